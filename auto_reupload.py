@@ -3,21 +3,21 @@
 # default included packages
 import os
 import re
+import sys
 import glob
 import json
-import base64
 import logging
 import schedule
 import argparse
 
+# `--startup-profile` must be detected before anything else is imported, so that the imports below can be timed as well
+from modules.startup_profiler import StartupProfiler
+startup_profiler = StartupProfiler.from_argv(sys.argv)
+startup_profiler.start()
+
 from pprint import pformat
 from datetime import datetime
 
-# These packages need to be installed
-import requests
-from dotenv import load_dotenv
-from pymediainfo import MediaInfo
-
 # Rich is used for printing text & interacting with user input
 from rich import box
 from rich.table import Table
@@ -28,6 +28,8 @@ from rich.traceback import install
 # Method that will search for dupes in trackers.
 # This is used to take screenshots and eventually upload them to either imgbox, imgbb, ptpimg or freeimage
 from utilities.utils_screenshots import take_upload_screens
+# Cached mediainfo for the media files
+from utilities.utils_mediainfo import MediaProbe
 from utilities.utils_dupes import search_for_dupes_api
 # Method that will search for dupes in trackers.
 import utilities.utils_miscellaneous as miscellaneous_utilities
@@ -36,14 +38,26 @@ import utilities.utils_reupload as reupload_utilities
 import utilities.utils_metadata as metadata_utilities
 import utilities.utils_torrent as torrent_utilities
 import utilities.utils_basic as basic_utilities
+import utilities.utils_http as http_utilities
 import utilities.utils as utils
 
 # processing modules
 from modules.cache import CacheFactory, CacheVendor
 from modules.torrent_client import Clients, TorrentClientFactory
+# All the configuration needed at startup (reupload.config.env, tracker acronyms, api keys)
+from modules.config_snapshot import ConfigSnapshot
+# Validated site templates, loaded once and reloaded only when modified
+from modules.site_template_registry import SiteTemplateRegistry
+# Request body of the uploads, the files are streamed from the disk while the upload is being sent
+from modules.streaming_body import StreamingRequestBody
+# Per tracker rate limits, configured in the `rate_limit` section of the site templates
+import modules.rate_limiter as rate_limiting
+# Description of the torrents, rendered once per torrent and varied per tracker in memory
+from modules.description_renderer import DescriptionRenderer
 
 # Used for rich.traceback
-install()
+with startup_profiler.phase("rich traceback"):
+    install()
 
 # For more control over rich terminal content, import and construct a Console object.
 console = Console()
@@ -60,17 +74,23 @@ torrent_info = {}
 # Logger running in "w" : write mode
 logging.basicConfig(filename='{}/reupload_script.log'.format(working_folder), filemode="w", level=logging.INFO, format='%(asctime)s | %(name)s | %(levelname)s | %(message)s')
 
-# Load the .env file that stores info like the tracker/image host API Keys & other info needed to upload
-load_dotenv(f'{working_folder}/reupload.config.env')
+with startup_profiler.phase("configuration snapshot"):
+    # Load the .env file that stores info like the tracker/image host API Keys & other info needed to upload
+    # along with the tracker acronyms and the api keys
+    config_snapshot = ConfigSnapshot.load(working_folder, f'{working_folder}/samples/reuploader/reupload.config.env', f'{working_folder}/reupload.config.env')
+
+    # Getting the keys present in the config.env.sample
+    # These keys are then used to compare with the env variable keys provided during runtime.
+    # Presently we just displays any missing keys, TODO in the future do something more useful with this information
+    utils.validate_env_file(config_snapshot.sample_env_file, config_snapshot.sample_env_keys)
 
-# Getting the keys present in the config.env.sample
-# These keys are then used to compare with the env variable keys provided during runtime.
-# Presently we just displays any missing keys, TODO in the future do something more useful with this information
-utils.validate_env_file(f'{working_folder}/samples/reuploader/reupload.config.env')
+    # Used to correctly select json file
+    # the value in this dictionay must correspond to the file name of the site template
+    acronym_to_tracker = config_snapshot.acronym_to_tracker
 
-# Used to correctly select json file
-# the value in this dictionay must correspond to the file name of the site template
-acronym_to_tracker = json.load(open(f'{working_folder}/parameters/tracker/acronyms.json'))
+with startup_profiler.phase("site templates"):
+    # Every site template is read and validated once, the reupload job looks them up from the registry
+    site_templates = SiteTemplateRegistry.load(working_folder, acronym_to_tracker)
 
 auto_mode = 'true'
 
@@ -98,7 +118,12 @@ internal_args.add_argument('-doubleup', action='store_true', help="(Internal) Gi
 internal_args.add_argument('-tripleup', action='store_true', help="(Internal) Give a new upload 'triple up' status [XBTIT Exclusive]")
 internal_args.add_argument('-sticky', action='store_true', help="(Internal) Pin the new upload")
 
-args = parser.parse_args()
+# args for troubleshooting
+troubleshooting_args = parser.add_argument_group('Troubleshooting Arguments')
+troubleshooting_args.add_argument('--startup-profile', action='store_true', help="Report the time taken by the imports and the initialisation of the reuploader")
+
+with startup_profiler.phase("argument parsing"):
+    args = parser.parse_args()
 
 # ---------------------------------------------------------------------------------#
 #  **START** This is the first code that executes when we run the script **START** #
@@ -113,7 +138,8 @@ if args.debug:
     logging.debug(f"Arguments provided by user for reupload: {args}")
 
 # the `prepare_tracker_api_keys_dict` prepares the api_keys_dict and also does mandatory property validations
-api_keys_dict = utils.prepare_and_validate_tracker_api_keys_dict('./parameters/tracker/api_keys.json')
+with startup_profiler.phase("tracker api keys"):
+    api_keys_dict = utils.prepare_and_validate_tracker_api_keys_dict(config_snapshot.api_keys_file, config_snapshot.api_keys)
 
 # getting the list of trackers that the user wants to upload to.
 # If there are any configuration errors for a particular tracker, then they'll not be used
@@ -128,12 +154,13 @@ console.rule("Establishing Connections", style='red', align='center')
 console.line(count=1)
 
 logging.info("[Main] Going to establish connection to the torrent client configured")
-# getting an instance of the torrent client factory
-torrent_client_factory = TorrentClientFactory()
-# creating the torrent client using the factory based on the users configuration
-torrent_client = torrent_client_factory.create(Clients[os.getenv('client')])
-# checking whether the torrent client connection has been created successfully or not
-torrent_client.hello()
+with startup_profiler.phase("torrent client"):
+    # getting an instance of the torrent client factory
+    torrent_client_factory = TorrentClientFactory()
+    # creating the torrent client using the factory based on the users configuration
+    torrent_client = torrent_client_factory.create(Clients[os.getenv('client')])
+    # checking whether the torrent client connection has been created successfully or not
+    torrent_client.hello()
 logging.info(f"[Main] Successfully established connection to the torrent client {os.getenv('client')}")
 
 
@@ -141,13 +168,21 @@ logging.info("[Main] Going to establish connection to the cache server configure
 # creating an instance of cache based on the users configuration
 # TODO if user hasn't provided any configuration then we need to use some other means to keep track
 # of these metadata
-# getting an instance of the torrent client factory
-cache_client_factory = CacheFactory()
-# creating the torrent client using the factory based on the users configuration
-cache = cache_client_factory.create(CacheVendor[os.getenv('cache_type')])
-# checking whether the cache connection has been created successfully or not
-cache.hello()
+with startup_profiler.phase("cache"):
+    # getting an instance of the torrent client factory
+    cache_client_factory = CacheFactory()
+    # creating the torrent client using the factory based on the users configuration
+    cache = cache_client_factory.create(CacheVendor[os.getenv('cache_type')])
+    # checking whether the cache connection has been created successfully or not
+    cache.hello()
 logging.info("[Main] Successfully established connection to the cache server configured")
+# TMDB / IMDB / TVMaze lookups are cached in the configured cache when `metadata_cache_backend=cache`
+metadata_utilities.metadata_configure_cache(cache)
+
+# the reuploader has been initialised
+startup_profiler.stop()
+if args.startup_profile:
+    startup_profiler.report(console)
 # now that we have verified that the client and cache connections have been created successfully
 # we can start the reupload job
 # At the end of this file xD
@@ -165,9 +200,8 @@ def check_for_dupes_in_tracker(tracker, temp_tracker_api_key):
         Returns True => Dupes are present in the tracker and cannot proceed with the upload
         Returns False => No dupes present in the tracker and upload can continue
     """
-    # Open the correct .json file since we now need things like announce URL, API Keys, and API info
-    with open(f"{working_folder}/site_templates/" + str(acronym_to_tracker.get(str(tracker).lower())) + ".json", "r", encoding="utf-8") as config_file:
-        config = json.load(config_file)
+    # Get the site template since we now need things like announce URL, API Keys, and API info
+    config = site_templates.get(tracker)
 
     # -------- format the torrent title --------
     torrent_info["torrent_title"] = translation_utilities.format_title(config, torrent_info)
@@ -183,7 +217,8 @@ def check_for_dupes_in_tracker(tracker, temp_tracker_api_key):
             tracker_api=temp_tracker_api_key,
             debug=args.debug,
             working_folder=working_folder,
-            auto_mode=auto_mode
+            auto_mode=auto_mode,
+            config=config
         )
     except Exception as e:
         logging.exception(f'[Main] Error occured while performing dupe check for tracker {tracker}. Error: {e}')
@@ -198,20 +233,21 @@ def upload_to_site(upload_to, tracker_api_key, config, tracker_settings):
     logging.info("[TrackerUpload] Attempting to upload to: {}".format(upload_to))
     url = str(config["upload_form"]).format(api_key=tracker_api_key)
     url_masked = str(config["upload_form"]).format(api_key="REDACTED")
-    payload = {}
-    files = []
+    payload_type = config["technical_jargons"]["payload_type"]
+    # the body is built lazily. The files are read (and encoded) in chunks only while the request is being sent
+    body = StreamingRequestBody(payload_type="JSON" if payload_type == "JSON" else "MULTI-PART")
     display_files = {}
 
     logging.debug("::::::::::::::::::::::::::::: Tracker settings that will be used for creating payload :::::::::::::::::::::::::::::")
     logging.debug(f'\n{pformat(tracker_settings)}')
 
     # multiple authentication modes
-    headers = None
+    headers = {}
     if config["technical_jargons"]["authentication_mode"] == "API_KEY":
-        pass  # headers = None
+        pass  # no authentication headers
     elif config["technical_jargons"]["authentication_mode"] == "API_KEY_PAYLOAD":
         # api key needs to be added in payload. the key in payload for api key can be obtained from `auth_payload_key`
-        payload[config["technical_jargons"]["auth_payload_key"]] = tracker_api_key
+        body.add_field(config["technical_jargons"]["auth_payload_key"], tracker_api_key)
     elif config["technical_jargons"]["authentication_mode"] == "BEARER":
         headers = {'Authorization': f'Bearer {tracker_api_key}'}
         logging.info(f"[TrackerUpload] Using Bearer Token authentication method for tracker {upload_to}")
@@ -227,13 +263,16 @@ def upload_to_site(upload_to, tracker_api_key, config, tracker_settings):
 
     for key, val in tracker_settings.items():
         # First check to see if its a required or optional key
-        req_opt = 'Required' if key in config["Required"] else 'Optional' if key in config["Optional"] else "Default"
+        req_opt = config.requirement_of(key) or "Default"
 
         # Now that we know if we are looking for a required or optional key we can try to add it into the payload
         if str(config[req_opt][key]) == "file":
             if os.path.isfile(tracker_settings[key]):
-                post_file = f'{key}', open(tracker_settings[key], 'rb')
-                files.append(post_file)
+                try:
+                    body.add_file(key, tracker_settings[key])
+                except ValueError as e:
+                    logging.critical(f"[TrackerUpload] {e}")
+                    continue
                 display_files[key] = tracker_settings[key]
             else:
                 logging.critical(f"[TrackerUpload] The file/path `{tracker_settings[key]}` for key {req_opt} does not exist!")
@@ -242,8 +281,13 @@ def upload_to_site(upload_to, tracker_api_key, config, tracker_settings):
             if os.path.isfile(tracker_settings[key]):
                 with open(tracker_settings[key], "r") as images_data:
                     for line in images_data.readlines():
-                        post_file = f'{key}[]', open(line.strip(), 'rb')
-                        files.append(post_file)
+                        if len(line.strip()) == 0:
+                            continue
+                        try:
+                            body.add_file(f'{key}[]', line.strip())
+                        except ValueError as e:
+                            logging.critical(f"[TrackerUpload] {e}")
+                            continue
                         display_files[key] = tracker_settings[key]
             else:
                 logging.critical(f"[TrackerUpload] The file/path `{tracker_settings[key]}` for key {req_opt} does not exist!")
@@ -258,7 +302,7 @@ def upload_to_site(upload_to, tracker_api_key, config, tracker_settings):
                     screenshot_array = []
                     for line in file_contents.readlines():
                         screenshot_array.append(line.strip())
-                    payload[f'{key}[]' if config["technical_jargons"]["payload_type"] == "MULTI-PART" else key] = screenshot_array
+                    body.add_field(f'{key}[]' if payload_type == "MULTI-PART" else key, screenshot_array)
                     logging.debug(f"[TrackerUpload] String array data for key {key} :: {screenshot_array}")
             else:
                 logging.critical(f"[TrackerUpload] The file/path `{tracker_settings[key]}` for key '{req_opt}' does not exist!")
@@ -272,40 +316,36 @@ def upload_to_site(upload_to, tracker_api_key, config, tracker_settings):
             for line in tracker_settings[key].split("\n"):
                 if len(line.strip()) > 0:
                     screenshot_array.append(line.strip())
-            payload[f'{key}[]' if config["technical_jargons"]["payload_type"] == "MULTI-PART" else key] = screenshot_array
+            body.add_field(f'{key}[]' if payload_type == "MULTI-PART" else key, screenshot_array)
             logging.debug(f"[TrackerUpload] String array data for key '{key}' :: {screenshot_array}")
 
         elif str(config[req_opt][key]) == "file|base64":
-            # file encoded as base64 string
+            # file encoded as base64 string. the file is encoded in chunks while the request is being sent
             if os.path.isfile(tracker_settings[key]):
                 logging.debug(f"[TrackerUpload] Setting file|base64 for key {key}")
-                with open(tracker_settings[key], 'rb') as binary_file:
-                    binary_file_data = binary_file.read()
-                    base64_encoded_data = base64.b64encode(binary_file_data)
-                    base64_message = base64_encoded_data.decode('utf-8')
-                    payload[key] = base64_message
+                body.add_base64_file(key, tracker_settings[key])
             else:
                 logging.critical(f"[TrackerUpload] The file/path `{tracker_settings[key]}` for key {req_opt} does not exist!")
                 continue
         else:
             # if str(val).endswith(".nfo") or str(val).endswith(".txt"):
+            if req_opt == "Optional":
+                logging.info(f"[TrackerUpload] Optional key {key} will be added to payload")
             if str(val).endswith(".txt"):
                 if not os.path.exists(val):
                     create_file = open(val, "w+")
                     create_file.close()
-                with open(val, 'r') as txt_file:
-                    val = txt_file.read()
-            if req_opt == "Optional":
-                logging.info(f"[TrackerUpload] Optional key {key} will be added to payload")
-            payload[key] = val
+                # the contents of the text file (eg: description) are sent as the value of the key
+                body.add_text_file(key, val)
+            else:
+                body.add_field(key, val)
 
-    logging.fatal(f"[TrackerUpload] URL: {url_masked} \n Data: {payload} \n Files: {files}")
+    logging.fatal(f"[TrackerUpload] URL: {url_masked} \n Data: {body.preview()} \n Files: {display_files}")
 
-    response = None
-    if config["technical_jargons"]["payload_type"] == "JSON":
-        response = requests.request("POST", url, json=payload, files=files, headers=headers)
-    else:
-        response = requests.request("POST", url, data=payload, files=files, headers=headers)
+    headers["Content-Type"] = body.content_type
+    # the uploads and the dupe searches made to the tracker share the same rate limits
+    rate_limiter = rate_limiting.get_rate_limiter(config.template_name, config.rate_limit)
+    response = http_utilities.post(url, host_class="tracker", data=body, headers=headers, rate_limiter=rate_limiter)
 
     logging.info(f"[TrackerUpload] POST Request: {url}")
     logging.info(f"[TrackerUpload] Response code: {response.status_code}")
@@ -540,10 +580,13 @@ def identify_type_and_basic_info(full_path, guess_it_result):
         if identify_me not in keys_we_need_but_missing_torrent_info:
             keys_we_need_but_missing_torrent_info.append(identify_me)
 
-    # parsing mediainfo, this will be reused for further processing.
+    # probing the media, mediainfo and ffprobe results are reused for all further processing.
     # only when the required data is mediainfo, this will be computed again, but as `text` format to write to file.
     parse_me = torrent_info["raw_video_file"] if "raw_video_file" in torrent_info else torrent_info["upload_media"]
-    media_info_result = basic_utilities.basic_get_mediainfo(parse_me)
+    media_probe = MediaProbe(parse_me)
+    media_probe.prefetch(ffprobe="audio_channels" in keys_we_need_but_missing_torrent_info)
+    media_info_result = media_probe.mediainfo
+    torrent_info["duration"] = media_probe.duration
 
     # if args.disc: TODO uncomment this for full disk auto uploads
     #     # for full disk uploads the bdinfo summary itself will be set as the `mediainfo_summary`
@@ -566,7 +609,7 @@ def identify_type_and_basic_info(full_path, guess_it_result):
     #  Now we'll try to use regex, mediainfo, ffprobe etc to try and auto get that required info
     for missing_val in keys_we_need_but_missing_torrent_info:
         # Save the analyze_video_file() return result into the 'torrent_info' dict
-        torrent_info[missing_val] = analyze_video_file(missing_value=missing_val, media_info=media_info_result)
+        torrent_info[missing_val] = analyze_video_file(missing_value=missing_val, media_probe=media_probe)
 
     logging.debug("::::::::::::::::::::::::::::: Torrent Information collected so far :::::::::::::::::::::::::::::")
     logging.debug(f"\n{pformat(torrent_info)}")
@@ -612,23 +655,19 @@ def identify_type_and_basic_info(full_path, guess_it_result):
 # -------------- END of identify_type_and_basic_info --------------
 
 
-def analyze_video_file(missing_value, media_info):
+def analyze_video_file(missing_value, media_probe):
     """
-        This method is being called in loop with mediainfo calculation all taking place multiple times.
-        Optimize this code for better performance
+        This method is being called in loop for every missing value.
+        All the mediainfo and ffprobe data is read from the `media_probe`, hence the media file is probed only once.
     """
     logging.debug(f"Trying to identify the {missing_value}...")
 
     # ffprobe/mediainfo need to access to video file not folder, set that here using the 'parse_me' variable
     parse_me = torrent_info["raw_video_file"] if "raw_video_file" in torrent_info else torrent_info["upload_media"]
 
-    # In pretty much all cases "media_info.tracks[1]" is going to be the video track and media_info.tracks[2] will be the primary audio track
-    media_info_video_track = media_info.tracks[1]
-    # I've encountered a media file without an audio track one time... this try/exception should handle any future situations like that
-    try:
-        media_info_audio_track = media_info.tracks[2]
-    except IndexError:
-        media_info_audio_track = None
+    media_info_video_track = media_probe.video_track
+    # I've encountered a media file without an audio track one time... the audio track will be None for such files
+    media_info_audio_track = media_probe.audio_track
 
     # ------------ Save mediainfo to txt ------------ #
     if missing_value == "mediainfo":
@@ -652,7 +691,7 @@ def analyze_video_file(missing_value, media_info):
     # ---------------- Audio Channels ---------------- #
     if missing_value == "audio_channels":
         # return basic_utilities.basic_get_missing_audio_channels(torrent_info, args.disc, auto_mode, parse_me, media_info_audio_track, missing_value)
-        return basic_utilities.basic_get_missing_audio_channels(torrent_info, False, auto_mode, parse_me, media_info_audio_track, missing_value)
+        return basic_utilities.basic_get_missing_audio_channels(torrent_info, False, auto_mode, parse_me, media_info_audio_track, missing_value, media_probe=media_probe)
 
     # ---------------- Audio Codec ---------------- #
     if missing_value == "audio_codec":
@@ -664,7 +703,8 @@ def analyze_video_file(missing_value, media_info):
             audio_codec_file_path=f'{working_folder}/parameters/audio_codecs.json',
             media_info_audio_track=media_info_audio_track,
             parse_me=parse_me,
-            missing_value=missing_value
+            missing_value=missing_value,
+            media_probe=media_probe
         )
 
         if atmos is not None:
@@ -797,6 +837,8 @@ def reupload_job():
         return
 
     logging.info(f'[Main] There are a total of {len(torrents)} completed torrents that needs to be re-uploaded')
+    # picking up the changes made to the site templates since the previous job
+    site_templates.refresh()
 
     for torrent in torrents:
         # for each completed torrents we start the processing
@@ -919,8 +961,7 @@ def reupload_job():
                 continue
 
         # -------- Take / Upload Screenshots --------
-        media_info_duration = MediaInfo.parse(torrent_info["raw_video_file"] if "raw_video_file" in torrent_info else torrent_info["upload_media"]).tracks[1]
-        torrent_info["duration"] = str(media_info_duration.duration).split(".", 1)[0]
+        # `duration` has already been identified from the media probe in `identify_type_and_basic_info`
 
         # This is used to evenly space out timestamps for screenshots
         # Call function to actually take screenshots & upload them (different file)
@@ -948,6 +989,7 @@ def reupload_job():
         # If the user has configured only one tracker, then dupe will not reach here.
         # single tracker dupe check is handled prior to screenshot generation
         is_non_dupes_present = False
+        description_renderer = DescriptionRenderer(torrent_info, uploader_signature=os.getenv("uploader_signature"))
         for tracker in upload_to_trackers_working:
 
             torrent_info["shameless_self_promotion"] = f'Uploaded with {"<3" if str(tracker).upper() in ("BHD", "BHDTV") or os.name == "nt" else "❤"} using GG-BOT Auto-ReUploader'
@@ -959,34 +1001,17 @@ def reupload_job():
             tracker_settings = {}
             tracker_settings.clear()
 
-            # Open the correct .json file since we now need things like announce URL, API Keys, and API info
-            with open("{}/site_templates/".format(working_folder) + str(acronym_to_tracker.get(str(tracker).lower())) + ".json", "r", encoding="utf-8") as config_file:
-                config = json.load(config_file)
+            # Get the site template since we now need things like announce URL, API Keys, and API info
+            config = site_templates.get(tracker)
 
             # -------- format the torrent title --------
             torrent_info["torrent_title"] = translation_utilities.format_title(config, torrent_info)
 
-            # (Theory) BHD has a different bbcode parser then BLU/ACM so the line break is different for each site
-            # this is why we set it in each sites *.json file then retrieve it here in this 'for loop' since its different for each site
-            bbcode_line_break = config['bbcode_line_break']
-
-            # -------- Add bbcode images to description.txt --------
-            utils.add_bbcode_images_to_description(
-                torrent_info=torrent_info,
-                config=config,
-                description_file_path=f'{working_folder}/temp_upload/{torrent_info["working_folder"]}description.txt',
-                bbcode_line_break=bbcode_line_break
-            )
-
-            # -------- Add custom uploader signature to description.txt --------
-            utils.write_uploader_signature_to_description(
-                description_file_path=f'{working_folder}/temp_upload/{torrent_info["working_folder"]}description.txt',
-                tracker=tracker,
-                bbcode_line_break=bbcode_line_break
-            )
-
-            # Add the finished file to the 'torrent_info' dict
-            torrent_info["description"] = f'{working_folder}/temp_upload/{torrent_info["working_folder"]}description.txt'
+            # -------- Render the description of the tracker --------
+            # the description is rendered in memory from the fragments shared by all the trackers of this torrent, and written to a file
+            # (shared by the trackers with the same description) only when the tracker accepts a description
+            if description_renderer.needs_file(config):
+                torrent_info["description"] = description_renderer.write(config, tracker, f'{working_folder}/temp_upload/{torrent_info["working_folder"]}')
 
             # -------- Check for Dupes Multiple Trackers --------
             # when the user has configured multiple trackers to upload to
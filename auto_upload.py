@@ -7,17 +7,19 @@ import sys
 import glob
 import time
 import json
-import base64
 import logging
 import argparse
 import shutil
-import bencoding
-from pprint import pformat
+import concurrent.futures
 
-# These packages need to be installed
+# `--startup-profile` must be detected before anything else is imported, so that the imports below can be timed as well
+from modules.startup_profiler import StartupProfiler
+startup_profiler = StartupProfiler.from_argv(sys.argv)
+startup_profiler.start()
+
+import bencoding
 import requests
-from dotenv import load_dotenv
-from pymediainfo import MediaInfo
+from pprint import pformat
 
 # Rich is used for printing text & interacting with user input
 from rich import box
@@ -30,21 +32,37 @@ from rich.prompt import Prompt, Confirm
 
 # utility methods
 # Method that will read and accept text components for torrent description
-# This is used to take screenshots and eventually upload them to either imgbox, imgbb, ptpimg or freeimage
 from utilities.utils_user_input import collect_custom_messages_from_user
-from utilities.utils_screenshots import take_upload_screens
-# Method that will search for dupes in trackers.
+# Cached mediainfo for the media files
+from utilities.utils_mediainfo import MediaProbe
+# The modules needed only by some of the stages (screenshots, dupe check and .torrent generation) are imported by those stages
 import utilities.utils_miscellaneous as miscellaneous_utilities
 import utilities.utils_translation as translation_utilities
 import utilities.utils_metadata as metadata_utilities
-import utilities.utils_torrent as torrent_utilities
 import utilities.utils_bdinfo as bdinfo_utilities
 import utilities.utils_basic as basic_utilities
-import utilities.utils_dupes as dupe_utilities
+import utilities.utils_http as http_utilities
 import utilities.utils as utils
 
+# Staged pipeline used to process the upload queue
+from modules.pipeline import Pipeline, Stage
+from modules.directory_index import DirectoryIndex
+# All the configuration needed at startup (config.env, tracker acronyms, api keys)
+from modules.config_snapshot import ConfigSnapshot
+# Validated site templates, loaded once and reloaded only when modified
+from modules.site_template_registry import SiteTemplateRegistry
+# Request body of the uploads, the files are streamed from the disk while the upload is being sent
+from modules.streaming_body import StreamingRequestBody
+# Durable record of the uploads, failed uploads are retried from it in the background
+from modules.upload_outbox import UploadOutbox, OutboxRetrier
+# Per tracker rate limits, configured in the `rate_limit` section of the site templates
+import modules.rate_limiter as rate_limiting
+# Description of the torrents, rendered once per item and varied per tracker in memory
+from modules.description_renderer import DescriptionRenderer
+
 # Used for rich.traceback
-install()
+with startup_profiler.phase("rich traceback"):
+    install()
 
 # For more control over rich terminal content, import and construct a Console object.
 console = Console()
@@ -53,32 +71,42 @@ console = Console()
 # This shows the full path to this files location
 working_folder = os.path.dirname(os.path.realpath(__file__))
 
-# This is an important dict that we use to store info about the media file as we discover it
-# Once all necessary info has been collected we will loop through this dict and set the correct tracker API Keys to it
-torrent_info = {}
-
 # Debug logs for the upload processing
 # Logger running in "w" : write mode
 logging.basicConfig(filename='{}/upload_script.log'.format(working_folder), filemode="w", level=logging.INFO, format='%(asctime)s | %(name)s | %(levelname)s | %(message)s')
 
-# Load the .env file that stores info like the tracker/image host API Keys & other info needed to upload
-load_dotenv(f'{working_folder}/config.env')
-# Getting the keys present in the config.env.sample
-# These keys are then used to compare with the env variable keys provided during runtime.
-# Presently we just displays any missing keys, in the future do something more useful with this information
-utils.validate_env_file(f'{working_folder}/samples/assistant/config.env')
-
-# Used to correctly select json file
-# the value in this dictionay must correspond to the file name of the site template
-acronym_to_tracker = json.load(open(f'{working_folder}/parameters/tracker/acronyms.json'))
-
-# the `prepare_tracker_api_keys_dict` prepares the api_keys_dict and also does mandatory property validations
-api_keys_dict = utils.prepare_and_validate_tracker_api_keys_dict(f'{working_folder}/parameters/tracker/api_keys.json')
-
-# Import 'auto_mode' status
-if str(os.getenv('auto_mode')).lower() not in ['true', 'false']:
-    logging.error('[Main] `auto_mode` is not set to `true/false` in `config.env`. Defaulting to `false`')
-auto_mode = str(os.getenv('auto_mode', 'false')).lower()
+with startup_profiler.phase("configuration snapshot"):
+    # Load the .env file that stores info like the tracker/image host API Keys & other info needed to upload
+    # along with the tracker acronyms and the api keys. When the script is run again in the same process, the snapshot is reused
+    config_snapshot = ConfigSnapshot.load(working_folder, f'{working_folder}/samples/assistant/config.env')
+    # Getting the keys present in the config.env.sample
+    # These keys are then used to compare with the env variable keys provided during runtime.
+    # Presently we just displays any missing keys, in the future do something more useful with this information
+    utils.validate_env_file(config_snapshot.sample_env_file, config_snapshot.sample_env_keys)
+
+    # Used to correctly select json file
+    # the value in this dictionay must correspond to the file name of the site template
+    acronym_to_tracker = config_snapshot.acronym_to_tracker
+
+    # the `prepare_tracker_api_keys_dict` prepares the api_keys_dict and also does mandatory property validations
+    api_keys_dict = utils.prepare_and_validate_tracker_api_keys_dict(config_snapshot.api_keys_file, config_snapshot.api_keys)
+
+    # Import 'auto_mode' status
+    auto_mode = config_snapshot.auto_mode
+
+with startup_profiler.phase("site templates"):
+    # Every site template is read and validated once, all the stages look them up from the registry
+    site_templates = SiteTemplateRegistry.load(working_folder, acronym_to_tracker)
+
+with startup_profiler.phase("upload outbox"):
+    # every prepared upload is recorded in the outbox, so that failed uploads can be retried and nothing is uploaded twice
+    upload_outbox = None
+    if str(os.getenv("upload_outbox", "true")).lower() == "true":
+        upload_outbox = UploadOutbox(
+            os.getenv("upload_outbox_path") or f'{working_folder}/temp_upload/upload_outbox.db',
+            max_attempts=int(os.getenv("upload_outbox_max_attempts") or 5),
+            backoff=float(os.getenv("upload_outbox_backoff") or 60)
+        )
 
 # Setup args
 parser = argparse.ArgumentParser()
@@ -124,13 +152,16 @@ internal_args.add_argument('-doubleup', action='store_true',help="(Internal) Giv
 internal_args.add_argument('-tripleup', action='store_true',help="(Internal) Give a new upload 'triple up' status [XBTIT Exclusive]")
 internal_args.add_argument('-sticky', action='store_true', help="(Internal) Pin the new upload")
 
-args = parser.parse_args()
+# args for troubleshooting
+troubleshooting_args = parser.add_argument_group('Troubleshooting Arguments')
+troubleshooting_args.add_argument('--startup-profile', action='store_true', help="Report the time taken by the imports and the initialisation of the upload assistant")
+
 DIR = os.getenv('DIR')
 
 # ---------------------------------------------------------------------- #
 #                          Dupe Check in Tracker                         #
 # ---------------------------------------------------------------------- #
-def check_for_dupes_in_tracker(tracker, temp_tracker_api_key):
+def check_for_dupes_in_tracker(tracker, temp_tracker_api_key, torrent_info):
     """
         Method to check for any duplicate torrents in the tracker.
         First we read the configuration for the tracker and format the title according to the tracker configuration
@@ -139,9 +170,8 @@ def check_for_dupes_in_tracker(tracker, temp_tracker_api_key):
         Returns True => Dupes are present in the tracker and cannot proceed with the upload
         Returns False => No dupes present in the tracker and upload can continue
     """
-    # Open the correct .json file since we now need things like announce URL, API Keys, and API info
-    with open(f"{working_folder}/site_templates/" + str(acronym_to_tracker.get(str(tracker).lower())) + ".json", "r", encoding="utf-8") as config_file:
-        config = json.load(config_file)
+    # Get the site template since we now need things like announce URL, API Keys, and API info
+    config = site_templates.get(tracker)
 
     # If the user provides this arg with the title right after in double quotes then we automatically use that
     # If the user does not manually provide the title (Most common) then we pull the renaming template from *.json & use all the info we gathered earlier to generate a title
@@ -149,6 +179,9 @@ def check_for_dupes_in_tracker(tracker, temp_tracker_api_key):
     torrent_info["torrent_title"] = str(args.title[0]) if args.title else translation_utilities.format_title(config, torrent_info)
 
 
+    # Method that will search for dupes in trackers. Imported here since it is not needed when the dupe check is disabled
+    import utilities.utils_dupes as dupe_utilities
+
     # Call the function that will search each site for dupes and return a similarity percentage, if it exceeds what the user sets in config.env we skip the upload
     try:
         return dupe_utilities.search_for_dupes_api(
@@ -160,7 +193,8 @@ def check_for_dupes_in_tracker(tracker, temp_tracker_api_key):
             tracker_api=temp_tracker_api_key,
             debug=args.debug,
             working_folder=working_folder,
-            auto_mode=os.getenv('auto_mode')
+            auto_mode=os.getenv('auto_mode'),
+            config=config
         )
     except Exception as e:
         logging.exception(f'[Main] Error occured while performing dupe check for tracker {tracker}. Error: {e}')
@@ -168,7 +202,33 @@ def check_for_dupes_in_tracker(tracker, temp_tracker_api_key):
         return True  # marking that dupes are present in the tracker
 
 
-def identify_type_and_basic_info(full_path, guess_it_result):
+def check_for_dupes_in_trackers(trackers, torrent_info):
+    """
+        Performs the dupe check for all the `trackers` at the same time.
+        Every tracker gets its own copy of `torrent_info`, since the torrent title is formatted differently for each tracker.
+
+        Returns the verdict for each tracker {tracker: True => dupes present, False => upload can continue}
+        When not in auto_mode, the user might need to be prompted. Hence the trackers are checked one after another.
+    """
+    def check_tracker(tracker):
+        start_time = time.perf_counter()
+        dupe_found = check_for_dupes_in_tracker(tracker, api_keys_dict[f"{str(tracker).lower()}_api_key"], dict(torrent_info))
+        logging.info(f"[Main] Dupe check for {tracker} completed in {time.perf_counter() - start_time:0.4f} seconds. Dupe found: {dupe_found}")
+        return dupe_found
+
+    if auto_mode == "false" or len(trackers) == 1:
+        return {tracker: check_tracker(tracker) for tracker in trackers}
+
+    verdicts = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(trackers)) as executor:
+        futures = {executor.submit(check_tracker, tracker): tracker for tracker in trackers}
+        for future in concurrent.futures.as_completed(futures):
+            verdicts[futures[future]] = future.result()
+    # keeping the verdicts in the same order as the trackers
+    return {tracker: verdicts[tracker] for tracker in trackers}
+
+
+def identify_type_and_basic_info(full_path, guess_it_result, torrent_info, database_ids):
     """
         guessit is typically pretty good at getting the title, year, resolution, group extracted
         but we need to do some more work for things like audio channels, codecs, etc
@@ -178,6 +238,8 @@ def identify_type_and_basic_info(full_path, guess_it_result):
             ffprobe to get that ourselves (pymediainfo has issues when dealing with atmos and more complex codecs)
 
         :param full_path: the full path for the file / folder
+        :param torrent_info: the dict holding all the information about the item being uploaded
+        :param database_ids: the tmdb, imdb and tvmaze ids to be used for this item. Ids found in mediainfo are updated here
 
         Returns `skip_to_next_file` if there are no video files in thhe provided folder
     """
@@ -333,11 +395,15 @@ def identify_type_and_basic_info(full_path, guess_it_result):
         if identify_me not in keys_we_need_but_missing_torrent_info:
             keys_we_need_but_missing_torrent_info.append(identify_me)
 
-    # parsing mediainfo, this will be reused for further processing.
+    # probing the media, mediainfo and ffprobe results are reused for all further processing.
     # only when the required data is mediainfo, this will be computed again, but as `text` format to write to file.
     parse_me = torrent_info["raw_video_file"] if "raw_video_file" in torrent_info else torrent_info["upload_media"]
     logging.debug(f'[Main] Torrent info just before MediaInfo generation. \n {pformat(torrent_info)}')
-    media_info_result = basic_utilities.basic_get_mediainfo(parse_me)
+    media_probe = MediaProbe(parse_me)
+    # audio channels are rarely present in the filename when guessit couldn't find them, so ffprobe will be needed. Run it along with mediainfo
+    media_probe.prefetch(ffprobe="audio_channels" in keys_we_need_but_missing_torrent_info)
+    media_info_result = media_probe.mediainfo
+    torrent_info["duration"] = media_probe.duration
 
     if args.disc:
         # for full disk uploads the bdinfo summary itself will be set as the `mediainfo_summary`
@@ -355,18 +421,18 @@ def identify_type_and_basic_info(full_path, guess_it_result):
         if tmdb != "0":
             # we will get movie/12345 or tv/12345 => we only need 12345 part.
             tmdb = tmdb[tmdb.find("/") + 1:] if tmdb.find("/") >= 0 else tmdb
-            args.tmdb = [tmdb]
-            logging.info(f"[Main] Obtained TMDB Id from mediainfo summary. Proceeding with {args.tmdb}")
+            database_ids["tmdb"] = [tmdb]
+            logging.info(f"[Main] Obtained TMDB Id from mediainfo summary. Proceeding with {database_ids['tmdb']}")
         if imdb != "0":
-            args.imdb = [imdb]
-            logging.info(f"[Main] Obtained IMDB Id from mediainfo summary. Proceeding with {args.imdb}")
+            database_ids["imdb"] = [imdb]
+            logging.info(f"[Main] Obtained IMDB Id from mediainfo summary. Proceeding with {database_ids['imdb']}")
 
     #  Now we'll try to use regex, mediainfo, ffprobe etc to try and auto get that required info
     skip = False
     for missing_val in keys_we_need_but_missing_torrent_info:
         # Save the analyze_video_file() return result into the 'torrent_info' dict
         torrent_info[missing_val] = analyze_video_file(
-            missing_value=missing_val, media_info=media_info_result)
+            missing_value=missing_val, media_probe=media_probe, torrent_info=torrent_info)
         if torrent_info[missing_val] == 'skip_to_next_file':
             skip = True
             continue
@@ -421,25 +487,20 @@ def identify_type_and_basic_info(full_path, guess_it_result):
     console.line(count=1)
 
 
-def analyze_video_file(missing_value, media_info):
+def analyze_video_file(missing_value, media_probe, torrent_info):
     """
-        This method is being called in loop with mediainfo calculation all taking place multiple times.
-        Optimize this code for better performance
+        This method is being called in loop for every missing value.
+        All the mediainfo and ffprobe data is read from the `media_probe`, hence the media file is probed only once.
     """
     logging.debug(f"Trying to identify the {missing_value}...")
 
     # ffprobe/mediainfo need to access to video file not folder, set that here using the 'parse_me' variable
     parse_me = torrent_info["raw_video_file"] if "raw_video_file" in torrent_info else torrent_info["upload_media"]
-    try:
-    # In pretty much all cases "media_info.tracks[1]" is going to be the video track and media_info.tracks[2] will be the primary audio track
-        media_info_video_track = media_info.tracks[1]
-    except:
+    media_info_video_track = media_probe.video_track
+    if media_info_video_track is None:
         return 'skip_to_next_file'
-    # I've encountered a media file without an audio track one time... this try/exception should handle any future situations like that
-    try:
-        media_info_audio_track = media_info.tracks[2]
-    except IndexError:
-        media_info_audio_track = None
+    # I've encountered a media file without an audio track one time... the audio track will be None for such files
+    media_info_audio_track = media_probe.audio_track
 
     # ------------ Save mediainfo to txt ------------ #
     if missing_value == "mediainfo":
@@ -461,14 +522,14 @@ def analyze_video_file(missing_value, media_info):
 
     # ---------------- Audio Channels ---------------- #
     if missing_value == "audio_channels":
-        return basic_utilities.basic_get_missing_audio_channels(torrent_info, args.disc, auto_mode, parse_me, media_info_audio_track, missing_value)
+        return basic_utilities.basic_get_missing_audio_channels(torrent_info, args.disc, auto_mode, parse_me, media_info_audio_track, missing_value, media_probe=media_probe)
 
     # ---------------- Audio Codec ---------------- #
     if missing_value == "audio_codec":
         missing_audio_codec = basic_utilities.basic_get_missing_audio_codec(torrent_info=torrent_info, is_disc=args.disc, auto_mode=auto_mode,
                                                                            audio_codec_file_path=f'{working_folder}/parameters/audio_codecs.json',
                                                                            media_info_audio_track=media_info_audio_track, parse_me=parse_me,
-                                                                           missing_value=missing_value)
+                                                                           missing_value=missing_value, media_probe=media_probe)
         if missing_audio_codec == 'skip_to_next_file':
             return 'skip_to_next_file'
         audio_codec, atmos = missing_audio_codec
@@ -495,7 +556,7 @@ def analyze_video_file(missing_value, media_info):
         return video_codec
 
 
-def identify_miscellaneous_details(guess_it_result):
+def identify_miscellaneous_details(guess_it_result, torrent_info):
     """
         This function is dedicated to analyzing the filename and extracting snippets such as "repack, "DV", "AMZN", etc
         Depending on what the "source" is we might need to search for a "web source" (amzn, nf, hulu, etc)
@@ -588,46 +649,28 @@ def identify_miscellaneous_details(guess_it_result):
 # ---------------------------------------------------------------------- #
 #                             Upload that shit!                          #
 # ---------------------------------------------------------------------- #
-def upload_to_site(upload_to, tracker_api_key):
+def upload_to_site(upload_to, tracker_api_key, config, tracker_settings, torrent_info):
     logging.info("[TrackerUpload] Attempting to upload to: {}".format(upload_to))
-    url = str(config["upload_form"]).format(api_key=tracker_api_key)
-    url_masked = str(config["upload_form"]).format(api_key="REDACTED")
-    payload = {}
-    files = []
+    payload_type = config["technical_jargons"]["payload_type"]
+    # the body is built lazily. The files are read (and encoded) in chunks only while the request is being sent
+    body = StreamingRequestBody(payload_type="JSON" if payload_type == "JSON" else "MULTI-PART")
     display_files = {}
 
     logging.debug("::::::::::::::::::::::::::::: Tracker settings that will be used for creating payload :::::::::::::::::::::::::::::")
     logging.debug(f'\n{pformat(tracker_settings)}')
 
-    # multiple authentication modes
-    headers = None
-    if config["technical_jargons"]["authentication_mode"] == "API_KEY":
-        pass  # headers = None
-    elif config["technical_jargons"]["authentication_mode"] == "API_KEY_PAYLOAD":
-        # api key needs to be added in payload. the key in payload for api key can be obtained from `auth_payload_key`
-        payload[config["technical_jargons"]["auth_payload_key"]] = tracker_api_key
-    elif config["technical_jargons"]["authentication_mode"] == "BEARER":
-        headers = {'Authorization': f'Bearer {tracker_api_key}'}
-        logging.info(f"[TrackerUpload] Using Bearer Token authentication method for tracker {upload_to}")
-    elif config["technical_jargons"]["authentication_mode"] == "HEADER":
-        if len(config["technical_jargons"]["header_key"]) > 0:
-            headers = {config["technical_jargons"]["header_key"]: tracker_api_key}
-            logging.info(f"[DupeCheck] Using Header based authentication method for tracker {upload_to}")
-        else:
-            logging.fatal(f'[DupeCheck] Header based authentication cannot be done without `header_key` for tracker {upload_to}.')
-    # TODO add support for cookie based authentication
-    elif config["technical_jargons"]["authentication_mode"] == "COOKIE":
-        logging.fatal('[TrackerUpload] Cookie based authentication is not supported as for now.')
-
     for key, val in tracker_settings.items():
         # First check to see if its a required or optional key
-        req_opt = 'Required' if key in config["Required"] else 'Optional' if key in config["Optional"] else "Default"
+        req_opt = config.requirement_of(key) or "Default"
 
         # Now that we know if we are looking for a required or optional key we can try to add it into the payload
         if str(config[req_opt][key]) == "file":
             if os.path.isfile(tracker_settings[key]):
-                post_file = f'{key}', open(tracker_settings[key], 'rb')
-                files.append(post_file)
+                try:
+                    body.add_file(key, tracker_settings[key])
+                except ValueError as e:
+                    logging.critical(f"[TrackerUpload] {e}")
+                    continue
                 display_files[key] = tracker_settings[key]
             else:
                 logging.critical(f"[TrackerUpload] The file/path `{tracker_settings[key]}` for key {req_opt} does not exist!")
@@ -636,8 +679,13 @@ def upload_to_site(upload_to, tracker_api_key):
             if os.path.isfile(tracker_settings[key]):
                 with open(tracker_settings[key], "r") as images_data:
                     for line in images_data.readlines():
-                        post_file = f'{key}[]', open(line.strip(), 'rb')
-                        files.append(post_file)
+                        if len(line.strip()) == 0:
+                            continue
+                        try:
+                            body.add_file(f'{key}[]', line.strip())
+                        except ValueError as e:
+                            logging.critical(f"[TrackerUpload] {e}")
+                            continue
                         display_files[key] = tracker_settings[key]
             else:
                 logging.critical(f"[TrackerUpload] The file/path `{tracker_settings[key]}` for key {req_opt} does not exist!")
@@ -652,7 +700,7 @@ def upload_to_site(upload_to, tracker_api_key):
                     screenshot_array = []
                     for line in file_contents.readlines():
                         screenshot_array.append(line.strip())
-                    payload[f'{key}[]' if config["technical_jargons"]["payload_type"] == "MULTI-PART" else key] = screenshot_array
+                    body.add_field(f'{key}[]' if payload_type == "MULTI-PART" else key, screenshot_array)
                     logging.debug(f"[TrackerUpload] String array data for key {key} :: {screenshot_array}")
             else:
                 logging.critical(f"[TrackerUpload] The file/path `{tracker_settings[key]}` for key '{req_opt}' does not exist!")
@@ -666,32 +714,29 @@ def upload_to_site(upload_to, tracker_api_key):
             for line in tracker_settings[key].split("\n"):
                 if len(line.strip()) > 0:
                     screenshot_array.append(line.strip())
-            payload[f'{key}[]' if config["technical_jargons"]["payload_type"] == "MULTI-PART" else key] = screenshot_array
+            body.add_field(f'{key}[]' if payload_type == "MULTI-PART" else key, screenshot_array)
             logging.debug(f"[TrackerUpload] String array data for key '{key}' :: {screenshot_array}")
 
         elif str(config[req_opt][key]) == "file|base64":
-            # file encoded as base64 string
+            # file encoded as base64 string. the file is encoded in chunks while the request is being sent
             if os.path.isfile(tracker_settings[key]):
                 logging.debug(f"[TrackerUpload] Setting file|base64 for key {key}")
-                with open(tracker_settings[key], 'rb') as binary_file:
-                    binary_file_data = binary_file.read()
-                    base64_encoded_data = base64.b64encode(binary_file_data)
-                    base64_message = base64_encoded_data.decode('utf-8')
-                    payload[key] = base64_message
+                body.add_base64_file(key, tracker_settings[key])
             else:
                 logging.critical(f"[TrackerUpload] The file/path `{tracker_settings[key]}` for key {req_opt} does not exist!")
                 continue
         else:
             # if str(val).endswith(".nfo") or str(val).endswith(".txt"):
+            if req_opt == "Optional":
+                logging.info(f"[TrackerUpload] Optional key {key} will be added to payload")
             if str(val).endswith(".txt"):
                 if not os.path.exists(val):
                     create_file = open(val, "w+")
                     create_file.close()
-                with open(val, 'r') as txt_file:
-                    val = txt_file.read()
-            if req_opt == "Optional":
-                logging.info(f"[TrackerUpload] Optional key {key} will be added to payload")
-            payload[key] = val
+                # the contents of the text file (eg: description) are sent as the value of the key
+                body.add_text_file(key, val)
+            else:
+                body.add_field(key, val)
 
     if auto_mode == "false":
         # prompt the user to verify everything looks OK before uploading
@@ -708,8 +753,10 @@ def upload_to_site(upload_to, tracker_api_key):
 
         review_upload_settings_text_table.add_column("Key", justify="left")
         review_upload_settings_text_table.add_column("Value (TEXT)", justify="left")
-        # Insert the data into the table, raw data (no paths)
-        for payload_k, payload_v in sorted(payload.items()):
+        # Insert the data into the table, raw data (text files are shown as paths)
+        for payload_k, payload_v in sorted(body.preview().items()):
+            if payload_k in display_files or (payload_k[:-2] if payload_k.endswith("[]") else payload_k) in display_files:
+                continue
             # Add torrent_info data to each row
             review_upload_settings_text_table.add_row(f"[deep_pink1]{payload_k}[/deep_pink1]", f"[dodger_blue1]{payload_v}[/dodger_blue1]")
         console.print(review_upload_settings_text_table, justify="center")
@@ -738,16 +785,73 @@ def upload_to_site(upload_to, tracker_api_key):
         continue_upload = Prompt.ask("Do you want to upload with these settings?", choices=["y", "n"])
         if continue_upload != "y":
             console.print(f"\nCanceling upload to [bright_red]{upload_to}[/bright_red]")
-            logging.error(f"[TrackerUpload] User chose to cancel the upload to {tracker}")
+            logging.error(f"[TrackerUpload] User chose to cancel the upload to {upload_to}")
             return False
 
-    logging.fatal(f"[TrackerUpload] URL: {url_masked} \n Data: {payload} \n Files: {files}")
+    # the prepared request is recorded in the outbox before it is sent, so that it can be retried without preparing it again
+    outbox_entry = None
+    infohash = torrent_info.get("infohash")
+    if upload_outbox is not None and infohash is not None:
+        outbox_entry = upload_outbox.record(infohash, upload_to, body.to_spec(), tracker_settings)
+        if outbox_entry is None:
+            entry = upload_outbox.get(infohash, upload_to)
+            console.print(f"\n[bold]Not uploading to [chartreuse1]{upload_to}[/chartreuse1] since it has already been {'uploaded' if entry['status'] == upload_outbox.UPLOADED else 'attempted by another upload'}[/bold]")
+            return entry["status"] == upload_outbox.UPLOADED
+
+    uploaded, error, retryable = send_upload_request(
+        upload_to=upload_to,
+        tracker_api_key=tracker_api_key,
+        config=config,
+        body=body,
+        torrent_id_path=f'{working_folder}/temp_upload/{torrent_info["working_folder"]}{upload_to}-torrent_id.txt'
+    )
+    if outbox_entry is not None and upload_outbox.complete(outbox_entry, uploaded, error, retryable) == upload_outbox.PENDING:
+        console.print(f"The upload to [bright_red]{upload_to}[/bright_red] will be retried later")
+    return uploaded
 
-    response = None
-    if config["technical_jargons"]["payload_type"] == "JSON":
-        response = requests.request("POST", url, json=payload, files=files, headers=headers)
-    else:
-        response = requests.request("POST", url, data=payload, files=files, headers=headers)
+
+def send_upload_request(upload_to, tracker_api_key, config, body, torrent_id_path=None):
+    """
+        Sends the upload request with the prepared `body` to the tracker.
+        The authentication (api key) is added here, so that it is never a part of the requests recorded in the upload outbox.
+
+        Returns (uploaded, error, retryable). A failed upload is `retryable` when the tracker couldn't be reached or responded with
+        a status indicating that it was temporarily unable to accept the upload (timeouts, 502, 503...)
+    """
+    url = str(config["upload_form"]).format(api_key=tracker_api_key)
+    url_masked = str(config["upload_form"]).format(api_key="REDACTED")
+
+    # multiple authentication modes
+    headers = {}
+    if config["technical_jargons"]["authentication_mode"] == "API_KEY":
+        pass  # no authentication headers
+    elif config["technical_jargons"]["authentication_mode"] == "API_KEY_PAYLOAD":
+        # api key needs to be added in payload. the key in payload for api key can be obtained from `auth_payload_key`
+        body.add_field(config["technical_jargons"]["auth_payload_key"], tracker_api_key)
+    elif config["technical_jargons"]["authentication_mode"] == "BEARER":
+        headers = {'Authorization': f'Bearer {tracker_api_key}'}
+        logging.info(f"[TrackerUpload] Using Bearer Token authentication method for tracker {upload_to}")
+    elif config["technical_jargons"]["authentication_mode"] == "HEADER":
+        if len(config["technical_jargons"]["header_key"]) > 0:
+            headers = {config["technical_jargons"]["header_key"]: tracker_api_key}
+            logging.info(f"[DupeCheck] Using Header based authentication method for tracker {upload_to}")
+        else:
+            logging.fatal(f'[DupeCheck] Header based authentication cannot be done without `header_key` for tracker {upload_to}.')
+    # TODO add support for cookie based authentication
+    elif config["technical_jargons"]["authentication_mode"] == "COOKIE":
+        logging.fatal('[TrackerUpload] Cookie based authentication is not supported as for now.')
+
+    logging.fatal(f"[TrackerUpload] URL: {url_masked} \n Data: {body.preview()}")
+
+    headers["Content-Type"] = body.content_type
+    try:
+        # the uploads and the dupe searches made to the tracker share the same rate limits
+        rate_limiter = rate_limiting.get_rate_limiter(config.template_name, config.rate_limit)
+        response = http_utilities.post(url, host_class="tracker", data=body, headers=headers, rate_limiter=rate_limiter)
+    except requests.exceptions.RequestException as e:
+        console.print(f'Upload to {upload_to} failed. The tracker could not be reached', style='bold red')
+        logging.exception(f"[TrackerUpload] Failed to send the upload request to {upload_to}. Error: {e}")
+        return False, str(e), True
 
     logging.info(f"[TrackerUpload] POST Request: {url}")
     logging.info(f"[TrackerUpload] Response code: {response.status_code}")
@@ -755,13 +859,21 @@ def upload_to_site(upload_to, tracker_api_key):
     console.print(f'\nSite response: [blue]{response.text}[/blue]')
     logging.info(f'[TrackerUpload] {response.text}')
 
+    uploaded = evaluate_upload_response(upload_to, response, torrent_id_path)
+    if uploaded:
+        return True, None, False
+    return False, f"HTTP {response.status_code}: {response.text[:500]}", response.status_code in UploadOutbox.RETRYABLE_STATUS_CODES
+
+
+def evaluate_upload_response(upload_to, response, torrent_id_path=None):
+    """ Returns True when the `response` of the tracker indicates that the upload was successful """
     if response.status_code in (200, 201):
         logging.info(f"[TrackerUpload] Upload response for {upload_to}: {response.text.encode('utf8')}")
         if "success" in response.json():
             if str(response.json()["success"]).lower() == "true":
-                url_location = f'{working_folder}/temp_upload/{torrent_info["working_folder"]}torrent_id.txt'
-                with open(url_location, 'w+') as f:
-                    f.write(response.json()['data'].split('/')[-1].split('.')[0])
+                if torrent_id_path is not None:
+                    with open(torrent_id_path, 'w+') as f:
+                        f.write(response.json()['data'].split('/')[-1].split('.')[0])
                 logging.info(f"[TrackerUpload] Upload to {upload_to} was a success!")
                 console.line(count=2)
                 console.rule(f"\n :thumbsup: Successfully uploaded to {upload_to} :balloon: \n", style='bold green1', align='center')
@@ -807,7 +919,7 @@ def upload_to_site(upload_to, tracker_api_key):
     elif response.status_code == 404:
         console.print(f'[bold]HTTP response status code: [red]{response.status_code}[/red][/bold]')
         console.print('Upload failed', style='bold red')
-        logging.critical(f"[TrackerUpload] 404 was returned on that upload, this is a problem with the site ({tracker})")
+        logging.critical(f"[TrackerUpload] 404 was returned on that upload, this is a problem with the site ({upload_to})")
         logging.error("[TrackerUpload] Upload failed")
 
     elif response.status_code == 500:
@@ -822,9 +934,9 @@ def upload_to_site(upload_to, tracker_api_key):
         console.print('Upload failed.', style='bold red')
         try:
             logging.critical(
-                f'[TrackerUpload] 400 was returned on that upload, this is a problem with the site ({tracker}). Error: Error {response.json()["error"] if "error" in response.json() else response.json()}')
+                f'[TrackerUpload] 400 was returned on that upload, this is a problem with the site ({upload_to}). Error: Error {response.json()["error"] if "error" in response.json() else response.json()}')
         except Exception:
-            logging.critical(f'[TrackerUpload] 400 was returned on that upload, this is a problem with the site ({tracker}).')
+            logging.critical(f'[TrackerUpload] 400 was returned on that upload, this is a problem with the site ({upload_to}).')
         logging.error("[TrackerUpload] Upload failed")
 
     else:
@@ -834,174 +946,228 @@ def upload_to_site(upload_to, tracker_api_key):
     return False
 
 
-# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------#
-#  **START** This is the first code that executes when we run the script, we log that info and we start a timer so we can keep track of total script runtime **START** #
-# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------#
+def upload_to_tracker(tracker, torrent, torrent_info, dupe_found, description_renderer):
+    """
+        Performs the tracker specific tasks (description, .torrent generation, translation and the upload itself) for one tracker.
+        Works on its own copy of `torrent_info`, hence the trackers can be handled at the same time.
+        The description is rendered by the `description_renderer` shared by all the trackers of the item.
 
-script_start_time = time.perf_counter()
-starting_new_upload = f" {'-' * 24} Starting new upload {'-' * 24} "
-
-console.line(count=2)
-utils.display_banner("  Upload  Assistant  ")
-console.line(count=1)
-
-logging.info(starting_new_upload)
-
-if args.tripleup and args.doubleup:
-    logging.error("[Main] User tried to pass tripleup and doubleup together. Stopping torrent upload process")
-    console.print("You can not use the arg [deep_sky_blue1]-doubleup[/deep_sky_blue1] and [deep_sky_blue1]-tripleup[/deep_sky_blue1] together. Only one can be used at a time\n", style='bright_red')
-    console.print("Exiting...\n", style='bright_red bold')
-    sys.exit()
-
-if args.debug:
-    logging.getLogger().setLevel(logging.DEBUG)
-    logging.getLogger("torf").setLevel(logging.INFO)
-    logging.getLogger("rebulk.rules").setLevel(logging.INFO)
-    logging.getLogger("rebulk.rebulk").setLevel(logging.INFO)
-    logging.getLogger("rebulk.processors").setLevel(logging.INFO)
-    logging.getLogger("urllib3.connectionpool").setLevel(logging.INFO)
-    logging.debug(f"Arguments provided by user: {args}")
-
-"""
------------------------ Full Disk & BDInfo CLI Related Notes -----------------------
-There is no way to use the `bdinfo_script` to create a bdinfocli docker container implementation inside a
-docker container unless docker in docker support with the docker socket / docker socket proxy is implemented.
-
-The docker socket approach is not considered due to the security risks associated with it.
-Hence BDInfo usage inside container is prohibited by default.
-
-To allow users to do Full Disks upload with the containeized approach a special docker image is provide that has bdinfo already packed inside.
-This image has the env properties `IS_CONTAINERIZED` and `IS_FULL_DISK_SUPPORTED` set as `true`
-Also this container has an alias `bdinfocli` that can be used to invoke the bdinfo utility.
-
-If the above mentioned envs are true, we override the user configured `bdinfo_script` to the alias `bdinfocli`
-
-Similarly, from inside the normal full disk un-supported images, if user tries to upload a Full Disk,
-we stop upload process immediately with an error message.
-"""
-bdinfo_script = os.getenv('bdinfo_script')
-if os.getenv("IS_CONTAINERIZED") == "true" and os.getenv("IS_FULL_DISK_SUPPORTED") == "true":
-    logging.info("[Main] Full disk is supported inside this container. Setting overriding configured `bdinfo_script` to use alias `bdinfocli`")
-    bdinfo_script = "bdinfocli"
-
-if args.disc and os.getenv("IS_CONTAINERIZED") == "true" and not os.getenv("IS_FULL_DISK_SUPPORTED") == "true":
-    logging.fatal("[Main] User tried to upload Full Disk from an unsupported image!. Stopping upload process.")
-    console.print("\n[bold red on white] ---------------------------- :warning: Unsupported Operation :warning: ---------------------------- [/bold red on white]")
-    console.print("You're trying to upload a [bold red]Full Disk[/bold red] to trackers.",  highlight=False)
-    console.print("Full disk uploads are [bold red]NOT PERMITTED[/bold red] in this image.", highlight=False)
-    console.print("If you wish to upload Full disks please consider the following")
-    console.print("1. Run me on a bare metal or VM following the steps mentioned with bdinfo_script property in wiki")
-    console.print("2. Use a FAT variant of my image that supports Full Disk Uploads [Recommended]")
-    console.print("[bold red on white] ---------------------------- :warning: Unsupported Operation :warning: ---------------------------- [/bold red on white]")
-    sys.exit(console.print("\nQuiting upload process since Full Disk uploads are not allowed in this image.\n",style="bold red", highlight=False))
-
-torrent_client = utils.get_torrent_client_if_needed()
-
-# Set the value of args.path to a variable that we can overwrite with a path translation later (if needed)
-user_supplied_paths = args.path
-
-# Verify we support the tracker specified
-logging.debug(f"[Main] Trackers provided by user {args.trackers}")
-upload_to_trackers = utils.get_and_validate_configured_trackers(args.trackers, args.all_trackers, api_keys_dict, acronym_to_tracker.keys())
-
-# Show the user what sites we will upload to
-console.line(count=2)
-console.rule("Target Trackers", style='red', align='center')
-console.line(count=1)
-upload_to_trackers_overview = Table(box=box.SQUARE, show_header=True, header_style="bold cyan")
-
-for upload_to_tracker in ["Acronym", "Site", "URL", "Platform"]:
-    upload_to_trackers_overview.add_column(f"{upload_to_tracker}", justify='center', style='#38ACEC')
-
-for tracker in upload_to_trackers:
-    with open(f"{working_folder}/site_templates/{str(acronym_to_tracker.get(str(tracker).lower()))}.json", "r", encoding="utf-8") as config_file:
-        config = json.load(config_file)
-    # Add tracker data to each row & show the user an overview
-    upload_to_trackers_overview.add_row(tracker, config["name"], config["url"], config["platform"])
-
-console.print(upload_to_trackers_overview)
-
-# If not in 'auto_mode' then verify with the user that they want to continue with the upload
-if auto_mode == "false":
-    if not Confirm.ask("Continue upload to these sites?", default='y'):
-        logging.info("[Main] User canceled upload when asked to confirm sites to upload to")
-        sys.exit(console.print("\nOK, quitting now..\n", style="bold red", highlight=False))
-
-# The user has confirmed what sites to upload to at this point (or auto_mode is set to true)
-# Get media file details now, check to see if we are running in "batch mode"
-
-# TODO an issue with batch mode currently is that we have a lot of "assert" & sys.exit statements during the prep work we do for each upload,
-# if one of these "assert/quit" statements get triggered, then it will quit the entire script instead of just moving on to the next file in the list 'upload_queue'
-# ---------- Batch mode prep ---------- #
-if args.batch:
-    if len(args.path) > 1:
-        logging.critical("[Main] The arg '-batch' can not be run with multiple '-path' args")
-        logging.info("[Main] The arg '-batch' should be used to upload all the files in 1 folder that you specify with the '-path' arg")
-        console.print("You can not use the arg [deep_sky_blue1]-batch[/deep_sky_blue1] while supplying multiple [deep_sky_blue1]-path[/deep_sky_blue1] args\n", style='bright_red')
-        console.print("Exiting...\n", style='bright_red bold')
-        sys.exit()
-    elif not os.path.isdir(args.path[0]):
-        # Since args.path is required now, we don't need to check if len(args.path) == 0 since that's impossible
-        # instead we check to see if its a folder, if not then
-        logging.critical("[Main]  The arg '-batch' can not be run an a single video file")
-        logging.info("[Main]  The arg '-batch' should be used to upload all the files in 1 folder that you specify with the '-path' arg")
-        console.print("We can not [deep_sky_blue1]-batch[/deep_sky_blue1] upload a single video file, [deep_sky_blue1]-batch[/deep_sky_blue1] is supposed to be used on a "
-                      "single folder containing multiple files you want to individually upload\n", style='bright_red')
-        console.print("Exiting...\n", style='bright_red bold')
-        sys.exit()
+        Returns (upload status, tracker settings). The upload status is the value returned by `upload_to_site`, or the reason for
+        which the tracker was skipped ("dupe" / "error").
+    """
+    torrent_info = dict(torrent_info)
+    torrent_info["shameless_self_promotion"] = f'Uploaded with {"<3" if str(tracker).upper() in ("BHD", "BHDTV") or os.name == "nt" else "❤"} using GG-BOT Upload Assistant'
+
+    temp_tracker_api_key = api_keys_dict[f"{str(tracker).lower()}_api_key"]
+    logging.info(f"[Main] Trying to upload to: {tracker}")
+
+    # Create a new dictionary that we store the exact keys/vals that the site is expecting
+    tracker_settings = {}
+
+    # Get the site template since we now need things like announce URL, API Keys, and API info
+    config = site_templates.get(tracker)
+
+    # If the user provides this arg with the title right after in double quotes then we automatically use that
+    # If the user does not manually provide the title (Most common) then we pull the renaming template from *.json & use all the info we gathered earlier to generate a title
+    # -------- format the torrent title --------
+    torrent_info["torrent_title"] = str(args.title[0]) if args.title else translation_utilities.format_title(config, torrent_info)
+
+    # -------- Render the description of the tracker --------
+    # the description is rendered in memory from the fragments shared by all the trackers of this item, and written to a file
+    # (shared by the trackers with the same description) only when the tracker accepts a description
+    if description_renderer.needs_file(config):
+        torrent_info["description"] = description_renderer.write(config, tracker, f'{working_folder}/temp_upload/{torrent_info["working_folder"]}')
+
+    # -------- Skip trackers that failed the dupe check --------
+    # the dupe check for all the trackers has already been performed in the `dupes` stage
+    # If dupe was found & the script is auto_mode OR if the user responds with 'n' for the 'dupe found, continue?' prompt we skip this tracker
+    if dupe_found:
+        logging.info(f"[Main] Skipping upload to {tracker} since dupes were found on site")
+        return "dupe", tracker_settings
+
+    # -------- Generate .torrent file --------
+    console.print(f'\n[bold]Generating .torrent file for [chartreuse1]{tracker}[/chartreuse1][/bold]')
+    logging.debug(f'[Main] Torrent info just before dot torrent creation. \n {pformat(torrent_info)}')
+    # If the type is a movie, then we only include the `raw_video_file` for torrent file creation.
+    # If type is an episode, then we'll create torrent file for the the `upload_media` which could be an single episode or a season folder
+    if args.allow_multiple_files == False and torrent_info["type"] == "movie" and "raw_video_file" in torrent_info:
+        torrent_media = torrent_info["raw_video_file"]
+    else:
+        torrent_media = torrent_info["upload_media"]
+
+    # the media is hashed only once even when several trackers reach this point at the same time (see `generate_dot_torrent`)
+    import utilities.utils_torrent as torrent_utilities
+    generated = torrent_utilities.generate_dot_torrent(
+        media=torrent_media,
+        announce=list(os.getenv(f"{str(tracker).upper()}_ANNOUNCE_URL").split(" ")),
+        source=config["source"],
+        working_folder=working_folder,
+        hash_prefix=torrent_info["working_folder"],
+        use_mktorrent=args.use_mktorrent,
+        tracker=tracker,
+        torrent_title=torrent_info["torrent_title"],
+        torrent=torrent
+    )
+    if generated == 'skip_to_next_file':
+        return "error", tracker_settings
+    # the upload to the tracker is identified by the infohash of the .torrent created for it (see `upload_outbox`)
+    torrent_info["infohash"] = generated
+
+    # -------- Assign specific tracker keys --------
+    # This function takes the info we have the dict torrent_info and associates with the right key/values needed for us to use X trackers API
+    # if for some reason the upload cannot be performed to the specific tracker, the method returns "STOP"
+    if translation_utilities.choose_right_tracker_keys(config, tracker_settings, tracker, torrent_info, args, working_folder) == "STOP":
+        return "error", tracker_settings
+
+    logging.debug(f"::::::::::::::::::::::::::::: Final torrent_info for {tracker} with all data filled :::::::::::::::::::::::::::::")
+    logging.debug(f'\n{pformat(torrent_info)}')
+    # -------- Upload everything! --------
+    # 1.0 everything we do here isn't persistent, its specific to each site that you upload to
+    # 1.1 things like screenshots, TMDB/IMDB ID's can & are reused for each site you upload to
+    # 2.0 we take all the info we generated earlier (mediainfo, description, etc) and combine it with tracker specific info and upload it all now
+    upload_status = upload_to_site(
+        upload_to=tracker,
+        tracker_api_key=temp_tracker_api_key,
+        config=config,
+        tracker_settings=tracker_settings,
+        torrent_info=torrent_info
+    )
+    return upload_status, tracker_settings
 
 
-# all files we upload (even if its 1) get added to this list
-upload_queue = []
+def upload_to_all_trackers(trackers, torrent, torrent_info, dupe_check_verdicts):
+    """
+        Uploads `torrent` to all the `trackers` at the same time, at most `tracker_upload_workers` trackers at a time.
+        Uploading to N trackers takes about as long as the slowest tracker.
+
+        Returns the result of `upload_to_tracker` for each tracker {tracker: (upload status, tracker settings)}
+        When not in auto_mode, the user needs to review the upload. Hence the trackers are handled one after another.
+    """
+    description_renderer = DescriptionRenderer(torrent_info, uploader_signature=os.getenv("uploader_signature"))
+
+    def upload_tracker(tracker):
+        start_time = time.perf_counter()
+        result = upload_to_tracker(tracker, torrent, torrent_info, dupe_check_verdicts.get(tracker, False), description_renderer)
+        logging.info(f"[Main] Tracker specific tasks for {tracker} completed in {time.perf_counter() - start_time:0.4f} seconds. Status: {result[0]}")
+        return result
+
+    max_workers = min(len(trackers), max(1, int(os.getenv("tracker_upload_workers") or 4)))
+    if auto_mode == "false" or max_workers <= 1:
+        return {tracker: upload_tracker(tracker) for tracker in trackers}
+
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(upload_tracker, tracker): tracker for tracker in trackers}
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.result()
+    # keeping the results in the same order as the trackers
+    return {tracker: results[tracker] for tracker in trackers}
+
 
+def start_outbox_retrier():
+    """
+        Starts retrying the uploads that failed earlier (eg: tracker was down) in the background. Returns the retrier, to be stopped once done.
+        Returns None when the upload outbox is disabled, or when not in auto_mode (the user is not interrupted with retries).
+    """
+    if upload_outbox is None or auto_mode != "true":
+        return None
+    outbox_retrier = OutboxRetrier(
+        upload_outbox,
+        replay_outbox_entry,
+        trackers=[tracker for tracker in acronym_to_tracker if api_keys_dict.get(f"{tracker}_api_key")],
+        tracker_workers=os.getenv("upload_outbox_tracker_workers") or 1
+    )
+    outbox_retrier.start()
+    return outbox_retrier
+
+
+def replay_outbox_entry(entry):
+    """
+        Sends the upload recorded in the upload outbox `entry` again. Used by the `OutboxRetrier`.
+        Returns (uploaded, error, retryable), same as `send_upload_request`
+    """
+    tracker = entry["tracker"]
+    body = StreamingRequestBody.from_spec(entry["request"])
+    missing_files = [part["path"] for part in entry["request"]["parts"] if part["path"] is not None and not os.path.isfile(part["path"])]
+    if len(missing_files) > 0:
+        # the files might be being moved to the cache folder right now (see `_finalize_item`), hence this is retried
+        return False, f"The files {missing_files} needed for the upload no longer exist", True
+    return send_upload_request(
+        upload_to=tracker,
+        tracker_api_key=api_keys_dict[f"{str(tracker).lower()}_api_key"],
+        config=site_templates.get(tracker),
+        body=body
+    )
 
-if args.batch:
-    logging.info("running in batch mode")
-    logging.info(f"Uploading all the items in the folder: {args.path}")
-    # This should be OK to upload, we've caught all the obvious issues above ^^ so if this is able to run we should be alright
-    for arg_file in glob.glob(f'{args.path[0]}/*'):
-        # Since we are in batch mode, we upload every file/folder we find in the path the user specified
-        upload_queue.append(arg_file)  # append each item to the list 'upload_queue' now
-else:
-    logging.info("Running in regular '-path' mode, starting upload now")
-    # This means the ran the script normally and specified a direct path to some media (or multiple media items, in which case we append it like normal to the list 'upload_queue')
-    for arg_file in user_supplied_paths:
-        upload_queue.append(arg_file)
 
-logging.debug(f"[Main] Upload queue: {upload_queue}")
 def processDot(torrent):
+    """
+        Checks whether all the files of the .torrent are present in `DIR` with the expected sizes.
+        The check is done against the `DIR` index, hence no file system calls are made for files that are present.
+
+        Returns (True, path to the media) when all files are present. (False, name) otherwise
+    """
     try:
-        f = open(torrent, "rb")
-        raw_torrent = f.read()
-        f.close()
-        torrent_header = bencoding.decode(raw_torrent)
-        dot = {"name":torrent_header[b'info'][b'name'].decode("utf-8"), 'files': [torrent_header[b'info'][b'name'].decode("utf-8")]}
-        if b'files' in torrent_header[b'info']:
-            #print('tem files')
-            dot['files'] = []
-            for file in torrent_header[b'info'][b'files']:
-                #print(file)
-                dot['files'].append(dot['name']+'/'+file[b'path'][0].decode("utf-8"))    
-        for file in dot['files']:
-            if not os.path.isfile(DIR + file):
-                return False, dot['name']
-        return True, DIR + dot['name']
+        with open(torrent, "rb") as torrent_file:
+            raw_torrent = torrent_file.read()
+        # only `info.name`, `info.length` and `info.files` are needed here, the `pieces` blob is skipped without being decoded
+        torrent_info = bencoding.decode_torrent_info(raw_torrent, (b'name', b'length', b'files'))
+        name = torrent_info[b'name'].decode("utf-8")
+        if b'files' in torrent_info:
+            # multi file torrents can have files in nested folders. eg: Season.Pack/Extras/Featurette.mkv
+            files = [
+                (os.path.join(name, *[path_component.decode("utf-8") for path_component in file[b'path']]), file.get(b'length'))
+                for file in torrent_info[b'files']
+            ]
+        else:
+            files = [(name, torrent_info.get(b'length'))]
+
+        missing, size_mismatch = dir_index.check(files)
+        if len(missing) > 0 or len(size_mismatch) > 0:
+            logging.error(f"[Main] Rejecting {torrent}. Files missing in DIR: {missing}. Files with a different size: {size_mismatch}")
+            return False, name
+        return True, DIR + name
     except Exception as e:
         print(e)
         return False, ''
-        pass
 
-# Now for each file we've been supplied (batch more or just the user manually specifying multiple files) we create a loop here that uploads each of them until none are left
-upload_queue.sort()
-for torrent in upload_queue:
-    status , file = processDot(torrent)
+
+# ---------------------------------------------------------------------- #
+#                         Staged upload pipeline                         #
+# ---------------------------------------------------------------------- #
+# Each .torrent in the `upload_queue` moves through the stages below. Every stage has its own pool of workers, hence while one
+# item is waiting on ffmpeg or a tracker, the next items can already be parsed, probed or searched in TMDB.
+# All the information about an item is kept in its own `torrent_info` (item.state["torrent_info"]), nothing is shared between items.
+#
+# Once an item leaves the pipeline its .torrent is moved exactly once, based on the `outcome` set by the stages.
+#   missing  => missing/   (media referred by the .torrent is not present in DIR)
+#   error    => error/     (we couldn't identify / prepare the upload)
+#   dupe     => dupe/      (dupe found on every tracker)
+#   uploaded => lancados/  (we've attempted the upload to atleast one tracker)
+# Items without an outcome (eg: rar extraction failures) are left untouched, so that they can be picked up again.
+outcome_folders = {
+    "missing": "missing",
+    "error": "error",
+    "dupe": "dupe",
+    "uploaded": "lancados"
+}
+
+
+def _stage_parse(item):
+    """
+        CPU bound stage: reads the .torrent, prepares the temp_upload folder and performs guessit on the filename
+    """
+    # picking up the changes made to the site templates since the previous item
+    site_templates.refresh()
+
+    torrent = item.source
+    status, file = processDot(torrent)
     if not status:
-        shutil.move(torrent,f"missing/{torrent.split('/')[-1]}")
-        continue    
-    
-    
+        item.outcome = "missing"
+        return False
+
     # Remove all old temp_files & data from the previous upload
-    torrent_info.clear()
+    torrent_info = item.state["torrent_info"] = {}
     # the working_folder will container a hash value with succeeding /
     torrent_info["working_folder"] = utils.delete_leftover_files(working_folder, resume=args.resume, file=file)
 
@@ -1016,18 +1182,29 @@ for torrent in upload_queue:
     rar_file_validation_response = utils.check_for_dir_and_extract_rars(file)
     if not rar_file_validation_response[0]:
         # Skip this entire 'file upload' & move onto the next (if exists)
-        continue
+        return False
     torrent_info["upload_media"] = rar_file_validation_response[1]
     # Performing guessit on the rawfile name and reusing the result instead of calling guessit over and over again
-    guess_it_result = utils.perform_guessit_on_filename(torrent_info["upload_media"])
+    item.state["guess_it_result"] = utils.perform_guessit_on_filename(torrent_info["upload_media"])
+    # ids provided by the user. these can be overridden by the ids present in mediainfo of this item
+    item.state["database_ids"] = {"tmdb": args.tmdb, "imdb": args.imdb, "tvmaze": args.tvmaze}
+    return True
+
+
+def _stage_probe(item):
+    """
+        Blocking I/O stage: MediaInfo, ffprobe and bdinfo on the media
+    """
+    torrent_info = item.state["torrent_info"]
+    guess_it_result = item.state["guess_it_result"]
 
     # -------- Basic info --------
     # So now we can start collecting info about the file/folder that was supplied to us (Step 1)
-    if identify_type_and_basic_info(torrent_info["upload_media"], guess_it_result) == 'skip_to_next_file':
+    if identify_type_and_basic_info(torrent_info["upload_media"], guess_it_result, torrent_info, item.state["database_ids"]) == 'skip_to_next_file':
         # If there is an issue with the file & we can't upload we use this check to skip the current file & move on to the next (if exists)
         logging.debug(f"[Main] Skipping {torrent_info['upload_media']} because type and basic information cannot be identified.")
-        shutil.move(torrent,f"error/{torrent.split('/')[-1]}")
-        continue
+        item.outcome = "error"
+        return False
 
     # -------- add .nfo if exists --------
     if args.nfo:
@@ -1041,16 +1218,25 @@ for torrent in upload_queue:
 
     # -------- Fix/update values --------
     # set the correct video & audio codecs (Dolby Digital --> DDP, use x264 if encode vs remux etc)
-    skip = identify_miscellaneous_details(guess_it_result)
-    if skip == 'skip_to_next_file':
-        shutil.move(torrent,f"error/{torrent.split('/')[-1]}")
-        continue
+    if identify_miscellaneous_details(guess_it_result, torrent_info) == 'skip_to_next_file':
+        item.outcome = "error"
+        return False
+    return True
+
+
+def _stage_metadata(item):
+    """
+        Network stage: TMDB / IMDB / TVMaze / MAL lookups
+    """
+    torrent_info = item.state["torrent_info"]
+    database_ids = item.state["database_ids"]
+
     # tmdb, imdb and tvmaze in torrent_info will be filled by this method
-    metadata_utilities.fill_database_ids(torrent_info, args.tmdb, args.imdb, args.tvmaze, auto_mode)
+    metadata_utilities.fill_database_ids(torrent_info, database_ids["tmdb"], database_ids["imdb"], database_ids["tvmaze"], auto_mode)
     if not 'tmdb' in torrent_info:
         print('No results found on TMDB, try running this script again but manually supply the TMDB or IMDB ID')
-        shutil.move(torrent,f"error/{torrent.split('/')[-1]}")
-        continue
+        item.outcome = "error"
+        return False
     # -------- Use official info from TMDB --------
     title, year, tvdb, mal = metadata_utilities.metadata_compare_tmdb_data_local(torrent_info)
 
@@ -1085,34 +1271,53 @@ for torrent in upload_queue:
 
     # Fix some default naming styles
     translation_utilities.fix_default_naming_styles(torrent_info)
+    return True
 
-    # -------- Dupe check for single tracker uploads --------
-    # If user has provided only one Tracker to upload to, then we do dupe check prior to taking screenshots. [if dupe_check is enabled]
-    # If there are duplicates in the tracker, then we do not waste time taking and uploading screenshots.
-    if os.getenv('check_dupes') == 'true' and len(upload_to_trackers) == 1:
-        tracker = upload_to_trackers[0]
-        temp_tracker_api_key = api_keys_dict[f"{str(tracker).lower()}_api_key"]
-
-        console.line(count=2)
-        console.rule(f"Dupe Check [bold]({tracker})[/bold]", style='red', align='center')
-        logging.debug(f"[Main] Dumping torrent_info contents to log before dupe check: \n{pformat(torrent_info)}")
-        dupe_check_response = check_for_dupes_in_tracker(tracker, temp_tracker_api_key)
-        # If dupes are present and user decided to stop upload, for single tracker uploads we stop operation immediately
-        # True == dupe_found
-        # False == no_dupes/continue upload
-        if dupe_check_response:
+
+def _stage_dupes(item):
+    """
+        Network stage: dupe check against all the trackers at the same time [if dupe_check is enabled]
+        This is done prior to taking screenshots, so that we do not waste time taking and uploading screenshots when all the trackers have dupes.
+    """
+    torrent_info = item.state["torrent_info"]
+    if os.getenv('check_dupes') != 'true':
+        return True
+
+    console.line(count=2)
+    console.rule(f"Dupe Check [bold]({', '.join(upload_to_trackers)})[/bold]", style='red', align='center')
+    logging.debug(f"[Main] Dumping torrent_info contents to log before dupe check: \n{pformat(torrent_info)}")
+    dupe_check_start_time = time.perf_counter()
+    # True == dupe_found
+    # False == no_dupes/continue upload
+    dupe_check_verdicts = check_for_dupes_in_trackers(upload_to_trackers, torrent_info)
+    logging.info(f"[Main] Dupe check for all trackers completed in {time.perf_counter() - dupe_check_start_time:0.4f} seconds. Verdicts: {dupe_check_verdicts}")
+    item.state["dupe_check_verdicts"] = dupe_check_verdicts
+
+    for tracker, dupe_found in dupe_check_verdicts.items():
+        if dupe_found:
             logging.error(f"[Main] Could not upload to: {tracker} because we found a dupe on site")
-            if auto_mode == "true":
-                shutil.move(torrent,f"dupe/{torrent.split('/')[-1]}")
-                continue
-            else:
-                sys.exit(console.print("\nOK, quitting now..\n",style="bold red", highlight=False))
+
+    if all(dupe_check_verdicts.values()):
+        # If dupes are present and user decided to stop upload, for single tracker uploads we stop operation immediately
+        if auto_mode == "false" and len(upload_to_trackers) == 1:
+            sys.exit(console.print("\nOK, quitting now..\n",style="bold red", highlight=False))
+        item.outcome = "dupe"
+        return False
+    return True
+
+
+def _stage_screenshots(item):
+    """
+        Blocking I/O + network stage: ffmpeg screenshots and uploads to the image hosts
+    """
+    torrent_info = item.state["torrent_info"]
 
     # -------- Take / Upload Screenshots --------
-    media_info_duration = MediaInfo.parse(torrent_info["raw_video_file"] if "raw_video_file" in torrent_info else torrent_info["upload_media"]).tracks[1]
-    torrent_info["duration"] = str(media_info_duration.duration).split(".", 1)[0]
+    # `duration` has already been identified from the media probe during the probe stage
     # This is used to evenly space out timestamps for screenshots
     # Call function to actually take screenshots & upload them (different file)
+    # This is used to take screenshots and eventually upload them to either imgbox, imgbb, ptpimg or freeimage
+    from utilities.utils_screenshots import take_upload_screens
     take_upload_screens(
         duration=torrent_info["duration"],
         upload_media_import=torrent_info["raw_video_file"] if "raw_video_file" in torrent_info else torrent_info["upload_media"],
@@ -1122,129 +1327,38 @@ for torrent in upload_queue:
         skip_screenshots=args.skip_screenshots
     )
 
-    screenshots_data = json.load(open(f"{working_folder}/temp_upload/{torrent_info['working_folder']}screenshots/screenshots_data.json"))
+    with open(f"{working_folder}/temp_upload/{torrent_info['working_folder']}screenshots/screenshots_data.json") as screenshots_data_file:
+        screenshots_data = json.load(screenshots_data_file)
     torrent_info["bbcode_images"] = screenshots_data["bbcode_images"]
     torrent_info["bbcode_images_nothumb"] = screenshots_data["bbcode_images_nothumb"]
     torrent_info["bbcode_thumb_nothumb"] = screenshots_data["bbcode_thumb_nothumb"]
     torrent_info["url_images"] = screenshots_data["url_images"]
     torrent_info["data_images"] = screenshots_data["data_images"]
+    return True
 
-    # At this point the only stuff that remains to be done is site specific so we can start a loop here for each site we are uploading to
-    logging.info("[Main] Now starting tracker specific tasks")
-    for tracker in upload_to_trackers:
-        torrent_info["shameless_self_promotion"] = f'Uploaded with {"<3" if str(tracker).upper() in ("BHD", "BHDTV") or os.name == "nt" else "❤"} using GG-BOT Upload Assistant'
-
-        temp_tracker_api_key = api_keys_dict[f"{str(tracker).lower()}_api_key"]
-        logging.info(f"[Main] Trying to upload to: {tracker}")
-
-        # Create a new dictionary that we store the exact keys/vals that the site is expecting
-        tracker_settings = {}
-        tracker_settings.clear()
-
-        # Open the correct .json file since we now need things like announce URL, API Keys, and API info
-        with open("{}/site_templates/".format(working_folder) + str(acronym_to_tracker.get(str(tracker).lower())) + ".json", "r", encoding="utf-8") as config_file:
-            config = json.load(config_file)
-
-        # If the user provides this arg with the title right after in double quotes then we automatically use that
-        # If the user does not manually provide the title (Most common) then we pull the renaming template from *.json & use all the info we gathered earlier to generate a title
-        # -------- format the torrent title --------
-        torrent_info["torrent_title"] = str(args.title[0]) if args.title else translation_utilities.format_title(config, torrent_info)
-
-        # (Theory) BHD has a different bbcode parser then BLU/ACM so the line break is different for each site
-        # this is why we set it in each sites *.json file then retrieve it here in this 'for loop' since its different for each site
-        bbcode_line_break = config['bbcode_line_break']
-
-        # -------- Add custom descriptions to description.txt --------
-        utils.write_cutsom_user_inputs_to_description(
-            torrent_info=torrent_info,
-            description_file_path=f'{working_folder}/temp_upload/{torrent_info["working_folder"]}description.txt',
-            config=config,
-            tracker=tracker,
-            bbcode_line_break=bbcode_line_break,
-            debug=args.debug
-        )
-
-        # -------- Add bbcode images to description.txt --------
-        utils.add_bbcode_images_to_description(
-            torrent_info=torrent_info,
-            config=config,
-            description_file_path=f'{working_folder}/temp_upload/{torrent_info["working_folder"]}description.txt',
-            bbcode_line_break=bbcode_line_break
-        )
-
-        # -------- Add custom uploader signature to description.txt --------
-        utils.write_uploader_signature_to_description(
-            description_file_path=f'{working_folder}/temp_upload/{torrent_info["working_folder"]}description.txt',
-            tracker=tracker,
-            bbcode_line_break=bbcode_line_break
-        )
-
-        # Add the finished file to the 'torrent_info' dict
-        torrent_info["description"] = f'{working_folder}/temp_upload/{torrent_info["working_folder"]}description.txt'
-
-        # -------- Check for Dupes Multiple Trackers --------
-        # when the user has configured multiple trackers to upload to
-        # we take the screenshots and uploads them, then do dupe check for the trackers.
-        # dupe check need not be performed if user provided only one tracker.
-        # in cases where only one tracker is provided, dupe check will be performed prior to taking screenshots.
-        if os.getenv('check_dupes') == 'true' and len(upload_to_trackers) > 1:
-            console.line(count=2)
-            console.rule(f"Dupe Check [bold]({tracker})[/bold]", style='red', align='center')
-            logging.debug(f"[Main] Dumping torrent_info contents to log before dupe check: \n{pformat(torrent_info)}")
-            # Call the function that will search each site for dupes and return a similarity percentage, if it exceeds what the user sets in config.env we skip the upload
-            dupe_check_response = check_for_dupes_in_tracker(tracker, temp_tracker_api_key)
-            # True == dupe_found
-            # False == no_dupes/continue upload
-            if dupe_check_response:
-                logging.error(f"[Main] Could not upload to: {tracker} because we found a dupe on site")
-                # If dupe was found & the script is auto_mode OR if the user responds with 'n' for the 'dupe found, continue?' prompt
-                #  we will essentially stop the current 'for loops' iteration & jump back to the beginning to start next cycle (if exists else quits)
-                shutil.move(torrent,f"dupe/{torrent.split('/')[-1]}")
-                continue
 
-        # -------- Generate .torrent file --------
-        console.print(f'\n[bold]Generating .torrent file for [chartreuse1]{tracker}[/chartreuse1][/bold]')
-        logging.debug(f'[Main] Torrent info just before dot torrent creation. \n {pformat(torrent_info)}')
-        # If the type is a movie, then we only include the `raw_video_file` for torrent file creation.
-        # If type is an episode, then we'll create torrent file for the the `upload_media` which could be an single episode or a season folder
-        if args.allow_multiple_files == False and torrent_info["type"] == "movie" and "raw_video_file" in torrent_info:
-            torrent_media = torrent_info["raw_video_file"]
-        else:
-            torrent_media = torrent_info["upload_media"]
+def _stage_upload(item):
+    """
+        Network stage: tracker specific tasks (.torrent generation, translation and the upload itself)
+    """
+    torrent = item.source
+    torrent_info = item.state["torrent_info"]
 
-        generated = torrent_utilities.generate_dot_torrent(
-            media=torrent_media,
-            announce=list(os.getenv(f"{str(tracker).upper()}_ANNOUNCE_URL").split(" ")),
-            source=config["source"],
-            working_folder=working_folder,
-            hash_prefix=torrent_info["working_folder"],
-            use_mktorrent=args.use_mktorrent,
-            tracker=tracker,
-            torrent_title=torrent_info["torrent_title"],
-            torrent=torrent
-        )
-        if generated == 'skip_to_next_file':
-            shutil.move(torrent,f"error/{torrent.split('/')[-1]}")
-            continue
+    # At this point the only stuff that remains to be done is site specific, and it is done for all the trackers at the same time
+    logging.info("[Main] Now starting tracker specific tasks")
+    results = upload_to_all_trackers(upload_to_trackers, torrent, torrent_info, item.state.get("dupe_check_verdicts", {}))
 
-        # -------- Assign specific tracker keys --------
-        # This function takes the info we have the dict torrent_info and associates with the right key/values needed for us to use X trackers API
-        # if for some reason the upload cannot be performed to the specific tracker, the method returns "STOP"
-        if translation_utilities.choose_right_tracker_keys(config, tracker_settings, tracker, torrent_info, args, working_folder) == "STOP":
-            shutil.move(torrent,f"error/{torrent.split('/')[-1]}")
+    # reasons for which a tracker was skipped. If every tracker has been skipped, the first reason becomes the outcome of the item
+    skipped_trackers = {}
+    for tracker, (upload_status, tracker_settings) in results.items():
+        if upload_status in ("dupe", "error"):
+            skipped_trackers[tracker] = upload_status
             continue
-
-        logging.debug("::::::::::::::::::::::::::::: Final torrent_info with all data filled :::::::::::::::::::::::::::::")
-        logging.debug(f'\n{pformat(torrent_info)}')
-        # -------- Upload everything! --------
-        # 1.0 everything we do in this for loop isn't persistent, its specific to each site that you upload to
-        # 1.1 things like screenshots, TMDB/IMDB ID's can & are reused for each site you upload to
-        # 2.0 we take all the info we generated outside of this loop (mediainfo, description, etc) and combine it with tracker specific info and upload it all now
-        torrent_info[f"{tracker}_upload_status"] = upload_to_site(upload_to=tracker, tracker_api_key=temp_tracker_api_key)
+        torrent_info[f"{tracker}_upload_status"] = upload_status
 
         # Tracker Settings
         console.print("\n\n")
-        tracker_settings_table = Table(show_header=True, title='[bold][deep_pink1]Tracker Settings[/bold][/deep_pink1]', header_style="bold cyan")
+        tracker_settings_table = Table(show_header=True, title=f'[bold][deep_pink1]{tracker} Tracker Settings[/bold][/deep_pink1]', header_style="bold cyan")
         tracker_settings_table.add_column("Key", justify="left")
         tracker_settings_table.add_column("Value", justify="left")
 
@@ -1275,12 +1389,236 @@ for torrent in upload_queue:
     #    if torrent_info["post_processing_complete"] == True:
     #        break  # this flag is used for watch folder post processing. we need to move only once
     #    utils.perform_post_processing(torrent_info, torrent_client, working_folder, tracker, args.allow_multiple_files)
-    shutil.move(torrent,f"lancados/{torrent.split('/')[-1]}")
-    try:
+    if len(skipped_trackers) == len(upload_to_trackers) and len(skipped_trackers) > 0:
+        item.outcome = next(iter(skipped_trackers.values()))
+        logging.error(f"[Main] Upload skipped for all the trackers: {skipped_trackers}")
+        return False
+    item.outcome = "uploaded"
+    return True
+
+
+def _finalize_item(item):
+    """
+        Invoked exactly once per item by the pipeline. Moves the .torrent to the folder corresponding to the outcome of the item.
+    """
+    torrent = item.source
+    if item.outcome not in outcome_folders:
+        logging.info(f"[Main] No outcome decided for {torrent}. Leaving the .torrent in place")
+        return
+
+    if not os.path.isfile(torrent):
+        logging.error(f"[Main] Cannot move {torrent} to {outcome_folders[item.outcome]}/ since the file no longer exists")
+        return
+    shutil.move(torrent, f"{outcome_folders[item.outcome]}/{torrent.split('/')[-1]}")
+
+    if item.outcome == "uploaded":
+        torrent_info = item.state["torrent_info"]
         print(torrent_info["working_folder"])
-        shutil.move(f'{working_folder}/temp_upload/{torrent_info["working_folder"]}',f'{working_folder}/cache/{torrent_info["working_folder"]}')
-    except:
-        pass
+        temp_folder = f'{working_folder}/temp_upload/{torrent_info["working_folder"]}'
+        cache_folder = f'{working_folder}/cache/{torrent_info["working_folder"]}'
+        try:
+            if upload_outbox is not None:
+                # uploads waiting to be retried now need to pick the files from the cache folder.
+                # The folder is moved in the same transaction, hence the retrier never claims an upload whose files are being moved
+                upload_outbox.relocate(temp_folder, cache_folder, move=lambda: shutil.move(temp_folder, cache_folder))
+            else:
+                shutil.move(temp_folder, cache_folder)
+        except Exception as e:
+            logging.exception(f"[Main] Failed to move {temp_folder} to the cache folder. Error: {e}")
+
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------#
+#  **START** `main` is the entry point of the upload assistant, we log that info and we start a timer so we can keep track of total script runtime **START**           #
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------#
+def main(argv=None, retry_outbox=True):
+    """
+        Uploads the media of the .torrent files given in `argv` (the command line arguments, `sys.argv[1:]` when not provided).
+        Failed uploads recorded in the upload outbox are retried in the background during the run, unless `retry_outbox` is False.
+
+        The process level state (config.env, api keys, site templates and the upload outbox) is initialised once, when this module is imported.
+        Hence the batch runner imports this module once in every worker and calls `main` for each of the items it uploads.
+    """
+    # state of the current run, used by the stages
+    global args, bdinfo_script, torrent_client, upload_to_trackers, dir_index
+
+    with startup_profiler.phase("argument parsing"):
+        args = parser.parse_args(argv)
+
+    script_start_time = time.perf_counter()
+    starting_new_upload = f" {'-' * 24} Starting new upload {'-' * 24} "
+
+    console.line(count=2)
+    utils.display_banner("  Upload  Assistant  ")
+    console.line(count=1)
+
+    logging.info(starting_new_upload)
+
+    if args.tripleup and args.doubleup:
+        logging.error("[Main] User tried to pass tripleup and doubleup together. Stopping torrent upload process")
+        console.print("You can not use the arg [deep_sky_blue1]-doubleup[/deep_sky_blue1] and [deep_sky_blue1]-tripleup[/deep_sky_blue1] together. Only one can be used at a time\n", style='bright_red')
+        console.print("Exiting...\n", style='bright_red bold')
+        sys.exit()
+
+    if args.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+        logging.getLogger("torf").setLevel(logging.INFO)
+        logging.getLogger("rebulk.rules").setLevel(logging.INFO)
+        logging.getLogger("rebulk.rebulk").setLevel(logging.INFO)
+        logging.getLogger("rebulk.processors").setLevel(logging.INFO)
+        logging.getLogger("urllib3.connectionpool").setLevel(logging.INFO)
+        logging.debug(f"Arguments provided by user: {args}")
+
+    """
+    ----------------------- Full Disk & BDInfo CLI Related Notes -----------------------
+    There is no way to use the `bdinfo_script` to create a bdinfocli docker container implementation inside a
+    docker container unless docker in docker support with the docker socket / docker socket proxy is implemented.
+
+    The docker socket approach is not considered due to the security risks associated with it.
+    Hence BDInfo usage inside container is prohibited by default.
+
+    To allow users to do Full Disks upload with the containeized approach a special docker image is provide that has bdinfo already packed inside.
+    This image has the env properties `IS_CONTAINERIZED` and `IS_FULL_DISK_SUPPORTED` set as `true`
+    Also this container has an alias `bdinfocli` that can be used to invoke the bdinfo utility.
+
+    If the above mentioned envs are true, we override the user configured `bdinfo_script` to the alias `bdinfocli`
+
+    Similarly, from inside the normal full disk un-supported images, if user tries to upload a Full Disk,
+    we stop upload process immediately with an error message.
+    """
+    bdinfo_script = os.getenv('bdinfo_script')
+    if os.getenv("IS_CONTAINERIZED") == "true" and os.getenv("IS_FULL_DISK_SUPPORTED") == "true":
+        logging.info("[Main] Full disk is supported inside this container. Setting overriding configured `bdinfo_script` to use alias `bdinfocli`")
+        bdinfo_script = "bdinfocli"
+
+    if args.disc and os.getenv("IS_CONTAINERIZED") == "true" and not os.getenv("IS_FULL_DISK_SUPPORTED") == "true":
+        logging.fatal("[Main] User tried to upload Full Disk from an unsupported image!. Stopping upload process.")
+        console.print("\n[bold red on white] ---------------------------- :warning: Unsupported Operation :warning: ---------------------------- [/bold red on white]")
+        console.print("You're trying to upload a [bold red]Full Disk[/bold red] to trackers.",  highlight=False)
+        console.print("Full disk uploads are [bold red]NOT PERMITTED[/bold red] in this image.", highlight=False)
+        console.print("If you wish to upload Full disks please consider the following")
+        console.print("1. Run me on a bare metal or VM following the steps mentioned with bdinfo_script property in wiki")
+        console.print("2. Use a FAT variant of my image that supports Full Disk Uploads [Recommended]")
+        console.print("[bold red on white] ---------------------------- :warning: Unsupported Operation :warning: ---------------------------- [/bold red on white]")
+        sys.exit(console.print("\nQuiting upload process since Full Disk uploads are not allowed in this image.\n",style="bold red", highlight=False))
+
+    with startup_profiler.phase("torrent client"):
+        torrent_client = utils.get_torrent_client_if_needed()
+
+    # Set the value of args.path to a variable that we can overwrite with a path translation later (if needed)
+    user_supplied_paths = args.path
+
+    # Verify we support the tracker specified
+    logging.debug(f"[Main] Trackers provided by user {args.trackers}")
+    upload_to_trackers = utils.get_and_validate_configured_trackers(args.trackers, args.all_trackers, api_keys_dict, acronym_to_tracker.keys())
+
+    # the upload assistant has been initialised. Everything imported from here on is imported by the stages that need it
+    startup_profiler.stop()
+    if args.startup_profile:
+        startup_profiler.report(console)
+
+    # Show the user what sites we will upload to
+    console.line(count=2)
+    console.rule("Target Trackers", style='red', align='center')
+    console.line(count=1)
+    upload_to_trackers_overview = Table(box=box.SQUARE, show_header=True, header_style="bold cyan")
+
+    for overview_column in ["Acronym", "Site", "URL", "Platform"]:
+        upload_to_trackers_overview.add_column(f"{overview_column}", justify='center', style='#38ACEC')
+
+    for tracker in upload_to_trackers:
+        config = site_templates.get(tracker)
+        # Add tracker data to each row & show the user an overview
+        upload_to_trackers_overview.add_row(tracker, config["name"], config["url"], config["platform"])
+
+    console.print(upload_to_trackers_overview)
+
+    # If not in 'auto_mode' then verify with the user that they want to continue with the upload
+    if auto_mode == "false":
+        if not Confirm.ask("Continue upload to these sites?", default='y'):
+            logging.info("[Main] User canceled upload when asked to confirm sites to upload to")
+            sys.exit(console.print("\nOK, quitting now..\n", style="bold red", highlight=False))
+
+    # The user has confirmed what sites to upload to at this point (or auto_mode is set to true)
+    # Get media file details now, check to see if we are running in "batch mode"
+
+    # TODO an issue with batch mode currently is that we have a lot of "assert" & sys.exit statements during the prep work we do for each upload,
+    # if one of these "assert/quit" statements get triggered, then it will quit the entire script instead of just moving on to the next file in the list 'upload_queue'
+    # ---------- Batch mode prep ---------- #
+    if args.batch:
+        if len(args.path) > 1:
+            logging.critical("[Main] The arg '-batch' can not be run with multiple '-path' args")
+            logging.info("[Main] The arg '-batch' should be used to upload all the files in 1 folder that you specify with the '-path' arg")
+            console.print("You can not use the arg [deep_sky_blue1]-batch[/deep_sky_blue1] while supplying multiple [deep_sky_blue1]-path[/deep_sky_blue1] args\n", style='bright_red')
+            console.print("Exiting...\n", style='bright_red bold')
+            sys.exit()
+        elif not os.path.isdir(args.path[0]):
+            # Since args.path is required now, we don't need to check if len(args.path) == 0 since that's impossible
+            # instead we check to see if its a folder, if not then
+            logging.critical("[Main]  The arg '-batch' can not be run an a single video file")
+            logging.info("[Main]  The arg '-batch' should be used to upload all the files in 1 folder that you specify with the '-path' arg")
+            console.print("We can not [deep_sky_blue1]-batch[/deep_sky_blue1] upload a single video file, [deep_sky_blue1]-batch[/deep_sky_blue1] is supposed to be used on a "
+                          "single folder containing multiple files you want to individually upload\n", style='bright_red')
+            console.print("Exiting...\n", style='bright_red bold')
+            sys.exit()
+
+
+    # all files we upload (even if its 1) get added to this list
+    upload_queue = []
+
+
+    if args.batch:
+        logging.info("running in batch mode")
+        logging.info(f"Uploading all the items in the folder: {args.path}")
+        # This should be OK to upload, we've caught all the obvious issues above ^^ so if this is able to run we should be alright
+        for arg_file in glob.glob(f'{args.path[0]}/*'):
+            # Since we are in batch mode, we upload every file/folder we find in the path the user specified
+            upload_queue.append(arg_file)  # append each item to the list 'upload_queue' now
+    else:
+        logging.info("Running in regular '-path' mode, starting upload now")
+        # This means the ran the script normally and specified a direct path to some media (or multiple media items, in which case we append it like normal to the list 'upload_queue')
+        for arg_file in user_supplied_paths:
+            upload_queue.append(arg_file)
+
+    logging.debug(f"[Main] Upload queue: {upload_queue}")
+
+    # Now for each file we've been supplied (batch more or just the user manually specifying multiple files) we push them through the pipeline
+    # The stages can interact with the user when we are not running in auto_mode, in such cases the items are processed one after another.
+    upload_queue.sort()
+    # index of `DIR`, built once per process. The .torrent files are checked against it in `processDot`
+    # every run (every item of the batch runner) only rescans the directories that have changed since the previous run
+    dir_index = DirectoryIndex.load(DIR)
+    upload_pipeline = Pipeline(
+        stages=[
+            Stage("parse", _stage_parse, workers=os.getenv("pipeline_parse_workers") or 2),
+            Stage("probe", _stage_probe, workers=os.getenv("pipeline_probe_workers") or 2),
+            Stage("metadata", _stage_metadata, workers=os.getenv("pipeline_metadata_workers") or 4),
+            Stage("dupes", _stage_dupes, workers=os.getenv("pipeline_dupes_workers") or 2),
+            Stage("screenshots", _stage_screenshots, workers=os.getenv("pipeline_screenshots_workers") or 2),
+            Stage("upload", _stage_upload, workers=os.getenv("pipeline_upload_workers") or 2)
+        ],
+        finalizer=_finalize_item,
+        queue_size=os.getenv("pipeline_queue_size") or 4
+    )
+    # uploads that failed earlier (eg: tracker was down) are retried in the background while the upload queue is being processed
+    # the batch runner retries them from its own process instead, hence its workers don't start a retrier per item
+    outbox_retrier = start_outbox_retrier() if retry_outbox else None
+    processed_items = upload_pipeline.run(upload_queue, serial=auto_mode == "false" or len(upload_queue) <= 1)
+    if outbox_retrier is not None:
+        outbox_retrier.stop()
+
+    for processed_item in processed_items:
+        logging.info(f"[Main] {processed_item.source} :: outcome '{processed_item.outcome}' :: {sum(processed_item.timings.values()):0.4f} seconds")
+
+    for host_class, hosts in http_utilities.get_request_statistics().items():
+        for host, statistics in hosts.items():
+            logging.info(f"[Main] HTTP {host_class} {host} :: {statistics['requests']} requests, {statistics['failures']} failed, "
+                         f"average {statistics['average_time']:0.4f} seconds, max {statistics['max_time']:0.4f} seconds, "
+                         f"queued on average {statistics['average_queue_time']:0.4f} seconds, max {statistics['max_queue_time']:0.4f} seconds")
+
     script_end_time = time.perf_counter()
     total_run_time = f'{script_end_time - script_start_time:0.4f}'
     logging.info(f"[Main] Total runtime is {total_run_time} seconds")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,173 @@
-"""Helper methods to encode and decode Bencoding data."""
-
-def _decode(raw_buffer, elements, index=0):
-    if raw_buffer[index] == ord('d'):
-        index += 1
-        obj = {}
-        while raw_buffer[index] != ord('e'):
-            key = []
-            value = []
-            index = _decode(raw_buffer, key, index)
-            index = _decode(raw_buffer, value, index)
-            obj[key[0]] = value[0]
-        index += 1
-        elements.append(obj)
-    elif raw_buffer[index] == ord('l'):
-        index += 1
-        list_elements = []
-        while raw_buffer[index] != ord('e'):
-            value = []
-            index = _decode(raw_buffer, value, index)
-            list_elements.append(value[0])
-        index += 1
-        elements.append(list_elements)
-    elif raw_buffer[index] == ord('i'):
-        index += 1
-        pos = index + raw_buffer[index:].find(ord('e'))
-        number = int(raw_buffer[index:pos])
-        index = pos+1
-        elements.append(number)
-    else:
-        pos = index + raw_buffer[index:].find(ord(':'))
-        size = int(raw_buffer[index:pos])
-        index = pos+1
-        data = raw_buffer[index:index+size]
-        index += size
-        elements.append(data)
-    return index
-
-def decode(raw_buffer):
-  """Decode a bytes string into its corresponding data via Bencoding."""
-  elements = []
-  _decode(raw_buffer, elements)
-  return elements[0]
-
-def encode(data):
-  """Encode data into a bytes string via Bencoding."""
-  if isinstance(data, bytes):
-    return str(len(data)).encode("ascii") + b':' + data
-  elif isinstance(data, str):
-    return encode(data.encode("ascii"))
-  elif isinstance(data, int):
-    return  b'i' + str(data).encode("ascii") + b'e'
-  elif isinstance(data, list):
-    result = b'l'
-    for d in data:
-      result += encode(d)
-    result += b'e'
-    return result
-  elif isinstance(data, dict):
-    result = b'd'
-    for key, value in data.items():
-      result += encode(key)
-      result += encode(value)
-    result += b'e'
-    return result
-
-  raise ValueError("Unexpected bencode_encode() data")
+"""Helper methods to encode and decode Bencoding data.
+
+The decoder works on a single read-only view of the input and locates delimiters with offset aware `find` calls,
+so no part of the buffer is copied except the byte strings that are actually returned. The encoder writes every
+token into one sink (a `bytearray` or any object exposing `write()`), instead of concatenating intermediate results.
+"""
+
+_DICT = ord('d')
+_LIST = ord('l')
+_INT = ord('i')
+_END = ord('e')
+
+
+def _as_bytes(raw_buffer):
+    # `bytes.find` accepts a start offset which lets us scan without slicing.
+    # memoryview doesn't expose `find`, hence we need a bytes-like object that does.
+    if isinstance(raw_buffer, (bytes, bytearray)):
+        return raw_buffer
+    return bytes(raw_buffer)
+
+
+def _find(raw_buffer, separator, index):
+    pos = raw_buffer.find(separator, index)
+    if pos == -1:
+        raise ValueError(f"Invalid bencode data. Missing '{separator.decode('ascii')}' after offset {index}")
+    return pos
+
+
+def _decode(raw_buffer, view, index):
+    token = raw_buffer[index]
+    if token == _DICT:
+        index += 1
+        obj = {}
+        while raw_buffer[index] != _END:
+            key, index = _decode(raw_buffer, view, index)
+            obj[key], index = _decode(raw_buffer, view, index)
+        return obj, index + 1
+    if token == _LIST:
+        index += 1
+        list_elements = []
+        while raw_buffer[index] != _END:
+            value, index = _decode(raw_buffer, view, index)
+            list_elements.append(value)
+        return list_elements, index + 1
+    if token == _INT:
+        pos = _find(raw_buffer, b'e', index + 1)
+        return int(view[index + 1:pos]), pos + 1
+    pos = _find(raw_buffer, b':', index)
+    start = pos + 1
+    end = start + int(view[index:pos])
+    if end > len(raw_buffer):
+        raise ValueError(f"Invalid bencode data. String at offset {index} overflows the buffer")
+    return bytes(view[start:end]), end
+
+
+def _skip(raw_buffer, index):
+    """Returns the offset right after the element starting at `index` without building any python objects for it."""
+    depth = 0
+    while True:
+        token = raw_buffer[index]
+        if token == _DICT or token == _LIST:
+            depth += 1
+            index += 1
+        elif token == _END:
+            depth -= 1
+            index += 1
+        elif token == _INT:
+            index = _find(raw_buffer, b'e', index + 1) + 1
+        else:
+            pos = _find(raw_buffer, b':', index)
+            index = pos + 1 + int(raw_buffer[index:pos])
+        if depth == 0:
+            return index
+
+
+def _decode_selected_keys(raw_buffer, view, index, wanted_keys):
+    """
+        Walks the dictionary starting at `index` and decodes only the values whose keys are present in `wanted_keys`.
+        Every other value is skipped over in place.
+    """
+    if raw_buffer[index] != _DICT:
+        raise ValueError(f"Invalid bencode data. Expected a dictionary at offset {index}")
+    index += 1
+    selected = {}
+    while raw_buffer[index] != _END:
+        key, index = _decode(raw_buffer, view, index)
+        if key in wanted_keys:
+            selected[key], index = _decode(raw_buffer, view, index)
+        else:
+            index = _skip(raw_buffer, index)
+    return selected, index + 1
+
+
+def scan_dict(raw_buffer, index=0):
+    """
+        Lists the entries of the dictionary starting at `index` without decoding their values.
+
+        Returns a tuple of ([(key, value_start, value_end)], end) where `value_start` / `value_end` are the offsets of the
+        raw bencoded value in `raw_buffer` and `end` is the offset right after the dictionary.
+    """
+    raw_buffer = _as_bytes(raw_buffer)
+    with memoryview(raw_buffer) as view:
+        if raw_buffer[index] != _DICT:
+            raise ValueError(f"Invalid bencode data. Expected a dictionary at offset {index}")
+        index += 1
+        entries = []
+        while raw_buffer[index] != _END:
+            key, index = _decode(raw_buffer, view, index)
+            value_end = _skip(raw_buffer, index)
+            entries.append((key, index, value_end))
+            index = value_end
+        return entries, index + 1
+
+
+def decode(raw_buffer):
+    """Decode a bytes string into its corresponding data via Bencoding."""
+    raw_buffer = _as_bytes(raw_buffer)
+    with memoryview(raw_buffer) as view:
+        return _decode(raw_buffer, view, 0)[0]
+
+
+def decode_torrent_info(raw_buffer, keys):
+    """
+        Extracts only the given `keys` of the `info` dictionary from the raw contents of a .torrent file.
+        Other keys (most notably the `pieces` blob) are skipped over without being materialised.
+    """
+    raw_buffer = _as_bytes(raw_buffer)
+    with memoryview(raw_buffer) as view:
+        if raw_buffer[0] != _DICT:
+            raise ValueError("Invalid torrent data. Expected a dictionary at offset 0")
+        index = 1
+        while raw_buffer[index] != _END:
+            key, index = _decode(raw_buffer, view, index)
+            if key == b'info':
+                return _decode_selected_keys(raw_buffer, view, index, keys)[0]
+            index = _skip(raw_buffer, index)
+    raise ValueError("Invalid torrent data. `info` dictionary not found")
+
+
+def _encode(data, write):
+    if isinstance(data, bytes):
+        write(str(len(data)).encode("ascii"))
+        write(b':')
+        write(data)
+    elif isinstance(data, str):
+        _encode(data.encode("ascii"), write)
+    elif isinstance(data, int):
+        write(b'i%de' % data)
+    elif isinstance(data, list):
+        write(b'l')
+        for d in data:
+            _encode(d, write)
+        write(b'e')
+    elif isinstance(data, dict):
+        write(b'd')
+        for key, value in data.items():
+            _encode(key, write)
+            _encode(value, write)
+        write(b'e')
+    else:
+        raise ValueError("Unexpected bencode_encode() data")
+
+
+def encode(data):
+    """Encode data into a bytes string via Bencoding."""
+    result = bytearray()
+    _encode(data, result.extend)
+    return bytes(result)
+
+
+def encode_to(data, sink):
+    """Encode data via Bencoding directly into `sink`, which can be a bytearray or any object having a `write()` method."""
+    _encode(data, sink.extend if isinstance(sink, bytearray) else sink.write)
@@ -0,0 +1,145 @@
+"""
+    Benchmarks the bencode codec in `bencoding.py` against the previous (slice based) implementation
+    using synthetic multi file torrents.
+
+    Usage (from the project root):
+        python3 dev_scripts/benchmark_bencoding.py --files 10000 --rounds 5
+"""
+import os
+import sys
+import hashlib
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bencoding
+
+
+# ------------------------------------------------------------------------------- #
+#         Previous implementation, kept here only as the benchmark baseline        #
+# ------------------------------------------------------------------------------- #
+def _legacy_decode(raw_buffer, elements, index=0):
+    if raw_buffer[index] == ord('d'):
+        index += 1
+        obj = {}
+        while raw_buffer[index] != ord('e'):
+            key = []
+            value = []
+            index = _legacy_decode(raw_buffer, key, index)
+            index = _legacy_decode(raw_buffer, value, index)
+            obj[key[0]] = value[0]
+        index += 1
+        elements.append(obj)
+    elif raw_buffer[index] == ord('l'):
+        index += 1
+        list_elements = []
+        while raw_buffer[index] != ord('e'):
+            value = []
+            index = _legacy_decode(raw_buffer, value, index)
+            list_elements.append(value[0])
+        index += 1
+        elements.append(list_elements)
+    elif raw_buffer[index] == ord('i'):
+        index += 1
+        pos = index + raw_buffer[index:].find(ord('e'))
+        number = int(raw_buffer[index:pos])
+        index = pos + 1
+        elements.append(number)
+    else:
+        pos = index + raw_buffer[index:].find(ord(':'))
+        size = int(raw_buffer[index:pos])
+        index = pos + 1
+        data = raw_buffer[index:index + size]
+        index += size
+        elements.append(data)
+    return index
+
+
+def legacy_decode(raw_buffer):
+    elements = []
+    _legacy_decode(raw_buffer, elements)
+    return elements[0]
+
+
+def legacy_encode(data):
+    if isinstance(data, bytes):
+        return str(len(data)).encode("ascii") + b':' + data
+    elif isinstance(data, str):
+        return legacy_encode(data.encode("ascii"))
+    elif isinstance(data, int):
+        return b'i' + str(data).encode("ascii") + b'e'
+    elif isinstance(data, list):
+        result = b'l'
+        for d in data:
+            result += legacy_encode(d)
+        result += b'e'
+        return result
+    elif isinstance(data, dict):
+        result = b'd'
+        for key, value in data.items():
+            result += legacy_encode(key)
+            result += legacy_encode(value)
+        result += b'e'
+        return result
+    raise ValueError("Unexpected bencode_encode() data")
+
+
+def build_synthetic_torrent(number_of_files, piece_length):
+    files = []
+    total_size = 0
+    for index in range(number_of_files):
+        length = 50 * 1024 * 1024 + index * 4099
+        total_size += length
+        files.append({b'length': length, b'path': [f'Season {index // 1000:02d}'.encode("utf-8"), f'Show.Name.S01E{index:05d}.1080p.WEB-DL.mkv'.encode("utf-8")]})
+    number_of_pieces = -(-total_size // piece_length)
+    # sha1 digests are 20 bytes each, generating them is pointless for the benchmark hence we just repeat one
+    pieces = hashlib.sha1(b"gg-bot").digest() * number_of_pieces
+    return {
+        b'announce': b'https://tracker.example/announce',
+        b'created by': b'GG-Bot Upload Assistant',
+        b'creation date': 1650000000,
+        b'info': {
+            b'files': files,
+            b'name': b'Show.Name.S01.1080p.WEB-DL-GROUP',
+            b'piece length': piece_length,
+            b'pieces': pieces,
+            b'private': 1,
+            b'source': b'GG-BOT',
+        },
+    }
+
+
+def _measure(label, function, rounds):
+    best = min(timeit.repeat(function, number=1, repeat=rounds))
+    print(f"{label:<45} {best * 1000:>10.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bencode encoding and decoding")
+    parser.add_argument('--files', type=int, default=10000, help="Number of files in the synthetic torrent")
+    parser.add_argument('--piece-length', type=int, default=4 * 1024 * 1024, help="Piece length of the synthetic torrent")
+    parser.add_argument('--rounds', type=int, default=5, help="Number of rounds. The best round is reported")
+    args = parser.parse_args()
+
+    torrent = build_synthetic_torrent(args.files, args.piece_length)
+    raw_torrent = bencoding.encode(torrent)
+    assert raw_torrent == legacy_encode(torrent), "Encoders produced different outputs"
+    assert bencoding.decode(raw_torrent) == legacy_decode(raw_torrent), "Decoders produced different outputs"
+
+    print(f"Synthetic torrent: {args.files} files, {len(torrent[b'info'][b'pieces']) // 20} pieces, {len(raw_torrent) / 1024 / 1024:.2f} MiB")
+    print("-" * 58)
+    legacy_decode_time = _measure("decode (legacy)", lambda: legacy_decode(raw_torrent), args.rounds)
+    decode_time = _measure("decode", lambda: bencoding.decode(raw_torrent), args.rounds)
+    # the keys read by `processDot` in auto_upload.py
+    files_time = _measure("decode_torrent_info (name + files only)", lambda: bencoding.decode_torrent_info(raw_torrent, (b'name', b'length', b'files')), args.rounds)
+    legacy_encode_time = _measure("encode (legacy)", lambda: legacy_encode(torrent), args.rounds)
+    encode_time = _measure("encode", lambda: bencoding.encode(torrent), args.rounds)
+    print("-" * 58)
+    print(f"decode speedup: {legacy_decode_time / decode_time:.1f}x, name + files only: {legacy_decode_time / files_time:.1f}x")
+    print(f"encode speedup: {legacy_encode_time / encode_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+    Benchmarks the multi threaded piece hasher in `utilities/utils_hashing.py` against torf's `Torrent.generate`
+    on the same media. When no media is provided, a synthetic multi file folder is created in a temporary directory.
+
+    Usage (from the project root):
+        python3 dev_scripts/benchmark_piece_hasher.py --media /data/Movie.2020.1080p.BluRay.REMUX-GRP --workers 8
+        python3 dev_scripts/benchmark_piece_hasher.py --size 2048 --files 4
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utilities.utils_hashing as hashing_utilities
+from utilities.utils_torrent import GGBOTTorrent, calculate_piece_size
+
+
+def build_synthetic_media(folder, size_in_mb, number_of_files):
+    media = os.path.join(folder, "Show.Name.S01.1080p.WEB-DL-GROUP")
+    os.makedirs(media)
+    file_size = size_in_mb * 1024 * 1024 // number_of_files
+    chunk = os.urandom(4 * 1024 * 1024)
+    for index in range(number_of_files):
+        # odd sizes, so that the pieces span the boundaries of the files
+        remaining = file_size + index * 4099
+        with open(os.path.join(media, f"Show.Name.S01E{index + 1:02d}.1080p.WEB-DL.mkv"), "wb") as media_file:
+            while remaining > 0:
+                remaining -= media_file.write(chunk[:min(remaining, len(chunk))])
+    return media
+
+
+def _new_torrent(media):
+    torrent = GGBOTTorrent(media, exclude_globs=["*.txt", "*.jpg", "*.png", "*.nfo", "*.svf", "*.rar", "*.screens", "*.sfv"], private=True)
+    torrent.piece_size = calculate_piece_size(torrent.size)
+    return torrent
+
+
+def _report(label, size, duration):
+    print(f"{label:<30} {duration:>10.2f} s {size / 1024 / 1024 / duration:>10.2f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the piece hasher against torf")
+    parser.add_argument('--media', help="File or folder to hash. A synthetic folder is created when not provided")
+    parser.add_argument('--size', type=int, default=1024, help="Size of the synthetic media in MB")
+    parser.add_argument('--files', type=int, default=3, help="Number of files in the synthetic media")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker threads of the piece hasher")
+    args = parser.parse_args()
+
+    temp_folder = None
+    media = args.media
+    if media is None:
+        temp_folder = tempfile.mkdtemp(prefix="gg-bot-hasher-")
+        media = build_synthetic_media(temp_folder, args.size, args.files)
+
+    try:
+        torrent = _new_torrent(media)
+        print(f"Media: {media}, {torrent.size / 1024 / 1024:.2f} MiB in {len(torrent.files)} files, piece size {torrent.piece_size}")
+        print("(the page cache is warm after the first run, run each hasher on a cold cache for disk bound numbers)")
+        print("-" * 64)
+
+        start_time = time.perf_counter()
+        torrent.generate(threads=args.workers)
+        torf_duration = time.perf_counter() - start_time
+        _report(f"torf ({args.workers} threads)", torrent.size, torf_duration)
+
+        files = [(str(filepath), file.size) for filepath, file in zip(torrent.filepaths, torrent.files)]
+        # forcing the thread pool even for small media, we are measuring the hasher and not the threshold
+        hashing_utilities.PARALLEL_HASHING_THRESHOLD = 0
+        start_time = time.perf_counter()
+        pieces = hashing_utilities.hash_pieces(files, torrent.piece_size, workers=args.workers)
+        hasher_duration = time.perf_counter() - start_time
+        _report(f"builtin ({args.workers} threads)", torrent.size, hasher_duration)
+
+        assert pieces == torrent.metainfo['info']['pieces'], "Hashers produced different pieces"
+        print("-" * 64)
+        print(f"speedup: {torf_duration / hasher_duration:.1f}x")
+    finally:
+        if temp_folder is not None:
+            shutil.rmtree(temp_folder)
+
+
+if __name__ == '__main__':
+    main()
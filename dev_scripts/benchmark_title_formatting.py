@@ -0,0 +1,128 @@
+"""
+    Benchmarks the compiled title formatting of `utils_translation.format_title` against the previous implementation
+    (a chain of str.replace calls), using the release names in `cache/` and in the test resources.
+
+    Usage (from the project root):
+        python3 dev_scripts/benchmark_title_formatting.py --rounds 5 --repeat 200
+"""
+import os
+import sys
+import glob
+import json
+import logging
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utilities.utils_translation as translation
+
+from modules.site_template_registry import SiteTemplate
+
+
+# ------------------------------------------------------------------------------- #
+#         Previous implementation, kept here only as the benchmark baseline        #
+# ------------------------------------------------------------------------------- #
+def legacy_title_from_file_name(raw_file_name):
+    temp_title = str(raw_file_name).replace('.mkv','').replace('.mp4','').replace(".", " ").replace("DDP2 0","DDP2.0").replace("DDP5 1","DDP5.1").replace("H 264","H.264").replace("H 265","H.264").replace("DD+7 1","DD+7.1").replace("AAC2 0","AAC2.0").replace("DDP2 0","DDP2.0").replace("DDP5 1","DDP5.1").replace("H 264","H.264").replace("H 265","H.264").replace("DD+7 1","DD+7.1").replace("AAC2 0","AAC2.0").replace('DD5 1','DD5.1').replace('DD2 0','DD2.0').replace('TrueHD 7 1','TrueHD 7.1').replace('DTS-HD MA 7 1','DTS-HD MA 7.1').replace('-C A A','-C.A.A')
+    return " ".join(temp_title.split())
+
+
+def legacy_title_from_template(json_config, torrent_info):
+    if str(torrent_info["source"]).lower() == "dvd":
+        config_profile = "dvd"
+    elif str(torrent_info["source"]).lower() == "web":
+        config_profile = "web"
+    else:
+        config_profile = torrent_info["source_type"]
+
+    tracker_torrent_name_style = json_config['torrent_title_format'][torrent_info["type"]][str(config_profile)]
+    generate_format_string = {}
+    separator = json_config["title_separator"] or " "
+
+    temp_load_torrent_info = tracker_torrent_name_style.replace("{", "").replace("}", "").split(" ")
+    for item in temp_load_torrent_info:
+        generate_format_string[item] = torrent_info[item].replace(" ", separator) if item in torrent_info and torrent_info[item] is not None else ""
+
+    formatted_title = ""
+    for key, value in generate_format_string.items():
+        if len(value) != 0:
+            formatted_title = f'{formatted_title}{"-" if key == "release_group" else separator}{value}'
+
+    if "torrent_title_translation" in json_config:
+        for key, val in json_config["torrent_title_translation"].items():
+            formatted_title = formatted_title.replace(key, val)
+    return str(formatted_title[1:])
+
+
+def collect_release_names(project_root):
+    release_names = set()
+    if os.path.isdir(f"{project_root}/cache"):
+        release_names.update(os.listdir(f"{project_root}/cache"))
+    for _, directories, files in os.walk(f"{project_root}/tests/resources"):
+        release_names.update(directories)
+        release_names.update(files)
+    return sorted(release_names)
+
+
+def build_torrent_info(release_name):
+    """ A torrent_info for the template titles, with the parts of the release name as its values """
+    parts = translation.format_title_from_file_name(release_name).split(" ")
+    parts += [""] * 8
+    return {
+        "type": "movie", "source": "BluRay", "source_type": "bluray_encode", "title": " ".join(parts[:2]), "year": parts[2],
+        "screen_size": parts[3], "source_name": parts[4], "audio_codec": parts[5] or "DD+", "audio_channels": parts[6], "hdr": "HDR10+",
+        "video_codec": parts[7], "edition": None, "release_group": "GROUP",
+    }
+
+
+def _measure(label, function, rounds):
+    best = min(timeit.repeat(function, number=1, repeat=rounds))
+    print(f"{label:<45} {best * 1000:>10.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the formatting of torrent titles")
+    parser.add_argument('--rounds', type=int, default=5, help="Number of rounds. The best round is reported")
+    parser.add_argument('--repeat', type=int, default=200, help="Number of times every release name is formatted in a round")
+    args = parser.parse_args()
+    # the template titles are logged at info level
+    logging.disable(logging.CRITICAL)
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    release_names = collect_release_names(project_root)
+    templates = []
+    for template_file in sorted(glob.glob(f"{project_root}/site_templates/*.json")):
+        config = json.load(open(template_file))
+        if isinstance(config["torrent_title_format"], dict) and "movie" in config["torrent_title_format"]:
+            templates.append(SiteTemplate(os.path.basename(template_file), config))
+    torrent_infos = [build_torrent_info(release_name) for release_name in release_names]
+
+    for release_name in release_names:
+        assert translation.format_title_from_file_name(release_name) == legacy_title_from_file_name(release_name), f"Titles differ for {release_name}"
+    for template in templates:
+        for torrent_info in torrent_infos:
+            assert translation.format_title_from_template(template, torrent_info) == legacy_title_from_template(template, torrent_info), \
+                f"Titles differ for {template.template_name} and {torrent_info['title']}"
+
+    print(f"{len(release_names)} release names, {len(templates)} site templates. All titles are identical")
+    print("-" * 58)
+    names = release_names * args.repeat
+    legacy_file_name_time = _measure("file name titles (legacy)", lambda: [legacy_title_from_file_name(name) for name in names], args.rounds)
+    file_name_time = _measure("file name titles", lambda: [translation.format_title_from_file_name(name) for name in names], args.rounds)
+
+    def format_template_titles(implementation):
+        for template in templates:
+            for torrent_info in torrent_infos:
+                implementation(template, torrent_info)
+
+    legacy_template_time = _measure("template titles (legacy)", lambda: [format_template_titles(legacy_title_from_template) for _ in range(args.repeat // 10 or 1)], args.rounds)
+    template_time = _measure("template titles", lambda: [format_template_titles(translation.format_title_from_template) for _ in range(args.repeat // 10 or 1)], args.rounds)
+    print("-" * 58)
+    print(f"file name titles speedup: {legacy_file_name_time / file_name_time:.1f}x")
+    print(f"template titles speedup: {legacy_template_time / template_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+    Benchmarks deriving tracker specific .torrent files by splicing the raw bytes (`modules/torrent_resourcer.py`)
+    against the previous torf based read / copy / write of the whole metainfo, using synthetic multi file torrents.
+
+    Usage (from the project root):
+        python3 dev_scripts/benchmark_torrent_resourcing.py --files 10000 --trackers 5 --rounds 3
+"""
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bencoding
+from benchmark_bencoding import build_synthetic_torrent
+from modules.torrent_resourcer import TorrentResourcer
+from utilities.utils_torrent import GGBOTTorrent
+
+
+def derive_with_torf(source_torrent, output_folder, trackers):
+    for tracker in trackers:
+        # this is how every tracker variant used to be derived, one full read / validation / write per tracker
+        edit_torrent = GGBOTTorrent.read(source_torrent)
+        edit_torrent.metainfo.pop('announce-list', "")
+        edit_torrent.metainfo['announce'] = f"https://{tracker}.example/announce"
+        edit_torrent.metainfo['info']['source'] = tracker
+        GGBOTTorrent.copy(edit_torrent).write(filepath=os.path.join(output_folder, f"torf-{tracker}.torrent"), overwrite=True)
+
+
+def derive_with_resourcer(source_torrent, output_folder, trackers):
+    with open(source_torrent, "rb") as torrent_file:
+        resourcer = TorrentResourcer(torrent_file.read())
+    for tracker in trackers:
+        resourcer.write(os.path.join(output_folder, f"resourcer-{tracker}.torrent"), [f"https://{tracker}.example/announce"], tracker)
+
+
+def _measure(label, function, rounds):
+    best = min(timeit.repeat(function, number=1, repeat=rounds))
+    print(f"{label:<45} {best * 1000:>10.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark deriving tracker specific .torrent files")
+    parser.add_argument('--files', type=int, default=10000, help="Number of files in the synthetic torrent")
+    parser.add_argument('--piece-length', type=int, default=4 * 1024 * 1024, help="Piece length of the synthetic torrent")
+    parser.add_argument('--trackers', type=int, default=5, help="Number of tracker variants derived from the torrent")
+    parser.add_argument('--rounds', type=int, default=3, help="Number of rounds. The best round is reported")
+    args = parser.parse_args()
+
+    trackers = [f"TRACKER{index}" for index in range(args.trackers)]
+    output_folder = tempfile.mkdtemp(prefix="gg-bot-resourcing-")
+    try:
+        source_torrent = os.path.join(output_folder, "source.torrent")
+        with open(source_torrent, "wb") as torrent_file:
+            bencoding.encode_to(build_synthetic_torrent(args.files, args.piece_length), torrent_file)
+        print(f"Synthetic torrent: {args.files} files, {os.path.getsize(source_torrent) / 1024 / 1024:.2f} MiB, {args.trackers} trackers")
+        print("-" * 58)
+        torf_time = _measure("torf read / copy / write per tracker", lambda: derive_with_torf(source_torrent, output_folder, trackers), args.rounds)
+        resourcer_time = _measure("byte level re-sourcing", lambda: derive_with_resourcer(source_torrent, output_folder, trackers), args.rounds)
+
+        for tracker in trackers:
+            torf_torrent = GGBOTTorrent.read(os.path.join(output_folder, f"torf-{tracker}.torrent"))
+            resourced_torrent = GGBOTTorrent.read(os.path.join(output_folder, f"resourcer-{tracker}.torrent"))
+            assert torf_torrent.infohash == resourced_torrent.infohash, f"Infohash of {tracker} differs"
+        print("-" * 58)
+        print(f"speedup: {torf_time / resourcer_time:.1f}x")
+    finally:
+        shutil.rmtree(output_folder)
+
+
+if __name__ == '__main__':
+    main()
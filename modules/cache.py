@@ -1,6 +1,11 @@
 import enum
+import importlib
 
-from modules.cache_vendors.cache_mongo import Mongo
+
+# module implementing each cache vendor, imported only when the vendor is used
+_cache_vendor_modules = {
+    "Mongo": "modules.cache_vendors.cache_mongo",
+}
 
 
 class CacheVendor(enum.Enum):
@@ -11,7 +16,7 @@ class CacheFactory():
 
     def create(self, cache_type):
         targetclass = cache_type.name.capitalize()
-        return Cache(globals()[targetclass]())
+        return Cache(getattr(importlib.import_module(_cache_vendor_modules[targetclass]), targetclass)())
 
 
 class Cache:
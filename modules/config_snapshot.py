@@ -0,0 +1,69 @@
+import os
+import json
+import logging
+import threading
+
+from dotenv import load_dotenv, dotenv_values
+
+
+class ConfigSnapshot:
+
+    _snapshots = {}
+    _snapshots_lock = threading.Lock()
+
+    def __init__(self, working_folder, sample_env_file, env_file=None):
+        """ All the configuration the entry points need at startup, loaded in one go.
+
+            config.env is loaded into the environment and the parameter files (tracker acronyms and api key names) and the
+            keys of the sample env file (used to report outdated config.env files) are read once.
+            Snapshots are cached per process by `load`, hence when the upload script is executed again in the same process
+            (eg: by the workers of `parallel.py`) none of the files are read again unless they have been modified.
+
+            `env_file` defaults to the `config.env` of the upload assistant.
+        """
+        self.working_folder = working_folder
+        self.env_file = env_file or f'{working_folder}/config.env'
+        self.sample_env_file = sample_env_file
+        self.acronyms_file = f'{working_folder}/parameters/tracker/acronyms.json'
+        self.api_keys_file = f'{working_folder}/parameters/tracker/api_keys.json'
+
+        load_dotenv(self.env_file)
+        self.sample_env_keys = list(dotenv_values(self.sample_env_file).keys())
+        with open(self.acronyms_file, "r", encoding="utf-8") as acronyms:
+            self.acronym_to_tracker = json.load(acronyms)
+        with open(self.api_keys_file, "r", encoding="utf-8") as api_keys:
+            self.api_keys = json.load(api_keys)
+
+    @property
+    def auto_mode(self):
+        """ The 'auto_mode' status of the upload assistant. The reuploader always runs in auto mode and never reads it """
+        if str(os.getenv('auto_mode')).lower() not in ['true', 'false']:
+            logging.error('[ConfigSnapshot] `auto_mode` is not set to `true/false` in `config.env`. Defaulting to `false`')
+        return str(os.getenv('auto_mode', 'false')).lower()
+
+    @staticmethod
+    def _get_version(files):
+        version = []
+        for file in files:
+            try:
+                file_stat = os.stat(file)
+                version.append((file_stat.st_mtime_ns, file_stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+
+    @classmethod
+    def load(cls, working_folder, sample_env_file, env_file=None):
+        """ Returns the snapshot of the configuration, reusing the one loaded earlier in this process if none of the files have changed """
+        env_file = env_file or f'{working_folder}/config.env'
+        key = (working_folder, sample_env_file, env_file)
+        files = (env_file, sample_env_file, f'{working_folder}/parameters/tracker/acronyms.json', f'{working_folder}/parameters/tracker/api_keys.json')
+        version = cls._get_version(files)
+        with cls._snapshots_lock:
+            cached = cls._snapshots.get(key)
+            if cached is not None and cached[0] == version:
+                logging.info("[ConfigSnapshot] Reusing the configuration loaded earlier")
+                return cached[1]
+            snapshot = cls(working_folder, sample_env_file, env_file)
+            cls._snapshots[key] = (version, snapshot)
+            return snapshot
@@ -0,0 +1,132 @@
+import os
+import hashlib
+import logging
+import threading
+
+from pprint import pformat
+
+
+class DescriptionRenderer:
+
+    def __init__(self, torrent_info, uploader_signature=None):
+        """
+            Builds the torrent description of an item for all the trackers it is uploaded to.
+
+            The parts of the description that are the same for every tracker (custom user inputs, screenshots, uploader signature)
+            are taken from `torrent_info` once, and the tracker specific variants (bbcode line break, description components) are
+            rendered in memory and cached, hence trackers sharing the same bbcode get the exact same description.
+            A description file is written only when a tracker needs one, once for every distinct description.
+        """
+        self.custom_user_inputs = None
+        if "custom_user_inputs" in torrent_info:
+            self.custom_user_inputs = [
+                {
+                    "key": custom_user_input["key"],
+                    "value": custom_user_input["value"],
+                    # the line breaks are replaced with the bbcode line break of the tracker
+                    "value_lines": custom_user_input["value"].split("\\n"),
+                    "title": custom_user_input["title"].strip() if custom_user_input.get("title") is not None else None,
+                }
+                for custom_user_input in torrent_info["custom_user_inputs"]
+            ]
+        self.bbcode_images = torrent_info.get("bbcode_images")
+        if uploader_signature is not None and len(uploader_signature) > 0:
+            logging.debug(f'[DescriptionRenderer] User provided signature :: {uploader_signature}')
+            if not uploader_signature.startswith("[center]") and not uploader_signature.endswith("[/center]"):
+                uploader_signature = f'[center]{uploader_signature}[/center]'
+        else:
+            uploader_signature = None
+        self.uploader_signature = uploader_signature
+        self._fragments = {}
+        self._written_files = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, key, build):
+        with self._lock:
+            if key not in self._fragments:
+                self._fragments[key] = build()
+            return self._fragments[key]
+
+    def _render_custom_user_inputs(self, description_components, bbcode_line_break, tracker):
+        description = []
+        for custom_user_input in self.custom_user_inputs:
+            if custom_user_input["key"] not in description_components:
+                # the provided component is not present in the trackers list. hence we adds this to the description directly (plain text)
+                description.append(custom_user_input["value"])
+            else:
+                input_wrapper_type = description_components[custom_user_input["key"]]
+                formatted_value = bbcode_line_break.join(custom_user_input["value_lines"])
+                if custom_user_input["title"] is not None:
+                    if "TITLE_PLACEHOLDER" in input_wrapper_type:
+                        input_wrapper_type = input_wrapper_type.replace("TITLE_PLACEHOLDER", custom_user_input["title"])
+                    else:
+                        logging.debug(f'[DescriptionRenderer] Title is not supported for this component {custom_user_input["key"]} in this tracker {tracker}. Skipping title placement')
+                # in cases where tracker supports title and user hasn't provided any title, we'll just remove the title placeholder
+                # note that the = is intentional. since title would be [spoiler=TITILE]. we need to remove =TITLE
+                input_wrapper_type = input_wrapper_type.replace("=TITLE_PLACEHOLDER", "")
+
+                if "][" in input_wrapper_type:
+                    description.append(input_wrapper_type.replace("][", f']{formatted_value}['))
+                elif "><" in input_wrapper_type:
+                    description.append(input_wrapper_type.replace("><", f'>{formatted_value}<'))
+                else:
+                    description.append(formatted_value)
+            description.append(bbcode_line_break)
+        return "".join(description)
+
+    def _render_screenshots(self, bbcode_line_break):
+        return f'{bbcode_line_break}[center] ---------------------- [size=22]Screenshots[/size] ---------------------- {bbcode_line_break}{bbcode_line_break}' \
+               f'{self.bbcode_images}[/center]'
+
+    def _render_signature(self, bbcode_line_break, tracker):
+        if self.uploader_signature is not None:
+            return f'{bbcode_line_break}{bbcode_line_break}{self.uploader_signature}'
+        heart = "<3" if str(tracker).upper() in ("BHD", "BHDTV") or os.name == "nt" else "❤"
+        return f'{bbcode_line_break}{bbcode_line_break}[center] Uploaded with [color=red]{heart}[/color] using GG-BOT Upload Assistant[/center]'
+
+    def render(self, config, tracker):
+        """ Returns the description for `tracker`, whose site template is `config` """
+        bbcode_line_break = config["bbcode_line_break"]
+        description = []
+
+        # we need to make sure that the tracker supports custom description for torrents.
+        # If tracker supports custom descriptions, the the tracker config will have the `description_components` key.
+        if self.custom_user_inputs is not None:
+            if "description_components" in config:
+                description_components = config["description_components"]
+                logging.debug(f'[DescriptionRenderer] Custom Message components configured for tracker {tracker} are {pformat(description_components)}')
+                description.append(self._cached(
+                    ("custom_user_inputs", bbcode_line_break, tuple(sorted(description_components.items()))),
+                    lambda: self._render_custom_user_inputs(description_components, bbcode_line_break, tracker)
+                ))
+            else:
+                logging.debug(f"[DescriptionRenderer] The tracker {tracker} doesn't support custom descriptions. Skipping custom description placements.")
+
+        # Screenshots will be added to description only if no custom screenshot payload method is provided.
+        if self.bbcode_images is not None and "url_images" not in config["translation"]:
+            description.append(self._cached(("screenshots", bbcode_line_break), lambda: self._render_screenshots(bbcode_line_break)))
+
+        # Finally append the entire thing with some shameless self promotion ;) and some line breaks
+        description.append(self._render_signature(bbcode_line_break, tracker))
+        return "".join(description)
+
+    def write(self, config, tracker, folder):
+        """
+            Writes the description for `tracker` to a file in `folder` and returns its path.
+            Trackers that get the same description share the same file, which is written only once.
+        """
+        description = self.render(config, tracker)
+        description_hash = hashlib.sha256(description.encode("utf-8")).hexdigest()
+        description_file_path = f'{folder}description-{description_hash[:16]}.txt'
+        with self._lock:
+            if self._written_files.get(description_file_path) != description_hash or not os.path.isfile(description_file_path):
+                logging.debug(f'[DescriptionRenderer] Writing the description for {tracker} to {description_file_path}')
+                with open(description_file_path, 'w', encoding="utf-8") as description_file:
+                    description_file.write(description)
+                self._written_files[description_file_path] = description_hash
+        return description_file_path
+
+    @staticmethod
+    def needs_file(config):
+        """ Whether the tracker accepts a description. The description is sent from a file, hence only such trackers need the file """
+        return "description" in config["translation"]
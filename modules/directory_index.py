@@ -0,0 +1,150 @@
+import os
+import stat
+import time
+import logging
+import threading
+
+
+class DirectoryIndex:
+
+    _indexes = {}
+    _indexes_lock = threading.Lock()
+
+    def __init__(self, root):
+        """ In memory index of every file under `root` (relative path => (size, inode)), built using `os.scandir`.
+
+            The index is built once and then refreshed incrementally. During a refresh only the directories whose
+            modification time has changed are scanned again, hence checking hundreds of .torrent files against a large
+            (network backed) folder only needs set lookups instead of a `stat` call per file.
+        """
+        self.root = root
+        self.files = {}
+        self._directories = {}
+        self._lock = threading.Lock()
+        self._is_built = False
+
+    @classmethod
+    def load(cls, root):
+        """ Returns the index of `root`, reusing (and refreshing) the one built earlier in this process """
+        with cls._indexes_lock:
+            index = cls._indexes.get(root)
+            if index is None:
+                # built lazily, by the first `check`
+                index = cls._indexes[root] = cls(root)
+                return index
+        index.refresh()
+        return index
+
+    def _remove_directory(self, relative_directory):
+        prefix = f"{relative_directory}{os.sep}" if len(relative_directory) > 0 else ""
+        for directory in [directory for directory in self._directories if directory == relative_directory or directory.startswith(prefix)]:
+            del self._directories[directory]
+        for file in [file for file in self.files if file.startswith(prefix)]:
+            del self.files[file]
+
+    def _scan_directory(self, relative_directory, recursive):
+        """ Scans the immediate entries of a directory. New sub directories (or all of them when `recursive`) are scanned as well """
+        directory_path = os.path.join(self.root, relative_directory)
+        try:
+            directory_mtime = os.stat(directory_path).st_mtime_ns
+            entries = list(os.scandir(directory_path))
+        except OSError as e:
+            logging.error(f"[DirectoryIndex] Failed to scan the directory {directory_path}. Error: {e}")
+            self._remove_directory(relative_directory)
+            return 0
+
+        prefix = f"{relative_directory}{os.sep}" if len(relative_directory) > 0 else ""
+        # forgetting the files of this directory, they are added back from the new entries
+        for file in [file for file in self.files if file.startswith(prefix) and os.sep not in file[len(prefix):]]:
+            del self.files[file]
+
+        scanned = 1
+        sub_directories = set()
+        for entry in entries:
+            relative_path = f"{prefix}{entry.name}"
+            try:
+                if entry.is_dir():
+                    sub_directories.add(relative_path)
+                    if recursive or relative_path not in self._directories:
+                        scanned += self._scan_directory(relative_path, recursive)
+                elif entry.is_file():
+                    entry_stat = entry.stat()
+                    self.files[relative_path] = (entry_stat.st_size, entry_stat.st_ino)
+            except OSError as e:
+                logging.error(f"[DirectoryIndex] Failed to index {entry.path}. Error: {e}")
+
+        # sub directories which no longer exist
+        for directory in [directory for directory in self._directories if directory.startswith(prefix) and os.sep not in directory[len(prefix):]
+                          and len(directory) > len(prefix) and directory not in sub_directories]:
+            self._remove_directory(directory)
+        self._directories[relative_directory] = directory_mtime
+        return scanned
+
+    def _build(self):
+        start_time = time.perf_counter()
+        self.files.clear()
+        self._directories.clear()
+        scanned = self._scan_directory("", recursive=True)
+        self._is_built = True
+        logging.info(f"[DirectoryIndex] Indexed {len(self.files)} files in {scanned} directories under {self.root} in {time.perf_counter() - start_time:0.4f} seconds")
+
+    def build(self):
+        """ Indexes every file under the root """
+        with self._lock:
+            self._build()
+
+    def refresh(self):
+        """ Scans again only the directories that have changed since they were last scanned """
+        with self._lock:
+            if not self._is_built:
+                return self._build()
+            start_time = time.perf_counter()
+            scanned = 0
+            for relative_directory, mtime in sorted(self._directories.items()):
+                if relative_directory not in self._directories:
+                    # removed while refreshing its parent
+                    continue
+                try:
+                    changed = os.stat(os.path.join(self.root, relative_directory)).st_mtime_ns != mtime
+                except OSError:
+                    changed = True
+                if changed:
+                    scanned += self._scan_directory(relative_directory, recursive=False)
+        logging.info(f"[DirectoryIndex] Refreshed {scanned} changed directories under {self.root} in {time.perf_counter() - start_time:0.4f} seconds")
+
+    def _lookup(self, relative_path):
+        entry = self.files.get(relative_path)
+        if entry is not None:
+            return entry
+        # the file might have been created after the directory was indexed (eg: finished downloading while we were processing)
+        try:
+            file_stat = os.stat(os.path.join(self.root, relative_path))
+        except OSError:
+            return None
+        return (file_stat.st_size, file_stat.st_ino) if stat.S_ISREG(file_stat.st_mode) else None
+
+    def check(self, files):
+        """
+            Verifies that every file in `files` ([(relative_path, expected_size or None)]) exists under the root with the expected size.
+            Returns the list of missing files and the list of files whose size doesn't match.
+        """
+        if not self._is_built:
+            with self._lock:
+                # the index might have been built by another thread while we were waiting for the lock
+                if not self._is_built:
+                    self._build()
+        missing, size_mismatch = [], []
+        for relative_path, expected_size in files:
+            relative_path = os.path.normpath(relative_path)
+            entry = self._lookup(relative_path)
+            if entry is None:
+                missing.append(relative_path)
+            elif expected_size is not None and entry[0] != expected_size:
+                # size might have changed after the directory was indexed. Confirming with the file system before rejecting
+                try:
+                    actual_size = os.stat(os.path.join(self.root, relative_path)).st_size
+                except OSError:
+                    actual_size = None
+                if actual_size != expected_size:
+                    size_mismatch.append(relative_path)
+        return missing, size_mismatch
@@ -0,0 +1,191 @@
+import os
+import time
+import errno
+import select
+import struct
+import fnmatch
+import logging
+
+import bencoding
+
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+IN_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+
+    def __init__(self, folder):
+        """ Minimal ctypes binding to the inotify api of linux. Raises OSError when inotify is not available """
+        import ctypes
+        import ctypes.util
+
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError(errno.ENOSYS, "libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not supported by this platform")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), IN_WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {folder}")
+
+    def read_events(self, timeout):
+        """ Waits up to `timeout` seconds for events. Returns a list of (mask, file name) """
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + INOTIFY_EVENT_HEADER.size <= len(buffer):
+            _, mask, _, name_length = INOTIFY_EVENT_HEADER.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+            events.append((mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class FolderWatcher:
+
+    def __init__(self, folder, pattern="*.torrent", settle_time=0.5, poll_interval=0.5, invalid_timeout=60, use_inotify=True):
+        """
+            Watches `folder` for new files matching `pattern` and hands them out once they have been completely written.
+
+            On linux the folder is watched using inotify, and a file that has been closed after writing (or moved into the folder)
+            is handed out right away. Everywhere else (or when inotify is not available) the folder is polled every `poll_interval`
+            seconds and a file is handed out once its size and modification time have not changed for `settle_time` seconds.
+
+            In both cases a .torrent is handed out only if it can be decoded, hence partially written files are never processed.
+            Files that are still not valid after `invalid_timeout` seconds are reported and ignored until they are modified.
+            A file is handed out only once, unless it is modified afterwards.
+        """
+        self.folder = folder
+        self.pattern = pattern
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.invalid_timeout = invalid_timeout
+        # path -> (version, time at which the version was first seen)
+        self._pending = {}
+        # path -> version of the file when it was handed out (or ignored)
+        self._handled = {}
+        # files reported as completely written by inotify
+        self._closed = set()
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify(folder)
+                logging.info(f"[FolderWatcher] Watching {folder} using inotify")
+            except OSError as e:
+                logging.info(f"[FolderWatcher] inotify is not available ({e}). Polling {folder} every {poll_interval} seconds")
+        else:
+            logging.info(f"[FolderWatcher] Polling {folder} every {poll_interval} seconds")
+
+    @property
+    def uses_inotify(self):
+        return self._inotify is not None
+
+    def _scan(self):
+        files = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not fnmatch.fnmatch(entry.name, self.pattern):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    file_stat = entry.stat()
+                except OSError:
+                    continue
+                files[entry.path] = (file_stat.st_size, file_stat.st_mtime_ns)
+        return files
+
+    def _is_complete(self, path):
+        if not self.pattern.endswith(".torrent"):
+            return True
+        try:
+            with open(path, "rb") as torrent_file:
+                bencoding.scan_dict(torrent_file.read())
+            return True
+        except (OSError, ValueError, IndexError):
+            return False
+
+    def _collect_ready(self, now):
+        files = self._scan()
+        # files that have been moved away (eg: to `lancados`) can be handed out again if they are dropped in once more
+        for path in list(self._handled):
+            if path not in files:
+                del self._handled[path]
+        for path in list(self._pending):
+            if path not in files:
+                del self._pending[path]
+
+        ready = []
+        for path, version in sorted(files.items()):
+            if self._handled.get(path) == version:
+                continue
+            pending_version, first_seen = self._pending.get(path, (None, now))
+            if pending_version != version:
+                self._pending[path] = (version, now)
+                first_seen = now
+            closed = os.path.basename(path) in self._closed
+            if not closed and now - first_seen < self.settle_time:
+                continue
+            if self._is_complete(path):
+                ready.append(path)
+            elif now - first_seen >= self.invalid_timeout:
+                logging.error(f"[FolderWatcher] {path} is not a valid .torrent file even after {self.invalid_timeout} seconds. Ignoring it until it is modified")
+            else:
+                continue
+            self._handled[path] = version
+            self._pending.pop(path, None)
+        self._closed.clear()
+        return ready
+
+    def wait_for_items(self, timeout=1.0):
+        """
+            Waits up to `timeout` seconds for files to be completely written into the folder.
+            Returns the list of paths that are ready to be processed (possibly empty).
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            ready = self._collect_ready(now)
+            if ready or now >= deadline:
+                return ready
+            # while some files are settling we need to look at them again, even if nothing else happens in the folder
+            wait_time = min(deadline - now, self.settle_time if self._pending else self.poll_interval)
+            if self._inotify is None:
+                time.sleep(wait_time)
+                continue
+            for mask, name in self._inotify.read_events(wait_time):
+                if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    self._closed.add(name)
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+import contextlib
+
+from urllib.parse import urlsplit, parse_qsl
+
+
+class CachedResponse:
+
+    def __init__(self, status_code, data):
+        """ Minimal stand in for `requests.Response`, rebuilt from the status code and the json payload stored in the metadata cache """
+        self.status_code = status_code
+        self._data = data
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 400
+
+    @property
+    def text(self):
+        return json.dumps(self._data)
+
+    def json(self):
+        return self._data
+
+
+class SqliteMetadataStore:
+
+    def __init__(self, path):
+        """ Stores the metadata cache entries in a local sqlite database """
+        self.path = path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, status_code INTEGER NOT NULL, data TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    @contextlib.contextmanager
+    def _connection(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key):
+        with self._connection() as connection:
+            entry = connection.execute("SELECT status_code, data, expires FROM metadata WHERE key = ?", (key,)).fetchone()
+        return None if entry is None else {"status_code": entry[0], "data": json.loads(entry[1]), "expires": entry[2]}
+
+    def set(self, key, status_code, data, expires):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO metadata (key, status_code, data, expires) VALUES (?, ?, ?, ?)",
+                (key, status_code, json.dumps(data), expires)
+            )
+
+
+class CacheBackendMetadataStore:
+
+    __cache_key = "gg_bot::metadata_cache"
+
+    def __init__(self, cache):
+        """ Stores the metadata cache entries using the configured `modules.cache.Cache` (eg: the Mongo cache of the reuploader) """
+        self.cache = cache
+
+    def get(self, key):
+        entries = self.cache.get(self.__cache_key, {"_id": key})
+        return entries[0] if entries is not None and len(entries) > 0 else None
+
+    def set(self, key, status_code, data, expires):
+        self.cache.save(self.__cache_key, {"_id": key, "status_code": status_code, "data": data, "expires": expires})
+
+
+class MetadataCache:
+
+    # the only error responses that are cached (as negative entries). Other errors, eg: 401 / 403 from an invalid or expired
+    # api key (which is not part of the cache key) or servers that are unable to answer, are never cached
+    NEGATIVE_STATUS_CODES = (404,)
+
+    def __init__(self, store=None, ttl=604800, negative_ttl=3600):
+        """ Cache for the metadata api (TMDB, IMDB, TVMaze, MAL...) responses.
+
+            Entries are keyed by the endpoint and the normalized query, and expire after `ttl` seconds.
+            Lookups which returned no results (`404` or an empty result) are cached for `negative_ttl` seconds, other errors are never cached.
+            Identical lookups made at the same time (eg: episodes of the same season processed in parallel) are
+            batched, so that only one of them reaches the api and the rest wait for its result.
+
+            When no `store` is provided nothing is persisted, but in-flight lookups are still batched.
+        """
+        self.store = store
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+    @staticmethod
+    def get_key(endpoint, url):
+        """ Builds the cache key from the `endpoint` and the `url`. Query parameters are sorted, lower cased and the api key is dropped """
+        url_parts = urlsplit(url)
+        query = sorted(
+            (name, " ".join(value.lower().split())) for name, value in parse_qsl(url_parts.query, keep_blank_values=True) if name != "api_key"
+        )
+        return json.dumps([endpoint, url_parts.netloc.lower(), url_parts.path.lower().rstrip("/"), query])
+
+    @staticmethod
+    def is_negative(status_code, data):
+        """ Identifies responses that don't have any useful data, eg: `404` or an empty search result """
+        if not 200 <= status_code < 300 or data in (None, 0, "0", "", [], {}):
+            return True
+        if isinstance(data, dict):
+            if "results" in data and len(data["results"]) == 0:
+                return True
+            # TMDB find api returns a dictionary of empty lists when nothing is found
+            if len(data) > 0 and all(isinstance(value, list) and len(value) == 0 for value in data.values()):
+                return True
+        return False
+
+    def _read(self, key):
+        if self.store is None:
+            return None
+        try:
+            entry = self.store.get(key)
+        except Exception as e:
+            logging.error(f"[MetadataCache] Failed to read from metadata cache. Error: {e}")
+            return None
+        if entry is None or entry["expires"] < time.time():
+            return None
+        return CachedResponse(entry["status_code"], entry["data"])
+
+    def _write(self, key, response):
+        if self.store is None or not (200 <= response.status_code < 300 or response.status_code in self.NEGATIVE_STATUS_CODES):
+            return
+        try:
+            data = response.json()
+        except ValueError:
+            logging.debug(f"[MetadataCache] Response for {key} is not json. Not caching it")
+            return
+        negative = self.is_negative(response.status_code, data)
+        try:
+            self.store.set(key, response.status_code, data, time.time() + (self.negative_ttl if negative else self.ttl))
+        except Exception as e:
+            logging.error(f"[MetadataCache] Failed to write to metadata cache. Error: {e}")
+
+    def get(self, endpoint, url, fetch):
+        """
+            Returns the cached response for `url`, or calls `fetch(url)` and caches its response.
+            The returned object is either the response from `fetch` or a `CachedResponse`, both exposing `ok`, `status_code` and `json()`
+        """
+        key = self.get_key(endpoint, url)
+        cached = self._read(key)
+        if cached is not None:
+            logging.info(f"[MetadataCache] Cache hit for {endpoint}")
+            return cached
+
+        with self._in_flight_lock:
+            in_flight = self._in_flight.get(key)
+            is_leader = in_flight is None
+            if is_leader:
+                in_flight = {"event": threading.Event(), "response": None}
+                self._in_flight[key] = in_flight
+
+        if not is_leader:
+            logging.info(f"[MetadataCache] Waiting for an identical {endpoint} lookup already in progress")
+            in_flight["event"].wait()
+            if in_flight["response"] is not None:
+                return in_flight["response"]
+            # the lookup we waited for has failed. Trying again on our own
+            return fetch(url)
+
+        try:
+            logging.info(f"[MetadataCache] Cache miss for {endpoint}")
+            response = fetch(url)
+            self._write(key, response)
+            in_flight["response"] = response
+            return response
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            in_flight["event"].set()
@@ -0,0 +1,149 @@
+import time
+import queue
+import logging
+import threading
+
+
+class PipelineItem:
+
+    def __init__(self, index, source):
+        """ A single unit of work moving through the pipeline.
+
+            Every item carries its own `state` dictionary, so stages never share mutable data between items.
+            `outcome` is set by the stages (eg: `error`, `dupe`, `uploaded`) and is consumed by the pipeline finalizer.
+        """
+        self.index = index
+        self.source = source
+        self.state = {}
+        self.outcome = None
+        self.timings = {}
+        self.failed_stage = None
+
+
+class Stage:
+
+    def __init__(self, name, handler, workers=1):
+        """ A pipeline stage.
+
+            `handler(item)` must return True to pass the item to the next stage.
+            Returning False (or raising an exception) takes the item out of the pipeline.
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+
+
+class Pipeline:
+
+    _SENTINEL = object()
+
+    def __init__(self, stages, finalizer=None, queue_size=4):
+        """ Staged pipeline where every stage has its own pool of worker threads, connected by bounded queues.
+
+            Since the queues are bounded, a slow stage applies back pressure on the stages before it instead of
+            letting the work pile up in memory.
+
+            The `finalizer` is invoked exactly once for every item, when the item leaves the pipeline.
+            This is either after the last stage, or when any stage drops or fails the item.
+        """
+        self.stages = stages
+        self.finalizer = finalizer
+        self.queue_size = max(1, int(queue_size))
+
+    def _fail_item(self, stage, item, error):
+        logging.exception(f"[Pipeline] Stage '{stage.name}' failed for item {item.source}. Error: {error}")
+        if item.outcome is None:
+            item.outcome = "error"
+        return False
+
+    def _run_stage_handler(self, stage, item, serial=False):
+        start_time = time.perf_counter()
+        try:
+            return stage.handler(item) is True
+        except SystemExit as e:
+            # in serial mode the handler runs in the calling thread, quitting (eg: the user chose to quit) stops the whole run.
+            # SystemExit from a worker thread would only kill that thread and leave the pipeline hanging, hence it fails the item
+            if serial:
+                raise
+            return self._fail_item(stage, item, f"SystemExit({e.code})")
+        except Exception as e:
+            return self._fail_item(stage, item, e)
+        finally:
+            item.timings[stage.name] = time.perf_counter() - start_time
+
+    def _finalize(self, item, stage_name=None):
+        item.failed_stage = stage_name
+        logging.info(f"[Pipeline] Item {item.source} left the pipeline {'after all stages' if stage_name is None else f'at stage {stage_name}'} "
+                     f"with outcome '{item.outcome}'. Timings: { {name: round(duration, 4) for name, duration in item.timings.items()} }")
+        if self.finalizer is None:
+            return
+        try:
+            self.finalizer(item)
+        except Exception as e:
+            logging.exception(f"[Pipeline] Finalizer failed for item {item.source}. Error: {e}")
+
+    def _worker(self, stage_index, queues, exited_workers, exited_lock):
+        stage = self.stages[stage_index]
+        input_queue = queues[stage_index]
+        output_queue = queues[stage_index + 1] if stage_index + 1 < len(self.stages) else None
+        while True:
+            item = input_queue.get()
+            if item is self._SENTINEL:
+                break
+            if not self._run_stage_handler(stage, item):
+                self._finalize(item, stage.name)
+            elif output_queue is None:
+                self._finalize(item)
+            else:
+                output_queue.put(item)
+
+        # the last worker of a stage to exit signals all the workers of the next stage
+        with exited_lock:
+            exited_workers[stage_index] += 1
+            is_last_worker = exited_workers[stage_index] == stage.workers
+        if is_last_worker and output_queue is not None:
+            for _ in range(self.stages[stage_index + 1].workers):
+                output_queue.put(self._SENTINEL)
+
+    def run(self, sources, serial=False):
+        """ Pushes every source through all the stages and returns the list of items in the same order as `sources`.
+
+            In `serial` mode items are processed one after another, through all stages, in the calling thread.
+            This is needed whenever the stages may interact with the user.
+        """
+        items = [PipelineItem(index, source) for index, source in enumerate(sources)]
+
+        if serial:
+            for item in items:
+                for stage in self.stages:
+                    if not self._run_stage_handler(stage, item, serial=True):
+                        self._finalize(item, stage.name)
+                        break
+                else:
+                    self._finalize(item)
+            return items
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        exited_workers = [0] * len(self.stages)
+        exited_lock = threading.Lock()
+        threads = []
+        for stage_index, stage in enumerate(self.stages):
+            logging.info(f"[Pipeline] Starting stage '{stage.name}' with {stage.workers} worker(s)")
+            for worker_number in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(stage_index, queues, exited_workers, exited_lock),
+                    name=f"pipeline-{stage.name}-{worker_number}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        for item in items:
+            queues[0].put(item)
+        for _ in range(self.stages[0].workers):
+            queues[0].put(self._SENTINEL)
+
+        for thread in threads:
+            thread.join()
+        return items
@@ -0,0 +1,149 @@
+import time
+import logging
+import threading
+import contextlib
+
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucketRateLimiter:
+
+    # responses with which the trackers tell us to slow down
+    THROTTLE_STATUS_CODES = (429, 503)
+
+    def __init__(self, name, requests_per_second=1, burst=1, max_concurrent_requests=None, min_rate_factor=0.1, recovery_requests=10):
+        """
+            Token bucket rate limiter with adaptive concurrency, shared by all the requests made to a tracker.
+
+            Requests are sent at most at `requests_per_second` on average, with bursts of up to `burst` requests, and at most
+            `max_concurrent_requests` requests are in flight at the same time (no limit when None).
+
+            When the tracker throttles a request (429 / 503) the rate and the concurrency are halved (the rate is never reduced below
+            `min_rate_factor` of the configured rate) and no requests are sent until the `Retry-After` duration has passed.
+            After `recovery_requests` successful requests, the rate and the concurrency are increased step by step, up to the configured limits.
+        """
+        self.name = name
+        self.min_rate_factor = min_rate_factor
+        self.recovery_requests = recovery_requests
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._successes = 0
+        self._paused_until = 0
+        self._last_refill = time.monotonic()
+        self.configure(requests_per_second, burst, max_concurrent_requests)
+        self._tokens = self.burst
+
+    def configure(self, requests_per_second, burst=1, max_concurrent_requests=None):
+        """ Updates the configured limits. The current (adapted) limits are never raised above the new limits """
+        if requests_per_second <= 0 or burst < 1 or (max_concurrent_requests is not None and max_concurrent_requests < 1):
+            raise ValueError(f"Invalid rate limit for {self.name}: {requests_per_second} requests per second, burst {burst}, {max_concurrent_requests} concurrent requests")
+        with self._condition:
+            self.requests_per_second = float(requests_per_second)
+            self.burst = int(burst)
+            self.max_concurrent_requests = None if max_concurrent_requests is None else int(max_concurrent_requests)
+            self.rate = min(getattr(self, "rate", self.requests_per_second), self.requests_per_second)
+            if self.max_concurrent_requests is None:
+                self.concurrency = None
+            else:
+                current_concurrency = getattr(self, "concurrency", None)
+                self.concurrency = self.max_concurrent_requests if current_concurrency is None else min(current_concurrency, self.max_concurrent_requests)
+            self._condition.notify_all()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _get_wait_time(self, now):
+        """ Seconds to wait before a request can be sent. 0 when it can be sent right away. None when a running request needs to finish first """
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.concurrency is not None and self._in_flight >= self.concurrency:
+            return None
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        return 0
+
+    @contextlib.contextmanager
+    def slot(self):
+        """ Waits until a request can be sent to the tracker. Yields the number of seconds spent waiting in the queue """
+        start_time = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait_time = self._get_wait_time(now)
+                if wait_time == 0:
+                    break
+                self._condition.wait(wait_time)
+            self._tokens -= 1
+            self._in_flight += 1
+        queue_time = time.monotonic() - start_time
+        if queue_time > 1:
+            logging.info(f"[RateLimiter] Request to {self.name} waited {queue_time:0.2f} seconds due to rate limiting")
+        try:
+            yield queue_time
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    @staticmethod
+    def parse_retry_after(retry_after):
+        """ Returns the seconds to wait from a `Retry-After` header (seconds or http date). None when it is missing or invalid """
+        if retry_after is None:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def observe(self, status_code, retry_after=None):
+        """ Adapts the limits based on the response of the tracker """
+        with self._condition:
+            if status_code in self.THROTTLE_STATUS_CODES:
+                self._successes = 0
+                self.rate = max(self.requests_per_second * self.min_rate_factor, self.rate / 2)
+                if self.concurrency is not None:
+                    self.concurrency = max(1, self.concurrency // 2)
+                pause = self.parse_retry_after(retry_after)
+                pause = max(1.0, 1 / self.rate) if pause is None else pause
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+                self._tokens = min(self._tokens, 0)
+                logging.warning(
+                    f"[RateLimiter] {self.name} throttled the request with status {status_code}. Pausing for {pause:0.2f} seconds. "
+                    f"Reduced the limits to {self.rate:0.3f} requests per second and {self.concurrency} concurrent requests"
+                )
+            elif status_code < 500:
+                self._successes += 1
+                if self._successes >= self.recovery_requests:
+                    self._successes = 0
+                    self.rate = min(self.requests_per_second, self.rate + self.requests_per_second * self.min_rate_factor)
+                    if self.concurrency is not None:
+                        self.concurrency = min(self.max_concurrent_requests, self.concurrency + 1)
+            self._condition.notify_all()
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name, rate_limit):
+    """
+        Returns the rate limiter of the tracker `name`, shared by all the requests made to the tracker in this process.
+        `rate_limit` is the `rate_limit` section of the site template of the tracker. None when the tracker is not rate limited
+    """
+    if rate_limit is None:
+        return None
+    settings = (rate_limit["requests_per_second"], rate_limit.get("burst", 1), rate_limit.get("max_concurrent_requests"))
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(name)
+        if limiter is None:
+            limiter = _rate_limiters[name] = TokenBucketRateLimiter(name, *settings)
+        elif (limiter.requests_per_second, limiter.burst, limiter.max_concurrent_requests) != settings:
+            # the site template has been modified since the limiter was created
+            limiter.configure(*settings)
+        return limiter
@@ -0,0 +1,168 @@
+import os
+import json
+import logging
+import threading
+
+from types import MappingProxyType
+from collections.abc import Mapping
+
+
+# keys that every site template must provide
+SITE_TEMPLATE_REQUIRED_KEYS = (
+    "name", "url", "upload_form", "source", "platform", "bbcode_line_break", "technical_jargons",
+    "translation", "Required", "Optional", "Default", "dupes", "torrent_title_format",
+)
+
+
+def _freeze(value):
+    """ Returns a read only view of the json `value`. Dictionaries become mapping proxies and lists become tuples """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(sub_value) for key, sub_value in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(sub_value) for sub_value in value)
+    return value
+
+
+class SiteTemplate(Mapping):
+
+    def __init__(self, name, template):
+        """
+            Immutable, validated view of a site template (site_templates/<name>.json).
+
+            The template can be used anywhere the parsed json used to be used (`config["translation"]` etc), and it
+            additionally exposes lookups that are computed once when the template is loaded:
+                `tracker_keys` => translation key to tracker key (the `translation` of the template)
+                `translation_keys` => tracker key to translation key
+                `requirement_of` => whether a tracker key is `Required`, `Optional` or `Default`
+                `dupes` and `title_formats` => the dupe check configuration and the title formats of the tracker
+                `rate_limit` => the optional `rate_limit` section of the template (see `modules.rate_limiter`)
+                `translation_rules` => the compiled translation rules (see `utils_translation.compile_translation_rules`)
+                `title_rules` => the compiled title formatting (see `utils_translation.compile_title_rules`)
+        """
+        missing_keys = [key for key in SITE_TEMPLATE_REQUIRED_KEYS if key not in template]
+        if len(missing_keys) > 0:
+            raise ValueError(f"Site template '{name}' is missing the keys {missing_keys}")
+        invalid_translations = [key for key, value in template["translation"].items() if not isinstance(value, str)]
+        if len(invalid_translations) > 0:
+            raise ValueError(f"Site template '{name}' has invalid translations for {invalid_translations}")
+
+        rate_limit = template.get("rate_limit")
+        if rate_limit is not None and not (
+            isinstance(rate_limit, dict)
+            and isinstance(rate_limit.get("requests_per_second"), (int, float)) and rate_limit["requests_per_second"] > 0
+            and isinstance(rate_limit.get("burst", 1), int) and rate_limit.get("burst", 1) >= 1
+            and (rate_limit.get("max_concurrent_requests") is None or (isinstance(rate_limit["max_concurrent_requests"], int) and rate_limit["max_concurrent_requests"] >= 1))
+        ):
+            raise ValueError(f"Site template '{name}' has an invalid rate_limit {rate_limit}")
+
+        self.template_name = name
+        self._template = _freeze(template)
+        self.tracker_keys = self._template["translation"]
+        self.translation_keys = MappingProxyType({tracker_key: key for key, tracker_key in self.tracker_keys.items()})
+
+        requirements = {}
+        for requirement in ("Default", "Optional", "Required"):
+            # `Required` takes precedence over `Optional` which takes precedence over `Default`
+            requirements.update((key, requirement) for key in self._template[requirement])
+        self._requirements = MappingProxyType(requirements)
+        self.required_keys = frozenset(self._template["Required"])
+        self.optional_keys = frozenset(self._template["Optional"])
+
+        self.dupes = self._template["dupes"]
+        self.title_formats = self._template["torrent_title_format"]
+        # requests per second, burst and concurrent requests allowed by the tracker. None when the tracker is not rate limited
+        self.rate_limit = self._template.get("rate_limit")
+        # compiled by `utils_translation.get_translation_rules` the first time the template is used for a translation
+        self.translation_rules = None
+        # compiled by `utils_translation.get_title_rules` the first time a title is generated from the template
+        self.title_rules = None
+
+    def __getitem__(self, key):
+        return self._template[key]
+
+    def __iter__(self):
+        return iter(self._template)
+
+    def __len__(self):
+        return len(self._template)
+
+    def __repr__(self):
+        return f"SiteTemplate({self.template_name})"
+
+    def requirement_of(self, tracker_key):
+        """ Returns `Required`, `Optional` or `Default` based on where the `tracker_key` is configured. None when it is not configured """
+        return self._requirements.get(tracker_key)
+
+
+class SiteTemplateRegistry:
+
+    _registries = {}
+    _registries_lock = threading.Lock()
+
+    def __init__(self, templates_folder, acronym_to_tracker):
+        """
+            Loads and validates the site templates of every tracker in `acronym_to_tracker` once.
+
+            `get` is a dictionary lookup. `refresh` checks the modification time of the templates and reloads only the
+            ones that have been modified, hence it can be called once per upload to pick up the changes made to the templates.
+        """
+        self.templates_folder = templates_folder
+        self.acronym_to_tracker = acronym_to_tracker
+        # template name -> SiteTemplate (or the error raised while loading it)
+        self._templates = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    @classmethod
+    def load(cls, working_folder, acronym_to_tracker):
+        """ Returns the registry of the `site_templates` folder, reusing (and refreshing) the one loaded earlier in this process """
+        templates_folder = f'{working_folder}/site_templates'
+        with cls._registries_lock:
+            registry = cls._registries.get(templates_folder)
+            if registry is None:
+                registry = cls._registries[templates_folder] = cls(templates_folder, acronym_to_tracker)
+                return registry
+        registry.acronym_to_tracker = acronym_to_tracker
+        registry.refresh()
+        return registry
+
+    def _get_version(self, template_name):
+        try:
+            file_stat = os.stat(f'{self.templates_folder}/{template_name}.json')
+            return file_stat.st_mtime_ns, file_stat.st_size
+        except OSError:
+            return None
+
+    def _load_template(self, template_name):
+        try:
+            with open(f'{self.templates_folder}/{template_name}.json', "r", encoding="utf-8") as template_file:
+                return SiteTemplate(template_name, json.load(template_file))
+        except (OSError, ValueError) as e:
+            logging.warning(f"[SiteTemplateRegistry] Could not load the site template '{template_name}'. Error: {e}")
+            return e
+
+    def refresh(self):
+        """ Reloads the templates that have been modified since they were loaded. Returns the names of the reloaded templates """
+        reloaded = []
+        with self._lock:
+            for template_name in set(self.acronym_to_tracker.values()):
+                version = self._get_version(template_name)
+                if template_name in self._templates and self._versions.get(template_name) == version:
+                    continue
+                if template_name in self._templates:
+                    logging.info(f"[SiteTemplateRegistry] Site template '{template_name}' has been modified. Reloading it")
+                self._templates[template_name] = self._load_template(template_name)
+                self._versions[template_name] = version
+                reloaded.append(template_name)
+        return reloaded
+
+    def get(self, tracker):
+        """ Returns the SiteTemplate of the `tracker` (acronym). Raises KeyError for unknown trackers and ValueError for invalid templates """
+        template_name = self.acronym_to_tracker[str(tracker).lower()]
+        template = self._templates.get(template_name)
+        if template is None:
+            raise KeyError(f"Site template '{template_name}' has not been loaded")
+        if isinstance(template, Exception):
+            raise ValueError(f"Site template '{template_name}' of {tracker} is not valid. Error: {template}")
+        return template
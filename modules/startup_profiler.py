@@ -0,0 +1,93 @@
+import sys
+import time
+import builtins
+import contextlib
+
+
+class StartupProfiler:
+
+    def __init__(self, enabled=False):
+        """ Measures the startup of the entry points (`--startup-profile`).
+
+            While started, every module imported for the first time is timed (like `python -X importtime`), recording
+            both the cumulative time and the time spent in the module itself (excluding the modules it imports).
+            Initialisation steps (loading the config, parsing the arguments etc) are timed with `phase`.
+
+            When not enabled, nothing is installed and every method is a no-op.
+        """
+        self.enabled = enabled
+        self.imports = {}
+        self.phases = []
+        self._stack = []
+        self._original_import = None
+        self._start_time = None
+        self._end_time = None
+
+    @classmethod
+    def from_argv(cls, argv):
+        # this has to be decided before the arguments are parsed, otherwise the imports preceding argparse can't be timed
+        return cls(enabled="--startup-profile" in argv)
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level > 0 or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        start_time = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - start_time
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cumulative
+            if name not in self.imports:
+                self.imports[name] = (cumulative, cumulative - nested)
+
+    def start(self):
+        if not self.enabled or self._original_import is not None:
+            return
+        self._start_time = time.perf_counter()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        if self._original_import is None:
+            return
+        builtins.__import__ = self._original_import
+        self._original_import = None
+        self._end_time = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """ Times an initialisation step """
+        if not self.enabled:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start_time))
+
+    def report(self, console, top=25):
+        """ Prints the slowest imports and the initialisation steps """
+        if not self.enabled:
+            return
+        from rich.table import Table
+
+        imports_table = Table(show_header=True, title=f"[bold][deep_pink1]Slowest {top} imports[/bold][/deep_pink1]", header_style="bold cyan")
+        imports_table.add_column("Module", justify="left")
+        imports_table.add_column("Cumulative (ms)", justify="right")
+        imports_table.add_column("Self (ms)", justify="right")
+        for module, (cumulative, self_time) in sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]:
+            imports_table.add_row(module, f"{cumulative * 1000:0.2f}", f"{self_time * 1000:0.2f}")
+        console.print(imports_table, justify="center")
+
+        phases_table = Table(show_header=True, title="[bold][deep_pink1]Initialisation[/bold][/deep_pink1]", header_style="bold cyan")
+        phases_table.add_column("Step", justify="left")
+        phases_table.add_column("Time (ms)", justify="right")
+        for name, duration in self.phases:
+            phases_table.add_row(name, f"{duration * 1000:0.2f}")
+        if self._start_time is not None:
+            phases_table.add_row("[bold]Total startup[/bold]", f"{((self._end_time or time.perf_counter()) - self._start_time) * 1000:0.2f}")
+        console.print(phases_table, justify="center")
@@ -0,0 +1,216 @@
+import os
+import json
+import base64
+import binascii
+
+
+# bytes read from the files at a time. Multiple of 3, so that the base64 encoding of the chunks can be concatenated
+CHUNK_SIZE = 3 * 16 * 1024
+
+
+def _escape_header_param(value):
+    """ Quotes a multipart header parameter the same way urllib3 (and hence requests) does it (html5 strategy) """
+    escaped = []
+    for character in str(value):
+        if character == '"':
+            escaped.append("%22")
+        elif character == "\\":
+            escaped.append("\\\\")
+        elif ord(character) < 0x20 and character != "\x1b":
+            escaped.append(f"%{ord(character):02X}")
+        else:
+            escaped.append(character)
+    return "".join(escaped)
+
+
+def _read_binary(path):
+    with open(path, "rb") as binary_file:
+        while True:
+            chunk = binary_file.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _read_base64(path):
+    remainder = b""
+    with open(path, "rb") as binary_file:
+        while True:
+            chunk = binary_file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            # only complete groups of 3 bytes are encoded, the rest is encoded along with the next chunk
+            complete_length = len(chunk) - len(chunk) % 3
+            remainder = chunk[complete_length:]
+            if complete_length > 0:
+                yield base64.b64encode(chunk[:complete_length])
+    if remainder:
+        yield base64.b64encode(remainder)
+
+
+def _read_text(path, json_escaped):
+    with open(path, "r", encoding="utf-8") as text_file:
+        while True:
+            chunk = text_file.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            # the contents of the file are a json string, hence the quotes added by json.dumps are removed
+            yield json.dumps(chunk)[1:-1].encode("utf-8") if json_escaped else chunk.encode("utf-8")
+
+
+class _Part:
+
+    def __init__(self, name, value=None, path=None, encoding=None, filename=None):
+        """
+            One field of the body.
+            The value of a field is either `value`, or the contents of the file at `path` read lazily using `encoding`:
+                binary => the raw bytes of the file (multipart files)
+                base64 => the base64 encoded bytes of the file
+                text   => the text of the file
+        """
+        self.name = name
+        self.value = value
+        self.path = path
+        self.encoding = encoding
+        self.filename = filename
+
+    def chunks(self, json_escaped=False):
+        if self.path is None:
+            yield self.value
+        elif self.encoding == "base64":
+            yield from _read_base64(self.path)
+        elif self.encoding == "text":
+            yield from _read_text(self.path, json_escaped)
+        else:
+            yield from _read_binary(self.path)
+
+    def length(self, json_escaped=False):
+        if self.path is None:
+            return len(self.value)
+        if self.encoding == "base64":
+            return (os.path.getsize(self.path) + 2) // 3 * 4
+        if self.encoding == "text":
+            # the encoded length of a text file is known only after decoding it
+            return sum(len(chunk) for chunk in self.chunks(json_escaped))
+        return os.path.getsize(self.path)
+
+
+class StreamingRequestBody:
+
+    def __init__(self, payload_type="MULTI-PART", boundary=None):
+        """
+            Request body whose file backed fields are read from the disk in chunks, while the request is being sent.
+
+            `payload_type` is either `MULTI-PART` (multipart/form-data) or `JSON`.
+            Files are opened only while their part of the body is being sent and are closed right after, hence the memory
+            used by an upload doesn't depend on the size of the files and no file handles are left open.
+
+            The body can be passed as `data` to requests. Since it has a length, requests sends it with a `Content-Length`
+            and since it can be iterated more than once, the request can be retried.
+            The `Content-Type` header of the request must be set to `content_type`.
+        """
+        self.payload_type = payload_type
+        self.boundary = boundary or binascii.hexlify(os.urandom(16)).decode("ascii")
+        self._parts = []
+
+    @property
+    def content_type(self):
+        if self.payload_type == "JSON":
+            return "application/json"
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def add_field(self, name, value):
+        """ Adds a text field. Lists are sent as repeated fields (json arrays for `JSON` bodies) and None values are not sent """
+        if self.payload_type == "JSON":
+            self._parts.append(_Part(name, value=json.dumps(value).encode("utf-8")))
+            return
+        for single_value in value if isinstance(value, (list, tuple)) else [value]:
+            if single_value is None:
+                continue
+            self._parts.append(_Part(name, value=single_value if isinstance(single_value, bytes) else str(single_value).encode("utf-8")))
+
+    def add_text_file(self, name, path):
+        """ Adds a text field whose value is the text of the file at `path` """
+        self._parts.append(_Part(name, path=path, encoding="text"))
+
+    def add_base64_file(self, name, path):
+        """ Adds a text field whose value is the base64 encoded contents of the file at `path` """
+        self._parts.append(_Part(name, path=path, encoding="base64"))
+
+    def add_file(self, name, path):
+        """ Adds the file at `path` as a file upload. Files can be uploaded only in `MULTI-PART` bodies """
+        if self.payload_type == "JSON":
+            raise ValueError(f"Cannot upload the file {path} as '{name}' in a JSON body")
+        self._parts.append(_Part(name, path=path, encoding="binary", filename=os.path.basename(path)))
+
+    def to_spec(self):
+        """ Returns a json serializable description of the body. File backed fields are recorded as references to the files """
+        return {
+            "payload_type": self.payload_type,
+            "parts": [
+                {"name": part.name, "value": None if part.value is None else part.value.decode("utf-8"), "path": part.path, "encoding": part.encoding, "filename": part.filename}
+                for part in self._parts
+            ]
+        }
+
+    @classmethod
+    def from_spec(cls, spec):
+        """ Rebuilds the body described by `to_spec`. The referenced files are read only when the body is sent """
+        body = cls(payload_type=spec["payload_type"])
+        for part in spec["parts"]:
+            value = None if part["value"] is None else part["value"].encode("utf-8")
+            body._parts.append(_Part(part["name"], value=value, path=part["path"], encoding=part["encoding"], filename=part["filename"]))
+        return body
+
+    def preview(self):
+        """ Returns the fields of the body, as they can be shown to the user. The values of file backed fields are the paths of the files """
+        fields = {}
+        for part in self._parts:
+            value = part.path if part.path is not None else part.value.decode("utf-8", "replace")
+            if part.name in fields:
+                fields[part.name] = f"{fields[part.name]}\n{value}"
+            else:
+                fields[part.name] = value
+        return fields
+
+    def _multipart_header(self, part):
+        disposition = f'form-data; name="{_escape_header_param(part.name)}"'
+        if part.filename is not None:
+            disposition = f'{disposition}; filename="{_escape_header_param(part.filename)}"'
+        return f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n\r\n".encode("utf-8")
+
+    def _json_key(self, index, part):
+        return f'{", " if index > 0 else ""}{json.dumps(part.name)}: '.encode("utf-8")
+
+    def __iter__(self):
+        if self.payload_type == "JSON":
+            yield b"{"
+            for index, part in enumerate(self._parts):
+                yield self._json_key(index, part)
+                if part.path is None:
+                    yield part.value
+                    continue
+                yield b'"'
+                yield from part.chunks(json_escaped=True)
+                yield b'"'
+            yield b"}"
+            return
+
+        for part in self._parts:
+            yield self._multipart_header(part)
+            yield from part.chunks()
+            yield b"\r\n"
+        yield f"--{self.boundary}--\r\n".encode("utf-8")
+
+    def __len__(self):
+        if self.payload_type == "JSON":
+            length = 2
+            for index, part in enumerate(self._parts):
+                length += len(self._json_key(index, part)) + part.length(json_escaped=True) + (0 if part.path is None else 2)
+            return length
+
+        length = len(f"--{self.boundary}--\r\n".encode("utf-8"))
+        for part in self._parts:
+            length += len(self._multipart_header(part)) + part.length() + 2
+        return length
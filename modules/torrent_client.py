@@ -1,9 +1,14 @@
 import enum
+import importlib
 
-# from modules.torrent_clients.client_deluge import Deluge
-from modules.torrent_clients.client_qbittorrent import Qbittorrent
-from modules.torrent_clients.client_rtorrent import Rutorrent
-# from modules.torrent_clients.client_transmission import Transmission
+
+# module implementing each client. Only the module of the configured client is imported (the client libraries are slow to import)
+_client_modules = {
+    "Qbittorrent": "modules.torrent_clients.client_qbittorrent",
+    "Rutorrent": "modules.torrent_clients.client_rtorrent",
+    # "Deluge": "modules.torrent_clients.client_deluge",
+    # "Transmission": "modules.torrent_clients.client_transmission",
+}
 
 
 # Using enum class create enumerations
@@ -18,7 +23,7 @@ class TorrentClientFactory():
 
     def create(self, client_type):
         targetclass = client_type.name.capitalize()
-        return TorrentClient(globals()[targetclass]())
+        return TorrentClient(getattr(importlib.import_module(_client_modules[targetclass]), targetclass)())
 
 
 class TorrentClient:
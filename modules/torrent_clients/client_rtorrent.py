@@ -1,7 +1,8 @@
 import os
 import base64
 import logging
-import requests
+
+import utilities.utils_http as http_utilities
 
 
 rutorrent_keys = ["d.get_custom1", "d.get_bytes_done", "d.get_base_path", "hash", "d.get_name", "d.get_size_bytes"]
@@ -23,7 +24,7 @@ class Rutorrent:
     __upload_torrent_path = "/php/addtorrent.php"
 
     def __call_server(self, url, data=None, files=None, header=None):
-        response = requests.post(url, data=data if data is not None else {}, files=files, headers=header or self.header)
+        response = http_utilities.post(url, host_class="torrent_client", data=data if data is not None else {}, files=files, headers=header or self.header)
         return response.json() if 'application/json' in response.headers.get('Content-Type') else response
 
     def __get_torrent_info(self, item):
@@ -0,0 +1,87 @@
+import hashlib
+
+import bencoding
+
+
+class TorrentResourcer:
+
+    def __init__(self, raw_torrent):
+        """ Derives tracker specific variants of a .torrent by splicing new `announce`, `announce-list` and `info.source`
+            values into its raw bencoded bytes.
+
+            The torrent is scanned once. Every other value (most notably the `pieces` blob) is copied as raw bytes and is
+            never decoded or re-encoded. The SHA-1 state of the `info` dictionary up to the `source` key is computed once as
+            well, hence the infohash of each variant only costs hashing the new `source` and the keys sorted after it.
+        """
+        self.raw_torrent = bytes(raw_torrent)
+        self._view = memoryview(self.raw_torrent)
+
+        entries, end = bencoding.scan_dict(self.raw_torrent)
+        if end != len(self.raw_torrent):
+            raise ValueError(f"Invalid torrent data. Unexpected data after offset {end}")
+        self._entries = [(key, self._view[start:value_end]) for key, start, value_end in entries if key not in (b'announce', b'announce-list')]
+
+        info = [(start, value_end) for key, start, value_end in entries if key == b'info']
+        if len(info) == 0:
+            raise ValueError("Invalid torrent data. `info` dictionary not found")
+        info_entries, _ = bencoding.scan_dict(self.raw_torrent, info[0][0])
+        # keys of bencoded dictionaries are sorted, `source` goes right before the first key that sorts after it
+        self._info_before_source = [(key, self._view[start:value_end]) for key, start, value_end in info_entries if key < b'source']
+        self._info_after_source = [(key, self._view[start:value_end]) for key, start, value_end in info_entries if key > b'source']
+
+        self._info_hash_prefix = hashlib.sha1(b'd')
+        for key, value in self._info_before_source:
+            self._info_hash_prefix.update(bencoding.encode(key))
+            self._info_hash_prefix.update(value)
+
+    @staticmethod
+    def _encode_string(value):
+        value = value.encode("utf-8") if isinstance(value, str) else value
+        return bencoding.encode(value)
+
+    def _info_segments(self, source):
+        source_segments = [] if source is None else [bencoding.encode(b'source'), self._encode_string(source)]
+        after_source = [segment for key, value in self._info_after_source for segment in (bencoding.encode(key), value)]
+        return source_segments, after_source
+
+    def _segments(self, announce, source):
+        """ Raw segments (bytes / memoryview) of the variant, in the order they have to be written """
+        top_level = list(self._entries)
+        top_level.append((b'announce', self._encode_string(announce[0])))
+        if len(announce) > 1:
+            top_level.append((b'announce-list', bencoding.encode([[url.encode("utf-8")] for url in announce])))
+        top_level.sort(key=lambda entry: entry[0])
+
+        source_segments, after_source = self._info_segments(source)
+        segments = [b'd']
+        for key, value in top_level:
+            segments.append(bencoding.encode(key))
+            if key == b'info':
+                segments.append(b'd')
+                segments.extend(segment for info_key, info_value in self._info_before_source for segment in (bencoding.encode(info_key), info_value))
+                segments.extend(source_segments)
+                segments.extend(after_source)
+                segments.append(b'e')
+            else:
+                segments.append(value)
+        segments.append(b'e')
+        return segments
+
+    def infohash(self, source):
+        """ SHA-1 infohash (hex) of the variant having `source` as `info.source`. `None` removes the source """
+        info_hash = self._info_hash_prefix.copy()
+        source_segments, after_source = self._info_segments(source)
+        for segment in source_segments + after_source:
+            info_hash.update(segment)
+        info_hash.update(b'e')
+        return info_hash.hexdigest()
+
+    def derive(self, announce, source):
+        """ Returns the raw bytes of the variant having the `announce` urls (the first one becomes `announce`) and `source` """
+        return b''.join(self._segments(announce, source))
+
+    def write(self, filepath, announce, source):
+        """ Writes the variant to `filepath` without building it in memory first. Returns the infohash of the variant """
+        with open(filepath, "wb") as torrent_file:
+            torrent_file.writelines(self._segments(announce, source))
+        return self.infohash(source)
@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+import contextlib
+import concurrent.futures
+
+
+class UploadOutbox:
+
+    PENDING = "pending"
+    SENDING = "sending"
+    UPLOADED = "uploaded"
+    FAILED = "failed"
+
+    # responses which indicate that the tracker is (temporarily) unable to accept the upload. Such uploads are retried.
+    # 500 is not one of them, since some trackers (BLU) return it even when the upload was successful and retrying it
+    # would upload the same torrent twice. Such uploads are marked as failed and can be uploaded again by the user
+    RETRYABLE_STATUS_CODES = (408, 425, 429, 502, 503, 504)
+
+    def __init__(self, path, max_attempts=5, backoff=60, lease_time=900):
+        """
+            Durable record of the uploads made to the trackers, stored in a local sqlite database.
+
+            Every fully prepared upload (the request body with references to the files, and the tracker settings) is recorded
+            before it is sent, and the outcome of the upload is recorded once the tracker has responded.
+            Uploads that failed because the tracker was unavailable (timeouts, connection failures, 502, 503...) are retried by the
+            `OutboxRetrier` after `backoff * 2 ^ (attempt - 1)` seconds, at most `max_attempts` times.
+
+            Uploads are identified by the infohash of the .torrent and the tracker, and a request is never handed out for sending
+            once the same (infohash, tracker) has been uploaded, or while it is being sent by someone else.
+            An upload that is being sent is leased for `lease_time` seconds, after which it is assumed that the process sending
+            it has crashed and the upload is retried.
+
+            The api keys are never stored in the outbox, they are added when the request is sent.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease_time = lease_time
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, infohash TEXT NOT NULL, tracker TEXT NOT NULL, status TEXT NOT NULL, "
+                "request TEXT NOT NULL, tracker_settings TEXT NOT NULL, attempts INTEGER NOT NULL, next_attempt REAL NOT NULL, "
+                "lease_expires REAL NOT NULL, last_error TEXT, created REAL NOT NULL, updated REAL NOT NULL, UNIQUE (infohash, tracker))"
+            )
+
+    @contextlib.contextmanager
+    def _connection(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """ Write transaction. The database is locked as soon as it starts, hence the rows read in it cannot be claimed by anyone else """
+        with self._connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _to_entry(row):
+        if row is None:
+            return None
+        entry = dict(row)
+        entry["request"] = json.loads(entry["request"])
+        entry["tracker_settings"] = json.loads(entry["tracker_settings"])
+        return entry
+
+    def get(self, infohash, tracker):
+        """ Returns the entry of the upload of `infohash` to `tracker`. None when it has never been recorded """
+        with self._connection() as connection:
+            row = connection.execute("SELECT * FROM outbox WHERE infohash = ? AND tracker = ?", (infohash, tracker)).fetchone()
+        return self._to_entry(row)
+
+    def record(self, infohash, tracker, request, tracker_settings):
+        """
+            Records the prepared `request` for the upload of `infohash` to `tracker` and leases it to the caller.
+            Returns the id of the entry when the request can be sent now. None when it has already been uploaded or is being sent
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute("SELECT id, status, lease_expires FROM outbox WHERE infohash = ? AND tracker = ?", (infohash, tracker)).fetchone()
+            if row is None:
+                cursor = connection.execute(
+                    "INSERT INTO outbox (infohash, tracker, status, request, tracker_settings, attempts, next_attempt, lease_expires, created, updated) "
+                    "VALUES (?, ?, ?, ?, ?, 1, 0, ?, ?, ?)",
+                    (infohash, tracker, self.SENDING, json.dumps(request), json.dumps(tracker_settings, default=str), now + self.lease_time, now, now)
+                )
+                return cursor.lastrowid
+            if row["status"] == self.UPLOADED:
+                logging.info(f"[UploadOutbox] {infohash} has already been uploaded to {tracker}. Not uploading it again")
+                return None
+            if row["status"] == self.SENDING and row["lease_expires"] > now:
+                logging.info(f"[UploadOutbox] {infohash} is being uploaded to {tracker} right now. Not uploading it again")
+                return None
+            # uploads that failed earlier are sent again with the newly prepared request
+            connection.execute(
+                "UPDATE outbox SET status = ?, request = ?, tracker_settings = ?, attempts = attempts + 1, lease_expires = ?, updated = ? WHERE id = ?",
+                (self.SENDING, json.dumps(request), json.dumps(tracker_settings, default=str), now + self.lease_time, now, row["id"])
+            )
+            return row["id"]
+
+    def due_entries(self, now=None):
+        """ Returns the (id, tracker) of the uploads that are waiting to be retried, oldest first """
+        now = time.time() if now is None else now
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT id, tracker FROM outbox WHERE (status = ? AND next_attempt <= ?) OR (status = ? AND lease_expires <= ?) ORDER BY next_attempt, id",
+                (self.PENDING, now, self.SENDING, now)
+            ).fetchall()
+        return [(row["id"], row["tracker"]) for row in rows]
+
+    def claim(self, entry_id, now=None):
+        """ Leases the entry to the caller for a retry. Returns the entry, or None when it is no longer waiting to be retried """
+        now = time.time() if now is None else now
+        with self._transaction() as connection:
+            row = connection.execute("SELECT * FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+            if row is None:
+                return None
+            waiting = (row["status"] == self.PENDING and row["next_attempt"] <= now) or (row["status"] == self.SENDING and row["lease_expires"] <= now)
+            if not waiting:
+                return None
+            if row["status"] == self.SENDING:
+                logging.warning(f"[UploadOutbox] The upload of {row['infohash']} to {row['tracker']} was interrupted. Retrying it")
+            connection.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, lease_expires = ?, updated = ? WHERE id = ?",
+                (self.SENDING, now + self.lease_time, now, entry_id)
+            )
+            row = connection.execute("SELECT * FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+        return self._to_entry(row)
+
+    def complete(self, entry_id, uploaded, error=None, retryable=False):
+        """
+            Records the outcome of sending the entry. Failed uploads which are `retryable` are retried later, unless
+            they have already been attempted `max_attempts` times. Returns the new status of the entry
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute("SELECT infohash, tracker, attempts FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+            if row is None:
+                return None
+            if uploaded:
+                status, next_attempt = self.UPLOADED, 0
+            elif retryable and row["attempts"] < self.max_attempts:
+                status, next_attempt = self.PENDING, now + self.backoff * 2 ** (row["attempts"] - 1)
+                logging.info(f"[UploadOutbox] Upload of {row['infohash']} to {row['tracker']} will be retried in {next_attempt - now:0.0f} seconds. Error: {error}")
+            else:
+                status, next_attempt = self.FAILED, 0
+                logging.error(f"[UploadOutbox] Upload of {row['infohash']} to {row['tracker']} failed after {row['attempts']} attempt(s). Error: {error}")
+            connection.execute(
+                "UPDATE outbox SET status = ?, next_attempt = ?, lease_expires = 0, last_error = ?, updated = ? WHERE id = ?",
+                (status, next_attempt, error, now, entry_id)
+            )
+        return status
+
+    def relocate(self, old_folder, new_folder, move=None):
+        """
+            Updates the files referenced by the uploads that can still be sent, when they are moved from `old_folder` to `new_folder`.
+
+            `move()` (which moves the folder) is called inside the same write transaction, after the entries have been updated.
+            Hence no entry can be claimed by a retrier while the files are being moved, and when `move` raises the entries are left unchanged.
+        """
+        old_folder = old_folder.rstrip("/") + "/"
+        new_folder = new_folder.rstrip("/") + "/"
+        with self._transaction() as connection:
+            rows = connection.execute("SELECT id, request, tracker_settings FROM outbox WHERE status != ?", (self.UPLOADED,)).fetchall()
+            for row in rows:
+                request = json.loads(row["request"])
+                tracker_settings = json.loads(row["tracker_settings"])
+                relocated = False
+                for part in request["parts"]:
+                    if part.get("path") is not None and part["path"].startswith(old_folder):
+                        part["path"] = new_folder + part["path"][len(old_folder):]
+                        relocated = True
+                for key, value in tracker_settings.items():
+                    if isinstance(value, str) and value.startswith(old_folder):
+                        tracker_settings[key] = new_folder + value[len(old_folder):]
+                        relocated = True
+                if relocated:
+                    connection.execute(
+                        "UPDATE outbox SET request = ?, tracker_settings = ? WHERE id = ?", (json.dumps(request), json.dumps(tracker_settings), row["id"])
+                    )
+            if move is not None:
+                move()
+
+
+class OutboxRetrier:
+
+    def __init__(self, outbox, replay, trackers=None, tracker_workers=1, max_workers=4, poll_interval=30):
+        """
+            Retries the uploads waiting in the `outbox`, in the background.
+
+            `replay(entry)` sends the request of an entry and returns (uploaded, error, retryable).
+            When `trackers` are provided, only the uploads to those trackers are retried (eg: trackers without api keys are left alone).
+            At most `tracker_workers` uploads are retried at the same time for a tracker, and `max_workers` in total.
+            The outbox is checked for uploads that are due every `poll_interval` seconds.
+        """
+        self.outbox = outbox
+        self.replay = replay
+        self.trackers = None if trackers is None else {str(tracker).lower() for tracker in trackers}
+        self.tracker_workers = max(1, int(tracker_workers))
+        self.poll_interval = poll_interval
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="outbox-retrier")
+        self._running = {}
+        self._running_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _replay_entry(self, entry):
+        try:
+            try:
+                uploaded, error, retryable = self.replay(entry)
+            except Exception as e:
+                logging.exception(f"[OutboxRetrier] Failed to retry the upload of {entry['infohash']} to {entry['tracker']}. Error: {e}")
+                uploaded, error, retryable = False, str(e), True
+            self.outbox.complete(entry["id"], uploaded, error, retryable)
+            return uploaded
+        finally:
+            with self._running_lock:
+                self._running[entry["tracker"]] -= 1
+
+    def run_once(self):
+        """ Hands out the uploads that are due, without exceeding the limits. Returns the futures of the uploads being retried """
+        futures = []
+        for entry_id, tracker in self.outbox.due_entries():
+            if self.trackers is not None and str(tracker).lower() not in self.trackers:
+                continue
+            with self._running_lock:
+                if self._running.get(tracker, 0) >= self.tracker_workers:
+                    continue
+                entry = self.outbox.claim(entry_id)
+                if entry is None:
+                    continue
+                self._running[tracker] = self._running.get(tracker, 0) + 1
+            logging.info(f"[OutboxRetrier] Retrying the upload of {entry['infohash']} to {tracker} (attempt {entry['attempts']})")
+            futures.append(self._executor.submit(self._replay_entry, entry))
+        return futures
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.exception(f"[OutboxRetrier] Failed to check the outbox for uploads to retry. Error: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="outbox-retrier", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stops checking the outbox. The uploads being retried right now are waited for """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=True)
@@ -1,22 +1,168 @@
-import concurrent.futures
+#!/usr/bin/env python3
+
+# Batch runner for the upload assistant.
+# Uploads every .torrent present in the `launch` folder using a pool of pre-warmed worker processes.
+# Each worker imports the heavy modules, loads config.env and imports `auto_upload.py` only once, then calls its `main` for every upload.
+# With `--watch` the batch runner keeps running as a daemon and uploads every .torrent as soon as it has been completely written into the folder.
+#
+# Usage:
+#   python3 parallel.py [--folder launch] [--workers 10] [--watch] [-- <extra auto_upload.py arguments>]
+import os
+import sys
 import glob
-import subprocess
-upload_queue = []
-for arg_file in glob.glob(f'launch/*'):
-    # Since we are in batch mode, we upload every file/folder we find in the path the user specified
-    upload_queue.append(arg_file)  # append each item to the list 'upload_queue' now
+import time
+import signal
+import logging
+import argparse
+import multiprocessing
+import concurrent.futures
+import logging.handlers
+
+from dotenv import load_dotenv
+from rich import box
+from rich.table import Table
+from rich.console import Console
+
+from modules.folder_watcher import FolderWatcher
+from utilities.utils_batch import BATCH_PRELOAD_MODULES, BatchItemLogFilter, batch_worker_initializer, batch_worker_ready, run_batch_item
+
+
+console = Console()
+working_folder = os.path.dirname(os.path.realpath(__file__))
+
+
+def _get_multiprocessing_context():
+    # forkserver lets us import the heavy modules once in the server process, every worker is then forked from it
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(BATCH_PRELOAD_MODULES)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _start_log_listener(log_queue, log_file):
+    formatter = logging.Formatter('%(asctime)s | %(processName)s | %(item)s | %(name)s | %(levelname)s | %(message)s')
+    file_handler = logging.FileHandler(log_file, mode="w")
+    file_handler.setFormatter(formatter)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def _get_result(future, item):
+    try:
+        result = future.result()
+    except Exception as e:
+        logging.exception(f"[BatchRunner] Worker crashed while uploading {item}. Error: {e}")
+        result = {"item": item, "status": "crashed", "duration": 0.0, "pid": None}
+    console.print(f"[bold]{result['status']:>9}[/bold] {result['item']} ({result['duration']:0.2f}s)")
+    return result
+
 
-def run(torrent):
+def _run_batch(executor, upload_queue, extra_args):
+    futures = {executor.submit(run_batch_item, item, extra_args): item for item in upload_queue}
+    return [_get_result(future, futures[future]) for future in concurrent.futures.as_completed(futures)]
+
+
+def _watch_folder(executor, args, extra_args):
+    """
+        Daemon mode. Uploads every .torrent dropped into the folder until the batch runner is interrupted (Ctrl+C / SIGTERM).
+        Items already present in the folder when the daemon starts are uploaded as well.
+    """
+    stop_requested = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_requested.append(signum))
+
+    # starting all the workers right away, so that the first upload doesn't have to wait for a worker to warm up
+    concurrent.futures.wait([executor.submit(batch_worker_ready) for _ in range(args.workers)])
+    watcher = FolderWatcher(args.folder, settle_time=args.settle_time, poll_interval=args.poll_interval)
+    console.print(f"Watching [bold]{args.folder}[/bold] for new .torrent files. Press Ctrl+C to stop")
+    logging.info(f"[BatchRunner] Watching {args.folder} for new .torrent files")
+
+    results = []
+    futures = {}
     try:
-            bashCommand = f"python3.8 auto_upload.py --path {torrent}"
-            process = subprocess.Popen(bashCommand.split(), stdout=subprocess.PIPE)
-            output, error = process.communicate()
-            print(output)
-    except:
+        while len(stop_requested) == 0:
+            for item in watcher.wait_for_items(timeout=1.0):
+                logging.info(f"[BatchRunner] Queueing {item} for upload")
+                futures[executor.submit(run_batch_item, item, extra_args)] = item
+            for future in [future for future in futures if future.done()]:
+                results.append(_get_result(future, futures.pop(future)))
+    except KeyboardInterrupt:
         pass
+    finally:
+        watcher.close()
+
+    console.print(f"Stopping. Waiting for {len(futures)} uploads in progress to complete")
+    logging.info(f"[BatchRunner] Stopping the daemon. {len(futures)} uploads in progress")
+    for future in concurrent.futures.as_completed(futures):
+        results.append(_get_result(future, futures[future]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload all the .torrent files in a folder using a pool of pre-warmed workers")
+    parser.add_argument('-f', '--folder', default="launch", help="Folder containing the .torrent files to upload")
+    parser.add_argument('-w', '--workers', type=int, default=10, help="Number of worker processes")
+    parser.add_argument('--watch', action='store_true', help="Keep running and upload the .torrent files as soon as they are dropped into the folder")
+    parser.add_argument('--settle-time', type=float, default=0.5, help="(--watch) Seconds a file must remain unchanged before it is uploaded, when inotify is not available")
+    parser.add_argument('--poll-interval', type=float, default=0.5, help="(--watch) Seconds between two scans of the folder, when inotify is not available")
+    args, extra_args = parser.parse_known_args()
+    extra_args = [arg for arg in extra_args if arg != "--"]
+
+    upload_queue = sorted(glob.glob(f'{args.folder}/*'))
+    if len(upload_queue) == 0 and not args.watch:
+        console.print(f"Nothing to upload in [bold]{args.folder}[/bold]")
+        return
+
+    context = _get_multiprocessing_context()
+    log_queue = context.Queue()
+    listener = _start_log_listener(log_queue, f'{working_folder}/batch_upload.log')
+
+    # the parent process logs into the same queue, so that the batch log contains everything in order
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(BatchItemLogFilter())
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+    if args.watch:
+        logging.info(f"[BatchRunner] Starting the daemon for {args.folder} using {args.workers} workers. Extra arguments: {extra_args}")
+    else:
+        logging.info(f"[BatchRunner] Uploading {len(upload_queue)} items from {args.folder} using {args.workers} workers. Extra arguments: {extra_args}")
+
+    load_dotenv(f'{working_folder}/config.env')
+    if str(os.getenv("auto_mode", "")).lower() != "true":
+        console.print("[bold yellow]Workers cannot prompt for user input. Make sure that `auto_mode` is set to `true` in config.env[/bold yellow]")
+
+    # uploads that failed earlier are retried by a single retrier in this process, while the workers upload the items.
+    # auto_upload is imported only here, so that the worker processes started with `spawn` don't import it when they import this module
+    import auto_upload
+    outbox_retrier = auto_upload.start_outbox_retrier()
+
+    batch_start_time = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=context,
+        initializer=batch_worker_initializer,
+        initargs=(log_queue, "auto_upload", working_folder, BATCH_PRELOAD_MODULES)
+    ) as executor:
+        if args.watch:
+            results = _watch_folder(executor, args, extra_args)
+        else:
+            results = _run_batch(executor, upload_queue, extra_args)
+
+    if outbox_retrier is not None:
+        outbox_retrier.stop()
+    batch_run_time = time.perf_counter() - batch_start_time
+    logging.info(f"[BatchRunner] Batch completed in {batch_run_time:0.4f} seconds")
+    listener.stop()
+
+    summary_table = Table(box=box.SQUARE, title='Batch upload summary', title_style='bold #be58bf')
+    for column in ["Item", "Status", "Time (s)", "Worker"]:
+        summary_table.add_column(column, justify='center', style='#38ACEC')
+    for result in sorted(results, key=lambda result: result["item"]):
+        summary_table.add_row(os.path.basename(result["item"]), result["status"], f"{result['duration']:0.2f}", str(result["pid"]))
+    console.print(summary_table, justify='center')
+    console.print(f"Total runtime: {batch_run_time:0.2f} seconds")
 
 
-upload_queue.sort()
-executor = concurrent.futures.ThreadPoolExecutor(max_workers=10)
-futures = [executor.submit(run, item) for item in upload_queue]
-concurrent.futures.wait(futures)
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
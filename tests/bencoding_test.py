@@ -0,0 +1,126 @@
+import io
+import pytest
+
+import bencoding
+
+
+def _sample_torrent(number_of_files=3, single_file=False):
+    info = {
+        b'name': b'Movie.Name.2017.1080p.BluRay.Remux.AVC.DTS.5.1-RELEASE_GROUP',
+        b'piece length': 16384,
+        b'pieces': bytes(range(256)) * 40,
+        b'private': 1,
+        b'source': b'GG-BOT',
+    }
+    if single_file:
+        info[b'length'] = 123456789
+    else:
+        info[b'files'] = [
+            {b'length': 1000 + i, b'path': [b'Sub', f'file-{i}.mkv'.encode("utf-8")]} for i in range(number_of_files)
+        ]
+    return {
+        b'announce': b'https://tracker.example/announce',
+        b'announce-list': [[b'https://tracker.example/announce'], [b'https://backup.example/announce']],
+        b'created by': b'GG-Bot Upload Assistant',
+        b'creation date': 1650000000,
+        b'info': info,
+    }
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        pytest.param(b"spam", b"4:spam", id="bytes"),
+        pytest.param("spam", b"4:spam", id="string"),
+        pytest.param(b"", b"0:", id="empty_bytes"),
+        pytest.param(42, b"i42e", id="positive_int"),
+        pytest.param(-3, b"i-3e", id="negative_int"),
+        pytest.param([b"spam", 1], b"l4:spami1ee", id="list"),
+        pytest.param({b"cow": b"moo", b"spam": [1, 2]}, b"d3:cow3:moo4:spamli1ei2eee", id="dict"),
+    ]
+)
+def test_encode(data, expected):
+    assert bencoding.encode(data) == expected
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        pytest.param(b"4:spam", b"spam", id="bytes"),
+        pytest.param(b"0:", b"", id="empty_bytes"),
+        pytest.param(b"i-3e", -3, id="negative_int"),
+        pytest.param(b"l4:spami1ee", [b"spam", 1], id="list"),
+        pytest.param(b"d3:cow3:moo4:spamli1ei2eee", {b"cow": b"moo", b"spam": [1, 2]}, id="dict"),
+    ]
+)
+def test_decode(raw, expected):
+    assert bencoding.decode(raw) == expected
+
+
+def test_decode_accepts_memoryview_and_bytearray():
+    raw = bencoding.encode(_sample_torrent())
+    assert bencoding.decode(memoryview(raw)) == bencoding.decode(raw)
+    assert bencoding.decode(bytearray(raw)) == bencoding.decode(raw)
+
+
+def test_round_trip_torrent():
+    torrent = _sample_torrent(number_of_files=50)
+    assert bencoding.decode(bencoding.encode(torrent)) == torrent
+
+
+def test_encode_unsupported_data():
+    with pytest.raises(ValueError):
+        bencoding.encode(1.5)
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        pytest.param(b"i42", id="unterminated_int"),
+        pytest.param(b"10:spam", id="string_overflow"),
+        pytest.param(b"4spam", id="missing_colon"),
+    ]
+)
+def test_decode_invalid_data(raw):
+    with pytest.raises(ValueError):
+        bencoding.decode(raw)
+
+
+def test_encode_to_sinks():
+    torrent = _sample_torrent()
+    expected = bencoding.encode(torrent)
+
+    buffer = bytearray()
+    bencoding.encode_to(torrent, buffer)
+    assert bytes(buffer) == expected
+
+    stream = io.BytesIO()
+    bencoding.encode_to(torrent, stream)
+    assert stream.getvalue() == expected
+
+
+def test_decode_torrent_info_multi_file():
+    torrent = _sample_torrent(number_of_files=10)
+    info = bencoding.decode_torrent_info(bencoding.encode(torrent), (b'name', b'length', b'files'))
+    assert info == {b'name': torrent[b'info'][b'name'], b'files': torrent[b'info'][b'files']}
+
+
+def test_decode_torrent_info_without_info():
+    with pytest.raises(ValueError):
+        bencoding.decode_torrent_info(bencoding.encode({b'announce': b'https://tracker.example/announce'}), (b'name',))
+
+
+def test_decode_torrent_info_selected_keys():
+    info = bencoding.decode_torrent_info(bencoding.encode(_sample_torrent(single_file=True)), (b'name', b'length', b'files'))
+    assert info == {b'name': b'Movie.Name.2017.1080p.BluRay.Remux.AVC.DTS.5.1-RELEASE_GROUP', b'length': 123456789}
+
+
+def test_scan_dict():
+    torrent = _sample_torrent()
+    raw = bencoding.encode(torrent)
+    entries, end = bencoding.scan_dict(raw)
+
+    assert end == len(raw)
+    assert [key for key, _, _ in entries] == list(torrent.keys())
+    for key, start, value_end in entries:
+        assert bencoding.decode(raw[start:value_end]) == torrent[key]
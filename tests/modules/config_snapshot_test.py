@@ -0,0 +1,53 @@
+import os
+import json
+
+import pytest
+
+from modules.config_snapshot import ConfigSnapshot
+
+
+@pytest.fixture
+def working_folder(tmp_path, monkeypatch):
+    (tmp_path / "parameters" / "tracker").mkdir(parents=True)
+    (tmp_path / "samples" / "assistant").mkdir(parents=True)
+    (tmp_path / "parameters" / "tracker" / "acronyms.json").write_text(json.dumps({"gg": "GG-BOT"}))
+    (tmp_path / "parameters" / "tracker" / "api_keys.json").write_text(json.dumps(["gg_api_key", "tmdb_api_key"]))
+    (tmp_path / "samples" / "assistant" / "config.env").write_text("tmdb_api_key=\nauto_mode=\n")
+    (tmp_path / "config.env").write_text("tmdb_api_key=tmdb_key\nauto_mode=True\n")
+    monkeypatch.delenv("tmdb_api_key", raising=False)
+    monkeypatch.delenv("auto_mode", raising=False)
+    ConfigSnapshot._snapshots.clear()
+    yield tmp_path
+    ConfigSnapshot._snapshots.clear()
+    os.environ.pop("tmdb_api_key", None)
+    os.environ.pop("auto_mode", None)
+
+
+def test_config_snapshot_loads_configuration(working_folder):
+    snapshot = ConfigSnapshot.load(str(working_folder), f"{working_folder}/samples/assistant/config.env")
+
+    assert os.getenv("tmdb_api_key") == "tmdb_key"
+    assert snapshot.sample_env_keys == ["tmdb_api_key", "auto_mode"]
+    assert snapshot.acronym_to_tracker == {"gg": "GG-BOT"}
+    assert snapshot.api_keys == ["gg_api_key", "tmdb_api_key"]
+    assert snapshot.auto_mode == "true"
+
+
+def test_config_snapshot_reused_until_files_change(working_folder):
+    sample_env_file = f"{working_folder}/samples/assistant/config.env"
+    snapshot = ConfigSnapshot.load(str(working_folder), sample_env_file)
+
+    assert ConfigSnapshot.load(str(working_folder), sample_env_file) is snapshot
+
+    (working_folder / "parameters" / "tracker" / "acronyms.json").write_text(json.dumps({"gg": "GG-BOT", "new": "NEW"}))
+    reloaded = ConfigSnapshot.load(str(working_folder), sample_env_file)
+    assert reloaded is not snapshot
+    assert reloaded.acronym_to_tracker == {"gg": "GG-BOT", "new": "NEW"}
+
+
+def test_config_snapshot_custom_env_file(working_folder):
+    (working_folder / "reupload.config.env").write_text("tmdb_api_key=reupload_key\n")
+
+    ConfigSnapshot.load(str(working_folder), f"{working_folder}/samples/assistant/config.env", f"{working_folder}/reupload.config.env")
+
+    assert os.getenv("tmdb_api_key") == "reupload_key"
@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+from modules.description_renderer import DescriptionRenderer
+
+
+SIGNATURE = "[center] Uploaded with [color=red]❤[/color] using GG-BOT Upload Assistant[/center]"
+
+
+def __template(bbcode_line_break="\n", description_components=None, translation=None):
+    template = {
+        "bbcode_line_break": bbcode_line_break,
+        "translation": translation if translation is not None else {"torrent_title": "name", "description": "description"},
+    }
+    if description_components is not None:
+        template["description_components"] = description_components
+    return template
+
+
+@pytest.fixture
+def torrent_info():
+    return {
+        "custom_user_inputs": [
+            {"key": "notes", "value": "Encoded by me\\nEnjoy", "title": None},
+            {"key": "code_code", "value": "x264 --crf 18", "title": "Encode Settings"},
+            {"key": "spoiler_code", "value": "Some text", "title": " Encode Log "},
+            {"key": "spoiler_code", "value": "Other text", "title": None},
+        ],
+        "bbcode_images": "[url=https://img/1][img=350]https://img/1.png[/img][/url] ",
+    }
+
+
+@pytest.fixture(autouse=True)
+def posix_os(mocker):
+    mocker.patch("os.name", "posix")
+
+
+def test_custom_inputs_screenshots_and_signature(torrent_info):
+    template = __template(
+        bbcode_line_break="<br />",
+        description_components={"code_code": "[code][/code]", "spoiler_code": "[spoiler=TITLE_PLACEHOLDER][/spoiler]"}
+    )
+
+    assert DescriptionRenderer(torrent_info).render(template, "BLU") == (
+        "Encoded by me\\nEnjoy<br />"
+        "[code]x264 --crf 18[/code]<br />"
+        "[spoiler=Encode Log]Some text[/spoiler]<br />"
+        "[spoiler]Other text[/spoiler]<br />"
+        "<br />[center] ---------------------- [size=22]Screenshots[/size] ---------------------- <br /><br />"
+        "[url=https://img/1][img=350]https://img/1.png[/img][/url] [/center]"
+        f"<br /><br />{SIGNATURE}"
+    )
+
+
+def test_line_breaks_of_components_replaced_per_tracker():
+    torrent_info = {"custom_user_inputs": [{"key": "quote", "value": "line 1\\nline 2", "title": None}]}
+    renderer = DescriptionRenderer(torrent_info)
+    description_components = {"quote": "[quote][/quote]"}
+
+    assert renderer.render(__template("\n", description_components), "BLU").startswith("[quote]line 1\nline 2[/quote]\n")
+    assert renderer.render(__template("[br]", description_components), "BHD").startswith("[quote]line 1[br]line 2[/quote][br]")
+
+
+def test_unsupported_parts_skipped(torrent_info):
+    # the tracker supports neither custom descriptions nor screenshots in the description
+    template = __template(translation={"description": "description", "url_images": "screenshots"})
+    assert DescriptionRenderer(torrent_info).render(template, "BLU") == f"\n\n{SIGNATURE}"
+
+
+@pytest.mark.parametrize(
+    ("uploader_signature", "tracker", "expected"),
+    [
+        pytest.param(None, "BLU", SIGNATURE, id="default_signature"),
+        pytest.param(None, "BHD", "[center] Uploaded with [color=red]<3[/color] using GG-BOT Upload Assistant[/center]", id="default_signature_bhd"),
+        pytest.param("", "BLU", SIGNATURE, id="empty_signature"),
+        pytest.param("My Signature", "BLU", "[center]My Signature[/center]", id="custom_signature"),
+        pytest.param("[center]My Signature", "BLU", "[center]My Signature", id="custom_signature_with_tags"),
+    ]
+)
+def test_uploader_signature(uploader_signature, tracker, expected):
+    assert DescriptionRenderer({}, uploader_signature=uploader_signature).render(__template(), tracker) == f"\n\n{expected}"
+
+
+def test_trackers_with_same_description_share_file(tmp_path, torrent_info, mocker):
+    renderer = DescriptionRenderer(torrent_info)
+    folder = f"{tmp_path}/"
+    screenshots_spy = mocker.spy(renderer, "_render_screenshots")
+
+    blu_description = renderer.write(__template("\n"), "BLU", folder)
+    ath_description = renderer.write(__template("\n"), "ATH", folder)
+    bhd_description = renderer.write(__template("[br]"), "BHD", folder)
+
+    assert blu_description == ath_description
+    assert bhd_description != blu_description
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(blu_description), os.path.basename(bhd_description)])
+    # the screenshots are rendered once for every line break
+    assert screenshots_spy.call_count == 2
+    with open(blu_description, encoding="utf-8") as description:
+        assert description.read() == renderer.render(__template("\n"), "BLU")
+
+
+def test_description_written_once_and_not_appended(tmp_path, torrent_info, mocker):
+    renderer = DescriptionRenderer(torrent_info)
+    folder = f"{tmp_path}/"
+    description_file_path = renderer.write(__template(), "BLU", folder)
+    open_spy = mocker.patch("builtins.open", wraps=open)
+
+    assert renderer.write(__template(), "BLU", folder) == description_file_path
+    open_spy.assert_not_called()
+
+    # the file is written again when it has been removed
+    os.remove(description_file_path)
+    renderer.write(__template(), "BLU", folder)
+    open_spy.assert_called_once()
+    with open(description_file_path, encoding="utf-8") as description:
+        assert description.read() == renderer.render(__template(), "BLU")
+
+
+def test_file_needed_only_when_tracker_accepts_description():
+    assert DescriptionRenderer.needs_file(__template()) is True
+    assert DescriptionRenderer.needs_file(__template(translation={"torrent_title": "name"})) is False
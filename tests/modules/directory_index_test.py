@@ -0,0 +1,91 @@
+import os
+import shutil
+
+import pytest
+
+from modules.directory_index import DirectoryIndex
+
+
+@pytest.fixture
+def media_root(tmp_path):
+    season = tmp_path / "Show.S01.1080p.WEB-DL-GRP"
+    (season / "Extras").mkdir(parents=True)
+    (season / "Show.S01E01.mkv").write_bytes(b"0" * 100)
+    (season / "Show.S01E02.mkv").write_bytes(b"0" * 200)
+    (season / "Extras" / "Featurette.mkv").write_bytes(b"0" * 50)
+    (tmp_path / "Movie.2020.1080p.mkv").write_bytes(b"0" * 10)
+    return tmp_path
+
+
+def test_build_indexes_nested_files(media_root):
+    dir_index = DirectoryIndex(str(media_root))
+    dir_index.build()
+
+    assert dir_index.files[os.path.join("Show.S01.1080p.WEB-DL-GRP", "Extras", "Featurette.mkv")][0] == 50
+    assert dir_index.files["Movie.2020.1080p.mkv"][0] == 10
+    assert len(dir_index.files) == 4
+
+
+@pytest.mark.parametrize(
+    ("files", "expected"),
+    [
+        pytest.param([("Movie.2020.1080p.mkv", 10)], ([], []), id="single_file_present"),
+        pytest.param([("Movie.2020.1080p.mkv", None)], ([], []), id="size_not_provided"),
+        pytest.param([("Show.S01.1080p.WEB-DL-GRP/Show.S01E01.mkv", 100), ("Show.S01.1080p.WEB-DL-GRP/Extras/Featurette.mkv", 50)], ([], []), id="nested_files_present"),
+        pytest.param([("Show.S01.1080p.WEB-DL-GRP/Extras/Missing.mkv", 50)], ([os.path.join("Show.S01.1080p.WEB-DL-GRP", "Extras", "Missing.mkv")], []), id="nested_file_missing"),
+        pytest.param([("Show.S01.1080p.WEB-DL-GRP/Show.S01E02.mkv", 201)], ([], [os.path.join("Show.S01.1080p.WEB-DL-GRP", "Show.S01E02.mkv")]), id="size_mismatch"),
+        pytest.param([("Show.S01.1080p.WEB-DL-GRP/Extras", None)], (["Show.S01.1080p.WEB-DL-GRP/Extras"], []), id="directory_is_not_a_file"),
+    ]
+)
+def test_check(files, expected, media_root):
+    dir_index = DirectoryIndex(str(media_root))
+    assert dir_index.check(files) == expected
+
+
+def test_check_finds_files_created_after_build(media_root):
+    dir_index = DirectoryIndex(str(media_root))
+    dir_index.build()
+    (media_root / "New.Movie.2021.mkv").write_bytes(b"0" * 5)
+
+    assert dir_index.check([("New.Movie.2021.mkv", 5)]) == ([], [])
+
+
+def test_refresh_rescans_only_changed_directories(media_root, mocker):
+    dir_index = DirectoryIndex(str(media_root))
+    dir_index.build()
+
+    (media_root / "Another.Movie.2022.mkv").write_bytes(b"0" * 7)
+    shutil.rmtree(media_root / "Show.S01.1080p.WEB-DL-GRP" / "Extras")
+    os.utime(media_root / "Show.S01.1080p.WEB-DL-GRP", ns=(0, 0))
+    os.utime(media_root, ns=(0, 0))
+    scandir = mocker.spy(os, "scandir")
+    dir_index.refresh()
+
+    assert "Another.Movie.2022.mkv" in dir_index.files
+    assert os.path.join("Show.S01.1080p.WEB-DL-GRP", "Extras", "Featurette.mkv") not in dir_index.files
+    assert os.path.join("Show.S01.1080p.WEB-DL-GRP", "Extras") not in dir_index._directories
+    assert os.path.join("Show.S01.1080p.WEB-DL-GRP", "Show.S01E01.mkv") in dir_index.files
+    assert scandir.call_count == 2
+
+    scandir.reset_mock()
+    dir_index.refresh()
+    assert scandir.call_count == 0
+
+
+def test_load_reuses_and_refreshes_the_index_of_the_process(media_root, mocker):
+    mocker.patch.object(DirectoryIndex, "_indexes", {})
+    dir_index = DirectoryIndex.load(str(media_root))
+    assert dir_index.check([("Movie.2020.1080p.mkv", 10)]) == ([], [])
+
+    (media_root / "Another.Movie.2022.mkv").write_bytes(b"0" * 7)
+    os.utime(media_root, ns=(0, 0))
+    scandir = mocker.spy(os, "scandir")
+    stat = mocker.spy(os, "stat")
+
+    assert DirectoryIndex.load(str(media_root)) is dir_index
+    # only the root directory has changed
+    assert scandir.call_count == 1
+    assert dir_index.check([("Another.Movie.2022.mkv", 7)]) == ([], [])
+    assert "Another.Movie.2022.mkv" in dir_index.files
+    # the new file was found in the refreshed index, not with a `stat` fallback
+    assert all(not str(call.args[0]).endswith("Another.Movie.2022.mkv") for call in stat.call_args_list)
@@ -0,0 +1,74 @@
+import os
+import time
+
+import pytest
+
+import bencoding
+from modules.folder_watcher import FolderWatcher
+
+
+TORRENT = bencoding.encode({b'announce': b'https://tracker.example/announce', b'info': {b'name': b'Movie.2022.1080p.WEB-DL-GRP', b'length': 1000}})
+
+
+@pytest.fixture
+def intake(tmp_path):
+    folder = tmp_path / "launch"
+    folder.mkdir()
+    return folder
+
+
+def test_polling_watcher_waits_for_files_to_settle(intake):
+    watcher = FolderWatcher(str(intake), settle_time=0.2, poll_interval=0.05, use_inotify=False)
+    (intake / "movie.torrent").write_bytes(TORRENT)
+    (intake / "movie.nfo").write_bytes(b"nfo")
+
+    assert watcher._collect_ready(time.monotonic()) == []
+    assert watcher.wait_for_items(timeout=2) == [str(intake / "movie.torrent")]
+    # the same file is handed out only once
+    assert watcher.wait_for_items(timeout=0.3) == []
+
+
+def test_watcher_ignores_partially_written_torrents(intake):
+    watcher = FolderWatcher(str(intake), settle_time=0.05, poll_interval=0.05, use_inotify=False)
+    (intake / "movie.torrent").write_bytes(TORRENT[:-10])
+
+    assert watcher.wait_for_items(timeout=0.3) == []
+
+    (intake / "movie.torrent").write_bytes(TORRENT)
+    assert watcher.wait_for_items(timeout=2) == [str(intake / "movie.torrent")]
+
+
+def test_watcher_gives_up_on_invalid_torrents(intake, mocker):
+    watcher = FolderWatcher(str(intake), settle_time=0.05, poll_interval=0.05, invalid_timeout=0.2, use_inotify=False)
+    logging_error = mocker.patch("modules.folder_watcher.logging.error")
+    (intake / "invalid.torrent").write_bytes(b"not a torrent")
+
+    assert watcher.wait_for_items(timeout=0.5) == []
+    logging_error.assert_called_once()
+    assert watcher._pending == {}
+
+
+def test_watcher_hands_out_modified_and_dropped_again_files(intake, tmp_path):
+    watcher = FolderWatcher(str(intake), settle_time=0.05, poll_interval=0.05, use_inotify=False)
+    torrent = intake / "movie.torrent"
+    torrent.write_bytes(TORRENT)
+    assert watcher.wait_for_items(timeout=2) == [str(torrent)]
+
+    # moved out by the upload script and dropped into the folder once again
+    os.rename(torrent, tmp_path / "movie.torrent")
+    assert watcher.wait_for_items(timeout=0.1) == []
+    os.rename(tmp_path / "movie.torrent", torrent)
+    assert watcher.wait_for_items(timeout=2) == [str(torrent)]
+
+
+def test_inotify_watcher_hands_out_closed_files_without_settling(intake):
+    watcher = FolderWatcher(str(intake), settle_time=30, poll_interval=30)
+    if not watcher.uses_inotify:
+        pytest.skip("inotify is not available")
+    try:
+        start_time = time.monotonic()
+        (intake / "movie.torrent").write_bytes(TORRENT)
+        assert watcher.wait_for_items(timeout=5) == [str(intake / "movie.torrent")]
+        assert time.monotonic() - start_time < 1
+    finally:
+        watcher.close()
@@ -0,0 +1,111 @@
+import time
+import threading
+
+import pytest
+from unittest.mock import MagicMock
+
+from modules.metadata_cache import MetadataCache, SqliteMetadataStore, CacheBackendMetadataStore
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.ok = 200 <= status_code < 400
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+def _counting_fetch(status_code=200, data=None, delay=0):
+    calls = []
+
+    def fetch(url):
+        calls.append(url)
+        time.sleep(delay)
+        return FakeResponse(status_code, {"results": [{"id": 1}]} if data is None else data)
+    return calls, fetch
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    return SqliteMetadataStore(str(tmp_path / "cache" / "metadata_cache.db"))
+
+
+def test_cache_key_is_normalized():
+    first = MetadataCache.get_key("tmdb_search", "https://api.themoviedb.org/3/search/tv?api_key=abc&query=The%20Office&page=1")
+    second = MetadataCache.get_key("tmdb_search", "https://api.themoviedb.org/3/search/tv?page=1&query=the++office&api_key=xyz")
+    other_endpoint = MetadataCache.get_key("tmdb_find", "https://api.themoviedb.org/3/search/tv?page=1&query=the+office")
+    assert first == second
+    assert first != other_endpoint
+
+
+def test_response_served_from_cache(sqlite_store):
+    calls, fetch = _counting_fetch()
+    metadata_cache = MetadataCache(store=sqlite_store)
+
+    first = metadata_cache.get("tmdb_search", "https://api.themoviedb.org/3/search/tv?query=dark", fetch)
+    second = metadata_cache.get("tmdb_search", "https://api.themoviedb.org/3/search/tv?query=Dark", fetch)
+
+    assert len(calls) == 1
+    assert second.ok
+    assert second.json() == first.json()
+
+
+def test_expired_entries_are_fetched_again(sqlite_store):
+    calls, fetch = _counting_fetch()
+    metadata_cache = MetadataCache(store=sqlite_store, ttl=-1)
+    metadata_cache.get("tmdb_details", "https://api.themoviedb.org/3/tv/1", fetch)
+    metadata_cache.get("tmdb_details", "https://api.themoviedb.org/3/tv/1", fetch)
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize(
+    ("status_code", "data", "expected_calls"),
+    [
+        pytest.param(200, {"results": []}, 1, id="no_results_cached_with_negative_ttl"),
+        pytest.param(404, {"name": "Not Found"}, 1, id="not_found_cached_with_negative_ttl"),
+        pytest.param(503, {"status_message": "unavailable"}, 2, id="transient_error_not_cached"),
+        pytest.param(401, {"status_message": "Invalid API key: You must be granted a valid key."}, 2, id="invalid_api_key_not_cached"),
+        pytest.param(403, {"status_message": "Forbidden"}, 2, id="forbidden_not_cached"),
+        pytest.param(400, {"status_message": "Bad request"}, 2, id="other_client_error_not_cached"),
+    ]
+)
+def test_negative_caching(status_code, data, expected_calls, sqlite_store):
+    calls, fetch = _counting_fetch(status_code, data)
+    metadata_cache = MetadataCache(store=sqlite_store, ttl=-1, negative_ttl=60)
+    metadata_cache.get("tvmaze_lookup", "https://api.tvmaze.com/lookup/shows?imdb=tt0", fetch)
+    metadata_cache.get("tvmaze_lookup", "https://api.tvmaze.com/lookup/shows?imdb=tt0", fetch)
+    assert len(calls) == expected_calls
+
+
+def test_identical_in_flight_lookups_are_batched():
+    calls, fetch = _counting_fetch(delay=0.2)
+    metadata_cache = MetadataCache()
+    responses = []
+
+    def lookup():
+        responses.append(metadata_cache.get("tmdb_search", "https://api.themoviedb.org/3/search/tv?query=dark", fetch))
+
+    threads = [threading.Thread(target=lookup) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(responses) == 6
+    assert all(response.json() == {"results": [{"id": 1}]} for response in responses)
+
+
+def test_cache_backend_store():
+    cache = MagicMock()
+    cache.get.return_value = [{"_id": "key", "status_code": 200, "data": {"id": 1}, "expires": time.time() + 60}]
+    store = CacheBackendMetadataStore(cache)
+
+    store.set("key", 200, {"id": 1}, 100)
+    cache.save.assert_called_once_with("gg_bot::metadata_cache", {"_id": "key", "status_code": 200, "data": {"id": 1}, "expires": 100})
+
+    response = MetadataCache(store=store).get("tmdb_details", "https://api.themoviedb.org/3/movie/1", lambda url: pytest.fail("must be cached"))
+    assert response.json() == {"id": 1}
@@ -0,0 +1,126 @@
+import time
+import threading
+
+import pytest
+
+from modules.pipeline import Pipeline, Stage
+
+
+def _collecting_finalizer():
+    finalized = []
+    lock = threading.Lock()
+
+    def finalizer(item):
+        with lock:
+            finalized.append(item)
+    return finalized, finalizer
+
+
+def _append_stage(name):
+    def handler(item):
+        item.state.setdefault("visited", []).append(name)
+        return True
+    return handler
+
+
+@pytest.mark.parametrize("serial", [True, False], ids=["serial", "parallel"])
+def test_items_visit_every_stage_in_order(serial):
+    finalized, finalizer = _collecting_finalizer()
+    pipeline = Pipeline(
+        stages=[Stage("first", _append_stage("first"), workers=3), Stage("second", _append_stage("second"), workers=2)],
+        finalizer=finalizer,
+        queue_size=1
+    )
+    items = pipeline.run([f"item-{i}" for i in range(20)], serial=serial)
+
+    assert [item.source for item in items] == [f"item-{i}" for i in range(20)]
+    assert all(item.state["visited"] == ["first", "second"] for item in items)
+    assert all(item.failed_stage is None for item in items)
+    assert sorted(item.index for item in finalized) == list(range(20))
+
+
+def test_finalizer_called_exactly_once_for_dropped_and_failed_items():
+    finalized, finalizer = _collecting_finalizer()
+
+    def drop_odd(item):
+        if item.index % 2:
+            item.outcome = "missing"
+            return False
+        return True
+
+    def fail_on_four(item):
+        if item.index == 4:
+            raise ValueError("broken media")
+        return True
+
+    def exit_on_six(item):
+        if item.index == 6:
+            # a sys.exit from a worker thread must not take the pipeline down
+            raise SystemExit()
+        item.outcome = "uploaded"
+        return True
+
+    pipeline = Pipeline(
+        stages=[Stage("parse", drop_odd, workers=2), Stage("probe", fail_on_four, workers=2), Stage("upload", exit_on_six, workers=2)],
+        finalizer=finalizer
+    )
+    items = pipeline.run(list(range(10)))
+
+    assert len(finalized) == 10
+    assert len({id(item) for item in finalized}) == 10
+    outcomes = {item.index: (item.outcome, item.failed_stage) for item in items}
+    assert outcomes[1] == ("missing", "parse")
+    assert outcomes[4] == ("error", "probe")
+    assert outcomes[6] == ("error", "upload")
+    assert outcomes[0] == ("uploaded", None)
+    assert set(items[0].timings.keys()) == {"parse", "probe", "upload"}
+
+
+@pytest.mark.parametrize("exception", [SystemExit, KeyboardInterrupt])
+def test_quitting_stops_serial_pipeline(exception):
+    finalized, finalizer = _collecting_finalizer()
+
+    def quit_on_one(item):
+        if item.index == 1:
+            # eg: the user chose to quit, or pressed Ctrl-C
+            raise exception()
+        return True
+
+    pipeline = Pipeline(stages=[Stage("upload", quit_on_one)], finalizer=finalizer)
+    with pytest.raises(exception):
+        pipeline.run(list(range(3)), serial=True)
+
+    # the item being processed is not marked as failed and the next items are not processed
+    assert [item.index for item in finalized] == [0]
+
+
+def test_failing_finalizer_does_not_stop_pipeline():
+    def finalizer(item):
+        raise OSError("cannot move file")
+
+    pipeline = Pipeline(stages=[Stage("only", lambda item: True, workers=2)], finalizer=finalizer)
+    items = pipeline.run(range(5))
+    assert len(items) == 5
+
+
+def test_stages_overlap_in_parallel_mode():
+    active = {"count": 0, "max": 0}
+    lock = threading.Lock()
+
+    def slow_stage(item):
+        with lock:
+            active["count"] += 1
+            active["max"] = max(active["max"], active["count"])
+        time.sleep(0.05)
+        with lock:
+            active["count"] -= 1
+        return True
+
+    pipeline = Pipeline(stages=[Stage("io", slow_stage, workers=4)])
+    pipeline.run(range(8))
+    assert active["max"] > 1
+
+
+def test_worker_count_from_configuration():
+    assert Stage("parse", None, workers="3").workers == 3
+    assert Stage("parse", None, workers=0).workers == 1
@@ -0,0 +1,128 @@
+import time
+import threading
+
+import pytest
+
+import modules.rate_limiter as rate_limiting
+from modules.rate_limiter import TokenBucketRateLimiter
+
+
+def __send(limiter, count):
+    queue_times = []
+    for _ in range(count):
+        with limiter.slot() as queue_time:
+            queue_times.append(queue_time)
+    return queue_times
+
+
+def test_burst_sent_right_away_then_limited_to_rate():
+    limiter = TokenBucketRateLimiter("blutopia", requests_per_second=20, burst=3)
+    start_time = time.monotonic()
+    queue_times = __send(limiter, 7)
+    elapsed = time.monotonic() - start_time
+
+    assert all(queue_time < 0.01 for queue_time in queue_times[:3])
+    # the 4 requests after the burst are spread at 20 requests per second
+    assert 0.15 <= elapsed < 0.5
+    assert queue_times[-1] > 0.02
+
+
+def test_concurrent_requests_limited():
+    limiter = TokenBucketRateLimiter("blutopia", requests_per_second=1000, burst=10, max_concurrent_requests=2)
+    in_flight = []
+    max_in_flight = []
+    lock = threading.Lock()
+
+    def send():
+        with limiter.slot():
+            with lock:
+                in_flight.append(1)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.pop()
+
+    threads = [threading.Thread(target=send) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(max_in_flight) == 2
+
+
+def test_throttling_halves_limits_and_pauses():
+    limiter = TokenBucketRateLimiter("blutopia", requests_per_second=10, burst=5, max_concurrent_requests=4)
+    limiter.observe(429, retry_after="0.2")
+
+    assert limiter.rate == 5
+    assert limiter.concurrency == 2
+    start_time = time.monotonic()
+    with limiter.slot() as queue_time:
+        pass
+    assert queue_time >= 0.15
+    assert time.monotonic() - start_time >= 0.15
+
+    # the rate is never reduced below `min_rate_factor` of the configured rate
+    for _ in range(10):
+        limiter.observe(503, retry_after="0")
+    assert limiter.rate == pytest.approx(1)
+    assert limiter.concurrency == 1
+
+
+def test_limits_recover_after_successful_requests():
+    limiter = TokenBucketRateLimiter("blutopia", requests_per_second=10, burst=5, max_concurrent_requests=4, recovery_requests=2)
+    limiter.observe(429, retry_after="0")
+    limiter.observe(429, retry_after="0")
+    assert limiter.rate == 2.5 and limiter.concurrency == 1
+
+    for _ in range(2):
+        limiter.observe(200)
+    assert limiter.rate == pytest.approx(3.5)
+    assert limiter.concurrency == 2
+
+    # server errors neither reduce nor recover the limits
+    for _ in range(4):
+        limiter.observe(500)
+    assert limiter.rate == pytest.approx(3.5)
+
+    for _ in range(40):
+        limiter.observe(201)
+    assert limiter.rate == 10
+    assert limiter.concurrency == 4
+
+
+@pytest.mark.parametrize(
+    ("retry_after", "expected"),
+    [
+        pytest.param(None, None, id="missing"),
+        pytest.param("5", 5, id="seconds"),
+        pytest.param("-5", 0, id="negative"),
+        pytest.param("Wed, 21 Oct 2015 07:28:00 GMT", 0, id="past_http_date"),
+        pytest.param("soon", None, id="invalid"),
+    ]
+)
+def test_parse_retry_after(retry_after, expected):
+    assert TokenBucketRateLimiter.parse_retry_after(retry_after) == expected
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter("blutopia", requests_per_second=0)
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter("blutopia", requests_per_second=1, burst=1, max_concurrent_requests=0)
+
+
+def test_limiter_shared_per_tracker_and_reconfigured():
+    assert rate_limiting.get_rate_limiter("rate_limiter_test", None) is None
+
+    limiter = rate_limiting.get_rate_limiter("rate_limiter_test", {"requests_per_second": 1, "burst": 5, "max_concurrent_requests": 2})
+    assert rate_limiting.get_rate_limiter("rate_limiter_test", {"requests_per_second": 1, "burst": 5, "max_concurrent_requests": 2}) is limiter
+    assert rate_limiting.get_rate_limiter("other_tracker", {"requests_per_second": 1}) is not limiter
+
+    # the site template has been modified
+    assert rate_limiting.get_rate_limiter("rate_limiter_test", {"requests_per_second": 0.5, "burst": 2}) is limiter
+    assert limiter.requests_per_second == 0.5
+    assert limiter.rate == 0.5
+    assert limiter.burst == 2
+    assert limiter.concurrency is None
@@ -0,0 +1,135 @@
+import os
+import json
+import shutil
+
+import pytest
+from pathlib import Path
+
+import utilities.utils_translation as translation
+from modules.site_template_registry import SiteTemplate, SiteTemplateRegistry
+
+
+working_folder = Path(__file__).resolve().parent.parent.parent
+acronym_to_tracker = json.load(open(f"{working_folder}/parameters/tracker/acronyms.json"))
+
+
+class Args:
+    anon = False
+    disc = False
+
+
+@pytest.fixture
+def templates_folder(tmp_path):
+    folder = tmp_path / "site_templates"
+    folder.mkdir()
+    shutil.copy(f"{working_folder}/site_templates/blutopia.json", folder / "blutopia.json")
+    shutil.copy(f"{working_folder}/site_templates/beyond-hd.json", folder / "beyond-hd.json")
+    return folder
+
+
+def test_every_site_template_is_valid():
+    registry = SiteTemplateRegistry(f"{working_folder}/site_templates", acronym_to_tracker)
+
+    for acronym, template_name in acronym_to_tracker.items():
+        if not os.path.isfile(f"{working_folder}/site_templates/{template_name}.json"):
+            with pytest.raises(ValueError):
+                registry.get(acronym)
+            continue
+        template = registry.get(acronym.upper())
+        assert template.template_name == template_name
+        config = json.load(open(f"{working_folder}/site_templates/{template_name}.json"))
+        assert template["name"] == config["name"]
+        assert template.tracker_keys == config["translation"]
+
+
+def test_site_template_is_immutable():
+    template = SiteTemplate("blutopia", json.load(open(f"{working_folder}/site_templates/blutopia.json")))
+
+    with pytest.raises(TypeError):
+        template["name"] = "changed"
+    with pytest.raises(TypeError):
+        template["translation"]["torrent_title"] = "changed"
+
+
+def test_site_template_indexes():
+    template = SiteTemplate("beyond-hd", json.load(open(f"{working_folder}/site_templates/beyond-hd.json")))
+
+    assert template.tracker_keys["torrent_title"] == "name"
+    assert template.translation_keys["name"] == "torrent_title"
+    assert template.requirement_of("name") == "Required"
+    assert template.requirement_of("region") == "Optional"
+    assert template.requirement_of("unknown_key") is None
+    assert template.dupes is template["dupes"]
+    assert template.title_formats is template["torrent_title_format"]
+
+
+def test_site_template_validation():
+    config = json.load(open(f"{working_folder}/site_templates/blutopia.json"))
+    del config["translation"]
+
+    with pytest.raises(ValueError, match="translation"):
+        SiteTemplate("blutopia", config)
+
+
+@pytest.mark.parametrize(
+    ("rate_limit", "valid"),
+    [
+        pytest.param({"requests_per_second": 0.5, "burst": 2, "max_concurrent_requests": 1}, True, id="valid"),
+        pytest.param({"requests_per_second": 1}, True, id="defaults"),
+        pytest.param({"requests_per_second": 0}, False, id="zero_rate"),
+        pytest.param({"burst": 2}, False, id="missing_rate"),
+        pytest.param({"requests_per_second": 1, "max_concurrent_requests": 0}, False, id="zero_concurrency"),
+    ]
+)
+def test_site_template_rate_limit(rate_limit, valid):
+    config = json.load(open(f"{working_folder}/site_templates/blutopia.json"))
+    config["rate_limit"] = rate_limit
+
+    if not valid:
+        with pytest.raises(ValueError, match="rate_limit"):
+            SiteTemplate("blutopia", config)
+        return
+    assert dict(SiteTemplate("blutopia", config).rate_limit) == rate_limit
+
+
+@pytest.mark.parametrize("torrent_info_id", ["1", "2", "3"])
+@pytest.mark.parametrize("template_name", ["blutopia", "beyond-hd", "bit-hdtv", "speedapp"])
+def test_site_template_translates_like_the_json(template_name, torrent_info_id):
+    config = json.load(open(f"{working_folder}/site_templates/{template_name}.json"))
+    torrent_info = json.load(open(f"{working_folder}/tests/resources/translations/translation_tests/{torrent_info_id}/torrent_info.json"))
+    expected_settings, actual_settings = {}, {}
+
+    expected = translation.choose_right_tracker_keys(config, expected_settings, "GG-BOT", dict(torrent_info), Args(), working_folder)
+    actual = translation.choose_right_tracker_keys(SiteTemplate(template_name, config), actual_settings, "GG-BOT", dict(torrent_info), Args(), working_folder)
+
+    assert actual == expected
+    assert actual_settings == expected_settings
+
+
+def test_registry_reloads_only_modified_templates(templates_folder):
+    registry = SiteTemplateRegistry(str(templates_folder), {"blu": "blutopia", "bhd": "beyond-hd"})
+    blutopia = registry.get("BLU")
+    beyond_hd = registry.get("BHD")
+
+    assert registry.refresh() == []
+    assert registry.get("BLU") is blutopia
+
+    config = json.load(open(templates_folder / "blutopia.json"))
+    config["name"] = "Blutopia (modified)"
+    (templates_folder / "blutopia.json").write_text(json.dumps(config))
+    os.utime(templates_folder / "blutopia.json", ns=(0, 0))
+
+    assert registry.refresh() == ["blutopia"]
+    assert registry.get("BLU")["name"] == "Blutopia (modified)"
+    assert registry.get("BHD") is beyond_hd
+
+
+def test_registry_reports_invalid_templates(templates_folder):
+    (templates_folder / "blutopia.json").write_text("{ invalid json")
+    registry = SiteTemplateRegistry(str(templates_folder), {"blu": "blutopia", "bhd": "beyond-hd"})
+
+    with pytest.raises(ValueError):
+        registry.get("BLU")
+    with pytest.raises(KeyError):
+        registry.get("XYZ")
+    assert registry.get("BHD")["name"] == "Beyond-HD"
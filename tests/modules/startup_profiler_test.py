@@ -0,0 +1,52 @@
+import sys
+import builtins
+
+import pytest
+
+from rich.console import Console
+
+from modules.startup_profiler import StartupProfiler
+
+
+def test_startup_profiler_disabled_by_default():
+    profiler = StartupProfiler.from_argv(["auto_upload.py", "-p", "/media"])
+    original_import = builtins.__import__
+
+    profiler.start()
+    assert builtins.__import__ is original_import
+    with profiler.phase("config"):
+        pass
+    profiler.stop()
+
+    assert profiler.phases == []
+    assert profiler.imports == {}
+
+
+def test_startup_profiler_times_imports_and_phases(tmp_path, monkeypatch):
+    (tmp_path / "gg_bot_profiled_child.py").write_text("VALUE = 1\n")
+    (tmp_path / "gg_bot_profiled_parent.py").write_text("import gg_bot_profiled_child\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    original_import = builtins.__import__
+    profiler = StartupProfiler.from_argv(["auto_upload.py", "--startup-profile"])
+
+    profiler.start()
+    try:
+        with profiler.phase("imports"):
+            import gg_bot_profiled_parent  # noqa: F401
+    finally:
+        profiler.stop()
+        sys.modules.pop("gg_bot_profiled_parent", None)
+        sys.modules.pop("gg_bot_profiled_child", None)
+
+    assert builtins.__import__ is original_import
+    assert [name for name, _ in profiler.phases] == ["imports"]
+    parent_cumulative, parent_self = profiler.imports["gg_bot_profiled_parent"]
+    child_cumulative, _ = profiler.imports["gg_bot_profiled_child"]
+    assert parent_cumulative >= child_cumulative
+    assert parent_self == pytest.approx(parent_cumulative - child_cumulative)
+
+    console = Console(record=True, width=200)
+    profiler.report(console)
+    output = console.export_text()
+    assert "gg_bot_profiled_parent" in output
+    assert "Total startup" in output
@@ -0,0 +1,176 @@
+import os
+import json
+import base64
+import tracemalloc
+
+import pytest
+import requests
+from pytest_mock import mocker
+
+from modules.streaming_body import StreamingRequestBody
+
+
+BOUNDARY = "ggbotboundary"
+
+
+@pytest.fixture
+def upload_files(tmp_path):
+    torrent = tmp_path / "BLU-Movie.2022.1080p.torrent"
+    torrent.write_bytes(os.urandom(100_003))
+    description = tmp_path / "BLU-description.txt"
+    description.write_text('[center]"Movie" \\ 2022[/center]\nÜñíçødé\n' * 5000, encoding="utf-8")
+    return torrent, description
+
+
+def __requests_body(mocker, data, files, json_payload=None):
+    mocker.patch("urllib3.filepost.choose_boundary", return_value=BOUNDARY)
+    request = requests.Request("POST", "https://blutopia.xyz/api/torrents/upload", data=data, files=files, json=json_payload).prepare()
+    return request.body, request.headers["Content-Type"]
+
+
+def __streamed_body(body):
+    return b"".join(body)
+
+
+def test_multipart_body_same_as_requests(mocker, upload_files):
+    torrent, description = upload_files
+    body = StreamingRequestBody(boundary=BOUNDARY)
+    body.add_field("name", "Movie 2022 1080p WEB-DL")
+    body.add_field("anonymous", 0)
+    body.add_field("sd", False)
+    body.add_field("screenshots[]", ["https://img/1.png", "https://img/2.png"])
+    body.add_field("nothing", None)
+    body.add_text_file("description", str(description))
+    body.add_file("torrent", str(torrent))
+
+    with open(torrent, "rb") as torrent_file:
+        expected_body, expected_content_type = __requests_body(
+            mocker,
+            data={
+                "name": "Movie 2022 1080p WEB-DL",
+                "anonymous": 0,
+                "sd": False,
+                "screenshots[]": ["https://img/1.png", "https://img/2.png"],
+                "nothing": None,
+                "description": description.read_text(encoding="utf-8"),
+            },
+            files=[("torrent", torrent_file)]
+        )
+
+    assert __streamed_body(body) == expected_body
+    assert len(body) == len(expected_body)
+    assert body.content_type == expected_content_type
+
+
+def test_json_body_same_as_json_payload(upload_files):
+    torrent, description = upload_files
+    body = StreamingRequestBody(payload_type="JSON")
+    body.add_field("name", "Movie 2022 1080p WEB-DL")
+    body.add_field("screenshots", ["https://img/1.png", "https://img/2.png"])
+    body.add_base64_file("torrent", str(torrent))
+    body.add_text_file("description", str(description))
+
+    streamed = __streamed_body(body)
+    assert len(body) == len(streamed)
+    assert body.content_type == "application/json"
+    assert json.loads(streamed) == {
+        "name": "Movie 2022 1080p WEB-DL",
+        "screenshots": ["https://img/1.png", "https://img/2.png"],
+        "torrent": base64.b64encode(torrent.read_bytes()).decode("utf-8"),
+        "description": description.read_text(encoding="utf-8"),
+    }
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 3 * 16 * 1024 - 1, 3 * 16 * 1024, 3 * 16 * 1024 + 1, 200_000])
+def test_base64_encoded_in_chunks(tmp_path, size):
+    binary_file = tmp_path / "file.torrent"
+    binary_file.write_bytes(os.urandom(size))
+    body = StreamingRequestBody(payload_type="JSON")
+    body.add_base64_file("torrent", str(binary_file))
+
+    streamed = __streamed_body(body)
+    assert len(body) == len(streamed)
+    assert json.loads(streamed)["torrent"] == base64.b64encode(binary_file.read_bytes()).decode("utf-8")
+
+
+def test_body_can_be_sent_again(upload_files):
+    torrent, description = upload_files
+    body = StreamingRequestBody()
+    body.add_file("torrent", str(torrent))
+    body.add_text_file("description", str(description))
+
+    # requests are retried on connection failures, the body must be the same every time it is iterated
+    assert __streamed_body(body) == __streamed_body(body)
+
+
+def test_files_read_only_while_sending_and_closed(mocker, upload_files):
+    torrent, description = upload_files
+    body = StreamingRequestBody()
+    opened_files = []
+    original_open = open
+
+    def tracking_open(*args, **kwargs):
+        opened_file = original_open(*args, **kwargs)
+        opened_files.append(opened_file)
+        return opened_file
+
+    mocker.patch("builtins.open", side_effect=tracking_open)
+    body.add_file("torrent", str(torrent))
+    body.add_text_file("description", str(description))
+    assert opened_files == []
+
+    __streamed_body(body)
+    assert len(opened_files) == 2
+    assert all(opened_file.closed for opened_file in opened_files)
+
+
+def test_peak_memory_does_not_depend_on_file_size(tmp_path):
+    large_file = tmp_path / "large.nfo"
+    with open(large_file, "wb") as nfo:
+        for _ in range(32):
+            nfo.write(os.urandom(1024 * 1024))
+    body = StreamingRequestBody(payload_type="JSON")
+    body.add_base64_file("nfo", str(large_file))
+
+    tracemalloc.start()
+    try:
+        total_length = sum(len(chunk) for chunk in body)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert total_length == len(body)
+    assert peak < 2 * 1024 * 1024
+
+
+@pytest.mark.parametrize("payload_type", ["MULTI-PART", "JSON"])
+def test_body_rebuilt_from_spec(upload_files, payload_type):
+    torrent, description = upload_files
+    body = StreamingRequestBody(payload_type=payload_type)
+    body.add_field("name", "Movie")
+    body.add_field("screenshots[]", ["1", "2"])
+    body.add_text_file("description", str(description))
+    body.add_base64_file("nfo", str(torrent))
+
+    spec = json.loads(json.dumps(body.to_spec()))
+    rebuilt = StreamingRequestBody.from_spec(spec)
+    rebuilt.boundary = body.boundary
+    assert __streamed_body(rebuilt) == __streamed_body(body)
+
+
+def test_files_cannot_be_uploaded_in_json_bodies(upload_files):
+    torrent, _ = upload_files
+    body = StreamingRequestBody(payload_type="JSON")
+    with pytest.raises(ValueError):
+        body.add_file("torrent", str(torrent))
+
+
+def test_preview_shows_paths_of_files(upload_files):
+    torrent, description = upload_files
+    body = StreamingRequestBody()
+    body.add_field("name", "Movie")
+    body.add_field("screenshots[]", ["1", "2"])
+    body.add_text_file("description", str(description))
+    body.add_file("torrent", str(torrent))
+
+    assert body.preview() == {"name": "Movie", "screenshots[]": "1\n2", "description": str(description), "torrent": str(torrent)}
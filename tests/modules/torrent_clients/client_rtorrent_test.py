@@ -26,7 +26,7 @@ def __reuploader_dynamic_mode(param, default=None):
 
 
 def test_init_rutorrent(mocker):
-    mock_api_call = mocker.patch("requests.post")
+    mock_api_call = mocker.patch("utilities.utils_http.post")
     mocker.patch("os.getenv", side_effect=__reuploader_default_mode)
     rutorrent = Rutorrent()
 
@@ -37,7 +37,7 @@ def test_init_rutorrent(mocker):
 
 
 def test_init_rutorrent_dynamic_reuploader(mocker):
-    mock_api_call = mocker.patch("requests.post")
+    mock_api_call = mocker.patch("utilities.utils_http.post")
     mocker.patch("os.getenv", side_effect=__reuploader_dynamic_mode)
     rutorrent = Rutorrent()
 
@@ -60,7 +60,7 @@ def test_init_rutorrent_dynamic_reuploader(mocker):
     ]
 )
 def test_get_dynamic_trackers(torrent, expected, mocker):
-    mock_api_call = mocker.patch("requests.post")
+    mock_api_call = mocker.patch("utilities.utils_http.post")
     mocker.patch("os.getenv", side_effect=__reuploader_dynamic_mode)
     rutorrent = Rutorrent()
     assert rutorrent.get_dynamic_trackers(torrent) == expected
@@ -78,7 +78,7 @@ def test_get_dynamic_trackers(torrent, expected, mocker):
     ]
 )
 def test_get_dynamic_trackers_when_disabled(torrent, expected, mocker):
-    mock_api_call = mocker.patch("requests.post")
+    mock_api_call = mocker.patch("utilities.utils_http.post")
     mocker.patch("os.getenv", side_effect=__reuploader_default_mode)
     rutorrent = Rutorrent()
     assert rutorrent.get_dynamic_trackers(torrent) == expected
\ No newline at end of file
@@ -0,0 +1,81 @@
+import hashlib
+
+import pytest
+
+import bencoding
+from modules.torrent_resourcer import TorrentResourcer
+
+
+def _sample_torrent(source=b'GG-BOT', extra_info=None):
+    info = {
+        b'files': [{b'length': 1000 + index, b'path': [b'Extras', f'file-{index}.mkv'.encode("utf-8")]} for index in range(5)],
+        b'name': b'Show.S01.1080p.WEB-DL-GRP',
+        b'piece length': 16384,
+        b'pieces': hashlib.sha1(b"gg-bot").digest() * 500,
+        b'private': 1,
+    }
+    if source is not None:
+        info[b'source'] = source
+    info.update(extra_info or {})
+    return {
+        b'announce': b'https://tracker.example/announce',
+        b'announce-list': [[b'https://tracker.example/announce'], [b'https://backup.example/announce']],
+        b'comment': b'Torrent created by GG-Bot Upload Assistant',
+        b'created by': b'GG-Bot Upload Assistant',
+        b'creation date': 1650000000,
+        b'info': dict(sorted(info.items())),
+    }
+
+
+def _expected(torrent, announce, source):
+    """ Variant built by decoding and re-encoding the whole torrent """
+    expected = dict(torrent)
+    expected.pop(b'announce-list')
+    expected[b'announce'] = announce[0].encode("utf-8")
+    if len(announce) > 1:
+        expected[b'announce-list'] = [[url.encode("utf-8")] for url in announce]
+    expected[b'info'] = dict(sorted({**torrent[b'info'], b'source': source.encode("utf-8")}.items()))
+    return bencoding.encode(dict(sorted(expected.items())))
+
+
+@pytest.mark.parametrize(
+    ("torrent", "announce", "source"),
+    [
+        pytest.param(_sample_torrent(), ["https://gg-bot.com/announce/1"], "GG-BOT-TWO", id="single_announce"),
+        pytest.param(_sample_torrent(), ["https://gg-bot.com/announce/1", "https://gg-bot.com/announce/2"], "GG-BOT-TWO", id="multiple_announce"),
+        pytest.param(_sample_torrent(source=None), ["https://gg-bot.com/announce/1"], "GG-BOT", id="source_not_present"),
+        pytest.param(_sample_torrent(extra_info={b'x_cross_seed': b'abc'}), ["https://gg-bot.com/announce/1"], "GG-BOT", id="info_keys_after_source"),
+    ]
+)
+def test_derive(torrent, announce, source):
+    resourcer = TorrentResourcer(bencoding.encode(torrent))
+    expected = _expected(torrent, announce, source)
+
+    assert resourcer.derive(announce, source) == expected
+    assert resourcer.infohash(source) == hashlib.sha1(bencoding.encode(bencoding.decode(expected)[b'info'])).hexdigest()
+
+
+def test_write_all_tracker_variants(tmp_path):
+    torrent = _sample_torrent()
+    resourcer = TorrentResourcer(bencoding.encode(torrent))
+
+    infohashes = set()
+    for tracker in ["ONE", "TWO", "THREE"]:
+        infohash = resourcer.write(str(tmp_path / f"{tracker}.torrent"), [f"https://{tracker}.example/announce"], tracker)
+        written = (tmp_path / f"{tracker}.torrent").read_bytes()
+        assert written == _expected(torrent, [f"https://{tracker}.example/announce"], tracker)
+        infohashes.add(infohash)
+    assert len(infohashes) == 3
+
+
+@pytest.mark.parametrize(
+    "raw_torrent",
+    [
+        pytest.param(bencoding.encode({b'announce': b'https://tracker.example/announce'}), id="info_missing"),
+        pytest.param(bencoding.encode(_sample_torrent()) + b'garbage', id="trailing_data"),
+        pytest.param(b'l4:spame', id="not_a_dictionary"),
+    ]
+)
+def test_invalid_torrent(raw_torrent):
+    with pytest.raises(ValueError):
+        TorrentResourcer(raw_torrent)
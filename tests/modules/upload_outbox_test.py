@@ -0,0 +1,193 @@
+import time
+import threading
+
+import pytest
+
+from modules.upload_outbox import UploadOutbox, OutboxRetrier
+
+
+INFOHASH = "0123456789abcdef0123456789abcdef01234567"
+REQUEST = {"payload_type": "MULTI-PART", "parts": [{"name": "name", "value": "Movie", "path": None, "encoding": None, "filename": None}]}
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return UploadOutbox(str(tmp_path / "temp_upload" / "upload_outbox.db"), max_attempts=3, backoff=60)
+
+
+def test_uploaded_entries_are_never_sent_again(outbox):
+    entry_id = outbox.record(INFOHASH, "BLU", REQUEST, {"name": "Movie"})
+    assert entry_id is not None
+    # the upload is being sent, hence it cannot be sent by anyone else
+    assert outbox.record(INFOHASH, "BLU", REQUEST, {"name": "Movie"}) is None
+
+    assert outbox.complete(entry_id, True) == UploadOutbox.UPLOADED
+    assert outbox.record(INFOHASH, "BLU", REQUEST, {"name": "Movie"}) is None
+    assert outbox.get(INFOHASH, "BLU")["status"] == UploadOutbox.UPLOADED
+    # the same .torrent can be uploaded to the other trackers
+    assert outbox.record(INFOHASH, "ATH", REQUEST, {"name": "Movie"}) is not None
+
+
+def test_entries_persisted_across_instances(outbox):
+    entry_id = outbox.record(INFOHASH, "BLU", REQUEST, {"name": "Movie", "torrent": "/temp_upload/abc/BLU-Movie.torrent"})
+    outbox.complete(entry_id, False, "HTTP 502", retryable=True)
+
+    entry = UploadOutbox(outbox.path).get(INFOHASH, "BLU")
+    assert entry["status"] == UploadOutbox.PENDING
+    assert entry["request"] == REQUEST
+    assert entry["tracker_settings"]["torrent"] == "/temp_upload/abc/BLU-Movie.torrent"
+    assert entry["last_error"] == "HTTP 502"
+
+
+def test_retryable_failures_retried_with_backoff(outbox):
+    entry_id = outbox.record(INFOHASH, "BLU", REQUEST, {})
+    before = time.time()
+    assert outbox.complete(entry_id, False, "HTTP 503", retryable=True) == UploadOutbox.PENDING
+    next_attempt = outbox.get(INFOHASH, "BLU")["next_attempt"]
+    assert before + 60 <= next_attempt <= time.time() + 60
+
+    assert outbox.due_entries() == []
+    assert outbox.due_entries(now=next_attempt) == [(entry_id, "BLU")]
+    entry = outbox.claim(entry_id, now=next_attempt)
+    assert entry["attempts"] == 2
+    # an entry is handed out only once
+    assert outbox.claim(entry_id, now=next_attempt) is None
+
+    assert outbox.complete(entry_id, False, "HTTP 503", retryable=True) == UploadOutbox.PENDING
+    # the backoff doubles with every attempt
+    assert outbox.get(INFOHASH, "BLU")["next_attempt"] >= before + 120
+
+
+def test_failed_after_max_attempts_or_non_retryable(outbox):
+    entry_id = outbox.record(INFOHASH, "BLU", REQUEST, {})
+    assert outbox.complete(entry_id, False, "HTTP 400", retryable=False) == UploadOutbox.FAILED
+    assert outbox.due_entries(now=time.time() + 3600) == []
+
+    # the user can upload it again
+    assert outbox.record(INFOHASH, "BLU", REQUEST, {}) == entry_id
+    assert outbox.complete(entry_id, False, "HTTP 502", retryable=True) == UploadOutbox.PENDING
+    entry = outbox.claim(entry_id, now=time.time() + 3600)
+    assert entry["attempts"] == 3
+    assert outbox.complete(entry_id, False, "HTTP 502", retryable=True) == UploadOutbox.FAILED
+
+
+@pytest.mark.parametrize(
+    ("status_code", "expected"),
+    [
+        pytest.param(503, True, id="unavailable"),
+        pytest.param(429, True, id="rate_limited"),
+        pytest.param(500, False, id="upload_might_have_succeeded"),
+        pytest.param(400, False, id="bad_request"),
+    ]
+)
+def test_retryable_status_codes(status_code, expected):
+    assert (status_code in UploadOutbox.RETRYABLE_STATUS_CODES) is expected
+
+
+def test_interrupted_uploads_retried_after_lease(outbox):
+    entry_id = outbox.record(INFOHASH, "BLU", REQUEST, {})
+    assert outbox.due_entries() == []
+    assert outbox.due_entries(now=time.time() + outbox.lease_time + 1) == [(entry_id, "BLU")]
+
+
+def test_relocate_files_of_pending_entries(outbox):
+    request = {"payload_type": "MULTI-PART", "parts": [{"name": "torrent", "value": None, "path": "/gg/temp_upload/abc/BLU-Movie.torrent", "encoding": "binary", "filename": "BLU-Movie.torrent"}]}
+    entry_id = outbox.record(INFOHASH, "BLU", request, {"torrent": "/gg/temp_upload/abc/BLU-Movie.torrent", "anonymous": 0})
+    outbox.complete(entry_id, False, "timeout", retryable=True)
+
+    outbox.relocate("/gg/temp_upload/abc/", "/gg/cache/abc/")
+    entry = outbox.get(INFOHASH, "BLU")
+    assert entry["request"]["parts"][0]["path"] == "/gg/cache/abc/BLU-Movie.torrent"
+    assert entry["tracker_settings"] == {"torrent": "/gg/cache/abc/BLU-Movie.torrent", "anonymous": 0}
+
+
+
+def test_relocate_moves_files_in_the_same_transaction(outbox):
+    request = {"payload_type": "MULTI-PART", "parts": [{"name": "torrent", "value": None, "path": "/gg/temp_upload/abc/BLU-Movie.torrent", "encoding": "binary", "filename": "BLU-Movie.torrent"}]}
+    entry_id = outbox.record(INFOHASH, "BLU", request, {"torrent": "/gg/temp_upload/abc/BLU-Movie.torrent"})
+    outbox.complete(entry_id, False, "timeout", retryable=True)
+    paths_during_move = []
+
+    def move():
+        # the relocation is not visible to the retrier until the files have been moved
+        paths_during_move.append(outbox.get(INFOHASH, "BLU")["request"]["parts"][0]["path"])
+        raise OSError("No space left on device")
+
+    with pytest.raises(OSError):
+        outbox.relocate("/gg/temp_upload/abc/", "/gg/cache/abc/", move=move)
+    assert paths_during_move == ["/gg/temp_upload/abc/BLU-Movie.torrent"]
+    # the files were not moved, hence the entries still refer to the old folder
+    assert outbox.get(INFOHASH, "BLU")["request"]["parts"][0]["path"] == "/gg/temp_upload/abc/BLU-Movie.torrent"
+
+    outbox.relocate("/gg/temp_upload/abc/", "/gg/cache/abc/", move=lambda: paths_during_move.append("moved"))
+    assert paths_during_move[-1] == "moved"
+    assert outbox.get(INFOHASH, "BLU")["request"]["parts"][0]["path"] == "/gg/cache/abc/BLU-Movie.torrent"
+
+def __pending_entries(outbox, trackers):
+    entry_ids = []
+    for index, tracker in enumerate(trackers):
+        entry_id = outbox.record(f"{index:040d}", tracker, REQUEST, {})
+        outbox.complete(entry_id, False, "timeout", retryable=True)
+        entry_ids.append(entry_id)
+    outbox.backoff = 0
+    # making the entries due right away
+    with outbox._connection() as connection:
+        connection.execute("UPDATE outbox SET next_attempt = 0")
+    return entry_ids
+
+
+def test_retrier_limits_uploads_per_tracker(outbox):
+    __pending_entries(outbox, ["BLU", "BLU", "BLU", "ATH"])
+    release = threading.Event()
+    running = []
+
+    def replay(entry):
+        running.append(entry["tracker"])
+        release.wait(5)
+        return True, None, False
+
+    retrier = OutboxRetrier(outbox, replay, tracker_workers=1, max_workers=4)
+    futures = retrier.run_once()
+    assert len(futures) == 2
+    # while an upload to BLU is being retried the other BLU uploads wait
+    assert retrier.run_once() == []
+    release.set()
+    for future in futures:
+        future.result()
+    assert sorted(running) == ["ATH", "BLU"]
+
+    for future in retrier.run_once():
+        future.result()
+    retrier.stop()
+    assert len(outbox.due_entries()) == 1
+
+
+def test_retrier_records_outcome_and_skips_unknown_trackers(outbox):
+    __pending_entries(outbox, ["BLU", "ATH", "XYZ"])
+    outcomes = {"BLU": (True, None, False), "ATH": (False, "HTTP 400", False)}
+
+    retrier = OutboxRetrier(outbox, lambda entry: outcomes[entry["tracker"]], trackers=["blu", "ath"])
+    for future in retrier.run_once():
+        future.result()
+    retrier.stop()
+
+    assert outbox.get(f"{0:040d}", "BLU")["status"] == UploadOutbox.UPLOADED
+    assert outbox.get(f"{1:040d}", "ATH")["status"] == UploadOutbox.FAILED
+    assert outbox.get(f"{2:040d}", "XYZ")["status"] == UploadOutbox.PENDING
+
+
+def test_retrier_treats_exceptions_as_retryable(outbox):
+    __pending_entries(outbox, ["BLU"])
+
+    def replay(entry):
+        raise ConnectionError("tracker is down")
+
+    outbox.backoff = 60
+    retrier = OutboxRetrier(outbox, replay)
+    for future in retrier.run_once():
+        future.result()
+    retrier.stop()
+
+    entry = outbox.get(f"{0:040d}", "BLU")
+    assert entry["status"] == UploadOutbox.PENDING
+    assert entry["last_error"] == "tracker is down"
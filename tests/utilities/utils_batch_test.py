@@ -0,0 +1,151 @@
+import os
+import sys
+import queue
+import logging
+
+import pytest
+from pathlib import Path
+
+import utilities.utils_batch as batch_utilities
+
+
+upload_module = """
+import os
+import sys
+import shutil
+import logging
+
+# process level state, initialised when the module is imported
+initialised = []
+initialised.append(os.getpid())
+retry_outbox_values = []
+
+
+def main(argv=None, retry_outbox=True):
+    retry_outbox_values.append(retry_outbox)
+    print("uploading", argv[1])
+    logging.info("log line from upload script")
+    if argv[1].endswith("exit.torrent"):
+        sys.exit(1)
+    if argv[1].endswith("crash.torrent"):
+        raise ValueError("something went wrong")
+    shutil.move(argv[1], "lancados/" + os.path.basename(argv[1]))
+"""
+
+
+@pytest.fixture
+def batch_worker(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    (tmp_path / "launch").mkdir()
+    (tmp_path / "lancados").mkdir()
+    (tmp_path / "batch_test_upload.py").write_text(upload_module)
+    log_queue = queue.Queue()
+
+    root_logger = logging.getLogger()
+    original_handlers = list(root_logger.handlers)
+    original_level = root_logger.level
+    batch_utilities.batch_worker_initializer(log_queue, "batch_test_upload", str(tmp_path), ["json"])
+    yield tmp_path, log_queue
+    sys.modules.pop("batch_test_upload", None)
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    for handler in original_handlers:
+        root_logger.addHandler(handler)
+    root_logger.setLevel(original_level)
+
+
+def _drain(log_queue):
+    records = []
+    while not log_queue.empty():
+        records.append(log_queue.get())
+    return records
+
+
+@pytest.mark.parametrize(
+    ("torrent", "expected_status"),
+    [
+        pytest.param("movie.torrent", "uploaded", id="uploaded"),
+        pytest.param("exit.torrent", "exited", id="sys_exit"),
+        pytest.param("crash.torrent", "failed", id="exception"),
+    ]
+)
+def test_run_batch_item_status(batch_worker, torrent, expected_status):
+    tmp_path, log_queue = batch_worker
+    (tmp_path / "launch" / torrent).touch()
+
+    result = batch_utilities.run_batch_item(f"launch/{torrent}")
+
+    assert result["status"] == expected_status
+    assert result["item"] == f"launch/{torrent}"
+    assert result["pid"] == os.getpid()
+    assert result["duration"] >= 0
+
+
+def test_run_batch_item_streams_output_as_log_records(batch_worker):
+    tmp_path, log_queue = batch_worker
+    (tmp_path / "launch" / "movie.torrent").touch()
+    _drain(log_queue)
+
+    batch_utilities.run_batch_item("launch/movie.torrent", ["-t", "BLU"])
+
+    records = _drain(log_queue)
+    output_records = [record for record in records if record.name == "BatchRunner.output"]
+    assert [record.getMessage() for record in output_records] == ["uploading launch/movie.torrent"]
+    script_records = [record for record in records if record.getMessage() == "log line from upload script"]
+    assert len(script_records) == 1
+    assert all(record.item == "movie.torrent" for record in output_records + script_records)
+
+
+
+def test_upload_module_initialised_once_per_worker(batch_worker):
+    tmp_path, log_queue = batch_worker
+    for torrent in ["movie.torrent", "show.torrent", "exit.torrent"]:
+        (tmp_path / "launch" / torrent).touch()
+
+    statuses = [batch_utilities.run_batch_item(f"launch/{torrent}")["status"] for torrent in ["movie.torrent", "show.torrent", "exit.torrent"]]
+
+    assert statuses == ["uploaded", "uploaded", "exited"]
+    # the upload module is imported by the worker initializer, `main` is then called for every item
+    assert sys.modules["batch_test_upload"].initialised == [os.getpid()]
+    # the failed uploads are retried by the batch runner, not by the workers
+    assert sys.modules["batch_test_upload"].retry_outbox_values == [False, False, False]
+
+def test_logging_stream_writer_emits_complete_lines():
+    records = []
+
+    class _Collector(logging.Handler):
+        def emit(self, record):
+            records.append(record.getMessage())
+
+    logger = logging.getLogger("utils_batch_test.writer")
+    logger.propagate = False
+    logger.addHandler(_Collector())
+    logger.setLevel(logging.INFO)
+
+    writer = batch_utilities.LoggingStreamWriter(logger, logging.INFO)
+    writer.write("first line\nsecond ")
+    assert records == ["first line"]
+    writer.write("line\n\n")
+    writer.write("partial")
+    writer.flush()
+    assert records == ["first line", "second line", "partial"]
+
+
+@pytest.mark.parametrize(
+    ("folder", "expected_status"),
+    [
+        pytest.param("lancados", "uploaded", id="uploaded"),
+        pytest.param("dupe", "dupe", id="dupe"),
+        pytest.param("error", "error", id="error"),
+        pytest.param("missing", "missing", id="missing"),
+        pytest.param("launch", "pending", id="pending"),
+        pytest.param(None, "unknown", id="unknown"),
+    ]
+)
+def test_resolve_batch_item_status(tmp_path, folder, expected_status):
+    if folder is not None:
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "movie.torrent").touch()
+    item = str(tmp_path / "launch" / "movie.torrent")
+    assert batch_utilities.resolve_batch_item_status(item, str(tmp_path)) == expected_status
@@ -139,3 +139,12 @@ def test_search_for_dupes_api_api_key_based(site_template, imdb, tmdb, tvmaze, a
     mocker.patch("os.getenv", return_value=80)
     assert search_for_dupes_api(site_template, imdb, tmdb, tvmaze, torrent_info,
                                 tracker_api_key, auto_mode, working_folder, "true") == expected
+
+
+@pytest.mark.parametrize(("site_template", "imdb", "tmdb", "tvmaze", "auto_mode", "torrent_info", "expected"), __fetch_dupe_check_test_data())
+def test_search_for_dupes_api_with_preloaded_site_template(site_template, imdb, tmdb, tvmaze, auto_mode, torrent_info, expected, mocker):
+    # when the site template is provided, it must not be read again from the working folder
+    mocker.patch("os.getenv", return_value=80)
+    config = json.load(open(f'{working_folder}/tests/resources/dupes/templates/{site_template}.json'))
+    assert search_for_dupes_api(site_template, imdb, tmdb, tvmaze, torrent_info,
+                                tracker_api_key, auto_mode, "/path/does/not/exist", "true", config=config) == expected
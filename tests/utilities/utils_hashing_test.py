@@ -0,0 +1,180 @@
+import os
+import sys
+import hashlib
+import textwrap
+import subprocess
+
+import pytest
+
+import utilities.utils_hashing as hashing_utilities
+from utilities.utils_torrent import GGBOTTorrent, generate_pieces
+
+
+PIECE_SIZE = 16 * 1024
+
+
+@pytest.fixture
+def media_folder(tmp_path):
+    media = tmp_path / "Show.S01.1080p.WEB-DL-GRP"
+    (media / "Extras").mkdir(parents=True)
+    # file sizes are chosen so that pieces span the boundaries of the files
+    (media / "Show.S01E01.mkv").write_bytes(os.urandom(PIECE_SIZE * 2 + 1000))
+    (media / "Show.S01E02.mkv").write_bytes(os.urandom(500))
+    (media / "Show.S01E03.mkv").write_bytes(os.urandom(PIECE_SIZE * 3 - 1500))
+    (media / "Extras" / "Featurette.mkv").write_bytes(os.urandom(PIECE_SIZE))
+    (media / "Show.S01.nfo").write_bytes(b"nfo")
+    return media
+
+
+def _torf_pieces(media):
+    torrent = GGBOTTorrent(str(media), exclude_globs=["*.nfo"], private=True)
+    torrent.piece_size = PIECE_SIZE
+    torrent.generate()
+    return torrent
+
+
+def _expected_pieces(files):
+    data = b''.join(open(path, "rb").read() for path, _ in files)
+    return b''.join(hashlib.sha1(data[index:index + PIECE_SIZE]).digest() for index in range(0, len(data), PIECE_SIZE))
+
+
+@pytest.mark.parametrize(
+    ("number_of_ranges", "expected"),
+    [
+        pytest.param(3, [(0, 4), (4, 7), (7, 10)], id="uneven_ranges"),
+        pytest.param(20, [(index, index + 1) for index in range(10)], id="more_ranges_than_pieces"),
+        pytest.param(1, [(0, 10)], id="single_range"),
+    ]
+)
+def test_get_piece_ranges(number_of_ranges, expected):
+    assert hashing_utilities._get_piece_ranges(10, number_of_ranges) == expected
+
+
+def test_hash_piece_range_spanning_file_boundaries(tmp_path):
+    files = []
+    for name, size in [("a.mkv", 1000), ("b.mkv", PIECE_SIZE + 10), ("c.mkv", 0), ("d.mkv", PIECE_SIZE * 2)]:
+        (tmp_path / name).write_bytes(os.urandom(size))
+        files.append((str(tmp_path / name), size))
+    layout, _ = hashing_utilities._get_file_layout(files)
+    expected = _expected_pieces(files)
+
+    assert hashing_utilities.hash_piece_range(layout, PIECE_SIZE, 0, 4) == expected
+    # a range starting and ending in the middle of the torrent
+    assert hashing_utilities.hash_piece_range(layout, PIECE_SIZE, 1, 3) == expected[20:60]
+
+
+def test_hash_pieces_matches_torf(media_folder):
+    torrent = _torf_pieces(media_folder)
+    files = [(str(filepath), file.size) for filepath, file in zip(torrent.filepaths, torrent.files)]
+    progress = []
+
+    pieces = hashing_utilities.hash_pieces(files, PIECE_SIZE, workers=1, callback=lambda done, total: progress.append((done, total)))
+
+    assert pieces == torrent.metainfo['info']['pieces']
+    assert progress[-1] == (len(pieces) // 20, len(pieces) // 20)
+
+
+def test_hash_pieces_using_thread_pool(media_folder, mocker):
+    mocker.patch("utilities.utils_hashing.PARALLEL_HASHING_THRESHOLD", 0)
+    torrent = _torf_pieces(media_folder)
+    files = [(str(filepath), file.size) for filepath, file in zip(torrent.filepaths, torrent.files)]
+
+    assert hashing_utilities.hash_pieces(files, PIECE_SIZE, workers=2) == torrent.metainfo['info']['pieces']
+
+
+def test_hash_pieces_from_unguarded_script(tmp_path):
+    # auto_reupload.py has no `if __name__ == "__main__"` guard, the workers must not re-run the script
+    media = tmp_path / "Movie.2020.mkv"
+    media.write_bytes(os.urandom(PIECE_SIZE * 8 + 100))
+    script = tmp_path / "script.py"
+    script.write_text(textwrap.dedent(f"""
+        import utilities.utils_hashing as hashing_utilities
+
+        with open({str(tmp_path / "runs.txt")!r}, "a") as runs:
+            runs.write("run\\n")
+        hashing_utilities.PARALLEL_HASHING_THRESHOLD = 0
+        print(hashing_utilities.hash_pieces([({str(media)!r}, {media.stat().st_size})], {PIECE_SIZE}, workers=4).hex())
+    """))
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    result = subprocess.run(
+        [sys.executable, str(script)], cwd=project_root, capture_output=True, text=True, timeout=60,
+        env={**os.environ, "PYTHONPATH": project_root}
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == _expected_pieces([(str(media), media.stat().st_size)]).hex()
+    assert (tmp_path / "runs.txt").read_text() == "run\n"
+
+
+def test_hash_pieces_fails_when_file_is_truncated(tmp_path):
+    (tmp_path / "a.mkv").write_bytes(os.urandom(1000))
+    with pytest.raises(IOError):
+        hashing_utilities.hash_pieces([(str(tmp_path / "a.mkv"), 2000)], PIECE_SIZE, workers=1)
+
+
+def test_generate_pieces_for_torf_torrent(media_folder, tmp_path):
+    expected = _torf_pieces(media_folder)
+    torrent = GGBOTTorrent(str(media_folder), exclude_globs=["*.nfo"], private=True)
+    torrent.piece_size = PIECE_SIZE
+    progress = []
+
+    generate_pieces(torrent, callback=lambda torrent, filepath, pieces_done, pieces_total: progress.append((pieces_done, pieces_total)))
+    torrent.write(str(tmp_path / "generated.torrent"))
+
+    assert torrent.metainfo['info']['pieces'] == expected.metainfo['info']['pieces']
+    assert torrent.infohash == expected.infohash
+    assert progress[-1][0] == progress[-1][1]
+
+
+@pytest.mark.parametrize(
+    ("pieces_total", "sample_size", "sampling", "expected_counts"),
+    [
+        pytest.param(10, 16, "stratified", (10,), id="small_torrent_fully_verified"),
+        # the piece picked from the first / last stratum can be the first / last piece of the torrent
+        pytest.param(1000, 16, "stratified", (16, 17, 18), id="stratified"),
+        pytest.param(1000, 16, "random", (18,), id="random"),
+    ]
+)
+def test_select_sample_pieces(pieces_total, sample_size, sampling, expected_counts):
+    selected = hashing_utilities.select_sample_pieces(pieces_total, sample_size, sampling)
+
+    assert len(selected) in expected_counts
+    assert selected == sorted(set(selected))
+    assert selected[0] == 0 and selected[-1] == pieces_total - 1
+
+
+def test_select_sample_pieces_stratified_covers_every_region():
+    selected = hashing_utilities.select_sample_pieces(1000, 10, "stratified")
+    for first_piece, last_piece in hashing_utilities._get_piece_ranges(1000, 10):
+        assert any(first_piece <= piece < last_piece for piece in selected)
+
+
+def test_verify_pieces_detects_corruption(media_folder):
+    torrent = _torf_pieces(media_folder)
+    files = [(str(filepath), file.size) for filepath, file in zip(torrent.filepaths, torrent.files)]
+    pieces = torrent.metainfo['info']['pieces']
+    pieces_total = len(pieces) // 20
+    assert hashing_utilities.verify_pieces(files, PIECE_SIZE, pieces, list(range(pieces_total))) == []
+
+    # corrupting the last byte of Show.S01E01.mkv, which is in a piece that spans into Show.S01E02.mkv
+    assert files[1][0].endswith("Show.S01E01.mkv")
+    with open(files[1][0], "r+b") as media_file:
+        media_file.seek(files[1][1] - 1)
+        corrupted_byte = b'\x00' if media_file.read(1) != b'\x00' else b'\x01'
+        media_file.seek(files[1][1] - 1)
+        media_file.write(corrupted_byte)
+    failed_piece = (files[0][1] + files[1][1] - 1) // PIECE_SIZE
+    assert hashing_utilities.verify_pieces(files, PIECE_SIZE, pieces, list(range(pieces_total))) == [failed_piece]
+
+
+def test_verify_pieces_read_bandwidth_is_bounded(media_folder, mocker):
+    torrent = _torf_pieces(media_folder)
+    files = [(str(filepath), file.size) for filepath, file in zip(torrent.filepaths, torrent.files)]
+    sleep = mocker.patch("utilities.utils_hashing.time.sleep")
+
+    hashing_utilities.verify_pieces(files, PIECE_SIZE, torrent.metainfo['info']['pieces'], [0, 1, 2, 3], workers=2, max_bytes_per_second=PIECE_SIZE)
+
+    # 4 pieces at one piece per second, the reads after the first one have to wait
+    assert sleep.call_count == 3
+    assert sum(call.args[0] for call in sleep.call_args_list) == pytest.approx(1 + 2 + 3, abs=0.5)
@@ -0,0 +1,90 @@
+import pytest
+import requests
+from pytest_mock import mocker
+
+import utilities.utils_http as http_utilities
+
+
+def __response(status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b'{}'
+    return response
+
+
+@pytest.fixture(autouse=True)
+def clean_sessions():
+    http_utilities.close_sessions()
+    yield
+    http_utilities.close_sessions()
+
+
+def test_session_reused_per_host_and_host_class():
+    first = http_utilities.get_session("https://api.themoviedb.org/3/movie/1", "metadata")
+    second = http_utilities.get_session("https://api.themoviedb.org/3/movie/2?api_key=abc", "metadata")
+    other_host = http_utilities.get_session("https://api.tvmaze.com/lookup/shows", "metadata")
+    other_class = http_utilities.get_session("https://api.themoviedb.org/3/movie/1", "tracker")
+
+    assert first is second
+    assert first is not other_host
+    assert first is not other_class
+
+
+@pytest.mark.parametrize(
+    ("env", "expected"),
+    [
+        pytest.param({}, {"timeout": 30, "retries": 3, "backoff": 0.5}, id="defaults"),
+        pytest.param({"http_metadata_timeout": "5", "http_metadata_retries": "1"}, {"timeout": 5, "retries": 1, "backoff": 0.5}, id="overridden"),
+        pytest.param({"http_metadata_timeout": "abc"}, {"timeout": 30, "retries": 3, "backoff": 0.5}, id="invalid_value"),
+    ]
+)
+def test_host_class_settings(env, expected, monkeypatch):
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    assert http_utilities._get_host_class_settings("metadata") == expected
+
+
+def test_retries_mounted_on_session():
+    session = http_utilities.get_session("https://imgbb.com/upload", "image_host")
+    retry = session.get_adapter("https://imgbb.com/upload").max_retries
+    assert retry.total == 2
+    assert 503 in retry.status_forcelist
+    # uploads must never be sent twice because of a bad response
+    assert "POST" not in retry.allowed_methods
+
+
+def test_request_uses_host_class_timeout_and_records_statistics(mocker):
+    send = mocker.patch("requests.sessions.Session.send", side_effect=[__response(200), __response(500)])
+
+    assert http_utilities.get("https://stats.example.com/a", host_class="torrent_client").status_code == 200
+    assert http_utilities.post("https://stats.example.com/b", host_class="torrent_client", timeout=5).status_code == 500
+
+    assert send.call_args_list[0].kwargs["timeout"] == 60
+    assert send.call_args_list[1].kwargs["timeout"] == 5
+    statistics = http_utilities.get_request_statistics()["torrent_client"]["https://stats.example.com"]
+    assert statistics["requests"] >= 2
+    assert statistics["failures"] >= 1
+    assert statistics["average_time"] <= statistics["max_time"]
+
+
+def test_failed_connection_recorded(mocker):
+    mocker.patch("requests.sessions.Session.send", side_effect=requests.exceptions.ConnectionError("refused"))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_utilities.get("https://down.example.com/", host_class="tracker")
+    statistics = http_utilities.get_request_statistics()["tracker"]["https://down.example.com"]
+    assert statistics["failures"] == statistics["requests"]
+
+
+def test_rate_limited_request_records_queue_time(mocker):
+    throttled = __response(429)
+    throttled.headers["Retry-After"] = "3"
+    mocker.patch("requests.sessions.Session.send", side_effect=[throttled])
+    rate_limiter = mocker.MagicMock()
+    rate_limiter.slot.return_value.__enter__.return_value = 0.25
+
+    assert http_utilities.post("https://limited.example.com/upload", host_class="tracker", rate_limiter=rate_limiter).status_code == 429
+
+    rate_limiter.observe.assert_called_once_with(429, "3")
+    statistics = http_utilities.get_request_statistics()["tracker"]["https://limited.example.com"]
+    assert statistics["max_queue_time"] >= 0.25
+    assert statistics["average_queue_time"] <= statistics["max_queue_time"]
@@ -0,0 +1,158 @@
+import os
+import pytest
+from pathlib import Path
+from pytest_mock import mocker
+
+import utilities.utils_mediainfo as mediainfo_utilities
+
+
+working_folder = Path(__file__).resolve().parent.parent.parent
+mediainfo_xml = "/tests/resources/mediainfo/xml/"
+sample_xml = "1883.S01E01.1883.2160p.WEB-DL.DDP5.1.H.265-NTb.xml"
+
+
+def __get_file_contents(raw_file_name):
+    with open(raw_file_name, "r") as file_contents:
+        return file_contents.read()
+
+
+def __fake_parse(path, output=None, full=True):
+    if output == "OLDXML":
+        return __get_file_contents(f"{working_folder}{mediainfo_xml}{sample_xml}")
+    return f"General\nComplete name : {path}\n"
+
+
+@pytest.fixture
+def media_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("mediainfo_cache_path", str(tmp_path / "cache" / "mediainfo_cache.db"))
+    monkeypatch.setenv("mediainfo_cache", "true")
+    media = tmp_path / "media.mkv"
+    media.write_bytes(b"0" * 128)
+    return media
+
+
+def test_xml_is_parsed_once_and_served_from_cache(media_file, mocker):
+    parse = mocker.patch("utilities.utils_mediainfo.MediaInfo.parse", side_effect=__fake_parse)
+    statistics_before = mediainfo_utilities.get_cache_statistics()
+
+    first = mediainfo_utilities.get_mediainfo(str(media_file))
+    second = mediainfo_utilities.get_mediainfo(str(media_file))
+
+    assert parse.call_count == 1
+    assert first.tracks[1].track_type == "Video"
+    assert first.to_data() == second.to_data()
+    statistics_after = mediainfo_utilities.get_cache_statistics()
+    assert statistics_after["miss"] - statistics_before["miss"] == 1
+    assert statistics_after["hit"] - statistics_before["hit"] == 1
+
+
+def test_text_and_xml_are_cached_separately(media_file, mocker):
+    parse = mocker.patch("utilities.utils_mediainfo.MediaInfo.parse", side_effect=__fake_parse)
+
+    xml, text = mediainfo_utilities.get_mediainfo(str(media_file), formats=["xml", "text"])
+    assert text == f"General\nComplete name : {media_file}\n"
+    assert xml.tracks[0].track_type == "General"
+    assert mediainfo_utilities.get_mediainfo(str(media_file), formats="text") == text
+    assert parse.call_count == 2
+
+
+
+def test_text_served_from_cache_with_the_path_of_the_caller(media_file, mocker, monkeypatch):
+    parse = mocker.patch("utilities.utils_mediainfo.MediaInfo.parse", side_effect=__fake_parse)
+    monkeypatch.chdir(media_file.parent)
+
+    assert mediainfo_utilities.get_mediainfo("media.mkv", formats="text") == "General\nComplete name : media.mkv\n"
+    text = mediainfo_utilities.get_mediainfo(str(media_file), formats="text")
+
+    assert parse.call_count == 1
+    assert text == f"General\nComplete name : {media_file}\n"
+    # mediainfo.txt only shows the name of the media, not where it is stored locally
+    assert text.replace(str(media_file), "media.mkv") == "General\nComplete name : media.mkv\n"
+
+def test_cache_invalidated_when_file_changes(media_file, mocker):
+    parse = mocker.patch("utilities.utils_mediainfo.MediaInfo.parse", side_effect=__fake_parse)
+
+    mediainfo_utilities.get_mediainfo(str(media_file), formats="text")
+    media_file.write_bytes(b"1" * 256)
+    mediainfo_utilities.get_mediainfo(str(media_file), formats="text")
+    assert parse.call_count == 2
+
+    stat = os.stat(media_file)
+    os.utime(media_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+    mediainfo_utilities.get_mediainfo(str(media_file), formats="text")
+    assert parse.call_count == 3
+
+
+def test_cache_disabled(media_file, mocker, monkeypatch):
+    monkeypatch.setenv("mediainfo_cache", "false")
+    parse = mocker.patch("utilities.utils_mediainfo.MediaInfo.parse", side_effect=__fake_parse)
+
+    mediainfo_utilities.get_mediainfo(str(media_file), formats="text")
+    mediainfo_utilities.get_mediainfo(str(media_file), formats="text")
+    assert parse.call_count == 2
+    assert not (media_file.parent / "cache" / "mediainfo_cache.db").exists()
+
+
+def test_unsupported_format(media_file):
+    with pytest.raises(ValueError):
+        mediainfo_utilities.get_mediainfo(str(media_file), formats="json")
+
+
+def __fake_ffprobe_output(channel_layout="5.1(side)"):
+    return (
+        f'{{"streams": [{{"index": 0, "codec_type": "video", "codec_name": "hevc"}}, '
+        f'{{"index": 1, "codec_type": "audio", "codec_name": "eac3", "profile": "E-AC-3", "channel_layout": "{channel_layout}"}}], '
+        f'"format": {{"format_name": "matroska,webm"}}}}'
+    ).encode("utf-8"), None
+
+
+def test_media_probe_reads_tracks_from_single_parse(media_file, mocker):
+    parse = mocker.patch("utilities.utils_mediainfo.MediaInfo.parse", side_effect=__fake_parse)
+    media_probe = mediainfo_utilities.MediaProbe(str(media_file))
+
+    assert media_probe.video_track.track_type == "Video"
+    assert media_probe.audio_track.track_type == "Audio"
+    assert media_probe.video_format == "HEVC"
+    assert media_probe.duration is not None and "." not in media_probe.duration
+    assert media_probe.atmos is None
+    assert parse.call_count == 1
+
+
+def test_media_probe_runs_ffprobe_once(media_file, mocker):
+    mocker.patch("utilities.utils_mediainfo.MediaInfo.parse", side_effect=__fake_parse)
+    ffprobe = mocker.patch("utilities.utils_mediainfo.FFprobe")
+    ffprobe.return_value.run.return_value = __fake_ffprobe_output()
+    media_probe = mediainfo_utilities.MediaProbe(str(media_file))
+
+    media_probe.prefetch()
+    assert media_probe.audio_profile == "E-AC-3"
+    assert media_probe.audio_channel_layout == "5.1(side)"
+    assert media_probe.ffprobe_audio_stream["index"] == 1
+    assert ffprobe.call_count == 1
+
+
+def test_media_probe_prefetch_without_ffprobe(media_file, mocker):
+    mocker.patch("utilities.utils_mediainfo.MediaInfo.parse", side_effect=__fake_parse)
+    ffprobe = mocker.patch("utilities.utils_mediainfo.FFprobe")
+    media_probe = mediainfo_utilities.MediaProbe(str(media_file))
+
+    media_probe.prefetch(ffprobe=False)
+    assert media_probe.video_track is not None
+    assert ffprobe.call_count == 0
+
+
+def test_audio_channels_and_codec_share_media_probe(media_file, mocker):
+    import utilities.utils_basic as basic_utilities
+
+    mocker.patch("utilities.utils_mediainfo.MediaInfo.parse", side_effect=__fake_parse)
+    ffprobe = mocker.patch("utilities.utils_mediainfo.FFprobe")
+    ffprobe.return_value.run.return_value = __fake_ffprobe_output()
+    media_probe = mediainfo_utilities.MediaProbe(str(media_file))
+    torrent_info = {"raw_file_name": "Some.Release.Without.Audio.Info.mkv"}
+
+    audio_channels = basic_utilities.basic_get_missing_audio_channels(
+        torrent_info, False, "true", str(media_file), media_probe.audio_track, "audio_channels", media_probe=media_probe
+    )
+    assert audio_channels == "5.1"
+    assert media_probe.audio_profile == "E-AC-3"
+    assert ffprobe.call_count == 1
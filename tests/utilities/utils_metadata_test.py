@@ -5,11 +5,18 @@ import requests
 from pathlib import Path
 from pytest_mock import mocker
 import utilities.utils_metadata as metadata
+from modules.metadata_cache import MetadataCache
 
 
 working_folder = Path(__file__).resolve().parent.parent.parent
 
 
+@pytest.fixture(autouse=True)
+def no_metadata_cache(monkeypatch):
+    # every test mocks the api responses differently, hence responses must not be served from the metadata cache
+    monkeypatch.setattr(metadata, "_metadata_cache", MetadataCache())
+
+
 class TMDBResponse:
     ok = None
     data = None
@@ -29,7 +36,7 @@ def test_tmdb_movie_auto_select(mocker):
     content_type = "movie"
 
     tmdb_response = TMDBResponse(json.load(open(f"{working_folder}/tests/resources/tmdb/results/Gods of Egypt.json")))
-    mocker.patch("requests.get", return_value=tmdb_response)
+    mocker.patch("utilities.utils_http.get", return_value=tmdb_response)
 
     assert metadata._metadata_search_tmdb_for_id(query_title, query_year, content_type, False) == json.load(open(f"{working_folder}/tests/resources/tmdb/expected/Gods of Egypt.json"))
 
@@ -40,7 +47,7 @@ def test_tmdb_movie_cannot_auto_select(mocker):
     content_type = "movie"
 
     tmdb_response = TMDBResponse(json.load(open(f"{working_folder}/tests/resources/tmdb/results/Uncharted.json")))
-    mocker.patch("requests.get", return_value=tmdb_response)
+    mocker.patch("utilities.utils_http.get", return_value=tmdb_response)
     mocker.patch("rich.prompt.Prompt.ask", return_value="1")
     assert metadata._metadata_search_tmdb_for_id(query_title, query_year, content_type, False) == json.load(open(f"{working_folder}/tests/resources/tmdb/expected/Uncharted.json"))
 
@@ -51,7 +58,7 @@ def test_tmdb_tv_auto_select(mocker):
     content_type = "episode"
 
     tmdb_response = TMDBResponse(json.load(open(f"{working_folder}/tests/resources/tmdb/results/Bosch Legacy.json")))
-    mocker.patch("requests.get", return_value=tmdb_response)
+    mocker.patch("utilities.utils_http.get", return_value=tmdb_response)
 
     assert metadata._metadata_search_tmdb_for_id(query_title, query_year, content_type, False) == json.load(open(f"{working_folder}/tests/resources/tmdb/expected/Bosch Legacy.json"))
 
@@ -64,7 +71,7 @@ def test_tmdb_movie_loose_search(mocker, monkeypatch):
     tmdb_response_strict = TMDBResponse(json.load(open(f"{working_folder}/tests/resources/tmdb/results/Kung Fu Panda 1_strict.json")))
     tmdb_response_loose = TMDBResponse(json.load(open(f"{working_folder}/tests/resources/tmdb/results/Kung Fu Panda 1.json")))
     tmdb_responses = iter([tmdb_response_strict, tmdb_response_loose])
-    monkeypatch.setattr('requests.get', lambda url: next(tmdb_responses))
+    monkeypatch.setattr('utilities.utils_http.get', lambda url, **kwargs: next(tmdb_responses))
     mocker.patch("os.getenv", return_value=1)
 
     assert metadata._metadata_search_tmdb_for_id(query_title, query_year, content_type, False) == json.load(open(f"{working_folder}/tests/resources/tmdb/expected/Kung Fu Panda 1.json"))
@@ -93,7 +100,7 @@ def test_tmdb_movie_no_results(mocker, monkeypatch):
 
     tmdb_response_strict = TMDBResponse(json.load(open(f"{working_folder}/tests/resources/tmdb/results/Kung Fu Panda 1_strict.json")))
     tmdb_responses = iter([tmdb_response_strict, tmdb_response_strict])
-    monkeypatch.setattr('requests.get', lambda url: next(tmdb_responses))
+    monkeypatch.setattr('utilities.utils_http.get', lambda url, **kwargs: next(tmdb_responses))
 
     mocker.patch('os.getenv', side_effect=__auto_reuploader)
 
@@ -115,7 +122,7 @@ def test_tmdb_movie_loosely_configured_reuploader(mocker, monkeypatch):
     tmdb_response_strict = TMDBResponse(json.load(open(f"{working_folder}/tests/resources/tmdb/results/Kung Fu Panda 1_strict.json")))
     tmdb_response_loose = TMDBResponse(json.load(open(f"{working_folder}/tests/resources/tmdb/results/Kung Fu Panda 1.json")))
     tmdb_responses = iter([tmdb_response_strict, tmdb_response_loose])
-    monkeypatch.setattr('requests.get', lambda url: next(tmdb_responses))
+    monkeypatch.setattr('utilities.utils_http.get', lambda url, **kwargs: next(tmdb_responses))
     mocker.patch('os.getenv', side_effect=__auto_reuploader_loosely_configured)
 
     expected = {
@@ -134,7 +141,7 @@ def test_tmdb_movie_no_results_exit(mocker, monkeypatch):
 
     tmdb_response_strict = TMDBResponse(json.load(open(f"{working_folder}/tests/resources/tmdb/results/Kung Fu Panda 1_strict.json")))
     tmdb_responses = iter([tmdb_response_strict, tmdb_response_strict])
-    monkeypatch.setattr('requests.get', lambda url: next(tmdb_responses))
+    monkeypatch.setattr('utilities.utils_http.get', lambda url, **kwargs: next(tmdb_responses))
 
     mocker.patch('os.getenv', side_effect=__upload_assistant)
 
@@ -253,7 +260,7 @@ def test_tmdb_movie_no_results_exit(mocker, monkeypatch):
 )
 def test_metadata_get_external_id(id_site, id_value, external_site, content_type, mock_response_file, expected, mocker):
     mock_response_file_data = TMDBResponse(json.load(open(f"{working_folder}/tests/resources/tmdb/results/external_id_search/{mock_response_file}.json")))
-    mocker.patch("requests.get", return_value=mock_response_file_data)
+    mocker.patch("utilities.utils_http.get", return_value=mock_response_file_data)
 
     assert metadata._metadata_get_external_id(id_site, id_value, external_site, content_type) == expected
 
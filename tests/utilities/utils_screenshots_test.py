@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import time
+import random
+import textwrap
+import threading
+import subprocess
+
+import pytest
+
+import utilities.utils_screenshots as screenshots_utilities
+
+
+SCREENSHOT_SETTINGS_KEYS = ["screenshots_mode", "screenshots_workers", "screenshots_ffmpeg_threads", "screenshots_keyframe_seek"]
+
+
+def test_optimize_and_upload_screenshots_from_unguarded_script(tmp_path):
+    # auto_reupload.py has no `if __name__ == "__main__"` guard, the optimization workers must not re-run the script
+    screenshots = []
+    for index in range(4):
+        (tmp_path / f"{index}.png").write_bytes(b"png")
+        screenshots.append(str(tmp_path / f"{index}.png"))
+    script = tmp_path / "script.py"
+    script.write_text(textwrap.dedent(f"""
+        import os
+        import utilities.utils_screenshots as screenshots_utilities
+
+        with open({str(tmp_path / "runs.txt")!r}, "a") as runs:
+            runs.write("run\\n")
+        os.environ["screenshots_optimize_workers"] = "4"
+        screenshots_utilities._upload_screens = lambda img_host, img_host_api, image_path, torrent_title, base_path: [os.path.basename(image_path)]
+        print(screenshots_utilities._optimize_and_upload_screenshots({screenshots!r}, ["imgbox"], "Movie", {str(tmp_path)!r}))
+    """))
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    result = subprocess.run(
+        [sys.executable, str(script)], cwd=project_root, capture_output=True, text=True, timeout=60,
+        env={**os.environ, "PYTHONPATH": project_root}
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[['0.png'], ['1.png'], ['2.png'], ['3.png']]"
+    assert (tmp_path / "runs.txt").read_text() == "run\n"
+
+
+@pytest.mark.parametrize(
+    ("env", "expected"),
+    [
+        pytest.param({}, {"mode": "parallel", "workers": 6, "threads": None, "keyframe_seek": False}, id="defaults"),
+        pytest.param(
+            {"screenshots_mode": "SINGLE", "screenshots_workers": "2", "screenshots_ffmpeg_threads": "1", "screenshots_keyframe_seek": "True"},
+            {"mode": "single", "workers": 2, "threads": "1", "keyframe_seek": True}, id="configured"
+        ),
+        pytest.param({"screenshots_mode": "turbo"}, {"mode": "parallel", "workers": 6, "threads": None, "keyframe_seek": False}, id="invalid_mode"),
+        pytest.param({"screenshots_workers": "many"}, {"mode": "parallel", "workers": 1, "threads": None, "keyframe_seek": False}, id="invalid_workers"),
+        pytest.param({"screenshots_workers": "0"}, {"mode": "parallel", "workers": 1, "threads": None, "keyframe_seek": False}, id="zero_workers"),
+    ]
+)
+def test_get_screenshot_settings(env, expected, monkeypatch, mocker):
+    for key in SCREENSHOT_SETTINGS_KEYS:
+        monkeypatch.delenv(key, raising=False)
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    mocker.patch("os.cpu_count", return_value=8)
+    # by default there is one worker per screenshot, at most one per cpu
+    assert screenshots_utilities._get_screenshot_settings("6") == expected
+
+
+def test_get_screenshot_settings_workers_capped_at_cpu_count(monkeypatch, mocker):
+    for key in SCREENSHOT_SETTINGS_KEYS:
+        monkeypatch.delenv(key, raising=False)
+    mocker.patch("os.cpu_count", return_value=2)
+    assert screenshots_utilities._get_screenshot_settings("6")["workers"] == 2
+
+
+def test_parallel_extraction_bounded_by_workers(tmp_path, mocker):
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def extract_screenshot(upload_media, ss_timestamp, output_path, threads=None, keyframe_seek=False):
+        with lock:
+            running.append(ss_timestamp)
+            max_running.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(ss_timestamp)
+        return 0.05
+
+    mocker.patch("utilities.utils_screenshots._extract_screenshot", side_effect=extract_screenshot)
+    screenshots = [(f"00:0{index}:00", str(tmp_path / f"{index}.png")) for index in range(8)]
+    settings = {"mode": "parallel", "workers": 3, "threads": None, "keyframe_seek": False}
+
+    timings = screenshots_utilities._extract_screenshots("/media/Movie.mkv", screenshots, settings)
+
+    assert max(max_running) == 3
+    assert sorted(timings.keys()) == [ss_timestamp for ss_timestamp, _ in screenshots]
+
+
+def test_parallel_extraction_writes_every_screenshot_to_its_own_path(tmp_path, mocker):
+    def extract_screenshot(upload_media, ss_timestamp, output_path, threads=None, keyframe_seek=False):
+        # completing in a random order
+        time.sleep(random.random() / 50)
+        with open(output_path, "w") as screenshot:
+            screenshot.write(ss_timestamp)
+        return 0.0
+
+    extract = mocker.patch("utilities.utils_screenshots._extract_screenshot", side_effect=extract_screenshot)
+    screenshots = [(f"00:{index:02d}:00", str(tmp_path / f"{index}.png")) for index in range(10)]
+    settings = {"mode": "parallel", "workers": 4, "threads": "2", "keyframe_seek": True}
+
+    screenshots_utilities._extract_screenshots("/media/Movie.mkv", screenshots, settings)
+
+    for ss_timestamp, output_path in screenshots:
+        with open(output_path) as screenshot:
+            assert screenshot.read() == ss_timestamp
+    assert all(call.args[3:] == ("2", True) for call in extract.call_args_list)
+
+
+def test_single_pass_extraction_moves_frames_in_timestamp_order(tmp_path, mocker):
+    ffmpeg = mocker.patch("utilities.utils_screenshots.FFmpeg")
+
+    def write_frames():
+        # ffmpeg writes the selected frames in the order in which they appear in the media
+        frames_pattern = list(ffmpeg.call_args.kwargs["outputs"].keys())[0]
+        for frame_number, ss_timestamp in enumerate(["00:05:00", "00:10:00", "01:00:00"], start=1):
+            with open(frames_pattern % frame_number, "w") as frame:
+                frame.write(ss_timestamp)
+
+    ffmpeg.return_value.run.side_effect = write_frames
+    # the screenshots are not in the order of their timestamps
+    screenshots = [(ss_timestamp, str(tmp_path / f"Movie - ({ss_timestamp.replace(':', '.')}).png")) for ss_timestamp in ["01:00:00", "00:05:00", "00:10:00"]]
+    settings = {"mode": "single", "workers": 1, "threads": None, "keyframe_seek": False}
+
+    timings = screenshots_utilities._extract_screenshots("/media/Movie.mkv", screenshots, settings)
+
+    assert list(timings.keys()) == ["single_pass"]
+    assert ffmpeg.call_count == 1
+    select_filter = list(ffmpeg.call_args.kwargs["outputs"].values())[0]
+    assert select_filter.index("gte(t\\,300)") < select_filter.index("gte(t\\,600)") < select_filter.index("gte(t\\,3600)")
+    assert "-frames:v 3" in select_filter
+    for ss_timestamp, output_path in screenshots:
+        with open(output_path) as screenshot:
+            assert screenshot.read() == ss_timestamp
+    # every frame has been moved to its screenshot
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(output_path) for _, output_path in screenshots)
+
+
+def __uploaded(img_host, image_path):
+    name = os.path.basename(image_path)
+    return [True, f"[img]{img_host}/{name}[/img]", f"[img]{img_host}/{name}.nothumb[/img]", f"[img]{img_host}/{name}.thumb[/img]", f"https://{img_host}/{name}"]
+
+
+def __upload_screens_failing_on_first_host(failing_image):
+    def upload_screens(img_host, img_host_api, image_path, torrent_title, base_path):
+        # completing in a random order
+        time.sleep(random.random() / 50)
+        if img_host == "imgbox" and os.path.basename(image_path) == failing_image:
+            return False
+        return __uploaded(img_host, image_path)
+    return upload_screens
+
+
+def test_optimize_and_upload_screenshots_order_and_failover(tmp_path, monkeypatch, mocker):
+    monkeypatch.setenv("screenshots_optimize_workers", "3")
+    monkeypatch.setenv("screenshots_upload_workers", "3")
+    optimize = mocker.patch("utilities.utils_screenshots._optimize_images")
+    upload_screens = mocker.patch("utilities.utils_screenshots._upload_screens", side_effect=__upload_screens_failing_on_first_host("2.png"))
+    screenshots = [str(tmp_path / f"{index}.png") for index in range(6)]
+
+    results = screenshots_utilities._optimize_and_upload_screenshots(screenshots, ["imgbox", "ptpimg"], "Movie", str(tmp_path))
+
+    # results are in the order of the screenshots, only the image that failed on imgbox is uploaded to ptpimg
+    assert results == [__uploaded("ptpimg" if index == 2 else "imgbox", screenshots[index]) for index in range(6)]
+    assert sorted(call.kwargs["img_host"] for call in upload_screens.call_args_list) == ["imgbox"] * 6 + ["ptpimg"]
+    assert sorted(call.args[0] for call in optimize.call_args_list) == sorted(screenshots)
+
+
+def test_optimize_and_upload_screenshots_failed_on_every_host(tmp_path, mocker):
+    mocker.patch("utilities.utils_screenshots._optimize_images", side_effect=OSError("oxipng failed"))
+    mocker.patch(
+        "utilities.utils_screenshots._upload_screens",
+        side_effect=lambda img_host, img_host_api, image_path, torrent_title, base_path: False if image_path.endswith("1.png") else __uploaded(img_host, image_path)
+    )
+    screenshots = [str(tmp_path / f"{index}.png") for index in range(3)]
+
+    # images that couldn't be optimized are still uploaded
+    assert screenshots_utilities._optimize_and_upload_screenshots(screenshots, ["imgbox", "ptpimg"], "Movie", str(tmp_path)) == [
+        __uploaded("imgbox", screenshots[0]), False, __uploaded("imgbox", screenshots[2])
+    ]
+
+
+def test_take_upload_screens_writes_screenshots_data(tmp_path, monkeypatch, mocker):
+    for key in ["no_spoilers", "img_host_3"] + SCREENSHOT_SETTINGS_KEYS:
+        monkeypatch.delenv(key, raising=False)
+    for key, value in {"num_of_screenshots": "3", "img_host_1": "imgbox", "img_host_2": "ptpimg", "imgbox_api_key": "x", "ptpimg_api_key": "x"}.items():
+        monkeypatch.setenv(key, value)
+    (tmp_path / "temp_upload" / "abc" / "screenshots").mkdir(parents=True)
+
+    def extract_screenshots(upload_media, screenshots, settings):
+        for _, output_path in screenshots:
+            open(output_path, "w").close()
+        return {}
+
+    mocker.patch("utilities.utils_screenshots._extract_screenshots", side_effect=extract_screenshots)
+    mocker.patch("utilities.utils_screenshots._optimize_images")
+    mocker.patch("utilities.utils_screenshots._upload_screens", side_effect=__upload_screens_failing_on_first_host("Movie - (00.33.20).png"))
+
+    # 4000000 milliseconds, the screenshots are taken at 00:16:40, 00:33:20 and 00:50:00
+    screenshots_utilities.take_upload_screens(4000000, "/media/Movie.mkv", "Movie", str(tmp_path), "abc/")
+
+    screenshots_folder = tmp_path / "temp_upload" / "abc" / "screenshots"
+    first, second, third = [f"{screenshots_folder}/Movie - ({ss_timestamp}).png" for ss_timestamp in ["00.16.40", "00.33.20", "00.50.00"]]
+    first_upload, second_upload, third_upload = __uploaded("imgbox", first), __uploaded("ptpimg", second), __uploaded("imgbox", third)
+    # the same format as when the screenshots were uploaded one after another, every screenshot is prepended to the previous ones
+    assert (screenshots_folder / "screenshots_data.json").read_text() == json.dumps({
+        "bbcode_images": f"{third_upload[1]} {second_upload[1]} {first_upload[1]} ",
+        "bbcode_images_nothumb": f"{third_upload[2]} {second_upload[2]} {first_upload[2]} ",
+        "bbcode_thumb_nothumb": f"{third_upload[3]} {second_upload[3]} {first_upload[3]} ",
+        "url_images": f"{third_upload[4]}\n{second_upload[4]}\n{first_upload[4]}\n",
+        "data_images": f"{third}\n{second}\n{first}\n",
+    })
+    assert (screenshots_folder / "uploads_complete.mark").is_file()
@@ -158,6 +158,21 @@ def test_create_temp_upload_itself():
     assert Path(f"{working_folder}{temp_working_dir}/nothing/temp_upload/{hash}/screenshots/").is_dir() == True
 
 
+def test_create_temp_upload_from_parallel_workers(mocker):
+    # the pipeline parses several files at the same time, all of them creating the same temp_upload folder
+    # making the folders appear right after they were checked, as if another worker had just created them
+    original_is_dir = Path.is_dir
+    mocker.patch("pathlib.Path.is_dir", autospec=True, side_effect=lambda path: False if "nothing" in str(path) else original_is_dir(path))
+    Path(f"{working_folder}{temp_working_dir}/nothing/temp_upload/{utils.get_hash('some_name1')}/screenshots").mkdir(parents=True)
+
+    computed_working_folder = utils.delete_leftover_files(
+        working_folder=f"{working_folder}{temp_working_dir}/nothing",
+        file="some_name1",
+        resume=True
+    )
+    assert computed_working_folder == f"{utils.get_hash('some_name1')}/"
+
+
 @pytest.mark.parametrize(
     ("torrent_info", "expected"),
     [
@@ -299,3 +299,49 @@ def test_client_upload_movie_file_relative(mocker):
         True
     )
     assert utils.perform_post_processing(torrent_info, mock_client, f"{working_folder}{temp_working_dir}", tracker) == expected
+
+
+def __cross_seed_sampled_verification_side_effect(param, default):
+    if param == "cross_seed_verification":
+        return "sampled"
+    elif param == "cross_seed_verification_sample_size":
+        # 16 pieces split in 8 strata, at least one of them lies entirely within the corrupted episode
+        return "8"
+    return __cross_seed_no_translation_side_effect(param, default)
+
+
+@pytest.mark.parametrize(
+    ("corrupt_media", "expected_skip_checking"),
+    [
+        pytest.param(False, True, id="sampled_pieces_match"),
+        pytest.param(True, False, id="mismatch_escalates_to_full_recheck"),
+    ]
+)
+def test_client_upload_tv_season_sampled_verification(corrupt_media, expected_skip_checking, tmp_path, mocker):
+    from torf import Torrent
+
+    season = tmp_path / "Show.S01.1080p.WEB-DL-GRP"
+    season.mkdir()
+    for episode in range(1, 4):
+        (season / f"Show.S01E0{episode}.mkv").write_bytes(bytes([episode]) * (16384 * 5 + 123))
+    torrent = Torrent(str(season), private=True, piece_size=16384)
+    torrent.generate()
+    torrent_file = f'{working_folder}{temp_working_dir}/temp_upload/test_working_folder/TRACKER-Some Title different from torrent_title.torrent'
+    torrent.write(torrent_file, overwrite=True)
+    if corrupt_media:
+        (season / "Show.S01E02.mkv").write_bytes(b'\x00' * (16384 * 5 + 123))
+
+    torrent_info = {}
+    torrent_info["raw_file_name"] = "Show.S01.1080p.WEB-DL-GRP"
+    torrent_info["upload_media"] = f"{season}/"
+    torrent_info["TRACKER_upload_status"] = True
+    torrent_info["type"] = "episode"
+    torrent_info["working_folder"] = "test_working_folder/"
+
+    mocker.patch("os.getenv", side_effect=__cross_seed_sampled_verification_side_effect)
+    mock_client = mocker.patch('modules.torrent_client.TorrentClient')
+    mock_client.upload_torrent = __mock_upload_torrent
+
+    assert utils.perform_post_processing(torrent_info, mock_client, f"{working_folder}{temp_working_dir}", "TRACKER") == (
+        torrent_file, f"{tmp_path}/", False, expected_skip_checking
+    )
@@ -532,3 +532,90 @@ def test_get_piece_size_for_mktorrent(input, expected):
 def test_calculate_piece_size(input, expected):
     assert torrent_utilities.calculate_piece_size(input) == expected  # 1 GB => 1 MiB
 
+
+
+def test_media_hashed_once_for_multiple_trackers(mocker):
+    hash_pieces = mocker.spy(torrent_utilities.hashing_utilities, "hash_pieces")
+    for tracker, source in [("GG-BOT", "GG-BOT"), ("GG-BOT-TRACKER-TWO", "GG-BOT-SECOND-SOURCE")]:
+        torrent_utilities.generate_dot_torrent(
+            media=f'{working_folder}{data_dir}/file1/',
+            announce=[f"https://gg-bot.com/announce/{tracker}"],
+            source=source,
+            working_folder=f"{working_folder}{temp_working_dir}",
+            use_mktorrent=False,
+            tracker=tracker,
+            torrent_title="This.Is.The.Title.Of.The.Torrent",
+            hash_prefix=f"{utils.get_hash('GenerateTorrentTesting')}/"
+        )
+
+    assert hash_pieces.call_count == 1
+    temp_upload = f'{working_folder}{temp_working_dir}/temp_upload/{utils.get_hash("GenerateTorrentTesting")}'
+    # the hashed pieces must not be picked up as the .torrent of a tracker
+    assert {Path(file).name for file in glob.glob(f"{temp_upload}/*.torrent")} == {
+        "GG-BOT-This.Is.The.Title.Of.The.Torrent.torrent", "GG-BOT-TRACKER-TWO-This.Is.The.Title.Of.The.Torrent.torrent"
+    }
+    first_torrent = Torrent.read(f"{temp_upload}/GG-BOT-This.Is.The.Title.Of.The.Torrent.torrent")
+    second_torrent = Torrent.read(f"{temp_upload}/GG-BOT-TRACKER-TWO-This.Is.The.Title.Of.The.Torrent.torrent")
+    assert first_torrent.metainfo['info']['pieces'] == second_torrent.metainfo['info']['pieces']
+    assert second_torrent.metainfo['announce'] == "https://gg-bot.com/announce/GG-BOT-TRACKER-TWO"
+    assert second_torrent.metainfo['info']['source'] == "GG-BOT-SECOND-SOURCE"
+    assert first_torrent.infohash != second_torrent.infohash
+
+
+def test_hashed_pieces_of_different_media_not_reused(mocker):
+    hash_pieces = mocker.spy(torrent_utilities.hashing_utilities, "hash_pieces")
+    for media in [f'{working_folder}{data_dir}/file1/', f'{working_folder}{data_dir}/file1/file1.dat']:
+        torrent_utilities.generate_dot_torrent(
+            media=media,
+            announce=["https://gg-bot.com/announce/commence/testing"],
+            source="GG-BOT",
+            working_folder=f"{working_folder}{temp_working_dir}",
+            use_mktorrent=False,
+            tracker="GG-BOT",
+            torrent_title="This.Is.The.Title.Of.The.Torrent",
+            hash_prefix=f"{utils.get_hash('GenerateTorrentTesting')}/"
+        )
+
+    assert hash_pieces.call_count == 2
+    created_torrent = Torrent.read(f'{working_folder}{temp_working_dir}/temp_upload/{utils.get_hash("GenerateTorrentTesting")}/GG-BOT-This.Is.The.Title.Of.The.Torrent.torrent')
+    assert created_torrent.mode == 'singlefile'
+
+
+def test_hashed_pieces_not_reused_when_media_modified(mocker):
+    hash_pieces = mocker.spy(torrent_utilities.hashing_utilities, "hash_pieces")
+    media_file = f'{working_folder}{data_dir}/file1/file1.dat'
+    try:
+        for content in [b"GG-BOT", b"BOT-GG"]:
+            # same size, different content, hence only the identity of the file changes
+            with open(media_file, 'wb') as f:
+                f.write(content * 1024 * 1024)
+            torrent_utilities.generate_dot_torrent(
+                media=f'{working_folder}{data_dir}/file1/',
+                announce=["https://gg-bot.com/announce/commence/testing"],
+                source="GG-BOT",
+                working_folder=f"{working_folder}{temp_working_dir}",
+                use_mktorrent=False,
+                tracker="GG-BOT",
+                torrent_title="This.Is.The.Title.Of.The.Torrent",
+                hash_prefix=f"{utils.get_hash('GenerateTorrentTesting')}/"
+            )
+    finally:
+        with open(media_file, 'wb') as f:
+            f.write(b"GG-BOT" * 1024 * 1024)
+
+    assert hash_pieces.call_count == 2
+
+
+def test_hashing_lock_released_after_hashing():
+    torrent_utilities.generate_dot_torrent(
+        media=f'{working_folder}{data_dir}/file1/',
+        announce=["https://gg-bot.com/announce/commence/testing"],
+        source="GG-BOT",
+        working_folder=f"{working_folder}{temp_working_dir}",
+        use_mktorrent=False,
+        tracker="GG-BOT",
+        torrent_title="This.Is.The.Title.Of.The.Torrent",
+        hash_prefix=f"{utils.get_hash('GenerateTorrentTesting')}/"
+    )
+
+    assert torrent_utilities._hashing_locks == {}
@@ -0,0 +1,307 @@
+"""
+    Differential tests of the compiled translation rules of `choose_right_tracker_keys`.
+
+    `_reference_choose_right_tracker_keys` is the implementation that scanned all the `Required` and `Optional` items for
+    every translation key. Both implementations must produce the same tracker settings for every bundled site template.
+"""
+import os
+import copy
+import glob
+import json
+import logging
+
+import pytest
+from pathlib import Path
+
+import utilities.utils_translation as translation
+from modules.site_template_registry import SiteTemplate
+
+
+working_folder = Path(__file__).resolve().parent.parent.parent
+
+site_template_files = sorted(glob.glob(f"{working_folder}/site_templates/*.json")) + [
+    f"{working_folder}/tests/resources/translations/translation_tests/full_tracker_config.json"
+]
+
+
+class Args:
+
+    def __init__(self, **kwargs):
+        self.anon = False
+        self.disc = False
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+def _torrent_infos():
+    torrent_infos = {}
+    for torrent_info_id in ["1", "2", "3"]:
+        torrent_info = json.load(open(f"{working_folder}/tests/resources/translations/translation_tests/{torrent_info_id}/torrent_info.json"))
+        torrent_infos[f"torrent_info_{torrent_info_id}"] = torrent_info
+
+    special_editions = copy.deepcopy(torrent_infos["torrent_info_2"])
+    special_editions.update({"edition": "Director's Cut", "region": "usa", "sd": "1", "scene": "true", "source_type": "webdl"})
+    torrent_infos["special_editions"] = special_editions
+
+    custom_edition = copy.deepcopy(torrent_infos["torrent_info_3"])
+    custom_edition.update({"edition": "Super Duper Edition", "region": "XYZ", "source_type": "webrip", "screen_size": "720p"})
+    torrent_infos["custom_edition"] = custom_edition
+
+    without_optionals = copy.deepcopy(torrent_infos["torrent_info_1"])
+    for key in ["edition", "region", "mediainfo", "imdb", "tvdb"]:
+        without_optionals.pop(key, None)
+    torrent_infos["without_optionals"] = without_optionals
+    return torrent_infos
+
+
+def _translate(implementation, config, torrent_info, args):
+    tracker_settings = {}
+    torrent_info = copy.deepcopy(torrent_info)
+    try:
+        outcome = implementation(config, tracker_settings, "GG-BOT", torrent_info, args, str(working_folder))
+    except SystemExit as e:
+        outcome = f"SystemExit({e.code})"
+    except Exception as e:
+        # the implementations must fail the same way for the torrent info they can't translate
+        outcome = f"{type(e).__name__}({e})"
+    return outcome, tracker_settings, torrent_info
+
+
+def _reference_choose_right_tracker_keys(config, tracker_settings, tracker, torrent_info, args, working_folder):
+    required_items = config["Required"]
+    optional_items = config["Optional"]
+
+    # BLU requires the IMDB with the "tt" removed so we do that here, BHD will automatically put the "tt" back in... so we don't need to make an exception for that
+    if "imdb" in torrent_info:
+        translation.__create_imdb_without_tt_key(torrent_info)
+
+    # torrent title
+    tracker_settings[config["translation"]["torrent_title"]] = torrent_info["torrent_title"]
+
+    # Save a few key values in a list that we'll use later to identify the resolution and type
+    relevant_torrent_info_values = translation.__get_relevant_items_for_tracker_keys(torrent_info)
+
+    # Filling in data for all the keys that have mapping/translations
+    # Here we iterate over the translation mapping and for each translation key, we check the required and optional items for that value
+    # once identified we handle it
+    logging.info("[Main] Starting translations from torrent info to tracker settings.")
+    is_hybrid_translation_needed = False
+    hybrid_translation_keys = []
+    for translation_key, translation_value in config["translation"].items():
+        logging.debug(f"[Main] Trying to translate {translation_key} to {translation_value}")
+
+        # ------------ required_items start ------------
+        for required_key, required_value in required_items.items():
+            # get the proper mapping, the elements that doesn't match can be ignored
+            if str(required_key) == str(translation_value):
+                # hybrid_type is managed by hybrid_mapping.
+                if required_value == "hybrid_type":
+                    break
+
+                logging.debug(f"[Main] Key {translation_key} mapped to required item {required_key} with value type as {required_value}")
+
+                # the torrent file is always submitted as a file
+                if required_value in ("file", "file|base64", "file|array", "file|string|array"):
+                    # adding support for base64 encoded files
+                    # the actual encoding will be performed in `upload_to_site` method
+                    if translation_key in torrent_info:
+                        tracker_settings[config["translation"][translation_key]] = torrent_info[translation_key]
+                    # Make sure you select the right .torrent file
+                    if translation_key == "dot_torrent":
+                        tracker_settings[config["translation"]["dot_torrent"]] = f'{working_folder}/temp_upload/{torrent_info["working_folder"]}{tracker}-{torrent_info["torrent_title"]}.torrent'
+
+                # The reason why we keep this elif statement here is because the conditional right above is also technically a "string"
+                # but its easier to keep mediainfo and description in text files until we need them so we have that small exception for them
+                elif required_value in ("string", "string|array"):
+                    # BHD requires the key "live" (0 = Sent to drafts and 1 = Live on site)
+                    if required_key == "live":
+                        # BHD Live/Draft
+                        is_live_on_site = str(os.getenv('live')).lower()
+                        live = '1' if is_live_on_site == 'true' else '0'
+                        logging.info(f"Upload live status: {'Live (Visible)' if is_live_on_site == 'true' else 'Draft (Hidden)'}")
+                        tracker_settings[config["translation"][translation_key]] = live
+
+                    # If the user supplied the "-anon" argument then we want to pass that along when uploading
+                    elif translation_key == "anon" and args.anon:
+                        logging.info("Uploading anonymously")
+                        tracker_settings[config["translation"][translation_key]] = "1"
+
+                    # Adding support for internal args
+                    elif translation_key in ['doubleup', 'featured', 'freeleech', 'internal', 'sticky', 'tripleup', 'foreign', "3d"]:
+                        tracker_settings[config["translation"][translation_key]] = "1" if getattr(args, translation_key, False) is True else "0"
+
+                    # We dump all the info from torrent_info in tracker_settings here
+                    elif translation_key in torrent_info:
+                        tracker_settings[config["translation"][translation_key]] = torrent_info[translation_key]
+                    # This work as a sort of 'catch all', if we don't have the correct data in torrent_info, we just send a 0 so we can successfully post
+                    else:
+                        tracker_settings[config["translation"][translation_key]] = "0"
+
+                elif required_value == "url":
+                    # we need this check becase some trackers accepts media database urls from the same key, thereby overwriting the previous data
+                    if config["translation"][translation_key] not in tracker_settings or len(tracker_settings[config["translation"][translation_key]]) == 0:
+                        # URLs can be set only to for certain media databases
+                        tracker_settings[config["translation"][translation_key]] = translation._get_url_type_data(translation_key, torrent_info)
+                else:
+                    logging.error(f"[Main] Invalid value type {required_value} configured for required item {required_key} with translation key {required_key}")
+
+                # Set the category ID, this could be easily hardcoded in (1=movie & 2=tv) but I chose to use JSON data just in case a future tracker switches this up
+                if translation_key == "type":
+                    for key_cat, val_cat in config["Required"][required_key].items():
+                        if torrent_info["type"] == val_cat:
+                            tracker_settings[config["translation"][translation_key]] = key_cat
+                        elif val_cat in torrent_info and torrent_info[val_cat] == "1":
+                            # special case whether we can check for certain values in torrent info to decide the type
+                            # eg: complete_season, individual_episodes etc
+                            tracker_settings[config["translation"][translation_key]] = key_cat
+
+                    if config["translation"][translation_key] not in tracker_settings:
+                        # this type of upload is not permitted in this tracker
+                        logging.critical('[CategoryMapping] Unable to find a suitable "category/type" match for this file')
+                        logging.error("[CategoryMapping] Its possible that the media you are trying to upload is not allowed on site (e.g. DVDRip to BLU is not allowed")
+                        translation.console.print(f'\nThis "Category" ([bold]{torrent_info["type"]}[/bold]) is not allowed on this tracker', style='Red underline', highlight=False)
+                        return "STOP"
+
+                if translation_key in ('source', 'resolution', 'resolution_id'):
+                    return_value = translation._identify_resolution_source(
+                        target_val=translation_key,
+                        config=config,
+                        relevant_torrent_info_values=relevant_torrent_info_values,
+                        torrent_info=torrent_info
+                    )
+                    if return_value == "STOP":
+                        return return_value
+                    tracker_settings[config["translation"][translation_key]] = return_value
+        # ------------ required_items end ------------
+
+        # ------------ optional_items start ------------
+        # This mainly applies to BHD since they are the tracker with the most 'Optional' fields,
+        # BLU/ACM only have 'nfo_file' as an optional item which we take care of later
+        for optional_key, optional_value in optional_items.items():
+            if str(optional_key) == str(translation_value):
+                # hybrid_type is managed by hybrid_mapping.
+                if optional_value == "hybrid_type":
+                    break
+
+                logging.debug(f"[Main] Key {translation_key} mapped to optional item {optional_key} with value type as {optional_value}")
+                # -!-!- Editions -!-!- #
+                if optional_key == 'edition' and 'edition' in torrent_info:
+                    # First we remove any 'fluff' so that we can try to match the edition to the list BHD has, if not we just upload it as a custom edition
+                    local_edition_formatted = str(torrent_info["edition"]).lower().replace("edition", "").replace("cut", "").replace("'", "").replace(" ", "")
+                    # Remove extra 's'
+                    if local_edition_formatted.endswith('s'):
+                        local_edition_formatted = local_edition_formatted[:-1]
+                    # Now check to see if what we got out of the filename already exists on BHD
+                    for bhd_edition in optional_value:
+                        if str(bhd_edition).lower() == local_edition_formatted:
+                            # If its a match we save the value to tracker_settings here
+                            tracker_settings[optional_key] = bhd_edition
+                            break
+                        else:
+                            # We use the 'custom_edition' to set our own, again we only do this if we can't match what BHD already has available to select
+                            tracker_settings["custom_edition"] = torrent_info["edition"]
+
+                # -!-!- Region -!-!- # (Disc only)
+                elif optional_key == 'region' and 'region' in torrent_info:
+                    # This will only run if you are uploading a bluray_disc
+                    region = translation._get_bluray_region(optional_value, torrent_info["region"])
+                    if region is not None:
+                        tracker_settings[optional_key] = region
+
+                # -!-!- Tags -!-!- #
+                elif optional_key == 'tags':  # (Only supported on BHD)
+                    # We only support 2 tags atm, Scene & WEBDL/RIP on bhd
+                    # All we currently support regarding tags, is to assign the 'Scene' tag if we are uploading a scene release
+                    upload_these_tags_list = []
+                    for tag in optional_value:
+
+                        # This will check for the 'Scene' tag
+                        if str(tag).lower() in str(torrent_info.keys()).lower():
+                            upload_these_tags_list.append(str(tag))
+                            # tracker_settings[optional_key] = str(tag)
+
+                        # This will check for webdl/webrip tag
+                        if str(tag) in ["WEBRip", "WEBDL"]:
+                            # Check if we are uploading one of those ^^ 'sources'
+                            if str(tag).lower() == str(torrent_info["source_type"]).lower():
+                                upload_these_tags_list.append(str(tag))
+                    if len(upload_these_tags_list) != 0:
+                        tracker_settings[optional_key] = ",".join(upload_these_tags_list)
+
+                # TODO figure out why .nfo uploads fail on BHD & don't display on BLU...
+                # if optional_key in ["nfo_file", "nfo"] and "nfo_file" in torrent_info:
+                #     # So far
+                #     tracker_settings[optional_key] = torrent_info["nfo_file"]
+
+                elif optional_key == 'sd' and "sd" in torrent_info:
+                    tracker_settings[optional_key] = 1
+
+                # checking whether the optional key is for mediainfo or bdinfo
+                # TODO make changes to save bdinfo to bdinfo and move the existing bdinfo metadata to someother key
+                # for full disks the bdInfo is saved under the same key as mediainfo
+                elif translation_key == "mediainfo":
+                    logging.debug(f"[CategoryMapping] Identified {optional_key} for tracker with {'FullDisk' if args.disc else 'File/Folder'} upload")
+                    if args.disc:
+                        logging.debug("[CategoryMapping] Skipping mediainfo for tracker settings since upload is FullDisk.")
+                    else:
+                        logging.debug(f"[CategoryMapping] Setting mediainfo from torrent_info to tracker_settings for optional_key {optional_key}")
+                        tracker_settings[optional_key] = torrent_info.get("mediainfo", "0")
+                        continue
+                elif translation_key == "bdinfo":
+                    logging.debug(f"[CategoryMapping] Identified {optional_key} for tracker with {'FullDisk' if args.disc else 'File/Folder'} upload")
+                    if args.disc:
+                        logging.debug(f"[CategoryMapping] Setting mediainfo from torrent_info to tracker_settings for optional_key {optional_key}")
+                        tracker_settings[optional_key] = torrent_info.get("mediainfo", "0")
+                        continue
+                    else:
+                        logging.debug("[CategoryMapping] Skipping bdinfo for tracker settings since upload is NOT FullDisk.")
+                else:
+                    tracker_settings[optional_key] = torrent_info.get(translation_key, "")
+        # ------------ optional_items end ------------
+
+        # ----------- hybrid_mapping_v2 start -----------
+        # using in instead of == since multiple hybrid mappings can be configured
+        # such as hybrid_type_1, hybrid_type_2, hybrid_type_3 ....
+        if "hybrid_type" in translation_key:
+            should_continue, is_hybrid_translation_needed = translation._validate_and_do_hybrid_mapping(translation_value, config, tracker_settings, torrent_info, is_hybrid_translation_needed)
+            if should_continue:
+                hybrid_translation_keys.append(translation_value)
+                continue
+        # ------------ hybrid_mapping_v2 end ------------
+
+    # Adding default values from template to tracker settings
+    for default_key, default_value in config["Default"].items():
+        logging.debug(f'[DefaultMapping] Adding default key `{default_key}` with value `{default_value}` to tracker settings')
+        tracker_settings[default_key] = default_value
+
+    # at this point we have finished iterating over the translation key items
+    if is_hybrid_translation_needed:
+        translation.perform_delayed_hybrid_mapping(
+            tracker_settings=tracker_settings,
+            config=config,
+            exit_program=True,
+            torrent_info=torrent_info
+        )
+
+
+@pytest.mark.parametrize("torrent_info_name", list(_torrent_infos().keys()))
+@pytest.mark.parametrize("template_file", site_template_files, ids=[os.path.basename(file) for file in site_template_files])
+def test_compiled_translation_matches_reference(template_file, torrent_info_name, monkeypatch):
+    config = json.load(open(template_file))
+    torrent_info = _torrent_infos()[torrent_info_name]
+
+    for live in ["true", "false"]:
+        monkeypatch.setenv("live", live)
+        for args in [Args(), Args(anon=True, disc=True, internal=True, freeleech=True, sticky=True)]:
+            expected = _translate(_reference_choose_right_tracker_keys, config, torrent_info, args)
+
+            assert _translate(translation.choose_right_tracker_keys, config, torrent_info, args) == expected
+            try:
+                site_template = SiteTemplate(os.path.basename(template_file), config)
+            except ValueError:
+                # test resources are not complete site templates
+                continue
+            # the second translation reuses the rules compiled for the site template
+            assert _translate(translation.choose_right_tracker_keys, site_template, torrent_info, args) == expected
+            assert _translate(translation.choose_right_tracker_keys, site_template, torrent_info, args) == expected
+            assert site_template.translation_rules is not None
@@ -0,0 +1,154 @@
+"""
+    Differential tests of the compiled title formatting of `format_title`.
+
+    `_reference_title_from_file_name` and `_reference_title_from_template` are the implementations that applied the
+    replacements one after another. Both implementations must produce the same titles.
+"""
+import os
+import glob
+import json
+import random
+
+import pytest
+from pathlib import Path
+
+import utilities.utils_translation as translation
+from modules.site_template_registry import SiteTemplate
+
+
+working_folder = Path(__file__).resolve().parent.parent.parent
+
+site_template_files = sorted(glob.glob(f"{working_folder}/site_templates/*.json"))
+
+
+def _reference_title_from_file_name(raw_file_name):
+    temp_title = str(raw_file_name).replace('.mkv','').replace('.mp4','').replace(".", " ").replace("DDP2 0","DDP2.0").replace("DDP5 1","DDP5.1").replace("H 264","H.264").replace("H 265","H.264").replace("DD+7 1","DD+7.1").replace("AAC2 0","AAC2.0").replace("DDP2 0","DDP2.0").replace("DDP5 1","DDP5.1").replace("H 264","H.264").replace("H 265","H.264").replace("DD+7 1","DD+7.1").replace("AAC2 0","AAC2.0").replace('DD5 1','DD5.1').replace('DD2 0','DD2.0').replace('TrueHD 7 1','TrueHD 7.1').replace('DTS-HD MA 7 1','DTS-HD MA 7.1').replace('-C A A','-C.A.A')
+    return " ".join(temp_title.split())
+
+
+def _reference_title_from_template(json_config, torrent_info):
+    if str(torrent_info["source"]).lower() == "dvd":
+        config_profile = "dvd"
+    elif str(torrent_info["source"]).lower() == "web":
+        config_profile = "web"
+    else:
+        config_profile = torrent_info["source_type"]
+
+    tracker_torrent_name_style = json_config['torrent_title_format'][torrent_info["type"]][str(config_profile)]
+    generate_format_string = {}
+    separator = json_config["title_separator"] or " "
+
+    temp_load_torrent_info = tracker_torrent_name_style.replace("{", "").replace("}", "").split(" ")
+    for item in temp_load_torrent_info:
+        generate_format_string[item] = torrent_info[item].replace(" ", separator) if item in torrent_info and torrent_info[item] is not None else ""
+
+    formatted_title = ""
+    for key, value in generate_format_string.items():
+        if len(value) != 0:
+            formatted_title = f'{formatted_title}{"-" if key == "release_group" else separator}{value}'
+
+    if "torrent_title_translation" in json_config:
+        for key, val in json_config["torrent_title_translation"].items():
+            formatted_title = formatted_title.replace(key, val)
+    return str(formatted_title[1:])
+
+
+def _release_names():
+    release_names = set(os.listdir(f"{working_folder}/cache")) if os.path.isdir(f"{working_folder}/cache") else set()
+    for _, directories, files in os.walk(f"{working_folder}/tests/resources"):
+        release_names.update(directories)
+        release_names.update(files)
+    # release names made of the parts that are normalised, glued together in every possible way
+    parts = ["DDP2", "DDP5", "DD+7", "AAC2", "DD5", "DD2", "TrueHD", "DTS-HD", "MA", "H", "264", "265", "-C", "A", "AA", "0", "1", "7", "mkv", ".mkv", ".mp4", "Movie", "2022", ""]
+    randomizer = random.Random(25)
+    for _ in range(20000):
+        release_names.add("".join(randomizer.choice(parts) + randomizer.choice([".", " ", "", "..", "\t"]) for _ in range(randomizer.randint(1, 12))))
+    return sorted(release_names)
+
+
+def test_title_from_file_name_matches_reference():
+    for release_name in _release_names():
+        assert translation.format_title_from_file_name(release_name) == _reference_title_from_file_name(release_name), release_name
+
+
+@pytest.mark.parametrize(
+    ("raw_file_name", "expected"),
+    [
+        pytest.param("Movie.2022.1080p.WEB-DL.DDP5.1.H.264-GROUP.mkv", "Movie 2022 1080p WEB-DL DDP5.1 H.264-GROUP", id="web"),
+        pytest.param("Movie 2022 1080p BluRay TrueHD 7.1 Atmos x264-GROUP", "Movie 2022 1080p BluRay TrueHD 7.1 Atmos x264-GROUP", id="spaces"),
+        pytest.param("Movie.2022.1080p.BluRay.DTS-HD.MA.7.1.H.265-C.A.A", "Movie 2022 1080p BluRay DTS-HD MA 7.1 H.264-C.A.A", id="group_with_dots"),
+        pytest.param("Movie.2022.DD5.1.-C.A.AAC2.0.mp4", "Movie 2022 DD5.1 -C.A.AAC2.0", id="adjacent_codecs"),
+    ]
+)
+def test_title_from_file_name(raw_file_name, expected):
+    assert translation.format_title_from_file_name(raw_file_name) == expected
+
+
+def _torrent_infos():
+    base = {
+        "title": "The Movie: Part 2?", "year": "2022", "s00e00": None, "edition": "Director's Cut", "repack": None, "screen_size": "2160p",
+        "region": None, "uhd": "UHD", "hybrid": "Hybrid", "remux": None, "dv": "DV", "hdr": "HDR10+", "video_codec": "H.265", "audio_codec": "DD+",
+        "audio_channels": "7.1", "atmos": "Atmos", "release_group": "GROUP", "web_source": "AMZN", "web_type": "WEB-DL",
+    }
+    torrent_infos = []
+    for content_type in ["movie", "episode"]:
+        for source, source_type in [("BluRay", "bluray_encode"), ("BluRay", "bluray_remux"), ("Web", "webdl"), ("DVD", "dvd_remux"), ("HDTV", "hdtv")]:
+            torrent_info = dict(base, type=content_type, source=source, source_type=source_type)
+            if content_type == "episode":
+                torrent_info.update(s00e00="S01E02", year=None)
+            torrent_infos.append(torrent_info)
+    torrent_infos.append(dict(base, type="movie", source="BluRay", source_type="bluray_encode", audio_codec="DTS:X", title="Movie: DD+ Edition"))
+    return torrent_infos
+
+
+@pytest.mark.parametrize("template_file", site_template_files, ids=[os.path.basename(file) for file in site_template_files])
+def test_title_from_template_matches_reference(template_file):
+    config = json.load(open(template_file))
+    if not isinstance(config["torrent_title_format"], dict):
+        pytest.skip("template without title formats")
+    site_template = SiteTemplate(os.path.basename(template_file), config)
+
+    for torrent_info in _torrent_infos():
+        if torrent_info["type"] not in config["torrent_title_format"]:
+            continue
+        expected = _reference_title_from_template(config, torrent_info)
+        assert translation.format_title_from_template(config, torrent_info) == expected
+        # the second title reuses the title formatting compiled for the site template
+        assert translation.format_title_from_template(site_template, torrent_info) == expected
+        assert translation.format_title_from_template(site_template, torrent_info) == expected
+    assert site_template.title_rules is not None
+
+
+@pytest.mark.parametrize(
+    ("title_translations", "single_pass"),
+    [
+        pytest.param({"DD+": "DDP", "HDR10+": "HDR10Plus", "DTS:X": "DTS-X", ":": "", "?": ""}, True, id="bit-hdtv"),
+        pytest.param({"DD+": "DDP"}, True, id="torrentdb"),
+        pytest.param({"+": "P", "DD+": "X"}, False, id="translated_before_longer_translation"),
+        pytest.param({"DD": "D", "D+": "P"}, False, id="translation_creates_translated_text"),
+        pytest.param({"AB": "X", "BC": "Y"}, False, id="overlapping_translations"),
+        pytest.param({":": "", "DTSX": "DTS-X"}, False, id="removal_joins_text"),
+        pytest.param({}, False, id="no_translations"),
+    ]
+)
+def test_title_translations_compiled_when_independent(title_translations, single_pass):
+    compiled = translation.compile_title_translations(title_translations)
+    assert (compiled is not None) == single_pass
+
+    config = {
+        "title_separator": " ", "torrent_title_translation": title_translations,
+        "torrent_title_format": {"movie": {"web": "{title} {audio_codec} {release_group}"}},
+    }
+    for title in ["DD+ AB:C", "DTS:X DD DD+ ABC", "HDR10+ ?+D+"]:
+        torrent_info = {"type": "movie", "source": "web", "source_type": "webdl", "title": title, "audio_codec": "DD+", "release_group": "ABC"}
+        assert translation.format_title_from_template(config, torrent_info) == _reference_title_from_template(config, torrent_info)
+
+
+def test_format_title_mode(monkeypatch):
+    config = json.load(open(f"{working_folder}/site_templates/blutopia.json"))
+    torrent_info = dict(_torrent_infos()[0], raw_file_name="Some.Movie.2022.2160p.BluRay.DD+7.1.x265-GROUP.mkv")
+
+    monkeypatch.delenv("title_from_template", raising=False)
+    assert translation.format_title(config, torrent_info) == "Some Movie 2022 2160p BluRay DD+7.1 x265-GROUP"
+    monkeypatch.setenv("title_from_template", "true")
+    assert translation.format_title(config, torrent_info) == _reference_title_from_template(config, torrent_info)
@@ -14,6 +14,8 @@ from guessit import guessit
 from dotenv import dotenv_values
 from rich.console import Console
 
+import utilities.utils_torrent as torrent_utilities
+
 from modules.torrent_client import Clients, TorrentClientFactory
 
 
@@ -26,114 +28,6 @@ def get_hash(string):
     return hashed.hexdigest()
 
 
-def write_cutsom_user_inputs_to_description(torrent_info, description_file_path, config, tracker, bbcode_line_break, debug=False):
-    # -------- Add custom descriptions to description.txt --------
-    if "custom_user_inputs" in torrent_info:
-        # If the user is uploading to multiple sites we don't want to keep appending to the same description.txt file so remove it each time and write clean bbcode to it
-        #  (Note, this doesn't delete bbcode_images.txt so you aren't uploading the same images multiple times)
-        if os.path.isfile(description_file_path):
-            os.remove(description_file_path)
-
-        # we need to make sure that the tracker supports custom description for torrents.
-        # If tracker supports custom descriptions, the the tracker config will have the `description_components` key.
-        if "description_components" in config:
-            logging.debug('[CustomUserInputs] User has provided custom inputs for torrent description')
-            # here we iterate through all the custom inputs provided by the user
-            # then we check whether this component is supported by the target tracker. If tracker supports it then the `key` will be present in the tracker config.
-            with open(description_file_path, 'a') as description:
-                description_components = config["description_components"]
-                logging.debug(f'[CustomUserInputs] Custom Message components configured for tracker {tracker} are {pformat(description_components)}')
-                for custom_user_input in torrent_info["custom_user_inputs"]:
-                    # getting the component type
-                    logging.debug(f'[CustomUserInputs] Custom input data {pformat(custom_user_input)}')
-                    if custom_user_input["key"] not in description_components:
-                        logging.debug('[CustomUserInputs] This type of component is not supported by the tracker. Writing input to description as plain text')
-                        # the provided component is not present in the trackers list. hence we adds this to the description directly (plain text)
-                        description.write(custom_user_input["value"])
-                    else:
-                        # provided component is present in the tracker list, so first we'll format the content to be added to the tracker template
-                        input_wrapper_type = description_components[custom_user_input["key"]]
-                        logging.debug(f'[CustomUserInputs] Component wrapper :: `{input_wrapper_type}`')
-                        formatted_value = custom_user_input["value"].replace("\\n", bbcode_line_break)
-                        # next we need to check whether the text component has any title
-                        if "title" in custom_user_input and custom_user_input["title"] is not None:
-                            logging.debug('[CustomUserInputs] User has provided a title for this component')
-                            # if user has provided title, next we'll make sure that the tracker supports title for the component.
-                            if "TITLE_PLACEHOLDER" in input_wrapper_type:
-                                logging.debug(f'[CustomUserInputs] Adding title [{custom_user_input["title"].strip()}] to this component')
-                                input_wrapper_type = input_wrapper_type.replace("TITLE_PLACEHOLDER", custom_user_input["title"].strip())
-                            else:
-                                logging.debug(
-                                    f'[CustomUserInputs] Title is not supported for this component {custom_user_input["key"]} in this tracker {tracker}. Skipping title placement')
-                        # in cases where tracker supports title and user hasn't provided any title, we'll just remove the title placeholder
-                        # note that the = is intentional. since title would be [spoiler=TITILE]. we need to remove =TITLE
-                        # if title has already been repalced the below statement won't do anything
-                        input_wrapper_type = input_wrapper_type.replace("=TITLE_PLACEHOLDER", "")
-
-                        if debug:  # just for debugging purposes
-                            if "][" in input_wrapper_type:
-                                logging.debug('[CustomUserInputs] ][ is present in the wrapper type')
-                            elif "><" in input_wrapper_type:
-                                logging.debug('[CustomUserInputs] >< is present in the wrapper type')
-                            else:
-                                logging.debug('[CustomUserInputs] No special characters present in the wrapper type')
-                            logging.debug(f'[CustomUserInputs] Wrapper type before formatting {input_wrapper_type}')
-
-                        if "][" in input_wrapper_type:
-                            final_formatted_data = input_wrapper_type.replace("][", f']{formatted_value}[')
-                        elif "><" in input_wrapper_type:
-                            final_formatted_data = input_wrapper_type.replace("><", f'>{formatted_value}<')
-                        else:
-                            final_formatted_data = formatted_value
-                        description.write(final_formatted_data)
-                        logging.debug(f'[CustomUserInputs] Formatted value being appended to torrent description {final_formatted_data}')
-
-                    description.write(bbcode_line_break)
-        else:  # else for "description_components" in config
-            logging.debug(f"[Utils] The tracker {tracker} doesn't support custom descriptions. Skipping custom description placements.")
-
-
-def add_bbcode_images_to_description(torrent_info, config, description_file_path, bbcode_line_break):
-    if "bbcode_images" in torrent_info and "url_images" not in config["translation"]:
-        # Screenshots will be added to description only if no custom screenshot payload method is provided.
-        # Possible payload mechanisms for screenshot are 1. bbcode, 2. url, 3. post data
-        # TODO implement proper screenshot payload mechanism. [under technical_jargons?????]
-        #
-        # if custom_user_inputs is already present in torrent info, then the delete operation would have already be done
-        # so we just need to append screenshots to the description.txt
-        if "custom_user_inputs" not in torrent_info and os.path.isfile(description_file_path):
-            os.remove(description_file_path)
-
-        # Now open up the correct files and format all the bbcode/tags below
-        with open(description_file_path, 'a') as description:
-            # First add the [center] tags, "Screenshots" header, Size tags etc etc. This only needs to be written once which is why its outside of the 'for loop' below
-            description.write(
-                f'{bbcode_line_break}[center] ---------------------- [size=22]Screenshots[/size] ---------------------- {bbcode_line_break}{bbcode_line_break}')
-            # Now write in the actual screenshot bbcode
-            description.write(torrent_info["bbcode_images"])
-            description.write("[/center]")
-
-
-def write_uploader_signature_to_description(description_file_path, tracker, bbcode_line_break):
-    # TODO what will happen if custom_user_inputs and bbcode_images are not present
-    # will then open throw some errors???
-    with open(description_file_path, 'a') as description:
-        # Finally append the entire thing with some shameless self promotion ;) and some line breaks
-        if os.getenv("uploader_signature") is not None and len(os.getenv("uploader_signature")) > 0:
-            logging.debug('[Utils] User has provided custom uploader signature to use.')
-            # the user has provided a custom signature to be used. hence we'll use that.
-            uploader_signature = os.getenv("uploader_signature")
-            logging.debug(f'[Utils] User provided signature :: {uploader_signature}')
-            if not uploader_signature.startswith("[center]") and not uploader_signature.endswith("[/center]"):
-                uploader_signature = f'[center]{uploader_signature}[/center]'
-            uploader_signature = f'{uploader_signature}'
-            description.write(f'{bbcode_line_break}{bbcode_line_break}{uploader_signature}')
-        else:
-            logging.debug('[Utils] User has not provided any custom uploader signature to use. Using default signature')
-            description.write(
-                f'{bbcode_line_break}{bbcode_line_break}[center] Uploaded with [color=red]{"<3" if str(tracker).upper() in ("BHD", "BHDTV") or os.name == "nt" else "❤"}[/color] using GG-BOT Upload Assistant[/center]')
-
-
 def has_user_provided_type(user_type):
     if user_type:
         if user_type[0] in ('tv', 'movie'):
@@ -171,7 +65,8 @@ def delete_leftover_files(working_folder, file, resume=False):
            #         shutil.rmtree(f)
             logging.info(f"[Utils] Deleted the contents of the folder: {working_folder}/temp_upload/")
     else:
-        os.mkdir(f"{working_folder}/temp_upload/")
+        # the files are parsed at the same time by the pipeline, hence another file might be creating the folder right now
+        os.makedirs(f"{working_folder}/temp_upload/", exist_ok=True)
 
     if bool(os.getenv("readable_temp_data", False)) == True:
         files = f'{file}/'.replace("//", "/").strip().replace(" ", ".").replace(":", ".").replace("'", "").split("/")[:-1]
@@ -180,10 +75,7 @@ def delete_leftover_files(working_folder, file, resume=False):
     else:
         unique_hash = get_hash(file)
 
-    if not Path(f"{working_folder}/temp_upload/{unique_hash}").is_dir():
-        os.mkdir(f"{working_folder}/temp_upload/{unique_hash}")
-    if not Path(f"{working_folder}/temp_upload/{unique_hash}/screenshots/").is_dir():
-        os.mkdir(f"{working_folder}/temp_upload/{unique_hash}/screenshots/")
+    os.makedirs(f"{working_folder}/temp_upload/{unique_hash}/screenshots/", exist_ok=True)
     logging.info(f"[Utils] Created subfolder {unique_hash} for file {file}")
     return f"{unique_hash}/"
 
@@ -261,17 +153,19 @@ def check_for_dir_and_extract_rars(file_path):
         return True, file_path
 
 
-def prepare_and_validate_tracker_api_keys_dict(api_keys_file_path):
+def prepare_and_validate_tracker_api_keys_dict(api_keys_file_path, api_keys=None):
     """
         Reads the apis keys from environment and returns as a dictionary.
 
-        Method will read the available api_keys from the `api_keys_file_path`, and for each of the mentioned keys, the value will be
-        read from the environment variables. This method also checks whether the TMDB api key has been provided or not.
+        Method will read the available api_keys from the `api_keys_file_path` (unless the already loaded `api_keys` are provided),
+        and for each of the mentioned keys, the value will be read from the environment variables.
+        This method also checks whether the TMDB api key has been provided or not.
 
         In cases where the TMDB api key has not been configured, the method will raise an `AssertionError`.
     """
-
-    api_keys = json.load(open(api_keys_file_path))
+    if api_keys is None:
+        with open(api_keys_file_path) as api_keys_file:
+            api_keys = json.load(api_keys_file)
     api_keys_dict = dict()
     for value in api_keys:
         api_keys_dict[value] = os.getenv(value.upper(), "")
@@ -287,8 +181,9 @@ def prepare_and_validate_tracker_api_keys_dict(api_keys_file_path):
     return api_keys_dict
 
 
-def validate_env_file(sample_env_location):
-    sample_env_keys = dotenv_values(sample_env_location).keys()
+def validate_env_file(sample_env_location, sample_env_keys=None):
+    if sample_env_keys is None:
+        sample_env_keys = dotenv_values(sample_env_location).keys()
     # validating env file with expected keys from sample file
     for key in sample_env_keys:
         if os.getenv(key, "") == "":
@@ -369,6 +264,49 @@ def _get_client_translated_path(torrent_info):
     return f'{torrent_info["upload_media"]}/'.replace('//', '/')
 
 
+def _get_uploader_translated_path(client_path):
+    # reverse of the translation done in `_get_client_translated_path`. The media has to be read from the path accessible to the uploader
+    if bool(os.getenv('translation_needed', False)) == True:
+        uploader_accessible_path = f"{os.getenv('uploader_accessible_path', '__MISCONFIGURED_PATH__')}/".replace('//', '/')
+        client_accessible_path = f"{os.getenv('client_accessible_path', '__MISCONFIGURED_PATH__')}/".replace('//', '/')
+        return client_path.replace(client_accessible_path, uploader_accessible_path)
+    return client_path
+
+
+def _verify_before_cross_seed(torrent_file, save_path):
+    """
+        Torrents are added to the client with skip checking. When `cross_seed_verification` is set to `sampled`, a sample of
+        the pieces is verified against the media on disk first. If the verification fails, the client is asked to do a full
+        recheck instead (so that corrupt data is never seeded).
+
+        Returns the value for `is_skip_checking`
+    """
+    if str(os.getenv("cross_seed_verification", "none")).lower() != "sampled":
+        return True
+    try:
+        sample_size = int(os.getenv("cross_seed_verification_sample_size", "64"))
+        workers = int(os.getenv("cross_seed_verification_workers", "4"))
+        max_read_speed = float(os.getenv("cross_seed_verification_max_read_speed", "0"))
+        verified = torrent_utilities.verify_torrent_sample(
+            torrent=torrent_file,
+            save_path=_get_uploader_translated_path(save_path),
+            sample_size=sample_size,
+            sampling=str(os.getenv("cross_seed_verification_sampling", "stratified")).lower(),
+            workers=workers,
+            max_bytes_per_second=max_read_speed * 1024 * 1024 if max_read_speed > 0 else None
+        )
+    except Exception as e:
+        logging.exception(f"[Utils] Failed to verify {torrent_file} before cross seeding. Error: {e}")
+        verified = False
+
+    if verified:
+        logging.info(f"[Utils] Sampled pieces of '{torrent_file}' match the media. Adding to client without recheck")
+        return True
+    logging.error(f"[Utils] Sampled verification of '{torrent_file}' failed. Client will perform a full recheck")
+    console.print(f"[bold red]Sampled verification of [green]{torrent_file}[/green] failed. Torrent client will recheck the torrent[/bold red]")
+    return False
+
+
 def _post_mode_cross_seed(torrent_client, torrent_info, working_folder, tracker, allow_multiple_files):
     # TODO check and validate connection to torrent client.
     # or should this be done at the start?? Just becase torrent client connection cannot be established
@@ -400,7 +338,7 @@ def _post_mode_cross_seed(torrent_client, torrent_info, working_folder, tracker,
                 torrent=torrent_file,
                 save_path=save_path,
                 use_auto_torrent_management=False,
-                is_skip_checking=True
+                is_skip_checking=_verify_before_cross_seed(torrent_file, save_path)
             )
         else:
             logging.error(f"[Utils] Could not identify the .torrent file for tracker '{tracker}'")
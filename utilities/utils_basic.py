@@ -5,16 +5,13 @@ import glob
 import json
 import time
 import logging
-import subprocess
 
-from ffmpy import FFprobe
 from pprint import pformat
-from pymediainfo import MediaInfo
-
 from rich.console import Console
 from rich.prompt import Prompt
 
 import utilities.utils_bdinfo as bdinfo_utilities
+from utilities.utils_mediainfo import MediaProbe, get_mediainfo
 
 console = Console()
 
@@ -166,9 +163,11 @@ def __get_atmos_from_media_info(media_info_audio_track):
     return None
 
 
-def basic_get_missing_audio_codec(torrent_info, is_disc, auto_mode, audio_codec_file_path, media_info_audio_track, parse_me, missing_value):
+def basic_get_missing_audio_codec(torrent_info, is_disc, auto_mode, audio_codec_file_path, media_info_audio_track, parse_me, missing_value, media_probe=None):
     """
         Returns (audio_codec, atmos)
+
+        If a `media_probe` is provided, its ffprobe data is reused instead of running ffprobe again.
     """
     # We store some common audio code translations in this dict
     audio_codec_dict = json.load(open(audio_codec_file_path))
@@ -254,15 +253,10 @@ def basic_get_missing_audio_codec(torrent_info, is_disc, auto_mode, audio_codec_
                 return return_value, atmos
 
             # If the regex failed we can try ffprobe
-            audio_info_probe = FFprobe(
-                inputs={parse_me: None},
-                global_options=['-v', 'quiet', '-print_format', 'json', '-select_streams a:0', '-show_format', '-show_streams']
-            ).run(stdout=subprocess.PIPE)
-            audio_info = json.loads(audio_info_probe[0].decode('utf-8'))
-
-            for stream in audio_info["streams"]:
-                logging.info(f'[BasicUtils] Used ffprobe to identify the audio codec: {stream["profile"]}')
-                return stream["profile"], atmos
+            media_probe = media_probe or MediaProbe(parse_me)
+            if media_probe.ffprobe_audio_stream is not None:
+                logging.info(f'[BasicUtils] Used ffprobe to identify the audio codec: {media_probe.audio_profile}')
+                return media_probe.audio_profile, atmos
 
         logging.debug(f"[BasicUtils] Pymediainfo extracted audio_codec as {audio_codec}")
 
@@ -295,7 +289,10 @@ def basic_get_missing_audio_codec(torrent_info, is_disc, auto_mode, audio_codec_
     #quit_log_reason(reason="Could not detect audio_codec via regex, pymediainfo, & ffprobe. force_auto_upload=false so we quit now", missing_value=missing_value)
 
 
-def basic_get_missing_audio_channels(torrent_info, is_disc, auto_mode, parse_me, media_info_audio_track, missing_value):
+def basic_get_missing_audio_channels(torrent_info, is_disc, auto_mode, parse_me, media_info_audio_track, missing_value, media_probe=None):
+    """
+        If a `media_probe` is provided, its ffprobe data is reused instead of running ffprobe again.
+    """
     if is_disc and torrent_info["bdinfo"] is not None:
         return bdinfo_utilities.bdinfo_get_audio_channels_from_bdinfo(torrent_info["bdinfo"])
 
@@ -318,27 +315,22 @@ def basic_get_missing_audio_channels(torrent_info, is_disc, auto_mode, parse_me,
                 return possible_audio_channels
 
     # If the regex failed ^^ (Likely) then we use ffprobe to try and auto detect the channels
-    audio_info_probe = FFprobe(
-        inputs={parse_me: None},
-        global_options=['-v', 'quiet', '-print_format', 'json', '-select_streams a:0', '-show_format', '-show_streams']
-    ).run(stdout=subprocess.PIPE)
-
-    audio_info = json.loads(audio_info_probe[0].decode('utf-8'))
-    for stream in audio_info["streams"]:
-        # make sure 'channel_layout' exists first (on some amzn webdls it doesn't)
-        if "channel_layout" in stream:
-            # convert the words 'mono, stereo, quad' to work with regex below
-            ffmpy_channel_layout_translation = {'mono': '1.0', 'stereo': '2.0', 'quad': '4.0'}
-
-            if str(stream["channel_layout"]) in ffmpy_channel_layout_translation.keys():
-                stream["channel_layout"] = ffmpy_channel_layout_translation[stream["channel_layout"]]
-
-            # Make sure what we got back from the ffprobe search fits into the audio_channels 'format' (num.num)
-            audio_channel_layout = re.search(r'\d\.\d', str(stream["channel_layout"]).replace("(side)", ""))
-            if audio_channel_layout is not None:
-                audio_channels_ff = str(audio_channel_layout.group())
-                logging.info(f"[BasicUtils] Used ffmpy.ffprobe to identify audio channels: {audio_channels_ff}")
-                return audio_channels_ff
+    media_probe = media_probe or MediaProbe(parse_me)
+    channel_layout = media_probe.audio_channel_layout
+    # make sure 'channel_layout' exists first (on some amzn webdls it doesn't)
+    if channel_layout is not None:
+        # convert the words 'mono, stereo, quad' to work with regex below
+        ffmpy_channel_layout_translation = {'mono': '1.0', 'stereo': '2.0', 'quad': '4.0'}
+
+        if str(channel_layout) in ffmpy_channel_layout_translation.keys():
+            channel_layout = ffmpy_channel_layout_translation[channel_layout]
+
+        # Make sure what we got back from the ffprobe search fits into the audio_channels 'format' (num.num)
+        audio_channel_layout = re.search(r'\d\.\d', str(channel_layout).replace("(side)", ""))
+        if audio_channel_layout is not None:
+            audio_channels_ff = str(audio_channel_layout.group())
+            logging.info(f"[BasicUtils] Used ffmpy.ffprobe to identify audio channels: {audio_channels_ff}")
+            return audio_channels_ff
 
     # Another thing we can try is pymediainfo and count the 'Channel layout' then subtract 1 depending on if 'LFE' is one of them
     if media_info_audio_track.channel_layout is not None:
@@ -481,7 +473,7 @@ def basic_get_missing_mediainfo(torrent_info, parse_me, working_folder):
             essential_path = f"{os.path.basename(torrent_info['upload_media'])}"
         # depending on if the user is uploading a folder or file we need for format it correctly so we replace the entire path with just media file/folder name
         logging.info(f"[BasicUtils] Using the following path in mediainfo.txt: {essential_path}")
-        media_info_output = str(MediaInfo.parse(parse_me, output="text", full=False)).replace(parse_me, essential_path)
+        media_info_output = get_mediainfo(parse_me, formats="text").replace(parse_me, essential_path)
         save_location = f'{working_folder}/temp_upload/{torrent_info["working_folder"]}mediainfo.txt'
         logging.info(f'[BasicUtils] Saving mediainfo to: {save_location}')
         logging.debug(":::::::::::::::::::::::::::: MediaInfo Output ::::::::::::::::::::::::::::")
@@ -499,7 +491,7 @@ def basic_get_missing_mediainfo(torrent_info, parse_me, working_folder):
 def basic_get_mediainfo(raw_file):
     logging.debug(f"[BasicUtils] Mediainfo will parse the file: {raw_file}")
     meddiainfo_start_time = time.perf_counter()
-    media_info_result = MediaInfo.parse(raw_file)
+    media_info_result = get_mediainfo(raw_file)
     meddiainfo_end_time = time.perf_counter()
     logging.debug(f"[BasicUtils] Time taken for mediainfo to parse the file {raw_file} :: {(meddiainfo_end_time - meddiainfo_start_time)}")
     return media_info_result
@@ -514,7 +506,7 @@ def basic_get_raw_video_file(upload_media):
         if os.path.isfile(individual_file):
             logging.info(
                 f"[BasicUtils] Using {individual_file} for mediainfo tests")
-            file_info = MediaInfo.parse(individual_file)
+            file_info = get_mediainfo(individual_file)
             for track in file_info.tracks:
                 if track.track_type == "Video":
                     logging.info(
@@ -0,0 +1,181 @@
+import io
+import os
+import sys
+import time
+import logging
+import importlib
+import contextlib
+import logging.handlers
+
+from dotenv import load_dotenv
+
+
+# heavy modules that every upload needs. These are imported once per worker (or once in the forkserver) instead of once per upload
+BATCH_PRELOAD_MODULES = [
+    "guessit",
+    "rebulk",
+    "rich",
+    "torf",
+    "requests",
+    "pymediainfo",
+    "bencoding",
+    # the image hosts are imported lazily by the screenshots stage
+    "pyimgbox",
+    "ptpimg_uploader",
+    "imgurpython",
+    "utilities.utils",
+    "utilities.utils_basic",
+    "utilities.utils_dupes",
+    "utilities.utils_metadata",
+    "utilities.utils_screenshots",
+    "utilities.utils_torrent",
+    "utilities.utils_translation",
+]
+
+# folders to which auto_upload moves the .torrent files, and the status they represent
+BATCH_OUTCOME_FOLDERS = {
+    "lancados": "uploaded",
+    "dupe": "dupe",
+    "error": "error",
+    "missing": "missing",
+}
+
+# state of the current worker process, populated by `batch_worker_initializer`
+_worker_state = {}
+
+
+class BatchItemLogFilter(logging.Filter):
+
+    def __init__(self):
+        """ Adds the `item` attribute to every record, so that log lines from the workers can be attributed to the upload """
+        super().__init__()
+        self.item = "-"
+
+    def filter(self, record):
+        if not hasattr(record, "item"):
+            record.item = self.item
+        return True
+
+
+class LoggingStreamWriter(io.TextIOBase):
+
+    def __init__(self, logger, level):
+        """ File like object that emits every complete line written to it as a log record. Used to replace stdout / stderr of the workers """
+        super().__init__()
+        self.logger = logger
+        self.level = level
+        self._buffer = ""
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    def write(self, text):
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self._emit(line)
+        return len(text)
+
+    def flush(self):
+        if self._buffer:
+            self._emit(self._buffer)
+            self._buffer = ""
+
+    def _emit(self, line):
+        line = line.rstrip("\r")
+        if len(line.strip()) > 0:
+            self.logger.log(self.level, line)
+
+
+def batch_worker_initializer(log_queue, upload_module, working_folder, preload_modules=None):
+    """
+        Runs once in every worker process of the batch runner.
+        Imports the heavy modules, loads config.env and imports the `upload_module` (auto_upload), so that none of these are repeated per upload.
+        Importing the upload module initialises its process level state (config snapshot, site templates, upload outbox) once for the worker.
+        All the logs of the worker are sent to the parent process via `log_queue`.
+    """
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    log_filter = BatchItemLogFilter()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(log_filter)
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(logging.INFO)
+
+    for module in preload_modules or []:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logging.warning(f"[BatchRunner] Could not preload module {module}. Error: {e}")
+
+    if "guessit" in (preload_modules or []):
+        # guessit builds its rules on the first call, do it now instead of during the first upload
+        try:
+            from guessit import guessit
+            guessit("GG.BOT.Warm.Up.2022.1080p.WEB-DL.DDP5.1.H.264-GRP")
+        except Exception as e:
+            logging.warning(f"[BatchRunner] Could not warm up guessit. Error: {e}")
+
+    load_dotenv(f'{working_folder}/config.env')
+
+    if working_folder not in sys.path:
+        sys.path.insert(0, working_folder)
+    _worker_state["main"] = importlib.import_module(upload_module).main
+    _worker_state["log_filter"] = log_filter
+    logging.info(f"[BatchRunner] Worker {os.getpid()} is ready")
+
+
+def batch_worker_ready():
+    """ No-op task used to start the workers of the pool before the first upload is submitted """
+    return os.getpid()
+
+
+def resolve_batch_item_status(item, base_folder="."):
+    """ Identifies what happened to the upload from the folder to which the .torrent has been moved """
+    file_name = os.path.basename(item)
+    for folder, status in BATCH_OUTCOME_FOLDERS.items():
+        if os.path.isfile(os.path.join(base_folder, folder, file_name)):
+            return status
+    return "pending" if os.path.isfile(item) else "unknown"
+
+
+def run_batch_item(item, extra_args=None):
+    """
+        Uploads a single item by calling `main` of the upload module inside the current (pre warmed) worker.
+
+        Returns a dictionary with the `item`, its `status`, `duration` in seconds and the `pid` of the worker that processed it.
+    """
+    log_filter = _worker_state["log_filter"]
+    log_filter.item = os.path.basename(item)
+    output_logger = logging.getLogger("BatchRunner.output")
+
+    status = None
+    start_time = time.perf_counter()
+    logging.info(f"[BatchRunner] Starting upload of {item}")
+    try:
+        with contextlib.redirect_stdout(LoggingStreamWriter(output_logger, logging.INFO)) as stdout, \
+                contextlib.redirect_stderr(LoggingStreamWriter(output_logger, logging.WARNING)) as stderr:
+            try:
+                # failed uploads are retried by the batch runner, not by every upload
+                _worker_state["main"](["--path", item] + list(extra_args or []), retry_outbox=False)
+            finally:
+                stdout.flush()
+                stderr.flush()
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            logging.error(f"[BatchRunner] Upload exited with code {e.code} for {item}")
+            status = "exited"
+    except BaseException as e:
+        logging.exception(f"[BatchRunner] Upload of {item} failed. Error: {e}")
+        status = "failed"
+
+    duration = time.perf_counter() - start_time
+    if status is None:
+        status = resolve_batch_item_status(item)
+    logging.info(f"[BatchRunner] Finished upload of {item} with status '{status}' in {duration:0.4f} seconds")
+    log_filter.item = "-"
+    return {"item": item, "status": status, "duration": duration, "pid": os.getpid()}
@@ -2,7 +2,6 @@ import os
 import re
 import json
 import logging
-import requests
 
 from pprint import pformat
 from distutils import util
@@ -13,6 +12,8 @@ from rich.table import Table
 from rich.prompt import Confirm
 from rich.console import Console
 
+import utilities.utils_http as http_utilities
+import modules.rate_limiter as rate_limiting
 from utilities.utils_miscellaneous import miscellaneous_identify_repacks
 
 
@@ -55,9 +56,11 @@ def _prepare_post_payload(search_site, imdb, tmdb, tvmaze, tracker_api, payload,
     return url_dupe_payload
 
 
-def _make_request(url, method, search_site, site_name, json_data=None, multipart_data=None, headers=None):
+def _make_request(url, method, search_site, site_name, json_data=None, multipart_data=None, headers=None, rate_limit=None):
     try:
-        return requests.request(method, url, json=json_data, data=multipart_data, headers=headers)
+        # the dupe searches and the uploads made to the tracker share the same rate limits
+        rate_limiter = rate_limiting.get_rate_limiter(search_site, rate_limit)
+        return http_utilities.request(method, url, host_class="tracker", json=json_data, data=multipart_data, headers=headers, rate_limiter=rate_limiter)
     except Exception as ex:
         console.print(
             f"[bold red]:warning: Dupe check request to tracker [green]{site_name}[/green], failed. Hence skipping this tracker. :warning:[/bold red]\n")
@@ -209,12 +212,16 @@ def _fuzzy_similarity(our_title, check_against_title, release_title, release_yea
     return token_set_ratio
 
 
-def search_for_dupes_api(search_site, imdb, tmdb, tvmaze, torrent_info, tracker_api, debug, working_folder, auto_mode):
+def search_for_dupes_api(search_site, imdb, tmdb, tvmaze, torrent_info, tracker_api, debug, working_folder, auto_mode, config=None):
+    """
+        `config` is the site template of `search_site`. When not provided, the site template is read from `working_folder`
+    """
     if debug:
         logging.getLogger().setLevel(logging.DEBUG)
 
-    with open(f'{working_folder}/site_templates/{search_site}.json', "r", encoding="utf-8") as config_file:
-        config = json.load(config_file)
+    if config is None:
+        with open(f'{working_folder}/site_templates/{search_site}.json', "r", encoding="utf-8") as config_file:
+            config = json.load(config_file)
 
     is_repack_or_proper = torrent_info["repack"]
     logging.info(
@@ -249,6 +256,7 @@ def search_for_dupes_api(search_site, imdb, tmdb, tvmaze, torrent_info, tracker_
                 method="POST",
                 search_site=search_site,
                 site_name=str(config['name']).upper(),
+                rate_limit=config.get("rate_limit"),
                 json_data=url_dupe_payload,
                 headers=headers
             )
@@ -260,6 +268,7 @@ def search_for_dupes_api(search_site, imdb, tmdb, tvmaze, torrent_info, tracker_
                 method="POST",
                 search_site=search_site,
                 site_name=str(config['name']).upper(),
+                rate_limit=config.get("rate_limit"),
                 multipart_data=url_dupe_payload,
                 headers=headers
             )
@@ -274,6 +283,7 @@ def search_for_dupes_api(search_site, imdb, tmdb, tvmaze, torrent_info, tracker_
             method="GET",
             search_site=search_site,
             site_name=str(config['name']).upper(),
+            rate_limit=config.get("rate_limit"),
             headers=headers
         )
         if dupe_check_result == True:
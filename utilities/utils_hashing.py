@@ -0,0 +1,209 @@
+import os
+import time
+import random
+import hashlib
+import logging
+import threading
+import concurrent.futures
+
+
+# torrents smaller than this are hashed in the calling thread, since they are hashed faster than the disk can be read by multiple workers
+PARALLEL_HASHING_THRESHOLD = 256 * 1024 * 1024
+# every worker gets multiple piece ranges, so that a slow disk region doesn't leave the other workers idle at the end
+RANGES_PER_WORKER = 4
+
+
+def _get_hasher_workers():
+    try:
+        return max(1, int(os.getenv("torrent_hasher_workers") or os.cpu_count() or 1))
+    except ValueError:
+        logging.error(f"[PieceHasher] Invalid torrent_hasher_workers '{os.getenv('torrent_hasher_workers')}'. Using a single worker")
+        return 1
+
+
+def _get_hasher_pool(workers):
+    # hashlib and readinto release the GIL for piece sized buffers, hence threads hash the pieces in parallel.
+    # A process pool would re-import the __main__ script (auto_upload.py / auto_reupload.py) in every worker
+    return concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="piece-hasher")
+
+
+def _get_file_layout(files):
+    """ Converts [(path, size)] into [(path, size, offset)] where offset is the position of the file in the torrent data """
+    layout = []
+    offset = 0
+    for path, size in files:
+        layout.append((path, size, offset))
+        offset += size
+    return layout, offset
+
+
+def hash_piece_range(layout, piece_size, first_piece, last_piece):
+    """
+        Returns the SHA-1 digests of the pieces [first_piece, last_piece) concatenated together.
+
+        `layout` is the list of (path, size, offset) of all the files in the torrent, in the order they appear in the torrent.
+        Pieces that span the boundary between two files are read partly from each of them.
+        Data is read straight into one reusable piece sized buffer (no intermediate copies).
+    """
+    total_size = layout[-1][2] + layout[-1][1] if len(layout) > 0 else 0
+    range_start = first_piece * piece_size
+    range_end = min(last_piece * piece_size, total_size)
+
+    piece_buffer = bytearray(piece_size)
+    piece_view = memoryview(piece_buffer)
+    piece_filled = 0
+    digests = bytearray()
+
+    for path, size, offset in layout:
+        if offset + size <= range_start or size == 0:
+            continue
+        if offset >= range_end:
+            break
+        position = max(range_start, offset) - offset
+        file_end = min(range_end, offset + size) - offset
+        with open(path, "rb", buffering=0) as media_file:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(media_file.fileno(), position, file_end - position, os.POSIX_FADV_SEQUENTIAL)
+            media_file.seek(position)
+            while position < file_end:
+                read_size = media_file.readinto(piece_view[piece_filled:piece_filled + min(piece_size - piece_filled, file_end - position)])
+                if not read_size:
+                    raise IOError(f"Unexpected end of file {path} at offset {position}. The file might have been modified")
+                position += read_size
+                piece_filled += read_size
+                if piece_filled == piece_size:
+                    digests += hashlib.sha1(piece_view).digest()
+                    piece_filled = 0
+
+    # last piece of the torrent is usually shorter than the piece size
+    if piece_filled > 0:
+        digests += hashlib.sha1(piece_view[:piece_filled]).digest()
+    piece_view.release()
+    return bytes(digests)
+
+
+def hash_pieces(files, piece_size, workers=None, callback=None):
+    """
+        Computes the `pieces` of a torrent containing `files` ([(path, size)] in torrent order).
+
+        The piece range is split across a pool of worker threads, each worker hashing contiguous pieces.
+        `callback(pieces_done, pieces_total)` is invoked as ranges of pieces are completed.
+
+        Returns the concatenated SHA-1 digests of all the pieces.
+    """
+    layout, total_size = _get_file_layout(files)
+    pieces_total = (total_size + piece_size - 1) // piece_size
+    if pieces_total == 0:
+        return b''
+    workers = _get_hasher_workers() if workers is None else max(1, int(workers))
+    start_time = time.perf_counter()
+
+    if workers == 1 or total_size < PARALLEL_HASHING_THRESHOLD:
+        # hashing in the calling thread, one range at a time so that the progress can still be reported
+        ranges = _get_piece_ranges(pieces_total, RANGES_PER_WORKER)
+        results = []
+        for first_piece, last_piece in ranges:
+            results.append(hash_piece_range(layout, piece_size, first_piece, last_piece))
+            if callback is not None:
+                callback(last_piece, pieces_total)
+    else:
+        ranges = _get_piece_ranges(pieces_total, workers * RANGES_PER_WORKER)
+        results = [None] * len(ranges)
+        pieces_done = 0
+        with _get_hasher_pool(min(workers, len(ranges))) as executor:
+            futures = {
+                executor.submit(hash_piece_range, layout, piece_size, first_piece, last_piece): index
+                for index, (first_piece, last_piece) in enumerate(ranges)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                pieces_done += ranges[index][1] - ranges[index][0]
+                if callback is not None:
+                    callback(pieces_done, pieces_total)
+
+    duration = time.perf_counter() - start_time
+    logging.info(f"[PieceHasher] Hashed {pieces_total} pieces ({total_size} bytes) with {workers} worker(s) in {duration:0.4f} seconds "
+                 f"({(total_size / (1024 * 1024)) / max(duration, 1e-9):0.2f} MB/s)")
+    return b''.join(results)
+
+
+def _get_piece_ranges(pieces_total, number_of_ranges):
+    """ Splits the pieces [0, pieces_total) into at most `number_of_ranges` contiguous ranges of (almost) equal length """
+    number_of_ranges = max(1, min(number_of_ranges, pieces_total))
+    range_length, remainder = divmod(pieces_total, number_of_ranges)
+    ranges = []
+    first_piece = 0
+    for index in range(number_of_ranges):
+        last_piece = first_piece + range_length + (1 if index < remainder else 0)
+        ranges.append((first_piece, last_piece))
+        first_piece = last_piece
+    return ranges
+
+
+class _ReadThrottle:
+
+    def __init__(self, bytes_per_second):
+        """ Paces the reads of multiple threads so that together they don't read more than `bytes_per_second` """
+        self.bytes_per_second = bytes_per_second
+        self._next_read = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, size):
+        with self._lock:
+            now = time.monotonic()
+            wait_until = max(now, self._next_read)
+            self._next_read = wait_until + size / self.bytes_per_second
+        if wait_until > now:
+            time.sleep(wait_until - now)
+
+
+def select_sample_pieces(pieces_total, sample_size, sampling="stratified", rng=None):
+    """
+        Selects the indexes of the pieces to be verified.
+
+        stratified => the torrent is split into `sample_size` equal strata and a random piece is picked from each of them,
+                      hence every region of the media (and every file of a season pack) is covered
+        random     => `sample_size` pieces picked at random
+
+        The first and last pieces are always selected, since they are the ones most likely to be affected by a truncated or padded file.
+    """
+    rng = rng or random.Random()
+    if pieces_total <= sample_size + 2:
+        return list(range(pieces_total))
+    selected = {0, pieces_total - 1}
+    if sampling == "random":
+        selected.update(rng.sample(range(1, pieces_total - 1), sample_size))
+    else:
+        for first_piece, last_piece in _get_piece_ranges(pieces_total, sample_size):
+            selected.add(rng.randrange(first_piece, last_piece))
+    return sorted(selected)
+
+
+def verify_pieces(files, piece_size, pieces, piece_indexes, workers=4, max_bytes_per_second=None):
+    """
+        Hashes the pieces at `piece_indexes` of the media in `files` ([(path, size)] in torrent order) and compares them
+        with `pieces` (the concatenated SHA-1 digests from the .torrent). Pieces are read on a thread pool, and when
+        `max_bytes_per_second` is provided, all the workers together read at most that many bytes per second.
+
+        Returns the list of piece indexes that don't match (or couldn't be read)
+    """
+    layout, total_size = _get_file_layout(files)
+    throttle = _ReadThrottle(max_bytes_per_second) if max_bytes_per_second else None
+
+    def verify_piece(piece_index):
+        if throttle is not None:
+            throttle.acquire(min(piece_size, total_size - piece_index * piece_size))
+        try:
+            digest = hash_piece_range(layout, piece_size, piece_index, piece_index + 1)
+        except OSError as e:
+            logging.error(f"[PieceHasher] Failed to read piece {piece_index}. Error: {e}")
+            return False
+        return digest == pieces[piece_index * 20:(piece_index + 1) * 20]
+
+    start_time = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="piece-verifier") as executor:
+        results = list(executor.map(verify_piece, piece_indexes))
+    failed_pieces = [piece_index for piece_index, verified in zip(piece_indexes, results) if not verified]
+    logging.info(f"[PieceHasher] Verified {len(piece_indexes)} pieces ({len(failed_pieces)} failed) in {time.perf_counter() - start_time:0.4f} seconds")
+    return failed_pieces
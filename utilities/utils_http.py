@@ -0,0 +1,165 @@
+import os
+import time
+import logging
+import threading
+import requests
+
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Every outbound http request of the upload assistant goes through this module.
+# Requests are grouped into host classes, and one pooled (keep-alive) session is maintained per host class and host,
+# so repeated calls to the same host reuse the already established TCP / TLS connection.
+#
+# The defaults of every host class can be overridden from config.env
+#   http_<host_class>_timeout  => seconds to wait for the server (connect and read)
+#   http_<host_class>_retries  => number of retries on connection failures and on 429 / 5xx responses
+#   http_<host_class>_backoff  => backoff factor between the retries (backoff * 2 ^ (retry - 1) seconds)
+#   http_pool_size             => maximum number of connections kept alive per host
+#
+# Only connection failures are retried for non idempotent requests (POST). Hence an upload is never sent twice.
+#
+# Requests to the trackers are additionally rate limited per tracker (`rate_limit` section of the site templates, see `modules.rate_limiter`).
+# The time spent waiting for the rate limiter is reported as the queue time of the requests.
+HOST_CLASSES = {
+    "metadata": {"timeout": 30, "retries": 3, "backoff": 0.5},
+    "tracker": {"timeout": 60, "retries": 2, "backoff": 1},
+    "image_host": {"timeout": 120, "retries": 2, "backoff": 1},
+    "torrent_client": {"timeout": 60, "retries": 2, "backoff": 0.5},
+    "default": {"timeout": 60, "retries": 0, "backoff": 0},
+}
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_statistics = {}
+_statistics_lock = threading.Lock()
+
+
+def _get_host_class_settings(host_class):
+    defaults = HOST_CLASSES.get(host_class, HOST_CLASSES["default"])
+    settings = {}
+    for setting, default in defaults.items():
+        value = os.getenv(f"http_{host_class}_{setting}")
+        try:
+            settings[setting] = type(default)(value) if value is not None and len(str(value)) > 0 else default
+        except ValueError:
+            logging.error(f"[HttpClient] Invalid value '{value}' for http_{host_class}_{setting}. Using the default {default}")
+            settings[setting] = default
+    return settings
+
+
+def _get_host(url):
+    url_parts = urlsplit(url)
+    return f"{url_parts.scheme}://{url_parts.netloc}"
+
+
+def _create_session(host_class):
+    settings = _get_host_class_settings(host_class)
+    try:
+        pool_size = int(os.getenv("http_pool_size") or 10)
+    except ValueError:
+        pool_size = 10
+    retry = Retry(
+        total=settings["retries"],
+        connect=settings["retries"],
+        read=settings["retries"],
+        status=settings["retries"],
+        backoff_factor=settings["backoff"],
+        status_forcelist=RETRY_STATUS_CODES,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(url, host_class="default"):
+    """ Returns the pooled session for the host of `url`. A new session is created on first use """
+    key = (host_class, _get_host(url))
+    with _sessions_lock:
+        if key not in _sessions:
+            logging.debug(f"[HttpClient] Creating a new {host_class} session for {key[1]}")
+            _sessions[key] = _create_session(host_class)
+        return _sessions[key]
+
+
+def close_sessions():
+    """ Closes all the pooled sessions, and the connections kept alive by them """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _record(host_class, host, duration, failed, queue_time=0.0):
+    with _statistics_lock:
+        statistics = _statistics.setdefault(
+            (host_class, host), {"requests": 0, "failures": 0, "total_time": 0.0, "max_time": 0.0, "total_queue_time": 0.0, "max_queue_time": 0.0}
+        )
+        statistics["requests"] += 1
+        statistics["failures"] += 1 if failed else 0
+        statistics["total_time"] += duration
+        statistics["max_time"] = max(statistics["max_time"], duration)
+        statistics["total_queue_time"] += queue_time
+        statistics["max_queue_time"] = max(statistics["max_queue_time"], queue_time)
+
+
+def get_request_statistics():
+    """
+        Returns the request timing metrics collected so far, per host class and host.
+        eg: {"metadata": {"https://api.themoviedb.org": {"requests": 3, "failures": 0, "total_time": 0.9, "max_time": 0.5, "average_time": 0.3, ...}}}
+        `*_queue_time` is the time spent waiting for the rate limiter of the host before sending the requests
+    """
+    with _statistics_lock:
+        result = {}
+        for (host_class, host), statistics in _statistics.items():
+            result.setdefault(host_class, {})[host] = dict(
+                statistics,
+                average_time=statistics["total_time"] / statistics["requests"],
+                average_queue_time=statistics["total_queue_time"] / statistics["requests"]
+            )
+        return result
+
+
+def _send(method, url, host_class, queue_time, **kwargs):
+    host = _get_host(url)
+    failed = True
+    start_time = time.perf_counter()
+    try:
+        response = get_session(url, host_class).request(method, url, **kwargs)
+        failed = not response.ok
+        return response
+    finally:
+        duration = time.perf_counter() - start_time
+        _record(host_class, host, duration, failed, queue_time)
+        logging.debug(f"[HttpClient] {method} request to {host} ({host_class}) took {duration:0.4f} seconds")
+
+
+def request(method, url, host_class="default", rate_limiter=None, **kwargs):
+    """
+        Same as `requests.request`, but the request is sent through the pooled session of the host of `url`.
+        The timeout and retries of the `host_class` are applied, unless a `timeout` is provided explicitly.
+
+        When a `rate_limiter` (`modules.rate_limiter.TokenBucketRateLimiter`) is provided, the request waits for the limiter
+        before it is sent and the limiter adapts its limits based on the response.
+    """
+    kwargs.setdefault("timeout", _get_host_class_settings(host_class)["timeout"])
+    if rate_limiter is None:
+        return _send(method, url, host_class, 0.0, **kwargs)
+    with rate_limiter.slot() as queue_time:
+        response = _send(method, url, host_class, queue_time, **kwargs)
+        rate_limiter.observe(response.status_code, response.headers.get("Retry-After"))
+        return response
+
+
+def get(url, host_class="default", **kwargs):
+    return request("GET", url, host_class=host_class, **kwargs)
+
+
+def post(url, host_class="default", **kwargs):
+    return request("POST", url, host_class=host_class, **kwargs)
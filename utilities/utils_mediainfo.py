@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+import contextlib
+import subprocess
+import concurrent.futures
+
+from ffmpy import FFprobe
+from pymediainfo import MediaInfo
+
+
+# MediaInfo results are cached on disk, keyed by the identity of the file (path, size, mtime and inode).
+# If any of these changes, the cached entry is discarded and the file is parsed again.
+#
+# Supported formats
+#   xml  => the parsed `MediaInfo` object (same as `MediaInfo.parse(path)`)
+#   text => the text output used for mediainfo.txt (same as `MediaInfo.parse(path, output="text", full=False)`)
+MEDIAINFO_FORMATS = ("xml", "text")
+# the text output contains the path with which the file was parsed ("Complete name"). It is cached with this placeholder
+# instead, and the path of the caller is put back when it is read, since the same file can be reached through differently spelled paths
+TEXT_PATH_PLACEHOLDER = "{{GG_BOT_MEDIA_PATH}}"
+
+_default_cache_path = f'{os.path.dirname(os.path.dirname(os.path.realpath(__file__)))}/temp_upload/mediainfo_cache.db'
+_statistics = {"hit": 0, "miss": 0}
+_statistics_lock = threading.Lock()
+
+
+def _get_cache_path():
+    return os.getenv("mediainfo_cache_path") or _default_cache_path
+
+
+def _is_cache_enabled():
+    return str(os.getenv("mediainfo_cache", "true")).lower() != "false"
+
+
+@contextlib.contextmanager
+def _cache_connection():
+    connection = _connect(_get_cache_path())
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def _connect(cache_path):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    connection = sqlite3.connect(cache_path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS mediainfo ("
+        "path TEXT NOT NULL, format TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL, "
+        "data TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (path, format))"
+    )
+    return connection
+
+
+def _get_file_identity(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def _parse(path, media_format):
+    if media_format == "xml":
+        return MediaInfo.parse(path, output="OLDXML")
+    return str(MediaInfo.parse(path, output="text", full=False))
+
+
+def _record(result, path, media_format):
+    with _statistics_lock:
+        _statistics[result] += 1
+        hits, misses = _statistics["hit"], _statistics["miss"]
+    logging.info(f"[MediaInfoCache] Cache {result} for {media_format} of {path}. Total hits: {hits}, misses: {misses}")
+
+
+def get_cache_statistics():
+    with _statistics_lock:
+        return dict(_statistics)
+
+
+def _get_raw_mediainfo(path, media_format):
+    if not _is_cache_enabled():
+        return _parse(path, media_format)
+
+    absolute_path, size, mtime_ns, inode = _get_file_identity(path)
+    try:
+        with _cache_connection() as connection:
+            cached = connection.execute(
+                "SELECT data FROM mediainfo WHERE path = ? AND format = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+                (absolute_path, media_format, size, mtime_ns, inode)
+            ).fetchone()
+    except sqlite3.Error as e:
+        logging.error(f"[MediaInfoCache] Failed to read from mediainfo cache. Error: {e}")
+        cached = None
+
+    if cached is not None:
+        _record("hit", path, media_format)
+        return cached[0].replace(TEXT_PATH_PLACEHOLDER, path) if media_format == "text" else cached[0]
+
+    _record("miss", path, media_format)
+    mediainfo_start_time = time.perf_counter()
+    data = _parse(path, media_format)
+    logging.debug(f"[MediaInfoCache] Time taken for mediainfo to parse the file {path} :: {(time.perf_counter() - mediainfo_start_time)}")
+    try:
+        with _cache_connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO mediainfo (path, format, size, mtime_ns, inode, data, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (absolute_path, media_format, size, mtime_ns, inode, data.replace(path, TEXT_PATH_PLACEHOLDER) if media_format == "text" else data, time.time())
+            )
+    except sqlite3.Error as e:
+        logging.error(f"[MediaInfoCache] Failed to write to mediainfo cache. Error: {e}")
+    return data
+
+
+def get_mediainfo(path, formats="xml"):
+    """
+        Returns the MediaInfo of `path`, from the on-disk cache if the file hasn't changed since it was last parsed.
+
+        :param path: the media file to parse
+        :param formats: a single format (`xml` or `text`) or a list of formats.
+        :return: `MediaInfo` object for `xml` and str for `text`. When a list of formats is provided a list of results is returned in the same order.
+    """
+    requested_formats = [formats] if isinstance(formats, str) else list(formats)
+    for media_format in requested_formats:
+        if media_format not in MEDIAINFO_FORMATS:
+            raise ValueError(f"Unsupported mediainfo format '{media_format}'. Supported formats are {MEDIAINFO_FORMATS}")
+
+    results = []
+    for media_format in requested_formats:
+        data = _get_raw_mediainfo(path, media_format)
+        results.append(MediaInfo(data) if media_format == "xml" else data)
+    return results[0] if isinstance(formats, str) else results
+
+
+class MediaProbe:
+
+    def __init__(self, path):
+        """ All the probing data for a single media file.
+
+            The file is parsed by mediainfo at most once and by ffprobe at most once (all streams in a single invocation),
+            no matter how many properties are read from this object. Both are loaded lazily, or concurrently using `prefetch`.
+        """
+        self.path = path
+        self._mediainfo = None
+        self._ffprobe = None
+        self._mediainfo_lock = threading.Lock()
+        self._ffprobe_lock = threading.Lock()
+
+    def prefetch(self, ffprobe=True):
+        """ Runs mediainfo and (optionally) ffprobe concurrently, so that the slower one hides the other """
+        if not ffprobe:
+            return self.mediainfo
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            ffprobe_future = executor.submit(lambda: self.ffprobe)
+            self.mediainfo
+            ffprobe_future.result()
+
+    @property
+    def mediainfo(self):
+        with self._mediainfo_lock:
+            if self._mediainfo is None:
+                self._mediainfo = get_mediainfo(self.path)
+            return self._mediainfo
+
+    @property
+    def ffprobe(self):
+        with self._ffprobe_lock:
+            if self._ffprobe is None:
+                logging.debug(f"[MediaProbe] Running ffprobe on {self.path}")
+                ffprobe_start_time = time.perf_counter()
+                probe_output = FFprobe(
+                    inputs={self.path: None},
+                    global_options=['-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams']
+                ).run(stdout=subprocess.PIPE)
+                self._ffprobe = json.loads(probe_output[0].decode('utf-8'))
+                logging.debug(f"[MediaProbe] Time taken for ffprobe on {self.path} :: {(time.perf_counter() - ffprobe_start_time)}")
+            return self._ffprobe
+
+    def _get_track(self, track_type):
+        for track in self.mediainfo.tracks:
+            if track.track_type == track_type:
+                return track
+        return None
+
+    @property
+    def video_track(self):
+        return self._get_track("Video")
+
+    @property
+    def audio_track(self):
+        return self._get_track("Audio")
+
+    @property
+    def duration(self):
+        """ Duration of the video track in milliseconds, as a string without the fractional part """
+        video_track = self.video_track
+        return str(video_track.duration).split(".", 1)[0] if video_track is not None else None
+
+    @property
+    def video_format(self):
+        video_track = self.video_track
+        return video_track.format if video_track is not None else None
+
+    @property
+    def hdr_format(self):
+        video_track = self.video_track
+        return video_track.hdr_format if video_track is not None else None
+
+    @property
+    def is_dolby_vision(self):
+        return self.hdr_format is not None and "Dolby Vision" in self.hdr_format
+
+    @property
+    def atmos(self):
+        audio_track = self.audio_track
+        if audio_track is not None and audio_track.commercial_name is not None and "atmos" in audio_track.commercial_name.lower():
+            return "Atmos"
+        return None
+
+    @property
+    def ffprobe_audio_stream(self):
+        """ The first audio stream reported by ffprobe (same as `-select_streams a:0`) """
+        for stream in self.ffprobe.get("streams", []):
+            if stream.get("codec_type") == "audio":
+                return stream
+        return None
+
+    @property
+    def audio_profile(self):
+        audio_stream = self.ffprobe_audio_stream
+        return audio_stream.get("profile") if audio_stream is not None else None
+
+    @property
+    def audio_channel_layout(self):
+        audio_stream = self.ffprobe_audio_stream
+        return audio_stream.get("channel_layout") if audio_stream is not None else None
@@ -1,19 +1,64 @@
 import os
 import sys
 import logging
-import requests
+import threading
 
 from rich import box
 from rich.table import Table
 from rich.console import Console
 from rich.prompt import Prompt
 
+import utilities.utils_http as http_utilities
+from modules.metadata_cache import MetadataCache, SqliteMetadataStore, CacheBackendMetadataStore
+
 
 console = Console()
 
+_metadata_cache = None
+_metadata_cache_lock = threading.Lock()
+
+
+def metadata_configure_cache(cache_client=None):
+    """
+        Creates the metadata cache based on the users configuration.
+
+        metadata_cache             => set to false to disable the cache. Identical lookups made at the same time are still batched
+        metadata_cache_backend     => `sqlite` (default) or `cache` to use the configured `modules.cache.Cache` (`cache_client`)
+        metadata_cache_path        => location of the sqlite database. Defaults to temp_upload/metadata_cache.db
+        metadata_cache_ttl         => seconds for which the responses are cached. Defaults to 7 days
+        metadata_cache_negative_ttl => seconds for which lookups without any results are cached. Defaults to 1 hour
+    """
+    global _metadata_cache
+    store = None
+    if str(os.getenv("metadata_cache", "true")).lower() != "false":
+        if str(os.getenv("metadata_cache_backend", "sqlite")).lower() == "cache" and cache_client is not None:
+            logging.info("[MetadataUtils] Using the configured cache as the metadata cache")
+            store = CacheBackendMetadataStore(cache_client)
+        else:
+            cache_path = os.getenv("metadata_cache_path") or f'{os.path.dirname(os.path.dirname(os.path.realpath(__file__)))}/temp_upload/metadata_cache.db'
+            logging.info(f"[MetadataUtils] Using {cache_path} as the metadata cache")
+            store = SqliteMetadataStore(cache_path)
+    _metadata_cache = MetadataCache(
+        store=store,
+        ttl=int(os.getenv("metadata_cache_ttl") or 604800),
+        negative_ttl=int(os.getenv("metadata_cache_negative_ttl") or 3600)
+    )
+    return _metadata_cache
+
+
+def _get_metadata_cache():
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            metadata_configure_cache()
+        return _metadata_cache
+
+
+def _get_metadata(endpoint, url):
+    return _get_metadata_cache().get(endpoint, url, lambda metadata_url: http_utilities.get(metadata_url, host_class="metadata"))
+
 
 def _do_tmdb_search(url):
-    return requests.get(url)
+    return _get_metadata("tmdb_search", url)
 
 
 def __is_auto_reuploader():
@@ -254,7 +299,7 @@ def _metadata_get_external_id(id_site, id_value, external_site, content_type):
         if external_site == "imdb":  # we need imdb id
             if id_site == "tmdb":  # we have tmdb id
                 logging.info(f"[MetadataUtils] GET Request For IMDB Lookup: https://api.themoviedb.org/3/{content_type}/{id_value}/external_ids?api_key=<REDACTED>&language=en-US")
-                imdb_id_request = requests.get(get_imdb_id_from_tmdb_url).json()
+                imdb_id_request = _get_metadata("tmdb_external_ids", get_imdb_id_from_tmdb_url).json()
                 if imdb_id_request["imdb_id"] is None or len(imdb_id_request["imdb_id"]) < 1:
                     logging.debug("[MetadataUtils] Returning imdb id as `0`")
                     return "0"
@@ -262,14 +307,14 @@ def _metadata_get_external_id(id_site, id_value, external_site, content_type):
                 return imdb_id_request["imdb_id"] if imdb_id_request["imdb_id"] is not None else "0"
             else:  # we have tvmaze
                 logging.info(f"[MetadataUtils] GET Request For IMDB Lookup: {get_imdb_id_from_tvmaze_url}")
-                imdb_id_request = requests.get(get_imdb_id_from_tvmaze_url).json()
+                imdb_id_request = _get_metadata("tvmaze_show", get_imdb_id_from_tvmaze_url).json()
                 logging.debug(f"[MetadataUtils] Returning imdb id as `{imdb_id_request['externals']['imdb']}`")
                 return imdb_id_request['externals']['imdb'] if imdb_id_request['externals']['imdb'] is not None else "0"
         elif external_site == "tvmaze":  # we need tvmaze id
             # tv maze needs imdb id to search
             if id_site == "imdb":
                 logging.info(f"[MetadataUtils] GET Request For TVMAZE Lookup: {get_tvmaze_id_from_imdb_url}")
-                tvmaze_id_request = requests.get(get_tvmaze_id_from_imdb_url).json()
+                tvmaze_id_request = _get_metadata("tvmaze_lookup", get_tvmaze_id_from_imdb_url).json()
                 logging.debug(f"[MetadataUtils] Returning tvmaze id as `{tvmaze_id_request['id']}`")
                 return str(tvmaze_id_request["id"]) if tvmaze_id_request["id"] is not None else "0"
             else:
@@ -278,7 +323,7 @@ def _metadata_get_external_id(id_site, id_value, external_site, content_type):
                 return "0"
         else:  # we need tmdb id
             logging.info(f"[MetadataUtils] GET Request For TMDB Lookup: https://api.themoviedb.org/3/find/{id_value}?api_key=<REDACTED>&language=en-US&external_source=imdb_id")
-            tmdb_id_request = requests.get(get_tmdb_id_from_imdb_url).json()
+            tmdb_id_request = _get_metadata("tmdb_find", get_tmdb_id_from_imdb_url).json()
             for item in tmdb_id_request:
                 if len(tmdb_id_request[item]) == 1:
                     logging.debug(f"[MetadataUtils] Returning tmdb id as `{str(tmdb_id_request[item][0]['id'])}`")
@@ -301,7 +346,7 @@ def search_for_mal_id(content_type, tmdb_id, torrent_info):
     if content_type == 'tv':
         get_tvdb_id = f"https://api.themoviedb.org/3/tv/{tmdb_id}/external_ids?api_key={os.getenv('TMDB_API_KEY')}&language=en-US"
         logging.info(f"[MetadataUtils] GET Request For TVDB Lookup: https://api.themoviedb.org/3/tv/{tmdb_id}/external_ids?api_key=<REDACTED>&language=en-US")
-        get_tvdb_id_response = requests.get(get_tvdb_id).json()
+        get_tvdb_id_response = _get_metadata("tmdb_external_ids", get_tvdb_id).json()
         # Look for the tvdb_id key
         if 'tvdb_id' in get_tvdb_id_response and get_tvdb_id_response['tvdb_id'] is not None:
             temp_map["tvdb"] = str(get_tvdb_id_response['tvdb_id'])
@@ -316,7 +361,7 @@ def search_for_mal_id(content_type, tmdb_id, torrent_info):
     # I might just start include the "tmdb --> mal .json" map with this bot instead of selfhosting it as an api, but for now it works so I'll revisit the subject later
     tmdb_tvdb_id_to_mal = f"http://195.201.146.92:5000/api/?{content_type_to_value_dict[content_type]}={temp_map[content_type_to_value_dict[content_type]]}"
     logging.info(f"[MetadataUtils] GET Request For MAL Lookup: {tmdb_tvdb_id_to_mal}")
-    mal_id_response = requests.get(tmdb_tvdb_id_to_mal)
+    mal_id_response = _get_metadata("mal", tmdb_tvdb_id_to_mal)
 
     # If the response returns http code 200 that means that a number has been returned, it'll either be the real mal ID or it will just be 0, either way we can use it
     if mal_id_response.status_code == 200:
@@ -353,7 +398,7 @@ def metadata_compare_tmdb_data_local(torrent_info):
     get_media_info_url = f"https://api.themoviedb.org/3/{content_type}/{torrent_info['tmdb']}?api_key={os.getenv('TMDB_API_KEY')}"
 
     try:
-        get_media_info = requests.get(get_media_info_url).json()
+        get_media_info = _get_metadata("tmdb_details", get_media_info_url).json()
     except Exception:
         logging.exception('[MetadataUtils] Failed to get TVDB and MAL id from TMDB.')
         return title, year, tvdb, mal
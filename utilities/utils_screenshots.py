@@ -1,20 +1,20 @@
 import os
 import re
 import json
+import time
 import base64
 import asyncio
 import logging
+import concurrent.futures
 import requests
-import pyimgbox
-import ptpimg_uploader
-import oxipng 
 from rich.progress import track
 from rich.console import Console
 
 from ffmpy import FFmpeg
 from pathlib import Path
 from datetime import datetime
-from imgurpython import ImgurClient
+
+import utilities.utils_http as http_utilities
 import platform
 # For more control over rich terminal content, import and construct a Console object.
 console = Console()
@@ -22,6 +22,7 @@ def _optimize_images(image):
     
     if os.path.exists(image):
         try:
+            import oxipng
             oxipng.optimize(image, level=6)
         except Exception as e:
             print(e)
@@ -45,6 +46,101 @@ def _get_ss_range(duration, num_of_screenshots):
     return list_of_ss_timestamps
 
 
+def _timestamp_to_seconds(ss_timestamp):
+    hours, minutes, seconds = ss_timestamp.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def _get_screenshot_settings(num_of_screenshots):
+    """
+        Reads the screenshot engine configurations from config.env
+
+        screenshots_mode          => `parallel` (default) runs one ffmpeg process per screenshot, concurrently
+                                     `single` uses the `select` filter to write all the screenshots from one ffmpeg process
+        screenshots_workers       => number of ffmpeg processes that can run at the same time in `parallel` mode
+        screenshots_ffmpeg_threads => value for the ffmpeg `-threads` option. Not set by default (ffmpeg decides)
+        screenshots_keyframe_seek => seek to the closest keyframe instead of decoding up to the exact timestamp
+    """
+    mode = str(os.getenv("screenshots_mode", "parallel")).lower()
+    if mode not in ("parallel", "single"):
+        logging.error(f"[Screenshots] Invalid screenshots_mode '{mode}'. Falling back to 'parallel'")
+        mode = "parallel"
+    try:
+        workers = int(os.getenv("screenshots_workers") or min(int(num_of_screenshots), os.cpu_count() or 1))
+    except ValueError:
+        logging.error(f"[Screenshots] Invalid screenshots_workers '{os.getenv('screenshots_workers')}'. Using a single worker")
+        workers = 1
+    return {
+        "mode": mode,
+        "workers": max(1, workers),
+        "threads": os.getenv("screenshots_ffmpeg_threads") or None,
+        "keyframe_seek": str(os.getenv("screenshots_keyframe_seek", "false")).lower() == "true"
+    }
+
+
+def _extract_screenshot(upload_media, ss_timestamp, output_path, threads=None, keyframe_seek=False):
+    """ Takes a single screenshot at `ss_timestamp` and returns the time taken in seconds """
+    input_options = f'-loglevel panic -ss {ss_timestamp}'
+    # `-itsoffset -2` added for Frame accurate screenshot. With keyframe seeking, ffmpeg doesn't decode up to the exact timestamp
+    input_options = f'{input_options} -noaccurate_seek' if keyframe_seek else f'{input_options} -itsoffset -2'
+    if threads is not None:
+        input_options = f'{input_options} -threads {threads}'
+    start_time = time.perf_counter()
+    FFmpeg(inputs={upload_media: input_options}, outputs={output_path: '-frames:v 1 -q:v 10'}).run()
+    return time.perf_counter() - start_time
+
+
+def _extract_screenshots_single_pass(upload_media, screenshots, threads=None):
+    """
+        Takes all the `screenshots` [(timestamp, output_path)] with a single ffmpeg process.
+        The `select` filter picks the first frame at or after every timestamp, and the frames are then moved to their output paths.
+        Returns the time taken in seconds.
+    """
+    screenshots = sorted(screenshots, key=lambda screenshot: _timestamp_to_seconds(screenshot[0]))
+    select_expression = "+".join(
+        f'gte(t\\,{_timestamp_to_seconds(ss_timestamp)})*lt(prev_pts*TB\\,{_timestamp_to_seconds(ss_timestamp)})' for ss_timestamp, _ in screenshots
+    )
+    frames_pattern = os.path.join(os.path.dirname(screenshots[0][1]), "single_pass_frame_%03d.png")
+    input_options = '-loglevel panic' if threads is None else f'-loglevel panic -threads {threads}'
+
+    start_time = time.perf_counter()
+    FFmpeg(
+        inputs={upload_media: input_options},
+        outputs={frames_pattern: f'-vf select=\'{select_expression}\' -vsync vfr -frames:v {len(screenshots)} -q:v 10'}
+    ).run()
+    for frame_number, (ss_timestamp, output_path) in enumerate(screenshots, start=1):
+        frame_path = frames_pattern % frame_number
+        if os.path.isfile(frame_path):
+            os.replace(frame_path, output_path)
+        else:
+            logging.error(f"[Screenshots] ffmpeg didn't write a frame for the timestamp {ss_timestamp}")
+    return time.perf_counter() - start_time
+
+
+def _extract_screenshots(upload_media, screenshots, settings):
+    """
+        Takes the `screenshots` [(timestamp, output_path)] according to the screenshot `settings`.
+        Returns a dictionary with the time taken (in seconds) for every timestamp,
+        or for the whole ffmpeg invocation (key `single_pass`) in `single` mode.
+    """
+    if len(screenshots) == 0:
+        return {}
+
+    if settings["mode"] == "single":
+        with console.status("Taking screenshots.."):
+            return {"single_pass": _extract_screenshots_single_pass(upload_media, screenshots, settings["threads"])}
+
+    timings = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(settings["workers"], len(screenshots))) as executor:
+        futures = {
+            executor.submit(_extract_screenshot, upload_media, ss_timestamp, output_path, settings["threads"], settings["keyframe_seek"]): ss_timestamp
+            for ss_timestamp, output_path in screenshots
+        }
+        for future in track(concurrent.futures.as_completed(futures), total=len(futures), description="Taking screenshots.."):
+            timings[futures[future]] = future.result()
+    return timings
+
+
 def _upload_screens(img_host, img_host_api, image_path, torrent_title, base_path):
     # ptpimg does all for us to upload multiple images at the same time but to simplify things &
     # allow for simple "backup hosts"/upload failures we instead upload 1 image at a time
@@ -64,8 +160,10 @@ def _upload_screens(img_host, img_host_api, image_path, torrent_title, base_path
     # 5. Full Image URL
     #
     thumb_size = os.getenv("thumb_size") or "350"
+    # the client libraries of the image hosts are imported only when the host is used
     if img_host == 'imgur':
         try:
+            from imgurpython import ImgurClient
             client = ImgurClient(client_id=os.getenv('imgur_client_id'), client_secret=os.getenv('imgur_api_key'))
             response = client.upload_from_path(image_path)
             logging.debug(f'[Screenshots] Imgur image upload response: {response}')
@@ -84,6 +182,7 @@ def _upload_screens(img_host, img_host_api, image_path, torrent_title, base_path
 
     elif img_host == 'ptpimg':
         try:
+            import ptpimg_uploader
             ptp_img_upload = ptpimg_uploader.upload(api_key=os.getenv('ptpimg_api_key'), files_or_urls=[image_path], timeout=5)
             # Make sure the response we get from ptpimg is a list
             if not isinstance(ptp_img_upload, ptp_img_upload):
@@ -121,10 +220,10 @@ def _upload_screens(img_host, img_host_api, image_path, torrent_title, base_path
             data = {'key': img_host_api}
             if img_host in ('imgfi', 'snappie'):
                 files = {'source': open(image_path, 'rb')}
-                img_upload_request = requests.post(url=image_host_url, data=data, files=files)
+                img_upload_request = http_utilities.post(image_host_url, host_class="image_host", data=data, files=files)
             else:
                 data['image'] = base64.b64encode(open(image_path, "rb").read())
-                img_upload_request = requests.post(url=image_host_url, data=data)
+                img_upload_request = http_utilities.post(image_host_url, host_class="image_host", data=data)
 
             if img_upload_request.ok:
                 img_upload_response = img_upload_request.json()
@@ -181,6 +280,8 @@ def _upload_screens(img_host, img_host_api, image_path, torrent_title, base_path
 
     # Instead of coding our own solution we'll use the awesome project https://github.com/plotski/pyimgbox to upload to imgbox
     elif img_host == "imgbox":
+        import pyimgbox
+
         async def imgbox_upload(filepaths):
             async with pyimgbox.Gallery(title=torrent_title, thumb_width=int(thumb_size)) as gallery:
                 async for submission in gallery.add(filepaths):
@@ -215,6 +316,67 @@ def _upload_screens(img_host, img_host_api, image_path, torrent_title, base_path
         logging.fatal(f'[Screenshots] Invalid imagehost {img_host}. Cannot upload screenshots.')
 
 
+def _upload_screenshot(image_path, enabled_img_hosts_list, torrent_title, base_path):
+    """ Uploads a single screenshot. This is how we fall back to the next host (img_host_2..N) if the previous one fails """
+    for img_host in enabled_img_hosts_list:
+        upload_image = _upload_screens(
+            img_host=img_host,
+            img_host_api=os.getenv(f'{img_host}_api_key'),
+            image_path=image_path,
+            torrent_title=torrent_title,
+            base_path=base_path
+        )
+        if upload_image:
+            logging.debug(f"[Screenshots] Response from image host {img_host} for {image_path}: {upload_image}")
+            # Since the image uploaded successfully, we need to stop now so we don't reupload to the backup image host (if exists)
+            return upload_image
+        logging.error(f"[Screenshots] Failed to upload {image_path} to {img_host}")
+    return False
+
+
+def _get_optimization_pool(workers):
+    # oxipng releases the GIL while it optimizes an image, hence threads run the optimizations in parallel.
+    # A process pool would re-import the __main__ script (auto_upload.py / auto_reupload.py) in every worker
+    return concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screenshot-optimizer")
+
+
+def _optimize_and_upload_screenshots(screenshots, enabled_img_hosts_list, torrent_title, base_path):
+    """
+        Optimizes the `screenshots` in a thread pool and uploads every screenshot as soon as it has been optimized, using a thread pool.
+        Hence the total time taken is roughly the time of the slower of the two, instead of the sum for every screenshot.
+
+        Returns the upload result of every screenshot (the response of `_upload_screens` or False) in the same order as `screenshots`.
+    """
+    if len(screenshots) == 0:
+        return []
+    optimize_workers = max(1, int(os.getenv("screenshots_optimize_workers") or min(len(screenshots), os.cpu_count() or 1)))
+    upload_workers = max(1, int(os.getenv("screenshots_upload_workers") or 4))
+    logging.info(f"[Screenshots] Optimizing screenshots with {optimize_workers} thread(s) and uploading with {upload_workers} thread(s)")
+
+    results = [False] * len(screenshots)
+    with _get_optimization_pool(optimize_workers) as optimize_executor, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=upload_workers) as upload_executor:
+        optimize_futures = {optimize_executor.submit(_optimize_images, image_path): index for index, image_path in enumerate(screenshots)}
+        upload_futures = {}
+        for optimize_future in concurrent.futures.as_completed(optimize_futures):
+            index = optimize_futures[optimize_future]
+            try:
+                optimize_future.result()
+            except Exception as e:
+                # an image that couldn't be optimized can still be uploaded
+                logging.error(f"[Screenshots] Failed to optimize {screenshots[index]}. Error: {e}")
+            upload_future = upload_executor.submit(_upload_screenshot, screenshots[index], enabled_img_hosts_list, torrent_title, base_path)
+            upload_futures[upload_future] = index
+
+        for upload_future in track(concurrent.futures.as_completed(upload_futures), total=len(upload_futures), description="Uploading screenshots..."):
+            index = upload_futures[upload_future]
+            try:
+                results[index] = upload_future.result()
+            except Exception as e:
+                logging.exception(f"[Screenshots] Failed to upload {screenshots[index]}. Error: {e}")
+    return results
+
+
 def take_upload_screens(duration, upload_media_import, torrent_title_import, base_path, hash_prefix, skip_screenshots=False):
     logging.basicConfig(filename=f'{base_path}/upload_script.log', level=logging.INFO,format='%(asctime)s | %(name)s | %(levelname)s | %(message)s')
 
@@ -280,22 +442,27 @@ def take_upload_screens(duration, upload_media_import, torrent_title_import, bas
     ss_timestamps_list = []
     screenshots_to_upload_list = []
     image_data_paths = []
-    for ss_timestamp in track(_get_ss_range(duration=duration, num_of_screenshots=num_of_screenshots), description="Taking screenshots.."):
+    screenshots_to_take = []
+    for ss_timestamp in _get_ss_range(duration=duration, num_of_screenshots=num_of_screenshots):
         # Save the ss_ts to the 'ss_timestamps_list' list
         ss_timestamps_list.append(ss_timestamp)
-        screenshots_to_upload_list.append(f'{base_path}/temp_upload/{hash_prefix}screenshots/{torrent_title_import} - ({ss_timestamp.replace(":", ".")}).png')
-        # Now with each of those timestamps we can take a screenshot and update the progress bar
-        # `-itsoffset -2` added for Frame accurate screenshot
-        if not Path(f'{base_path}/temp_upload/{hash_prefix}screenshots/{torrent_title_import} - ({ss_timestamp.replace(":", ".")}).png').is_file():
-            FFmpeg(inputs={upload_media_import: f'-loglevel panic -ss {ss_timestamp} -itsoffset -2'},
-                   outputs={f'{base_path}/temp_upload/{hash_prefix}screenshots/{torrent_title_import} - ({ss_timestamp.replace(":", ".")}).png': '-frames:v 1 -q:v 10'}).run()
+        screenshot_path = f'{base_path}/temp_upload/{hash_prefix}screenshots/{torrent_title_import} - ({ss_timestamp.replace(":", ".")}).png'
+        screenshots_to_upload_list.append(screenshot_path)
+        image_data_paths.append(screenshot_path)
+        if not Path(screenshot_path).is_file():
+            screenshots_to_take.append((ss_timestamp, screenshot_path))
         else:
             logging.info(f"[Screenshots] Continuing upload existing screenshot: {torrent_title_import} - ({ss_timestamp.replace(':', '.')}).png")
-        image_data_paths.append(f'{base_path}/temp_upload/{hash_prefix}screenshots/{torrent_title_import} - ({ss_timestamp.replace(":", ".")}).png')
 
-    console.print('Finished taking screenshots!\n', style='sea_green3')
     # log the list of screenshot timestamps
     logging.info(f'[Screenshots] Taking screenshots at the following timestamps {ss_timestamps_list}')
+    screenshot_settings = _get_screenshot_settings(num_of_screenshots)
+    logging.info(f"[Screenshots] Screenshot engine settings: {screenshot_settings}")
+    screenshots_start_time = time.perf_counter()
+    screenshot_timings = _extract_screenshots(upload_media_import, screenshots_to_take, screenshot_settings)
+    logging.info(f"[Screenshots] Took {len(screenshots_to_take)} screenshots in {(time.perf_counter() - screenshots_start_time):0.4f} seconds. "
+                 f"Timings: { {timestamp: round(timing, 4) for timestamp, timing in screenshot_timings.items()} }")
+    console.print('Finished taking screenshots!\n', style='sea_green3')
 
     # checking whether we have previously uploaded all the screenshots. If we have, then no need to upload them again
     # if screenshots were not uploaded previously, then we'll upload them.
@@ -318,28 +485,19 @@ def take_upload_screens(duration, upload_media_import, torrent_title_import, bas
 
         successfully_uploaded_image_count = 0
 
-        for ss_to_upload in track(screenshots_to_upload_list, description="Uploading screenshots..."):
-            # This is how we fall back to a second host if the first fails
-            for img_host in enabled_img_hosts_list:
-                # call the function that uploads the screenshot
-                _optimize_images(ss_to_upload)
-                upload_image = _upload_screens(
-                    img_host=img_host,
-                    img_host_api=os.getenv(f'{img_host}_api_key'),
-                    image_path=ss_to_upload,
-                    torrent_title=torrent_title_import,
-                    base_path=base_path
-                )
-                # If the upload function returns True, we add it to bbcode_images.txt and url_images.txt
-                if upload_image:
-                    logging.debug(f"[Screenshots] Response from image host: {upload_image}")
-                    images_data["bbcode_images"] = f'{upload_image[1]} {images_data["bbcode_images"]}'
-                    images_data["bbcode_images_nothumb"] = f'{upload_image[2]} {images_data["bbcode_images_nothumb"]}'
-                    images_data["bbcode_thumb_nothumb"] = f'{upload_image[3]} {images_data["bbcode_thumb_nothumb"]}'
-                    images_data["url_images"] = f'{upload_image[4]}\n{images_data["url_images"]}'
-                    successfully_uploaded_image_count += 1
-                    # Since the image uploaded successfully, we need to break now so we don't reupload to the backup image host (if exists)
-                    break
+        upload_start_time = time.perf_counter()
+        upload_results = _optimize_and_upload_screenshots(screenshots_to_upload_list, enabled_img_hosts_list, torrent_title_import, base_path)
+        logging.info(f"[Screenshots] Optimized and uploaded {len(screenshots_to_upload_list)} screenshots in {(time.perf_counter() - upload_start_time):0.4f} seconds")
+
+        # results are processed in the order of the screenshots, irrespective of the order in which the uploads completed
+        for upload_image in upload_results:
+            # If the upload function returns True, we add it to bbcode_images.txt and url_images.txt
+            if upload_image:
+                images_data["bbcode_images"] = f'{upload_image[1]} {images_data["bbcode_images"]}'
+                images_data["bbcode_images_nothumb"] = f'{upload_image[2]} {images_data["bbcode_images_nothumb"]}'
+                images_data["bbcode_thumb_nothumb"] = f'{upload_image[3]} {images_data["bbcode_thumb_nothumb"]}'
+                images_data["url_images"] = f'{upload_image[4]}\n{images_data["url_images"]}'
+                successfully_uploaded_image_count += 1
 
         logging.info('[Screenshots] Uploaded screenshots. Saving urls and bbcodes...')
         with open(f"{base_path}/temp_upload/{hash_prefix}screenshots/screenshots_data.json", "a") as screenshots_file:
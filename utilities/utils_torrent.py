@@ -1,15 +1,50 @@
 import os
 import glob
+import json
 import math
 import logging
+import functools
+import threading
+import contextlib
 
-from torf import Torrent
 from pathlib import Path
 from datetime import datetime
 
+import bencoding
+import utilities.utils_hashing as hashing_utilities
+from modules.torrent_resourcer import TorrentResourcer
 
-class GGBOTTorrent(Torrent):
-    piece_size_max = 32 * 1024 * 1024 # 32MB as max piece size
+
+# guards the hashing of an item, so that trackers processed at the same time wait for one hash pass instead of starting their own
+# hashed pieces path => (lock, number of trackers using it). The entry is dropped once no tracker is using it
+_hashing_locks = {}
+_hashing_locks_lock = threading.Lock()
+
+
+_torrent_class = None
+
+
+def _get_torrent_class():
+    """
+        torf is imported only when a torrent has to be hashed or read by torf.
+        Deriving the .torrent files of the trackers from an existing torrent doesn't need it.
+    """
+    global _torrent_class
+    if _torrent_class is None:
+        from torf import Torrent
+
+        class GGBOTTorrent(Torrent):
+            piece_size_max = 32 * 1024 * 1024 # 32MB as max piece size
+
+        _torrent_class = GGBOTTorrent
+    return _torrent_class
+
+
+def __getattr__(name):
+    # `GGBOTTorrent` is created on first access (see `_get_torrent_class`)
+    if name == "GGBOTTorrent":
+        return _get_torrent_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def callback_progress(torrent, filepath, pieces_done, pieces_total):
@@ -92,17 +127,105 @@ def calculate_piece_size(size):
 
 
 
-def generate_dot_torrent(media, announce, source, working_folder, use_mktorrent, tracker, torrent_title,torrent, hash_prefix=""):
+def generate_pieces(torrent, callback=None):
     """
-        media : the -p path param passed to GGBot. (dot torrent will be created for this path or file)
+        Hashes the pieces of a torf `torrent` using the multi process hasher in `utils_hashing`, instead of `Torrent.generate`.
+        `callback` has the same signature as the torf callback: callback(torrent, filepath, pieces_done, pieces_total)
     """
-    logging.info("[DotTorrentGeneration] Creating the .torrent file now")
-    logging.info(f"[DotTorrentGeneration] Primary announce url: {announce[0]}")
-    logging.info(f"[DotTorrentGeneration] Source field in info will be set as `{source}`")
+    # `filepaths` and `files` are in the same order as the files in the info dictionary
+    files = [(str(filepath), file.size) for filepath, file in zip(torrent.filepaths, torrent.files)]
+
+    def hashing_progress(pieces_done, pieces_total):
+        if callback is not None:
+            callback(torrent, torrent.path, pieces_done, pieces_total)
+
+    torrent.metainfo['info']['pieces'] = hashing_utilities.hash_pieces(files, torrent.piece_size, callback=hashing_progress)
+
+
+def _get_hashed_pieces_path(working_folder, hash_prefix):
+    # not a `.torrent` file, so that post processing doesn't mistake it for the .torrent of a tracker
+    return f'{working_folder}/temp_upload/{hash_prefix}hashed_pieces.dat'
+
+
+def _get_media_identity_path(hashed_pieces_path):
+    return f'{os.path.splitext(hashed_pieces_path)[0]}.json'
+
+
+@contextlib.contextmanager
+def _hashing_lock(hashed_pieces_path):
+    with _hashing_locks_lock:
+        lock, users = _hashing_locks.get(hashed_pieces_path, (None, 0))
+        lock = lock or threading.Lock()
+        _hashing_locks[hashed_pieces_path] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _hashing_locks_lock:
+            lock, users = _hashing_locks[hashed_pieces_path]
+            if users <= 1:
+                # the hashing of this item is done, the watch folder daemon must not keep a lock for every item it has seen
+                del _hashing_locks[hashed_pieces_path]
+            else:
+                _hashing_locks[hashed_pieces_path] = (lock, users - 1)
+
+
+def _get_media_identity(torrent, media):
+    """
+        Returns the identity {path in torrent: [size, mtime_ns, inode]} of every file in `torrent`, read from the `media` on disk.
+        A file replaced by another one of the same size (eg: a re-done remux) has a different identity.
+    """
+    media_parent = os.path.dirname(os.path.normpath(media))
+    identity = {}
+    for file in torrent.files:
+        file_stat = os.stat(os.path.join(media_parent, str(file)))
+        identity[str(file)] = [file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino]
+    return identity
+
+
+def _is_hashed_pieces_reusable(hashed_pieces_path, media):
+    """ The hashed pieces can be reused only if they were generated for the same media and the files haven't changed since """
+    from torf import TorfError
+
+    try:
+        hashed_torrent = _get_torrent_class().read(hashed_pieces_path)
+        if hashed_torrent.name != os.path.basename(os.path.normpath(media)) or not hashed_torrent.verify_filesize(media):
+            return False
+        with open(_get_media_identity_path(hashed_pieces_path), "r") as media_identity_file:
+            media_identity = json.load(media_identity_file)
+        if media_identity != _get_media_identity(hashed_torrent, media):
+            logging.info(f"[DotTorrentGeneration] Hashed pieces {hashed_pieces_path} cannot be reused for {media}. The files have been modified")
+            return False
+        return True
+    except (TorfError, OSError, ValueError) as e:
+        logging.info(f"[DotTorrentGeneration] Hashed pieces {hashed_pieces_path} cannot be reused for {media}. Reason: {e}")
+        return False
+
+
+def _write_media_identity(hashed_pieces_path, media_identity):
+    with open(_get_media_identity_path(hashed_pieces_path), "w") as media_identity_file:
+        json.dump(media_identity, media_identity_file)
+
+
+def hash_media(media, announce, source, working_folder, use_mktorrent, hash_prefix=""):
+    """
+        Hashing step of the .torrent generation. Hashes the `media` and saves the result as a tracker independent
+        metainfo file (the piece-hash artifact) in the `temp_upload` folder of the item.
+
+        The artifact is reused by every tracker the item is uploaded to, therefore the media is hashed only once and the
+        per tracker .torrent files are derived from it by `generate_dot_torrent` (only `announce`, `announce-list` and `info.source` differ).
+
+        Returns the path to the artifact or None if the media couldn't be hashed
+    """
+    hashed_pieces_path = _get_hashed_pieces_path(working_folder, hash_prefix)
+    with _hashing_lock(hashed_pieces_path):
+        if os.path.isfile(hashed_pieces_path) and _is_hashed_pieces_reusable(hashed_pieces_path, media):
+            logging.info(f"[DotTorrentGeneration] Reusing the pieces already hashed for {media}")
+            return hashed_pieces_path
 
-    if len(glob.glob(torrent)) == 0:
-        return 'skip_to_next_file'
         # we need to actually generate a torrent file "from scratch"
+        if os.path.isfile(_get_media_identity_path(hashed_pieces_path)):
+            os.remove(_get_media_identity_path(hashed_pieces_path))
         logging.info("[DotTorrentGeneration] Generating new .torrent file since old ones doesn't exist")
         if use_mktorrent:
             print("Using mktorrent to generate the torrent")
@@ -126,27 +249,26 @@ def generate_dot_torrent(media, announce, source, working_folder, use_mktorrent,
             logging.info(f'[DotTorrentGeneration] Size of the torrent: {torrent_size}')
             logging.info(f'[DotTorrentGeneration] Piece Size of the torrent: {piece_size}')
 
+            if os.path.isfile(hashed_pieces_path):
+                # mktorrent refuses to overwrite an existing file
+                os.remove(hashed_pieces_path)
+            # announce and source are replaced when the .torrent of each tracker is derived
             os.system(
-                f"mktorrent -v -p -l {piece_size} -c \"Torrent created by GG-Bot Upload Assistant\" -s '{source}' -a '{announce[0]}' -o \"{working_folder}/temp_upload/{hash_prefix}{tracker}-{torrent_title}.torrent\" \"{media}\"")
+                f"mktorrent -v -p -l {piece_size} -c \"Torrent created by GG-Bot Upload Assistant\" -s '{source}' -a '{announce[0]}' -o \"{hashed_pieces_path}\" \"{media}\"")
 
-            logging.info("[DotTorrentGeneration] Mktorrent .torrent write into {}".format("[" + source + "]" + torrent_title + ".torrent"))
+            if not os.path.isfile(hashed_pieces_path):
+                logging.error(f"[DotTorrentGeneration] Mktorrent failed to hash {media}")
+                return None
 
             logging.info("[DotTorrentGeneration] Using torf to do some cleanup on the created torrent")
-            edit_torrent = GGBOTTorrent.read(glob.glob(f'{working_folder}/temp_upload/{hash_prefix}{tracker}-{torrent_title}.torrent')[0])
+            edit_torrent = _get_torrent_class().read(hashed_pieces_path)
             edit_torrent.created_by = "GG-Bot Upload Assistant"
             edit_torrent.metainfo['created by'] = "GG-Bot Upload Assistant"
-
-            if len(announce) > 1:
-                # multiple announce urls
-                edit_torrent.metainfo['announce-list'] = []
-                for announce_url in announce:
-                    edit_torrent.metainfo['announce-list'].append([announce_url])
-
-            GGBOTTorrent.copy(edit_torrent).write(filepath=f'{working_folder}/temp_upload/{hash_prefix}{tracker}-{torrent_title}.torrent', overwrite=True)
+            _get_torrent_class().copy(edit_torrent).write(filepath=hashed_pieces_path, overwrite=True)
+            _write_media_identity(hashed_pieces_path, _get_media_identity(edit_torrent, media))
         else:
             print("Using python torf to generate the torrent")
-            torrent = GGBOTTorrent(media,
-                              trackers=announce,
+            torrent = _get_torrent_class()(media,
                               source=source,
                               comment="Torrent created by GG-Bot Upload Assistant",
                               created_by="GG-Bot Upload Assistant",
@@ -156,39 +278,103 @@ def generate_dot_torrent(media, announce, source, working_folder, use_mktorrent,
             torrent.piece_size = calculate_piece_size(torrent.size)
             logging.info(f'[DotTorrentGeneration] Size of the torrent: {torrent.size}')
             logging.info(f'[DotTorrentGeneration] Piece Size of the torrent: {torrent.piece_size}')
+            # identity of the files before they are hashed, hence a file modified while being hashed is hashed again next time
+            media_identity = _get_media_identity(torrent, media)
 
-            torrent.generate(callback=callback_progress)
-            torrent.write(f'{working_folder}/temp_upload/{hash_prefix}{tracker}-{torrent_title}.torrent')
+            if (os.getenv("torrent_hasher") or "builtin").lower() == "torf":
+                torrent.generate(callback=callback_progress)
+            else:
+                generate_pieces(torrent, callback=callback_progress)
+            torrent.write(hashed_pieces_path, overwrite=True)
             torrent.verify_filesize(media)
-            logging.info("[DotTorrentGeneration] Trying to write into {}".format("[" + source + "]" + torrent_title + ".torrent"))
+            _write_media_identity(hashed_pieces_path, media_identity)
+        logging.info(f"[DotTorrentGeneration] Hashed pieces of {media} saved to {hashed_pieces_path}")
+        return hashed_pieces_path
+
+
+@functools.lru_cache(maxsize=8)
+def _load_torrent_resourcer(torrent, modification_time, size):
+    with open(torrent, "rb") as torrent_file:
+        return TorrentResourcer(torrent_file.read())
+
+
+def _get_torrent_resourcer(torrent):
+    """ The source torrent is read and scanned once, then reused for every tracker until the file is modified """
+    torrent_stat = os.stat(torrent)
+    return _load_torrent_resourcer(torrent, torrent_stat.st_mtime_ns, torrent_stat.st_size)
+
+
+def generate_dot_torrent(media, announce, source, working_folder, use_mktorrent, tracker, torrent_title, torrent=None, hash_prefix=""):
+    """
+        media : the -p path param passed to GGBot. (dot torrent will be created for this path or file)
+        torrent : an existing .torrent for the media. When provided, it is edited instead of hashing the media.
+                  Otherwise the media is hashed by `hash_media` (once per item) and the .torrent is derived from the hashed pieces
+
+        Returns the infohash of the .torrent created for the tracker, or `skip_to_next_file` when it could not be created
+    """
+    logging.info("[DotTorrentGeneration] Creating the .torrent file now")
+    logging.info(f"[DotTorrentGeneration] Primary announce url: {announce[0]}")
+    logging.info(f"[DotTorrentGeneration] Source field in info will be set as `{source}`")
+
+    if torrent is not None and len(glob.glob(torrent)) == 0:
+        logging.error(f"[DotTorrentGeneration] The .torrent file {torrent} doesn't exist")
+        return 'skip_to_next_file'
+
+    if torrent is None:
+        # the media is hashed only once, the .torrent of every tracker is derived from the hashed pieces
+        torrent = hash_media(media=media, announce=announce, source=source, working_folder=working_folder, use_mktorrent=use_mktorrent, hash_prefix=hash_prefix)
+        if torrent is None:
+            return 'skip_to_next_file'
+        logging.info(f"[DotTorrentGeneration] Deriving the .torrent file for {tracker} from the hashed pieces {torrent}")
     else:
         print("Editing previous .torrent file to work with {} instead of generating a new one".format(source))
         logging.info("[DotTorrentGeneration] Editing previous .torrent file to work with {} instead of generating a new one".format(source))
 
-        # just choose whichever, doesn't really matter since we replace the same info anyways
-        edit_torrent = GGBOTTorrent.read(torrent)
+    if len(announce) == 1:
+        logging.debug(f"[DotTorrentGeneration] Only one announce url provided for tracker {tracker}. Removing announce-list if present in existing torrent.")
+    else:
+        logging.debug(f"[DotTorrentGeneration] Multiple announce urls provided for tracker {tracker}. Updating announce-list to {announce}")
 
-        if len(announce) == 1:
-            logging.debug(f"[DotTorrentGeneration] Only one announce url provided for tracker {tracker}.")
-            logging.debug("[DotTorrentGeneration] Removing announce-list if present in existing torrent.")
-            edit_torrent.metainfo.pop('announce-list', "")
-        else:
-            logging.debug(f"[DotTorrentGeneration] Multiple announce urls provided for tracker {tracker}. Updating announce-list")
-            edit_torrent.metainfo.pop('announce-list', "")
-            edit_torrent.metainfo['announce-list'] = list()
-            for announce_url in announce:
-                logging.debug(f"[DotTorrentGeneration] Adding secondary announce url {announce_url}")
-                announce_list = list()
-                announce_list.append(announce_url)
-                edit_torrent.metainfo['announce-list'].append(announce_list)
-            logging.debug(f"[DotTorrentGeneration] Final announce-list in torrent metadata {edit_torrent.metainfo['announce-list']}")
-
-        edit_torrent.metainfo['announce'] = announce[0]
-        edit_torrent.metainfo['info']['source'] = source
-        # Edit the previous .torrent and save it as a new copy
-        GGBOTTorrent.copy(edit_torrent).write(filepath=f'{working_folder}/temp_upload/{hash_prefix}{tracker}-{torrent_title}.torrent', overwrite=True)
+    # the variant for this tracker is spliced into the raw bytes of the source torrent, the `pieces` blob is never decoded again
+    try:
+        infohash = _get_torrent_resourcer(torrent).write(f'{working_folder}/temp_upload/{hash_prefix}{tracker}-{torrent_title}.torrent', announce, source)
+        logging.info(f"[DotTorrentGeneration] Infohash of the .torrent for {tracker}: {infohash}")
+    except (OSError, ValueError) as e:
+        logging.exception(f"[DotTorrentGeneration] Failed to derive the .torrent for {tracker} from {torrent}. Error: {e}")
+        return 'skip_to_next_file'
 
     if os.path.isfile(f'{working_folder}/temp_upload/{hash_prefix}{tracker}-{torrent_title}.torrent'):
         logging.info(f'[DotTorrentGeneration] Successfully created the following file: {working_folder}/temp_upload/{hash_prefix}{tracker}-{torrent_title}.torrent')
     else:
         logging.error(f'[DotTorrentGeneration] The following .torrent file was not created: {working_folder}/temp_upload/{hash_prefix}{tracker}-{torrent_title}.torrent')
+    return infohash
+
+
+def verify_torrent_sample(torrent, save_path, sample_size=64, sampling="stratified", workers=4, max_bytes_per_second=None):
+    """
+        Verifies a sample of the pieces of `torrent` against the media in `save_path` (the folder containing the media of the torrent).
+        Files are first checked for existence and size, then the sampled pieces are hashed and compared with the `pieces` of the .torrent.
+
+        Returns True when all the sampled pieces match
+    """
+    with open(torrent, "rb") as torrent_file:
+        info = bencoding.decode_torrent_info(torrent_file.read(), (b'name', b'length', b'files', b'piece length', b'pieces'))
+    name = info[b'name'].decode("utf-8")
+    if b'files' in info:
+        files = [(os.path.join(save_path, name, *[path_component.decode("utf-8") for path_component in file[b'path']]), file[b'length']) for file in info[b'files']]
+    else:
+        files = [(os.path.join(save_path, name), info[b'length'])]
+
+    for path, size in files:
+        if not os.path.isfile(path) or os.path.getsize(path) != size:
+            logging.error(f"[DotTorrentGeneration] Verification of {torrent} failed. File {path} is missing or has a different size")
+            return False
+
+    pieces_total = len(info[b'pieces']) // 20
+    piece_indexes = hashing_utilities.select_sample_pieces(pieces_total, sample_size, sampling)
+    logging.info(f"[DotTorrentGeneration] Verifying {len(piece_indexes)} of {pieces_total} pieces of {torrent} ({sampling} sampling)")
+    failed_pieces = hashing_utilities.verify_pieces(files, info[b'piece length'], info[b'pieces'], piece_indexes, workers, max_bytes_per_second)
+    if len(failed_pieces) > 0:
+        logging.error(f"[DotTorrentGeneration] Verification of {torrent} failed. Pieces that don't match the media: {failed_pieces}")
+        return False
+    return True
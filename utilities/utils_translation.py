@@ -1,4 +1,5 @@
 import os
+import re
 import sys
 import logging
 
@@ -276,6 +277,260 @@ def _validate_and_do_hybrid_mapping(translation_value, config, tracker_settings,
     return False, is_hybrid_translation_needed
 
 
+# ---------------------------------------------------------------------- #
+#                 Translation rules of the site templates                #
+# ---------------------------------------------------------------------- #
+# Every entry of the `translation` of a site template is compiled once into a rule, holding the `Required` / `Optional`
+# configuration of its tracker key and the handlers that translate it. Hence a translation is a single pass over the rules
+# instead of scanning all the `Required` and `Optional` items for every translation key.
+# The handlers have the same signature and return "STOP" when the upload to the tracker must not continue.
+TRANSLATION_INTERNAL_ARGS = ('doubleup', 'featured', 'freeleech', 'internal', 'sticky', 'tripleup', 'foreign', "3d")
+
+
+def _translate_required_file(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    # adding support for base64 encoded files
+    # the actual encoding will be performed in `upload_to_site` method
+    if rule["translation_key"] in torrent_info:
+        tracker_settings[rule["tracker_key"]] = torrent_info[rule["translation_key"]]
+    # Make sure you select the right .torrent file
+    if rule["translation_key"] == "dot_torrent":
+        tracker_settings[rule["tracker_key"]] = f'{working_folder}/temp_upload/{torrent_info["working_folder"]}{tracker}-{torrent_info["torrent_title"]}.torrent'
+
+
+def _translate_required_live(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    # BHD requires the key "live" (0 = Sent to drafts and 1 = Live on site)
+    is_live_on_site = str(os.getenv('live')).lower()
+    logging.info(f"Upload live status: {'Live (Visible)' if is_live_on_site == 'true' else 'Draft (Hidden)'}")
+    tracker_settings[rule["tracker_key"]] = '1' if is_live_on_site == 'true' else '0'
+
+
+def _translate_required_internal_arg(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    tracker_settings[rule["tracker_key"]] = "1" if getattr(args, rule["translation_key"], False) is True else "0"
+
+
+def _translate_required_string(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    # If the user supplied the "-anon" argument then we want to pass that along when uploading
+    if rule["translation_key"] == "anon" and args.anon:
+        logging.info("Uploading anonymously")
+        tracker_settings[rule["tracker_key"]] = "1"
+    # We dump all the info from torrent_info in tracker_settings here
+    elif rule["translation_key"] in torrent_info:
+        tracker_settings[rule["tracker_key"]] = torrent_info[rule["translation_key"]]
+    # This work as a sort of 'catch all', if we don't have the correct data in torrent_info, we just send a 0 so we can successfully post
+    else:
+        tracker_settings[rule["tracker_key"]] = "0"
+
+
+def _translate_required_url(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    # we need this check becase some trackers accepts media database urls from the same key, thereby overwriting the previous data
+    if rule["tracker_key"] not in tracker_settings or len(tracker_settings[rule["tracker_key"]]) == 0:
+        # URLs can be set only to for certain media databases
+        tracker_settings[rule["tracker_key"]] = _get_url_type_data(rule["translation_key"], torrent_info)
+
+
+def _translate_required_invalid(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    logging.error(f"[Main] Invalid value type {rule['required_value']} configured for required item {rule['required_key']} with translation key {rule['required_key']}")
+
+
+def _translate_category(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    # Set the category ID, this could be easily hardcoded in (1=movie & 2=tv) but I chose to use JSON data just in case a future tracker switches this up
+    for key_cat, val_cat in rule["required_value"].items():
+        if torrent_info["type"] == val_cat:
+            tracker_settings[rule["tracker_key"]] = key_cat
+        elif val_cat in torrent_info and torrent_info[val_cat] == "1":
+            # special case whether we can check for certain values in torrent info to decide the type
+            # eg: complete_season, individual_episodes etc
+            tracker_settings[rule["tracker_key"]] = key_cat
+
+    if rule["tracker_key"] not in tracker_settings:
+        # this type of upload is not permitted in this tracker
+        logging.critical('[CategoryMapping] Unable to find a suitable "category/type" match for this file')
+        logging.error("[CategoryMapping] Its possible that the media you are trying to upload is not allowed on site (e.g. DVDRip to BLU is not allowed")
+        console.print(f'\nThis "Category" ([bold]{torrent_info["type"]}[/bold]) is not allowed on this tracker', style='Red underline', highlight=False)
+        return "STOP"
+
+
+def _translate_resolution_source(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    return_value = _identify_resolution_source(
+        target_val=rule["translation_key"],
+        config=config,
+        relevant_torrent_info_values=relevant_torrent_info_values,
+        torrent_info=torrent_info
+    )
+    if return_value == "STOP":
+        return return_value
+    tracker_settings[rule["tracker_key"]] = return_value
+
+
+def _translate_optional_value(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    tracker_settings[rule["optional_key"]] = torrent_info.get(rule["translation_key"], "")
+
+
+# checking whether the optional key is for mediainfo or bdinfo
+# TODO make changes to save bdinfo to bdinfo and move the existing bdinfo metadata to someother key
+# for full disks the bdInfo is saved under the same key as mediainfo
+def _translate_optional_mediainfo(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    logging.debug(f"[CategoryMapping] Identified {rule['optional_key']} for tracker with {'FullDisk' if args.disc else 'File/Folder'} upload")
+    if args.disc:
+        logging.debug("[CategoryMapping] Skipping mediainfo for tracker settings since upload is FullDisk.")
+    else:
+        logging.debug(f"[CategoryMapping] Setting mediainfo from torrent_info to tracker_settings for optional_key {rule['optional_key']}")
+        tracker_settings[rule["optional_key"]] = torrent_info.get("mediainfo", "0")
+
+
+def _translate_optional_bdinfo(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    logging.debug(f"[CategoryMapping] Identified {rule['optional_key']} for tracker with {'FullDisk' if args.disc else 'File/Folder'} upload")
+    if args.disc:
+        logging.debug(f"[CategoryMapping] Setting mediainfo from torrent_info to tracker_settings for optional_key {rule['optional_key']}")
+        tracker_settings[rule["optional_key"]] = torrent_info.get("mediainfo", "0")
+    else:
+        logging.debug("[CategoryMapping] Skipping bdinfo for tracker settings since upload is NOT FullDisk.")
+
+
+def _translate_optional_edition(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    if 'edition' not in torrent_info:
+        return rule["optional_fallback"](rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values)
+    # First we remove any 'fluff' so that we can try to match the edition to the list BHD has, if not we just upload it as a custom edition
+    local_edition_formatted = str(torrent_info["edition"]).lower().replace("edition", "").replace("cut", "").replace("'", "").replace(" ", "")
+    # Remove extra 's'
+    if local_edition_formatted.endswith('s'):
+        local_edition_formatted = local_edition_formatted[:-1]
+    # Now check to see if what we got out of the filename already exists on BHD
+    for bhd_edition in rule["optional_value"]:
+        if str(bhd_edition).lower() == local_edition_formatted:
+            # If its a match we save the value to tracker_settings here
+            tracker_settings[rule["optional_key"]] = bhd_edition
+            break
+        else:
+            # We use the 'custom_edition' to set our own, again we only do this if we can't match what BHD already has available to select
+            tracker_settings["custom_edition"] = torrent_info["edition"]
+
+
+def _translate_optional_region(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    if 'region' not in torrent_info:
+        return rule["optional_fallback"](rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values)
+    # This will only run if you are uploading a bluray_disc
+    region = _get_bluray_region(rule["optional_value"], torrent_info["region"])
+    if region is not None:
+        tracker_settings[rule["optional_key"]] = region
+
+
+def _translate_optional_tags(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    # (Only supported on BHD) We only support 2 tags atm, Scene & WEBDL/RIP on bhd
+    # All we currently support regarding tags, is to assign the 'Scene' tag if we are uploading a scene release
+    upload_these_tags_list = []
+    for tag in rule["optional_value"]:
+        # This will check for the 'Scene' tag
+        if str(tag).lower() in str(torrent_info.keys()).lower():
+            upload_these_tags_list.append(str(tag))
+
+        # This will check for webdl/webrip tag
+        if str(tag) in ["WEBRip", "WEBDL"]:
+            # Check if we are uploading one of those ^^ 'sources'
+            if str(tag).lower() == str(torrent_info["source_type"]).lower():
+                upload_these_tags_list.append(str(tag))
+    if len(upload_these_tags_list) != 0:
+        tracker_settings[rule["optional_key"]] = ",".join(upload_these_tags_list)
+
+
+def _translate_optional_sd(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values):
+    if "sd" not in torrent_info:
+        return rule["optional_fallback"](rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values)
+    tracker_settings[rule["optional_key"]] = 1
+
+
+_required_value_type_handlers = {
+    "file": _translate_required_file,
+    "file|base64": _translate_required_file,
+    "file|array": _translate_required_file,
+    "file|string|array": _translate_required_file,
+    "string": _translate_required_string,
+    "string|array": _translate_required_string,
+    "url": _translate_required_url,
+}
+
+# handlers of the optional keys that need special treatment. Everything else is handled based on the translation key
+_optional_key_handlers = {
+    "edition": _translate_optional_edition,
+    "region": _translate_optional_region,
+    "tags": _translate_optional_tags,
+    "sd": _translate_optional_sd,
+}
+
+_optional_translation_key_handlers = {
+    "mediainfo": _translate_optional_mediainfo,
+    "bdinfo": _translate_optional_bdinfo,
+}
+
+
+def _get_required_handlers(translation_key, required_key, required_value):
+    if required_value in ("string", "string|array") and required_key == "live":
+        handlers = [_translate_required_live]
+    elif required_value in ("string", "string|array") and translation_key in TRANSLATION_INTERNAL_ARGS:
+        handlers = [_translate_required_internal_arg]
+    else:
+        # category / resolution / source mappings etc are not value types, they are logged as invalid just like unknown value types
+        handlers = [_required_value_type_handlers.get(required_value, _translate_required_invalid) if isinstance(required_value, str) else _translate_required_invalid]
+
+    if translation_key == "type":
+        handlers.append(_translate_category)
+    if translation_key in ('source', 'resolution', 'resolution_id'):
+        handlers.append(_translate_resolution_source)
+    return handlers
+
+
+def compile_translation_rules(config):
+    """
+        Compiles the `translation` of the site template into the list of rules used by `choose_right_tracker_keys`.
+
+        For each translation key the rule holds its tracker key, the `Required` / `Optional` configuration of the tracker key
+        and the `handlers` that translate it (in order). Tracker keys configured as `hybrid_type` have no handlers since
+        they are resolved by the hybrid mapping.
+    """
+    required_items = config["Required"]
+    optional_items = config["Optional"]
+    rules = []
+    for translation_key, tracker_key in config["translation"].items():
+        rule = {
+            "translation_key": translation_key,
+            "tracker_key": tracker_key,
+            "required_key": None,
+            "required_value": None,
+            "optional_key": None,
+            "optional_value": None,
+            "optional_fallback": None,
+            "is_hybrid_type": "hybrid_type" in translation_key,
+            "handlers": [],
+        }
+        if str(tracker_key) in required_items and required_items[str(tracker_key)] != "hybrid_type":
+            rule["required_key"] = str(tracker_key)
+            rule["required_value"] = required_items[str(tracker_key)]
+            rule["handlers"].extend(_get_required_handlers(translation_key, rule["required_key"], rule["required_value"]))
+
+        # This mainly applies to BHD since they are the tracker with the most 'Optional' fields,
+        # BLU/ACM only have 'nfo_file' as an optional item
+        if str(tracker_key) in optional_items and optional_items[str(tracker_key)] != "hybrid_type":
+            rule["optional_key"] = str(tracker_key)
+            rule["optional_value"] = optional_items[str(tracker_key)]
+            rule["optional_fallback"] = _optional_translation_key_handlers.get(translation_key, _translate_optional_value)
+            rule["handlers"].append(_optional_key_handlers.get(rule["optional_key"], rule["optional_fallback"]))
+        rules.append(rule)
+    return rules
+
+
+def get_translation_rules(config):
+    """
+        Returns the compiled translation rules of the site template.
+        The rules of templates from the SiteTemplateRegistry are compiled only once and reused for every upload
+    """
+    rules = getattr(config, "translation_rules", None)
+    if rules is None:
+        rules = compile_translation_rules(config)
+        if hasattr(config, "translation_rules"):
+            config.translation_rules = rules
+    return rules
+
+
 # ---------------------------------------------------------------------- #
 #                  Set correct tracker API Key/Values                    #
 # ---------------------------------------------------------------------- #
@@ -283,9 +538,6 @@ def _validate_and_do_hybrid_mapping(translation_value, config, tracker_settings,
 #           !!! WARN !!! This Method has side effects. !!! WARN !!!
 # ---------------------------------------------------------------------- #
 def choose_right_tracker_keys(config, tracker_settings, tracker, torrent_info, args, working_folder):
-    required_items = config["Required"]
-    optional_items = config["Optional"]
-
     # BLU requires the IMDB with the "tt" removed so we do that here, BHD will automatically put the "tt" back in... so we don't need to make an exception for that
     if "imdb" in torrent_info:
         __create_imdb_without_tt_key(torrent_info)
@@ -297,190 +549,23 @@ def choose_right_tracker_keys(config, tracker_settings, tracker, torrent_info, a
     relevant_torrent_info_values = __get_relevant_items_for_tracker_keys(torrent_info)
 
     # Filling in data for all the keys that have mapping/translations
-    # Here we iterate over the translation mapping and for each translation key, we check the required and optional items for that value
-    # once identified we handle it
+    # The required and optional items of each translation key have been resolved when the rules were compiled
     logging.info("[Main] Starting translations from torrent info to tracker settings.")
     is_hybrid_translation_needed = False
     hybrid_translation_keys = []
-    for translation_key, translation_value in config["translation"].items():
-        logging.debug(f"[Main] Trying to translate {translation_key} to {translation_value}")
-
-        # ------------ required_items start ------------
-        for required_key, required_value in required_items.items():
-            # get the proper mapping, the elements that doesn't match can be ignored
-            if str(required_key) == str(translation_value):
-                # hybrid_type is managed by hybrid_mapping.
-                if required_value == "hybrid_type":
-                    break
-
-                logging.debug(f"[Main] Key {translation_key} mapped to required item {required_key} with value type as {required_value}")
-
-                # the torrent file is always submitted as a file
-                if required_value in ("file", "file|base64", "file|array", "file|string|array"):
-                    # adding support for base64 encoded files
-                    # the actual encoding will be performed in `upload_to_site` method
-                    if translation_key in torrent_info:
-                        tracker_settings[config["translation"][translation_key]] = torrent_info[translation_key]
-                    # Make sure you select the right .torrent file
-                    if translation_key == "dot_torrent":
-                        tracker_settings[config["translation"]["dot_torrent"]] = f'{working_folder}/temp_upload/{torrent_info["working_folder"]}{tracker}-{torrent_info["torrent_title"]}.torrent'
-
-                # The reason why we keep this elif statement here is because the conditional right above is also technically a "string"
-                # but its easier to keep mediainfo and description in text files until we need them so we have that small exception for them
-                elif required_value in ("string", "string|array"):
-                    # BHD requires the key "live" (0 = Sent to drafts and 1 = Live on site)
-                    if required_key == "live":
-                        # BHD Live/Draft
-                        is_live_on_site = str(os.getenv('live')).lower()
-                        live = '1' if is_live_on_site == 'true' else '0'
-                        logging.info(f"Upload live status: {'Live (Visible)' if is_live_on_site == 'true' else 'Draft (Hidden)'}")
-                        tracker_settings[config["translation"][translation_key]] = live
-
-                    # If the user supplied the "-anon" argument then we want to pass that along when uploading
-                    elif translation_key == "anon" and args.anon:
-                        logging.info("Uploading anonymously")
-                        tracker_settings[config["translation"][translation_key]] = "1"
-
-                    # Adding support for internal args
-                    elif translation_key in ['doubleup', 'featured', 'freeleech', 'internal', 'sticky', 'tripleup', 'foreign', "3d"]:
-                        tracker_settings[config["translation"][translation_key]] = "1" if getattr(args, translation_key, False) is True else "0"
-
-                    # We dump all the info from torrent_info in tracker_settings here
-                    elif translation_key in torrent_info:
-                        tracker_settings[config["translation"][translation_key]] = torrent_info[translation_key]
-                    # This work as a sort of 'catch all', if we don't have the correct data in torrent_info, we just send a 0 so we can successfully post
-                    else:
-                        tracker_settings[config["translation"][translation_key]] = "0"
-
-                elif required_value == "url":
-                    # we need this check becase some trackers accepts media database urls from the same key, thereby overwriting the previous data
-                    if config["translation"][translation_key] not in tracker_settings or len(tracker_settings[config["translation"][translation_key]]) == 0:
-                        # URLs can be set only to for certain media databases
-                        tracker_settings[config["translation"][translation_key]] = _get_url_type_data(translation_key, torrent_info)
-                else:
-                    logging.error(f"[Main] Invalid value type {required_value} configured for required item {required_key} with translation key {required_key}")
-
-                # Set the category ID, this could be easily hardcoded in (1=movie & 2=tv) but I chose to use JSON data just in case a future tracker switches this up
-                if translation_key == "type":
-                    for key_cat, val_cat in config["Required"][required_key].items():
-                        if torrent_info["type"] == val_cat:
-                            tracker_settings[config["translation"][translation_key]] = key_cat
-                        elif val_cat in torrent_info and torrent_info[val_cat] == "1":
-                            # special case whether we can check for certain values in torrent info to decide the type
-                            # eg: complete_season, individual_episodes etc
-                            tracker_settings[config["translation"][translation_key]] = key_cat
-
-                    if config["translation"][translation_key] not in tracker_settings:
-                        # this type of upload is not permitted in this tracker
-                        logging.critical('[CategoryMapping] Unable to find a suitable "category/type" match for this file')
-                        logging.error("[CategoryMapping] Its possible that the media you are trying to upload is not allowed on site (e.g. DVDRip to BLU is not allowed")
-                        console.print(f'\nThis "Category" ([bold]{torrent_info["type"]}[/bold]) is not allowed on this tracker', style='Red underline', highlight=False)
-                        return "STOP"
-
-                if translation_key in ('source', 'resolution', 'resolution_id'):
-                    return_value = _identify_resolution_source(
-                        target_val=translation_key,
-                        config=config,
-                        relevant_torrent_info_values=relevant_torrent_info_values,
-                        torrent_info=torrent_info
-                    )
-                    if return_value == "STOP":
-                        return return_value
-                    tracker_settings[config["translation"][translation_key]] = return_value
-        # ------------ required_items end ------------
-
-        # ------------ optional_items start ------------
-        # This mainly applies to BHD since they are the tracker with the most 'Optional' fields,
-        # BLU/ACM only have 'nfo_file' as an optional item which we take care of later
-        for optional_key, optional_value in optional_items.items():
-            if str(optional_key) == str(translation_value):
-                # hybrid_type is managed by hybrid_mapping.
-                if optional_value == "hybrid_type":
-                    break
-
-                logging.debug(f"[Main] Key {translation_key} mapped to optional item {optional_key} with value type as {optional_value}")
-                # -!-!- Editions -!-!- #
-                if optional_key == 'edition' and 'edition' in torrent_info:
-                    # First we remove any 'fluff' so that we can try to match the edition to the list BHD has, if not we just upload it as a custom edition
-                    local_edition_formatted = str(torrent_info["edition"]).lower().replace("edition", "").replace("cut", "").replace("'", "").replace(" ", "")
-                    # Remove extra 's'
-                    if local_edition_formatted.endswith('s'):
-                        local_edition_formatted = local_edition_formatted[:-1]
-                    # Now check to see if what we got out of the filename already exists on BHD
-                    for bhd_edition in optional_value:
-                        if str(bhd_edition).lower() == local_edition_formatted:
-                            # If its a match we save the value to tracker_settings here
-                            tracker_settings[optional_key] = bhd_edition
-                            break
-                        else:
-                            # We use the 'custom_edition' to set our own, again we only do this if we can't match what BHD already has available to select
-                            tracker_settings["custom_edition"] = torrent_info["edition"]
-
-                # -!-!- Region -!-!- # (Disc only)
-                elif optional_key == 'region' and 'region' in torrent_info:
-                    # This will only run if you are uploading a bluray_disc
-                    region = _get_bluray_region(optional_value, torrent_info["region"])
-                    if region is not None:
-                        tracker_settings[optional_key] = region
-
-                # -!-!- Tags -!-!- #
-                elif optional_key == 'tags':  # (Only supported on BHD)
-                    # We only support 2 tags atm, Scene & WEBDL/RIP on bhd
-                    # All we currently support regarding tags, is to assign the 'Scene' tag if we are uploading a scene release
-                    upload_these_tags_list = []
-                    for tag in optional_value:
-
-                        # This will check for the 'Scene' tag
-                        if str(tag).lower() in str(torrent_info.keys()).lower():
-                            upload_these_tags_list.append(str(tag))
-                            # tracker_settings[optional_key] = str(tag)
-
-                        # This will check for webdl/webrip tag
-                        if str(tag) in ["WEBRip", "WEBDL"]:
-                            # Check if we are uploading one of those ^^ 'sources'
-                            if str(tag).lower() == str(torrent_info["source_type"]).lower():
-                                upload_these_tags_list.append(str(tag))
-                    if len(upload_these_tags_list) != 0:
-                        tracker_settings[optional_key] = ",".join(upload_these_tags_list)
-
-                # TODO figure out why .nfo uploads fail on BHD & don't display on BLU...
-                # if optional_key in ["nfo_file", "nfo"] and "nfo_file" in torrent_info:
-                #     # So far
-                #     tracker_settings[optional_key] = torrent_info["nfo_file"]
-
-                elif optional_key == 'sd' and "sd" in torrent_info:
-                    tracker_settings[optional_key] = 1
-
-                # checking whether the optional key is for mediainfo or bdinfo
-                # TODO make changes to save bdinfo to bdinfo and move the existing bdinfo metadata to someother key
-                # for full disks the bdInfo is saved under the same key as mediainfo
-                elif translation_key == "mediainfo":
-                    logging.debug(f"[CategoryMapping] Identified {optional_key} for tracker with {'FullDisk' if args.disc else 'File/Folder'} upload")
-                    if args.disc:
-                        logging.debug("[CategoryMapping] Skipping mediainfo for tracker settings since upload is FullDisk.")
-                    else:
-                        logging.debug(f"[CategoryMapping] Setting mediainfo from torrent_info to tracker_settings for optional_key {optional_key}")
-                        tracker_settings[optional_key] = torrent_info.get("mediainfo", "0")
-                        continue
-                elif translation_key == "bdinfo":
-                    logging.debug(f"[CategoryMapping] Identified {optional_key} for tracker with {'FullDisk' if args.disc else 'File/Folder'} upload")
-                    if args.disc:
-                        logging.debug(f"[CategoryMapping] Setting mediainfo from torrent_info to tracker_settings for optional_key {optional_key}")
-                        tracker_settings[optional_key] = torrent_info.get("mediainfo", "0")
-                        continue
-                    else:
-                        logging.debug("[CategoryMapping] Skipping bdinfo for tracker settings since upload is NOT FullDisk.")
-                else:
-                    tracker_settings[optional_key] = torrent_info.get(translation_key, "")
-        # ------------ optional_items end ------------
+    for rule in get_translation_rules(config):
+        logging.debug(f"[Main] Trying to translate {rule['translation_key']} to {rule['tracker_key']}")
+        for handler in rule["handlers"]:
+            if handler(rule, config, tracker_settings, tracker, torrent_info, args, working_folder, relevant_torrent_info_values) == "STOP":
+                return "STOP"
 
         # ----------- hybrid_mapping_v2 start -----------
         # using in instead of == since multiple hybrid mappings can be configured
         # such as hybrid_type_1, hybrid_type_2, hybrid_type_3 ....
-        if "hybrid_type" in translation_key:
-            should_continue, is_hybrid_translation_needed = _validate_and_do_hybrid_mapping(translation_value, config, tracker_settings, torrent_info, is_hybrid_translation_needed)
+        if rule["is_hybrid_type"]:
+            should_continue, is_hybrid_translation_needed = _validate_and_do_hybrid_mapping(rule["tracker_key"], config, tracker_settings, torrent_info, is_hybrid_translation_needed)
             if should_continue:
-                hybrid_translation_keys.append(translation_value)
+                hybrid_translation_keys.append(rule["tracker_key"])
                 continue
         # ------------ hybrid_mapping_v2 end ------------
 
@@ -537,13 +622,126 @@ def fix_default_naming_styles(torrent_info):
 # ---------------------------------------------------------------------- #
 #                           Format torrent title!                        #
 # ---------------------------------------------------------------------- #
-def format_title(json_config, torrent_info):
+# the extensions removed from the file name, and the audio / video codecs whose dots are restored once the dots of the file name
+# have been replaced with spaces. (H 265 has always been written as H.264 in the titles)
+TITLE_FILE_EXTENSIONS = (".mkv", ".mp4")
+TITLE_CODEC_NORMALISATIONS = (
+    ("DDP2 0", "DDP2.0"), ("DDP5 1", "DDP5.1"), ("H 264", "H.264"), ("H 265", "H.264"), ("DD+7 1", "DD+7.1"), ("AAC2 0", "AAC2.0"),
+    ("DD5 1", "DD5.1"), ("DD2 0", "DD2.0"), ("TrueHD 7 1", "TrueHD 7.1"), ("DTS-HD MA 7 1", "DTS-HD MA 7.1"), ("-C A A", "-C.A.A"),
+)
+
+
+def compile_file_name_title_pattern(codec_normalisations=TITLE_CODEC_NORMALISATIONS):
+    """
+        Compiles the codec normalisations into one regex that normalises all the codecs of a title in a single pass.
+        Returns (pattern, replacements), where `replacements[match.group()]` replaces the match.
+
+        For every codec only the characters up to the last character that changes (eg: `DDP5 ` of `DDP5 1`) are consumed, the
+        rest of the codec is matched with a lookahead, hence codecs next to each other (`-C A AAC2 0`) are all normalised,
+        as when the replacements are made one after another.
+    """
+    alternatives = []
+    replacements = {}
+    for codec, normalised_codec in dict(codec_normalisations).items():
+        if len(codec) != len(normalised_codec):
+            raise ValueError(f"Codec normalisation {codec} => {normalised_codec} must not change the length of the codec")
+        last = max(index for index, (character, normalised_character) in enumerate(zip(codec, normalised_codec)) if character != normalised_character) + 1
+        if replacements.get(codec[:last], normalised_codec[:last]) != normalised_codec[:last]:
+            raise ValueError(f"Codec normalisation {codec} => {normalised_codec} conflicts with another normalisation")
+        alternatives.append(re.escape(codec[:last]) + (f"(?={re.escape(codec[last:])})" if last < len(codec) else ""))
+        replacements[codec[:last]] = normalised_codec[:last]
+    return re.compile("|".join(alternatives)), replacements
+
+
+def _overlaps(first, second):
+    """ Whether a part of `second` can be found at the start or the end of `first` (or the other way around) """
+    return any(first.endswith(second[:length]) or second.endswith(first[:length]) for length in range(1, min(len(first), len(second))))
+
+
+def compile_title_translations(title_translations):
+    """
+        Compiles the `torrent_title_translation` of a site template into a regex that applies all the translations in a single pass.
+        Returns (pattern, replacements) as `compile_file_name_title_pattern` does, or None when the translations depend on each other
+        (eg: a translation creates text that is translated later, or removes text and joins the text around it) and hence need to be
+        applied one after another.
+    """
+    translations = list(title_translations.items())
+    for index, (key, value) in enumerate(translations):
+        if len(key) == 0:
+            return None
+        for later_key, _ in translations[index + 1:]:
+            if key in later_key or _overlaps(key, later_key):
+                return None
+            if len(value) == 0 and len(later_key) > 1:
+                return None
+            if len(value) > 0 and (value in later_key or later_key in value or _overlaps(value, later_key)):
+                return None
+    if len(translations) == 0:
+        return None
+    return re.compile("|".join(re.escape(key) for key, _ in translations)), dict(translations)
+
+
+def compile_title_rules(config):
+    """
+        Compiles the title formatting of the site template.
+            `formats` => the keys of `torrent_title_format` for every type and profile, in order
+            `separator` => the `title_separator` of the template
+            `translations` => the compiled `torrent_title_translation` (see `compile_title_translations`)
+            `sequential_translations` => the translations when they cannot be compiled
+            `has_translations` => whether the template has a `torrent_title_translation`
+    """
+    formats = {}
+    for content_type, profiles in config["torrent_title_format"].items():
+        for profile, title_format in profiles.items():
+            # the same key used twice is added to the title only once
+            formats[(content_type, profile)] = tuple(dict.fromkeys(title_format.replace("{", "").replace("}", "").split(" ")))
+    title_translations = config.get("torrent_title_translation", None)
+    translations = compile_title_translations(title_translations) if title_translations is not None else None
+    return {
+        "formats": formats,
+        "separator": config["title_separator"] or " ",
+        "translations": translations,
+        "sequential_translations": tuple(title_translations.items()) if title_translations is not None and translations is None else None,
+        "has_translations": title_translations is not None,
+    }
+
+
+def get_title_rules(config):
+    """
+        Returns the compiled title formatting of the site template.
+        The title formatting of templates from the SiteTemplateRegistry is compiled only once and reused for every upload
+    """
+    rules = getattr(config, "title_rules", None)
+    if rules is None:
+        rules = compile_title_rules(config)
+        if hasattr(config, "title_rules"):
+            config.title_rules = rules
+    return rules
+
+
+def _apply_compiled_replacements(compiled, text):
+    pattern, replacements = compiled
+    return pattern.sub(lambda match: replacements[match.group()], text)
+
+
+_file_name_title_pattern = compile_file_name_title_pattern()
+
+
+def format_title_from_file_name(raw_file_name):
+    """ The title is the file name without the extension, with spaces instead of dots and normalised codecs """
+    file_name = str(raw_file_name)
+    # removing an extension can join the text around it, hence the extensions are removed before anything else
+    for extension in TITLE_FILE_EXTENSIONS:
+        file_name = file_name.replace(extension, "")
+    return " ".join(_apply_compiled_replacements(_file_name_title_pattern, file_name.replace(".", " ")).split())
+
+
+def format_title_from_template(json_config, torrent_info):
     # ------------------ Load correct "naming config" ------------------ #
-    # Here we open the uploads corresponding .json file and using the current uploads "source" we pull in a custom naming config
+    # Here we use the current uploads "source" to pick the custom naming config from the site template
     # this "naming config" can individually tweaked for each site & "content_type" (bluray_encode, web, etc)
+    rules = get_title_rules(json_config)
 
-    temp_title = str(torrent_info["raw_file_name"]).replace('.mkv','').replace('.mp4','').replace(".", " ").replace("DDP2 0","DDP2.0").replace("DDP5 1","DDP5.1").replace("H 264","H.264").replace("H 265","H.264").replace("DD+7 1","DD+7.1").replace("AAC2 0","AAC2.0").replace("DDP2 0","DDP2.0").replace("DDP5 1","DDP5.1").replace("H 264","H.264").replace("H 265","H.264").replace("DD+7 1","DD+7.1").replace("AAC2 0","AAC2.0").replace('DD5 1','DD5.1').replace('DD2 0','DD2.0').replace('TrueHD 7 1','TrueHD 7.1').replace('DTS-HD MA 7 1','DTS-HD MA 7.1').replace('-C A A','-C.A.A')
-    return " ".join(temp_title.split())
     # Because 'webrips' & 'webdls' have basically the same exact naming style we convert the 'source_type' to just 'web' (we do something similar to DVDs as well)
     if str(torrent_info["source"]).lower() == "dvd":
         config_profile = "dvd"
@@ -552,36 +750,38 @@ def format_title(json_config, torrent_info):
     else:
         config_profile = torrent_info["source_type"]
 
-    tracker_torrent_name_style = json_config['torrent_title_format'][torrent_info["type"]][str(config_profile)]
-
     # ------------------ Actual format the title now ------------------ #
-    # This dict will store the "torrent_info" response for each item in the "naming config"
-    generate_format_string = {}
-    separator = json_config["title_separator"] or " "
-
-    temp_load_torrent_info = tracker_torrent_name_style.replace("{", "").replace("}", "").split(" ")
-    for item in temp_load_torrent_info:
-        # Here is were we actual get the torrent_info response and add it to the "generate_format_string" dict we declared earlier
-        generate_format_string[item] = torrent_info[item].replace(" ", separator) if item in torrent_info and torrent_info[item] is not None else ""
-
-    formatted_title = ""  # This is the final torrent title, we add any info we get from "torrent_info" to it using the "for loop" below
-    for key, value in generate_format_string.items():
+    separator = rules["separator"]
+    formatted_title = []  # This is the final torrent title, we add any info we get from "torrent_info" to it using the "for loop" below
+    for key in rules["formats"][(torrent_info["type"], str(config_profile))]:
+        value = torrent_info[key].replace(" ", separator) if key in torrent_info and torrent_info[key] is not None else ""
         # ignore no matches (e.g. most TV Shows don't have the "year" added to its title so unless it was directly specified in the filename we also ignore it)
         if len(value) != 0:
-            formatted_title = f'{formatted_title}{"-" if key == "release_group" else separator}{value}'
+            formatted_title.append(f'{"-" if key == "release_group" else separator}{value}')
+    formatted_title = "".join(formatted_title)
 
     # Custom title translations specific to tracker
     # Certain terms might not be allowed in certain trackers. Such terms are configured in a separate config in the tracker template.
     # Eg: DD+ might not be allowed in certain trackers. Instead they'll use DDP
-    # These translations are then applied here.
-    if "torrent_title_translation" in json_config:
-        torrent_title_translation = json_config["torrent_title_translation"]
+    if rules["has_translations"]:
         logging.info(f"Going to apply title translations to generated title: {formatted_title}")
-        for key, val in torrent_title_translation.items():
-            formatted_title = formatted_title.replace(key, val)
+        if rules["translations"] is not None:
+            formatted_title = _apply_compiled_replacements(rules["translations"], formatted_title)
+        else:
+            for key, val in rules["sequential_translations"]:
+                formatted_title = formatted_title.replace(key, val)
 
     logging.info(f"Torrent title after formatting and translations: {formatted_title}")
-    # Finally save the "formatted_title" into torrent_info which later will get passed to the dict "tracker_settings"
-    # which is used to store the payload for the actual POST upload request
     return str(formatted_title[1:])
+
+
+def format_title(json_config, torrent_info):
+    """
+        Returns the torrent title for the tracker.
+        By default the title is generated from the file name. When `title_from_template` is enabled it is generated
+        from the `torrent_title_format` of the site template instead.
+    """
+    if str(os.getenv("title_from_template", "false")).lower() == "true":
+        return format_title_from_template(json_config, torrent_info)
+    return format_title_from_file_name(torrent_info["raw_file_name"])
 # -------------- END of format_title --------------
\ No newline at end of file